@@ -17,25 +17,59 @@ For the program to work, the playlist URL pattern must follow the format of
 
 from __future__ import annotations
 
-__version__ = "2.2.1"
+import sys
+
+# Headless CLI dispatch, before any heavy import: a known first arg routes to
+# sunnify_cli, which loads PyQt6/yt-dlp/mutagen only when a download actually
+# starts (status/config/info never pay for them). Anything else - including a
+# bare double-click - is the GUI, byte-identical to before. No module alias:
+# this __main__ copy never runs past here for a command, and the engine is
+# imported fresh as `Spotify_Downloader` when a download needs it.
+if __name__ == "__main__":
+    import multiprocessing
+
+    # a frozen build's `sunnify verify` pool re-launches this executable per
+    # worker; freeze_support() turns those launches into pool workers
+    multiprocessing.freeze_support()
+    _cli_commands = (
+        "download",
+        "info",
+        "status",
+        "verify",
+        "repair",
+        "queue",
+        "work",
+        "config",
+        "doctor",
+        "serve",
+        "help",
+    )
+    _arg1 = sys.argv[1] if len(sys.argv) > 1 else ""
+    if _arg1 in _cli_commands or _arg1 in ("--version", "-V", "--help", "-h"):
+        import sunnify_cli
+
+        sys.exit(sunnify_cli.main(sys.argv[1:]))
+    if _arg1.isascii() and _arg1.isalpha():
+        # a bare word is a command attempt, not launcher argv (macOS -psn_*,
+        # file paths all carry non-letters); don't swallow it into a GUI launch
+        import difflib
+
+        close = difflib.get_close_matches(_arg1.lower(), _cli_commands, n=1)
+        hint = f" (did you mean '{close[0]}'?)" if close else ""
+        print(
+            f"sunnify: unknown command '{_arg1}'{hint}\nrun 'sunnify --help' for usage",
+            file=sys.stderr,
+        )
+        sys.exit(2)
 
-import atexit
-import concurrent.futures
 import contextlib
-import faulthandler
 import logging
 import os
-import platform
-import re
 import signal
-import sys
 import threading
 import webbrowser
-from logging.handlers import RotatingFileHandler
 
 import requests
-from mutagen.easyid3 import EasyID3
-from mutagen.id3 import APIC, ID3
 from PyQt6.QtCore import (
     QEasingCurve,
     QPropertyAnimation,
@@ -61,414 +95,39 @@ from PyQt6.QtWidgets import (
     QPushButton,
     QVBoxLayout,
 )
-from yt_dlp import YoutubeDL
 
+import sunnify_http
 from spotifydown_api import (
-    ExtractionError,
-    NetworkError,
-    PlaylistClient,
-    PlaylistInfo,
-    RateLimitError,
-    SpotifyDownAPIError,
-    cap_filename,
     detect_spotify_url_type,
-    extract_playlist_id,
-    sanitize_filename,
 )
-from Template import Ui_MainWindow
-
-# Module logger. Stays a no-op (no handlers) until _setup_logging() runs at
-# startup, so importing this module in tests stays silent and writes nothing.
-log = logging.getLogger("sunnify")
-
 
-def _log_excepthook(exc_type, exc, tb):
-    """Route uncaught main-thread exceptions to the log before the default handler."""
-    # ctrl+c and an intentional sys.exit() are clean exits, not crashes
-    if not issubclass(exc_type, (KeyboardInterrupt, SystemExit)):
-        with contextlib.suppress(Exception):
-            log.critical("uncaught exception", exc_info=(exc_type, exc, tb))
-    if sys.stderr is not None:  # windowed builds have no stderr to write to
-        sys.__excepthook__(exc_type, exc, tb)
-
-
-def _thread_excepthook(args):
-    """Same, for python threads; qt threads log inside their own run()."""
-    if issubclass(args.exc_type, SystemExit):
-        return
-    with contextlib.suppress(Exception):
-        log.critical(
-            "uncaught exception in thread %s",
-            args.thread.name if args.thread else "?",
-            exc_info=(args.exc_type, args.exc_value, args.exc_traceback),
-        )
-
-
-def _install_crash_handlers() -> None:
-    """Make every abnormal exit land in the log; logging is our only diagnostic."""
-    sys.excepthook = _log_excepthook
-    threading.excepthook = _thread_excepthook
-    # faulthandler catches native crashes (qt/ffmpeg segfaults) excepthook can't;
-    # crash.log sits next to sunnify.log and stays open for the process lifetime.
-    with contextlib.suppress(Exception):
-        crash_path = os.path.join(os.path.dirname(log_file_path()), "crash.log")
-        faulthandler.enable(open(crash_path, "a"))  # noqa: SIM115
-    atexit.register(lambda: log.info("==== sunnify session end ===="))
-
-
-class _YtdlpLog:
-    """Bridge yt-dlp's own output into our log and remember the last error.
-
-    With ignoreerrors=True a failed download won't raise, so capturing error()
-    here is the only way to record *why* no audio file landed (bot-block vs
-    unavailable vs format vs nsig). Routine yt-dlp chatter goes to our DEBUG so
-    the default INFO log stays lean.
-    """
-
-    def __init__(self):
-        self.last_error = None
-
-    def debug(self, msg):
-        log.debug("yt-dlp: %s", msg)
-
-    info = debug
-
-    def warning(self, msg):
-        log.debug("yt-dlp warning: %s", msg)
-
-    def error(self, msg):
-        self.last_error = msg
-        log.debug("yt-dlp error: %s", msg)
-
-
-def get_ffmpeg_path():
-    """Get path to FFmpeg - checks bundled first, then system paths."""
-    # Check bundled FFmpeg first (for PyInstaller builds)
-    if getattr(sys, "frozen", False):
-        base_path = sys._MEIPASS
-        if sys.platform == "win32":
-            ffmpeg = os.path.join(base_path, "ffmpeg", "ffmpeg.exe")
-        else:
-            ffmpeg = os.path.join(base_path, "ffmpeg", "ffmpeg")
-        if os.path.exists(ffmpeg):
-            return os.path.join(base_path, "ffmpeg")
-
-    # Check common system paths (for homebrew/system installs)
-    ffmpeg_name = "ffmpeg.exe" if sys.platform == "win32" else "ffmpeg"
-    common_paths = [
-        "/opt/homebrew/bin",  # macOS ARM homebrew
-        "/usr/local/bin",  # macOS Intel homebrew / Linux
-        "/usr/bin",  # Linux system
-    ]
-
-    for path in common_paths:
-        ffmpeg = os.path.join(path, ffmpeg_name)
-        if os.path.exists(ffmpeg):
-            return path
-
-    # Check if ffmpeg is in PATH
-    import shutil
-
-    ffmpeg_in_path = shutil.which("ffmpeg")
-    if ffmpeg_in_path:
-        return os.path.dirname(ffmpeg_in_path)
-
-    return None
-
-
-# Supported output formats. "lossy" means quality/bitrate applies; "lossless"
-# means the ffmpeg postprocessor ignores preferredquality.
-SUPPORTED_FORMATS = {
-    "mp3": {"ext": "mp3", "lossy": True},
-    "m4a": {"ext": "m4a", "lossy": True},
-    "opus": {"ext": "opus", "lossy": True},
-    "flac": {"ext": "flac", "lossy": False},
-    "wav": {"ext": "wav", "lossy": False},
-}
-SUPPORTED_QUALITIES = ("128", "192", "256", "320")
-# "auto" keeps whatever rate the source stream has (YouTube audio is 48 kHz).
-SUPPORTED_SAMPLE_RATES = ("auto", "44100", "48000")
-
-
-class _Setting:
-    """One user setting: config key, validation, scraper wiring, CLI surface."""
-
-    __slots__ = ("key", "default", "kind", "choices", "scraper_kwarg", "cli_flag", "help")
-
-    def __init__(self, key, default, kind, choices=(), scraper_kwarg=None, cli_flag=None, help=""):
-        self.key = key
-        self.default = default
-        self.kind = kind  # "choice" | "bool" | "path"
-        self.choices = choices
-        self.scraper_kwarg = scraper_kwarg
-        self.cli_flag = cli_flag
-        self.help = help
-
-    def coerce(self, value):
-        """Validated value or the default - never raises on user data."""
-        if self.kind == "bool":
-            return value if isinstance(value, bool) else self.default
-        if self.kind == "choice":
-            return value if value in self.choices else self.default
-        return value if isinstance(value, str) or value is None else self.default
-
-
-# Single source of truth for user settings. Config load/validation, scraper
-# construction, and every CLI flag derive from this - a new setting added
-# here reaches the CLI with zero CLI changes (the dialog row stays bespoke).
-SETTINGS = (
-    _Setting("download_path", None, "path", help="where downloads land"),
-    _Setting(
-        "format",
-        "mp3",
-        "choice",
-        tuple(SUPPORTED_FORMATS),
-        scraper_kwarg="audio_format",
-        cli_flag="--format",
-        help="audio format",
-    ),
-    _Setting(
-        "quality",
-        "192",
-        "choice",
-        SUPPORTED_QUALITIES,
-        scraper_kwarg="audio_quality",
-        cli_flag="--quality",
-        help="bitrate in kbps, lossy formats only",
-    ),
-    _Setting(
-        "sample_rate",
-        "auto",
-        "choice",
-        SUPPORTED_SAMPLE_RATES,
-        scraper_kwarg="sample_rate",
-        cli_flag="--sample-rate",
-        help="output sample rate, applies to mp3/flac/wav",
-    ),
-    _Setting(
-        "include_track_number",
-        False,
-        "bool",
-        scraper_kwarg="include_track_number",
-        cli_flag="--track-numbers",
-        help="prefix filenames with playlist position",
-    ),
-    _Setting(
-        "artist_first",
-        False,
-        "bool",
-        scraper_kwarg="artist_first",
-        cli_flag="--artist-first",
-        help='name files "Artist - Song" instead of "Song - Artist"',
-    ),
-    _Setting(
-        "loose_match",
-        False,
-        "bool",
-        scraper_kwarg="loose_match",
-        cli_flag="--loose-match",
-        help="fall back to the closest result when strict matching finds nothing",
-    ),
+# Qt-free core (settings, config, logging, ffmpeg lookup, update check) lives
+# in sunnify_core so the CLI can start without this module; re-exported here
+# so the GUI and every existing import keep working.
+from sunnify_core import (
+    _RELEASES_PAGE,  # noqa: F401
+    GITHUB_REPO,
+    MANIFEST_FILENAME,  # noqa: F401
+    SETTINGS,
+    SUPPORTED_FORMATS,
+    SUPPORTED_QUALITIES,
+    SUPPORTED_SAMPLE_RATES,
+    __version__,
+    _check_for_update,
+    _is_newer_version,  # noqa: F401
+    _log_dir,
+    _log_excepthook,  # noqa: F401
+    _parse_version,  # noqa: F401
+    _thread_excepthook,  # noqa: F401
+    load_config,
+    log,
+    log_file_path,
+    save_config,
+    scraper_kwargs_from,
+    setup_logging,
 )
-
-
-def scraper_kwargs_from(settings: dict) -> dict:
-    """Registry-derived MusicScraper kwargs from a config/settings dict."""
-    return {s.scraper_kwarg: settings.get(s.key, s.default) for s in SETTINGS if s.scraper_kwarg}
-
-
-# Resume manifest: JSON-lines file per playlist folder recording landed tracks,
-# so a rate-limited playlist finishes across sessions instead of restarting (#40).
-MANIFEST_FILENAME = ".sunnify-manifest.jsonl"
-
-
-def _config_dir() -> str:
-    """Return the per-user config directory, creating it if needed."""
-    import json as _json  # noqa: F401 (used by load/save)
-
-    if sys.platform == "win32":
-        base = os.environ.get("APPDATA", os.path.expanduser("~"))
-    elif sys.platform == "darwin":
-        base = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
-    else:
-        base = os.environ.get("XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config"))
-    path = os.path.join(base, "Sunnify")
-    os.makedirs(path, exist_ok=True)
-    return path
-
-
-def _log_dir() -> str:
-    """Return the per-user log directory path (does not create it).
-
-    Pure path computation, no filesystem side effects, so callers that only
-    need the string (e.g. a settings tooltip) don't create stray folders;
-    setup_logging() and _open_logs() create the dir when they actually use it.
-
-    Uses each platform's conventional spot for app logs (not config), so the
-    files are where a user (or a support request) would expect them:
-      windows -> %LOCALAPPDATA%\\Sunnify\\logs
-      macOS   -> ~/Library/Logs/Sunnify
-      linux   -> $XDG_STATE_HOME/sunnify/logs (defaults to ~/.local/state)
-    """
-    if sys.platform == "win32":
-        base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA", os.path.expanduser("~"))
-        path = os.path.join(base, "Sunnify", "logs")
-    elif sys.platform == "darwin":
-        path = os.path.join(os.path.expanduser("~"), "Library", "Logs", "Sunnify")
-    else:
-        base = os.environ.get(
-            "XDG_STATE_HOME", os.path.join(os.path.expanduser("~"), ".local", "state")
-        )
-        path = os.path.join(base, "sunnify", "logs")
-    return path
-
-
-def log_file_path() -> str:
-    """Absolute path of the current log file (used by the 'open logs' action)."""
-    return os.path.join(_log_dir(), "sunnify.log")
-
-
-def setup_logging() -> str:
-    """Configure file logging once; return the log file path.
-
-    Rotating handler caps disk use at ~6MB total (1MB x 5 backups) so logs are
-    diagnostic, never bloat. Idempotent: safe to call more than once. The line
-    format is deliberately dense (timestamp, level, function:line) so a single
-    log pasted into an issue is enough to pinpoint where a download went wrong.
-    A session header records the environment every launch.
-    """
-    if any(getattr(h, "_sunnify", False) for h in log.handlers):
-        return log_file_path()
-
-    path = log_file_path()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    handler = RotatingFileHandler(
-        path, maxBytes=1_000_000, backupCount=5, encoding="utf-8", delay=True
-    )
-    handler._sunnify = True  # tag so we don't double-attach on re-call
-    handler.setFormatter(
-        logging.Formatter(
-            "%(asctime)s %(levelname)-7s [%(funcName)s:%(lineno)d] %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-    )
-    # default INFO stays lean (scales with failures, not track count); set
-    # SUNNIFY_DEBUG=1 to get the full per-track + yt-dlp trail for hard cases.
-    level = logging.DEBUG if os.environ.get("SUNNIFY_DEBUG") else logging.INFO
-    log.setLevel(level)
-    log.addHandler(handler)
-    log.propagate = False
-
-    try:
-        ytdlp_ver = __import__("yt_dlp").version.__version__
-    except Exception:
-        ytdlp_ver = "?"
-    log.info("==== sunnify session start ====")
-    log.info(
-        "version=%s platform=%s python=%s yt-dlp=%s",
-        __version__,
-        f"{sys.platform}-{platform.machine()}",
-        platform.python_version(),
-        ytdlp_ver,
-    )
-    log.info("ffmpeg=%s", get_ffmpeg_path() or "(not found)")
-    log.info("logs=%s level=%s", path, logging.getLevelName(level))
-    _install_crash_handlers()
-    return path
-
-
-def _config_path() -> str:
-    return os.path.join(_config_dir(), "config.json")
-
-
-def load_config() -> dict:
-    """Load persisted user config. Missing or corrupt file returns defaults.
-
-    Every user setting is validated through the SETTINGS registry;
-    star_prompt_shown is internal state, not a setting."""
-    import json
-
-    defaults = {s.key: s.default for s in SETTINGS}
-    defaults["version"] = 1
-    defaults["star_prompt_shown"] = False
-    try:
-        with open(_config_path(), encoding="utf-8") as f:
-            data = json.load(f)
-        if not isinstance(data, dict):
-            return defaults
-        for s in SETTINGS:
-            if s.key in data:
-                defaults[s.key] = s.coerce(data[s.key])
-        if isinstance(data.get("star_prompt_shown"), bool):
-            defaults["star_prompt_shown"] = data["star_prompt_shown"]
-        return defaults
-    except (OSError, json.JSONDecodeError):
-        return defaults
-
-
-def save_config(config: dict) -> None:
-    """Persist user config to disk. Best-effort, swallows IO errors."""
-    import json
-
-    try:
-        with open(_config_path(), "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
-    except OSError as exc:
-        log.warning("could not save config: %s", exc)
-
-
-GITHUB_REPO = "sunnypatell/sunnify-spotify-downloader"
-_LATEST_RELEASE_API = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
-_RELEASES_PAGE = f"https://github.com/{GITHUB_REPO}/releases/latest"
-
-
-def _parse_version(s: str) -> tuple:
-    """'v2.0.13' / '2.0.13' / '2.0.13-beta' -> (2, 0, 13). Stops at the first non-int part."""
-    parts = []
-    for chunk in (s or "").strip().lstrip("vV").split("."):
-        num = ""
-        for ch in chunk:
-            if ch.isdigit():
-                num += ch
-            else:
-                break
-        if not num:
-            break
-        parts.append(int(num))
-    return tuple(parts)
-
-
-def _is_newer_version(latest: str, current: str) -> bool:
-    """True if latest is a strictly newer release than current (numeric, not lexical)."""
-    lv, cv = _parse_version(latest), _parse_version(current)
-    return bool(lv) and lv > cv
-
-
-def _check_for_update(current: str, timeout: int = 5):
-    """Return (latest_version, release_url) if a newer release exists, else None.
-
-    Fail-silent (returns None) on any network/parse error so launch is never
-    blocked or crashed by the check.
-    """
-    try:
-        r = requests.get(
-            _LATEST_RELEASE_API,
-            timeout=timeout,
-            headers={"Accept": "application/vnd.github+json"},
-        )
-        if r.status_code != 200:
-            log.debug("update check: github api returned %s", r.status_code)
-            return None
-        data = r.json()
-        tag = data.get("tag_name") or ""
-        url = data.get("html_url") or _RELEASES_PAGE
-        if _is_newer_version(tag, current):
-            return (tag.lstrip("vV"), url)
-        log.debug("update check: on latest (%s, newest %s)", current, tag or "?")
-        return None
-    except Exception as exc:  # network/parse must never disrupt launch
-        log.debug("update check skipped: %s", exc)
-        return None
+from sunnify_engine import DownloadEngine, write_tags
+from Template import Ui_MainWindow
 
 
 class UpdateCheckThread(QThread):
@@ -486,7 +145,10 @@ class UpdateCheckThread(QThread):
             self.update_available.emit(result[0], result[1])
 
 
-class MusicScraper(QThread):
+class MusicScraper(QThread, DownloadEngine):
+    """Qt adapter over the headless DownloadEngine: every engine event is
+    re-emitted as the signal the GUI's widgets are connected to."""
+
     PlaylistCompleted = pyqtSignal(str)
     PlaylistID = pyqtSignal(str)
     song_Album = pyqtSignal(str)
@@ -496,976 +158,34 @@ class MusicScraper(QThread):
     dlprogress_signal = pyqtSignal(int)
     Resetprogress_signal = pyqtSignal(int)
     resume_skipped = pyqtSignal(int)  # manifest-resumed tracks never reach song_meta
+    source_progress = pyqtSignal(dict)  # scrape_many: per-link started/done records
     error_signal = pyqtSignal(str)  # Signal for error messages to UI
 
-    # Max concurrent track downloads. 4 is the measured sweet spot:
-    # linear speedup through 4, diminishing returns past 6 (CPU-bound ffmpeg).
-    MAX_WORKERS = 4
-
-    def __init__(
-        self,
-        cancel_event: threading.Event | None = None,
-        *,
-        audio_format: str = "mp3",
-        audio_quality: str = "192",
-        include_track_number: bool = False,
-        artist_first: bool = False,
-        sample_rate: str = "auto",
-        loose_match: bool = False,
-    ):
-        super().__init__()
-        self.counter = 0  # Initialize counter to zero
-        self.session = requests.Session()
-        self.spotifydown_api = None
-        self._cancel_event = cancel_event or threading.Event()
-        self._failed_tracks: list[str] = []  # Track failed downloads
-        # Output options. audio_format must be a key of SUPPORTED_FORMATS;
-        # audio_quality only applies to lossy formats (mp3/m4a/opus).
-        self.audio_format = audio_format if audio_format in SUPPORTED_FORMATS else "mp3"
-        self.audio_quality = audio_quality if audio_quality in SUPPORTED_QUALITIES else "192"
-        self.include_track_number = bool(include_track_number)
-        self.artist_first = bool(artist_first)
-        self.sample_rate = sample_rate if sample_rate in SUPPORTED_SAMPLE_RATES else "auto"
-        # opt-in: when strict title/artist matching fails, fall back to the
-        # duration-closest youtube result (recovers cross-script matches);
-        # off by default so the wrong-audio safeguard (#52) stays the default.
-        self.loose_match = bool(loose_match)
-        self._counter_lock = threading.Lock()
-        self._failed_lock = threading.Lock()
-        self._filename_lock = threading.Lock()
-        self._manifest_lock = threading.Lock()
-        self._manifest_path: str | None = None
-        self._in_flight_files: set[str] = set()
-        # Set to True during parallel playlist downloads so workers can suppress
-        # per-track UI noise (label flicker, thumbnail spam, progress bar jitter)
-        # that only makes sense for a single active download.
-        self._parallel_mode = False
-        self._total_tracks = 0
-
-    def is_cancelled(self) -> bool:
-        """Check if cancellation has been requested."""
-        return self._cancel_event.is_set()
-
-    def _get_user_friendly_error(self, error: Exception, track_title: str = "") -> str:
-        """Convert exception to user-friendly error message."""
-        if isinstance(error, RateLimitError):
-            return "Rate limited by Spotify - waiting..."
-        if isinstance(error, NetworkError):
-            return "Network error - retrying..."
-        if isinstance(error, ExtractionError):
-            return f"Could not access '{track_title}' - may be unavailable"
-        if "HTTP Error 429" in str(error):
-            return "YouTube rate limit - waiting..."
-        error_text = str(error).lower()
-        if (
-            "no video formats" in error_text
-            or "no playable audio source" in error_text
-            or "unavailable" in error_text
-        ):
-            return f"'{track_title}' not found on YouTube"
-        return f"Error: {str(error)[:50]}"
-
-    def ensure_spotifydown_api(self):
-        if self.spotifydown_api is None:
-            self.spotifydown_api = PlaylistClient(session=self.session)
-        return self.spotifydown_api
-
-    def sanitize_text(self, text):
-        """Sanitize text for filename usage."""
-        return sanitize_filename(text, allow_spaces=True)
-
-    def _name_parts(self, sanitized_title, sanitized_artists):
-        """Filename component order per the artist_first setting (#77). Both
-        parts are already sanitized, so the swap can't change path safety."""
-        if self.artist_first:
-            return sanitized_artists, sanitized_title
-        return sanitized_title, sanitized_artists
-
-    def format_playlist_name(self, metadata: PlaylistInfo):
-        owner = metadata.owner or "Spotify"
-        return f"{metadata.name} - {owner}".strip(" -")
-
-    def prepare_playlist_folder(self, base_folder, playlist_name):
-        os.makedirs(base_folder, exist_ok=True)
-        # Same cross-platform sanitizer as track files (windows reserved
-        # chars/device names, posix rules - see sanitize_filename's doc refs).
-        safe_name = sanitize_filename(playlist_name)
-        if not safe_name or safe_name == "Unknown":
-            safe_name = "Sunnify Playlist"
-        playlist_folder = os.path.join(base_folder, safe_name)
-        # If the ascii-allowlist-era folder name ("Name  Owner") exists, keep
-        # using it so re-runs resume there instead of orphaning the manifest (#40).
-        legacy_name = "".join(
-            ch for ch in playlist_name if ch.isalnum() or ch in (" ", "_")
-        ).strip()
-        legacy_folder = os.path.join(base_folder, legacy_name)
-        if legacy_name and legacy_name != safe_name and os.path.isdir(legacy_folder):
-            playlist_folder = legacy_folder
-        try:
-            os.makedirs(playlist_folder, exist_ok=True)
-        except OSError:
-            log.error("could not create playlist folder %r", playlist_folder, exc_info=True)
-            raise
-        return playlist_folder
-
-    @staticmethod
-    def _widen_search(search_query: str) -> str:
-        """Search several YouTube results instead of only the top hit.
-
-        A track's #1 result can be region-locked or removed; `ytsearch1`
-        fails the whole download in that case (closes #42). Widening to
-        `ytsearch5` lets yt-dlp skip unavailable results and download the
-        first one that actually plays.
-        """
-        if search_query.startswith("ytsearch1:"):
-            return "ytsearch5:" + search_query[len("ytsearch1:") :]
-        return search_query
-
-    @staticmethod
-    def _simplify_search(search_query: str) -> str:
-        """Strip parenthetical/bracketed qualifiers for a looser fallback.
-
-        Hyper-specific titles (classical works like `(Wiegenlied, Op. 49,
-        No. 4)`, tone tracks like `(528 Hz)`) can return zero YouTube
-        matches. Dropping the qualifiers widens the net on a second attempt.
-        Returns the original query unchanged if there is nothing to strip.
-        """
-        _, sep, terms = search_query.partition(":")
-        if not sep:
-            terms = search_query
-        stripped = re.sub(r"[\(\[\{].*?[\)\]\}]", " ", terms)
-        stripped = re.sub(r"\s+", " ", stripped).strip()
-        if not stripped or stripped == terms.strip():
-            return search_query
-        return f"ytsearch5:{stripped}"
-
-    # Max spotify-vs-youtube length gap to count as the same recording; the
-    # top hit is often the music video or an extended cut.
-    _DURATION_TOLERANCE_S = 7
-
-    # Wider bound for the title+duration combined check: right title but >30s
-    # off means remix/live/extended - fail loudly rather than ship it.
-    _DURATION_TOLERANCE_S_WIDE = 30
-
-    @staticmethod
-    def _normalize_title(s: str | None) -> str:
-        """Lowercase, strip diacritics, drop bracketed segments + `feat./ft.`
-        tails, collapse to word characters + spaces (any script). Used on
-        BOTH sides of title comparison.
-
-        Critically: this does NOT split on ` - ` because YouTube titles
-        commonly use the `Artist - Song` convention; splitting would turn
-        "The Weeknd - Blinding Lights" into just "The Weeknd" and lose the
-        song name. Spotify-side variant stripping (`Title - Remastered`)
-        is handled separately in `_spotify_title_core`.
-        """
-        if not s:
-            return ""
-        import unicodedata
-
-        # NFKD + drop combining marks: "Café" -> "Cafe"
-        s = "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
-        s = s.lower()
-        s = re.sub(r"\([^)]*\)", " ", s)  # "Hello (Remix)" -> "Hello "
-        s = re.sub(r"\[[^\]]*\]", " ", s)  # "Hello [Edit]" -> "Hello "
-        s = re.sub(r"\b(feat\.?|ft\.?)\s+.*$", "", s, flags=re.IGNORECASE)
-        # Strip apostrophes BEFORE the general punctuation->space step so
-        # "I'm" becomes "im" not "i m".
-        s = s.replace("'", "").replace("’", "")
-        # Keep letters/digits/marks from ANY script (#77). Category M is
-        # load-bearing: indic/thai vowel signs are combining-class-0 marks,
-        # and dropping them collapses distinct words ("दिल"/"दाल").
-        s = "".join(
-            ch if (ch.isspace() or unicodedata.category(ch)[0] in "LNM") else " " for ch in s
-        )
-        s = re.sub(r"\s+", " ", s).strip()
-        return s
-
-    @staticmethod
-    def _spotify_title_core(s: str | None) -> str:
-        """Drop the ` - Variant` suffix Spotify adds to differentiate releases.
-
-        Examples:
-            "Bohemian Rhapsody - Remastered 2011" -> "Bohemian Rhapsody"
-            "Hello - Live"                        -> "Hello"
-            "Sweet Disposition - Remix Edit"      -> "Sweet Disposition"
-            "Take-Off"                            -> "Take-Off" (literal hyphen, no spaces)
-            "Mi Gente"                            -> "Mi Gente"
-
-        Only applied to the Spotify-side title before fuzzy comparison so
-        a YouTube upload titled just "Bohemian Rhapsody" still matches.
-        Don't apply this to YouTube titles - they use ` - ` for
-        `Artist - Song` and the strip would lose the song name.
-        """
-        if not s:
-            return ""
-        return s.split(" - ", 1)[0]
-
-    @classmethod
-    def _title_plausibly_matches(cls, yt_title: str | None, expected_title: str | None) -> bool:
-        """True when the YouTube candidate's title could reasonably be the
-        Spotify track. The Spotify side gets its variant suffix dropped
-        first so "Hello - Live" matches a plain "Hello" upload; the YouTube
-        side is normalized as-is (its ` - ` is usually `Artist - Song`).
-        Substring match for titles >= 4 chars, word-boundary match for
-        shorter ones (so a single-letter song name like "i" doesn't match
-        every YouTube video)."""
-        yt = cls._normalize_title(yt_title)
-        target = cls._normalize_title(cls._spotify_title_core(expected_title))
-        if not target or not yt:
-            return False
-        if len(target) >= 4:
-            return target in yt
-        return target in yt.split()
-
-    def _select_youtube_match(
-        self, search_query, expected_duration_s, expected_title=None, expected_artists=None
-    ):
-        """Return the best YouTube watch URL for a search, or None.
-
-        Selection policy (closes #52):
-          1. Filter to candidates whose title plausibly matches the Spotify
-             track title (substring / word match on a normalized form).
-             Rules out the failure mode where YouTube's top hit is a
-             DIFFERENT track by the SAME artist with a similar duration -
-             e.g. searching "Mi Gente DJ Goja audio" returns "Dj Goja -
-             Mi Chico" at the top, only ~2s off the real Mi Gente, and the
-             prior pure-duration matcher would happily pick it and write
-             Mi Gente metadata onto Mi Chico audio.
-          2. Prefer the subset that ALSO has an artist plausibly appearing
-             in the YouTube title. Falls back to the title-only pool if no
-             candidate matches both - artist isn't always in the YouTube
-             title for legitimate uploads.
-          3. Among the resulting pool, pick the duration-closest if duration
-             is known, but reject the whole result if even the best
-             candidate's duration is >30s off the Spotify track - that means
-             the closest title-matching upload is a remix / live cover /
-             extended edit, and shipping a 5-minute remix under a 2-minute
-             track's metadata still corrupts the library.
-          4. If no candidate's title passes, return None. The caller treats
-             that as "not found on YouTube" - strictly better than shipping
-             the wrong audio under the right cover.
-
-        `expected_title` + `expected_artists` are optional so legacy callers
-        that haven't been updated still work via the older trust-the-top-
-        hit-unless-duration-is-clearly-off policy.
-        """
-        select_opts = {
-            "quiet": True,
-            "no_warnings": True,
-            "skip_download": True,
-            "extract_flat": True,
-            "ignoreerrors": True,
-            "retries": 5,
-            "socket_timeout": 15,
-            "concurrent_fragment_downloads": 4,
-        }
-        log.debug(
-            "yt search: query=%r title=%r artists=%r dur=%ss",
-            search_query,
-            expected_title,
-            expected_artists,
-            expected_duration_s,
-        )
-        try:
-            with YoutubeDL(select_opts) as ydl:
-                info = ydl.extract_info(search_query, download=False)
-        except Exception as exc:
-            # The single most useful log line for triage: a real exception here
-            # (bot-challenge, SSL, network, region block) is otherwise invisible
-            # because the caller only ever sees "not found on YouTube".
-            log.warning("yt search raised %s: %s", type(exc).__name__, str(exc)[:300])
-            return None
-        entries = [e for e in (info or {}).get("entries", []) if e and e.get("id")]
-        if not entries:
-            # Empty results with no exception is the classic bot-block / rate-limit
-            # / region signature. Distinct from "found results but filtered out".
-            log.warning(
-                "yt search returned 0 entries for %r (bot-block/network/region?)", search_query
-            )
-            return None
-        log.debug("yt search returned %d entries", len(entries))
-
-        if expected_title:
-            title_ok = [
-                e for e in entries if self._title_plausibly_matches(e.get("title"), expected_title)
-            ]
-            if not title_ok:
-                log.info(
-                    "title filter rejected all %d candidates for %r (e.g. %r)",
-                    len(entries),
-                    expected_title,
-                    (entries[0].get("title") if entries else None),
-                )
-                if self.loose_match:
-                    return self._loose_pick(entries, expected_duration_s)
-                return None
-
-            # Require an artist in the YouTube title alongside the song name:
-            # rejects right-title-wrong-uploader remixes. Prefer not-found
-            # over wrong audio (#52). Title-only when no artists are known.
-            pool = title_ok
-            if expected_artists:
-                # Split on collaboration separators BEFORE normalizing -
-                # normalization eats commas, which would collapse the
-                # multi-artist string into one unmatchable token.
-                raw_tokens = re.split(
-                    r"[,&]+|\s+(?:feat\.?|ft\.?)\s+",
-                    expected_artists,
-                    flags=re.IGNORECASE,
-                )
-                artist_tokens = [self._normalize_title(t) for t in raw_tokens]
-                artist_tokens = [t for t in artist_tokens if t]
-                if artist_tokens:
-                    pool = [
-                        e
-                        for e in title_ok
-                        if any(
-                            artist in self._normalize_title(e.get("title") or "")
-                            for artist in artist_tokens
-                        )
-                    ]
-                    if not pool and not any(re.search(r"[a-z0-9]", t) for t in artist_tokens):
-                        # Native-script artists usually appear romanized on
-                        # YouTube, so an all-non-latin token set would reject
-                        # everything; fall back to title-only.
-                        log.info(
-                            "artist gate skipped: no latin token in %r, falling back to title-only",
-                            expected_artists,
-                        )
-                        pool = title_ok
-                    if not pool:
-                        log.info(
-                            "artist filter rejected all %d title-matches (artists=%r)",
-                            len(title_ok),
-                            expected_artists,
-                        )
-                        if self.loose_match:
-                            return self._loose_pick(title_ok, expected_duration_s)
-                        return None
-
-            chosen = pool[0]
-            if expected_duration_s:
-                timed = [e for e in pool if e.get("duration")]
-                if timed:
-                    chosen = min(timed, key=lambda e: abs(e["duration"] - expected_duration_s))
-                    # Right title+artist but wildly wrong duration = live
-                    # cover / extended mix; still the wrong audio to ship.
-                    off = abs(chosen["duration"] - expected_duration_s)
-                    if off > self._DURATION_TOLERANCE_S_WIDE:
-                        log.info(
-                            "closest candidate duration off by %.0fs (>%ss), rejecting",
-                            off,
-                            self._DURATION_TOLERANCE_S_WIDE,
-                        )
-                        return None
-            log.debug("selected youtube video %s", chosen["id"])
-            return f"https://www.youtube.com/watch?v={chosen['id']}"
-
-        # Legacy path - kept for any caller that hasn't been updated yet.
-        chosen = entries[0]
-        if expected_duration_s:
-            top_duration = chosen.get("duration")
-            top_off = top_duration is None or (
-                abs(top_duration - expected_duration_s) > self._DURATION_TOLERANCE_S
-            )
-            if top_off:
-                timed = [e for e in entries if e.get("duration")]
-                if timed:
-                    chosen = min(timed, key=lambda e: abs(e["duration"] - expected_duration_s))
-        return f"https://www.youtube.com/watch?v={chosen['id']}"
-
-    def _loose_pick(self, candidates, expected_duration_s):
-        """Opt-in fallback (Settings: "use closest result if no match").
-
-        When strict title/artist matching finds nothing, return the
-        duration-closest candidate (or the top result if durations are
-        missing). Recovers cross-script matches the ascii title filter can
-        never make - e.g. a Latin Spotify title vs a Greek/Cyrillic/CJK
-        youtube title. Trades the never-grab-the-wrong-audio guarantee for
-        coverage, which is why the caller only reaches here when loose_match
-        is on (off by default).
-        """
-        if not candidates:
-            return None
-        chosen = candidates[0]
-        if expected_duration_s:
-            timed = [e for e in candidates if e.get("duration")]
-            if timed:
-                chosen = min(timed, key=lambda e: abs(e["duration"] - expected_duration_s))
-        log.warning("loose match (no confident title/artist match): selected %s", chosen["id"])
-        return f"https://www.youtube.com/watch?v={chosen['id']}"
-
-    def download_track_audio(
-        self,
-        search_query,
-        destination,
-        expected_duration_s=None,
-        expected_title=None,
-        expected_artists=None,
-    ):
-        # Check for FFmpeg first
-        ffmpeg_path = get_ffmpeg_path()
-        if not ffmpeg_path:
-            raise RuntimeError(
-                "FFmpeg not found! Install via: brew install ffmpeg (macOS) "
-                "or apt install ffmpeg (Linux)"
-            )
-
-        fmt = self.audio_format if self.audio_format in SUPPORTED_FORMATS else "mp3"
-        ext = SUPPORTED_FORMATS[fmt]["ext"]
-        is_lossy = SUPPORTED_FORMATS[fmt]["lossy"]
-
-        base, _ = os.path.splitext(destination)
-        output_template = base + ".%(ext)s"
-        postprocessor = {
-            "key": "FFmpegExtractAudio",
-            "preferredcodec": fmt,
-        }
-        if is_lossy:
-            postprocessor["preferredquality"] = self.audio_quality
-
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "quiet": True,
-            "no_warnings": True,
-            "outtmpl": output_template,
-            "ffmpeg_location": ffmpeg_path,
-            "retries": 5,
-            "socket_timeout": 15,
-            "concurrent_fragment_downloads": 4,
-            "ignoreerrors": True,
-            "postprocessors": [postprocessor],
-        }
-        if self.sample_rate != "auto" and fmt in ("mp3", "flac", "wav"):
-            # "extractaudio" is the only key yt-dlp matches for this PP.
-            # opus excluded (libopus is 48 kHz-only); m4a excluded (may
-            # stream-copy aac, where ffmpeg silently drops -ar).
-            ydl_opts["postprocessor_args"] = {"extractaudio": ["-ar", self.sample_rate]}
-
-        expected_path = base + "." + ext
-
-        # Widened query then a simplified fallback; success = an audio file
-        # actually on disk, so an empty search fails loudly.
-        queries = [self._widen_search(search_query)]
-        fallback = self._simplify_search(search_query)
-        if fallback not in queries:
-            queries.append(fallback)
-
-        # Default web client first, then the alternate player clients:
-        # youtube bot-challenges web per-IP while android/ios/tv endpoints
-        # often still serve. Fallback only runs when no file landed.
-        fallback_opts = {
-            **ydl_opts,
-            "extractor_args": {
-                "youtube": {"player_client": ["android", "ios", "tv", "web_safari"]}
-            },
-        }
-        attempts = [("default", ydl_opts), ("fallback", fallback_opts)]
-
-        for query in queries:
-            video_url = self._select_youtube_match(
-                query,
-                expected_duration_s,
-                expected_title=expected_title,
-                expected_artists=expected_artists,
-            )
-            if not video_url:
-                continue
-            for label, opts in attempts:
-                # per-attempt bridge captures yt-dlp's own error even when
-                # ignoreerrors swallows it (no exception, no file)
-                ytlog = _YtdlpLog()
-                try:
-                    with YoutubeDL({**opts, "logger": ytlog}) as ydl:
-                        ydl.extract_info(video_url, download=True)
-                except Exception as exc:
-                    log.warning(
-                        "download attempt (%s) failed for %s: %s",
-                        label,
-                        video_url,
-                        str(exc)[:300],
-                    )
-                else:
-                    if not os.path.exists(expected_path):
-                        # the silent case: yt-dlp produced no file without
-                        # raising; the bridge holds the real reason
-                        reason = (ytlog.last_error or "no error reported by yt-dlp").strip()
-                        log.warning(
-                            "download attempt (%s) produced no file for %s: %s",
-                            label,
-                            video_url,
-                            reason[:300],
-                        )
-                if os.path.exists(expected_path):
-                    if label != "default":
-                        log.info("recovered via %s player clients", label)
-                    return expected_path
-
-        log.debug("no playable audio landed for query set %r", queries)
-        raise RuntimeError("no playable audio source found on YouTube for this track")
-
-    def download_http_file(self, url, destination):
-        response = self.session.get(url, stream=True, timeout=60)
-        response.raise_for_status()
-        total = int(response.headers.get("content-length", 0))
-        downloaded = 0
-        os.makedirs(os.path.dirname(destination), exist_ok=True)
-        with open(destination, "wb") as handle:
-            for chunk in response.iter_content(chunk_size=8192):
-                if not chunk:
-                    continue
-                handle.write(chunk)
-                downloaded += len(chunk)
-                if total:
-                    progress = int(downloaded / total * 100)
-                    self.dlprogress_signal.emit(progress)
-        return destination
-
-    def _download_one_track(self, track, playlist_folder_path, default_cover_url, track_num=0):
-        """Download a single track. Runs inside a ThreadPoolExecutor worker.
-
-        Returns None on success, the track title on failure (for _failed_tracks).
-        Qt signals emitted here cross thread boundaries via queued connections,
-        which is safe.
-
-        In parallel mode (self._parallel_mode), per-track UI noise (song_meta
-        preview, per-byte progress) is suppressed because those widgets are
-        single-track and would flicker with N workers in flight. add_song_meta
-        still fires so ID3 tags + cover art get written to every mp3.
-
-        track_num (1-based) is passed through to song_meta so the ID3 TRCK
-        frame can be populated for playlist ordering.
-        """
-        if self.is_cancelled():
-            return None
-
-        track_title = track.title
-        artists = track.artists
-        sanitized_title = self.sanitize_text(track_title)
-        sanitized_artists = self.sanitize_text(artists)
-        first, second = self._name_parts(sanitized_title, sanitized_artists)
-
-        if self.include_track_number:
-            filename = f"{track_num:02d}. {first} - {second}.mp3"
-        else:
-            filename = f"{first} - {second}.mp3"
-
-        filepath = os.path.join(playlist_folder_path, cap_filename(filename))
-
-        # Collision guard: distinct tracks can sanitize to the same name, and
-        # parallel workers racing os.path.exists would clobber each other.
-        # Claim under a lock; if taken, suffix the track id.
-        with self._filename_lock:
-            if filepath in self._in_flight_files:
-                if self.include_track_number:
-                    filename = f"{track_num:02d}. {first} - {second} [{track.id}].mp3"
-                else:
-                    filename = f"{first} - {second} [{track.id}].mp3"
-
-                filepath = os.path.join(
-                    playlist_folder_path,
-                    cap_filename(filename),
-                )
-            self._in_flight_files.add(filepath)
-
-        # Per-track cover enrichment: the playlist embed has no per-track
-        # cover urls (the "all 300 songs have the same cover" report), so
-        # fetch /embed/track/{id} when missing. ~100-300ms per track,
-        # overlapped by other workers in parallel mode.
-        cover_url = track.cover_url
-        release_date = track.release_date or ""
-        if (
-            not cover_url
-            and track.id
-            and self.spotifydown_api is not None
-            and not self.is_cancelled()
-        ):
-            try:
-                enriched = self.spotifydown_api.get_track(track.id)
-                if enriched:
-                    if enriched.cover_url:
-                        cover_url = enriched.cover_url
-                    if not release_date and enriched.release_date:
-                        release_date = enriched.release_date
-            except SpotifyDownAPIError as exc:
-                log.debug("cover enrichment failed for '%s': %s", track_title, exc)
-
-        cover_url = cover_url or default_cover_url
-        album_name = track.album or ""
-
-        song_meta = {
-            "title": track_title,
-            "artists": artists,
-            "album": album_name,
-            "releaseDate": release_date,
-            "cover": cover_url or "",
-            "file": filepath,
-            "trackNumber": track_num,
-        }
-
-        # Preview panel shows whichever track most recently started; the
-        # worker race is fine (better than a blank panel).
-        self.song_meta.emit(dict(song_meta))
-
-        try:
-            if os.path.exists(filepath):
-                self._record_in_manifest(track.id, filepath)
-                self.add_song_meta.emit(song_meta)
-                self._finish_track_ui(ok=True)
-                return None
-
-            search_query = f"ytsearch1:{track_title} {artists} audio"
-            expected_dur = (track.duration_ms / 1000) if track.duration_ms else None
-            try:
-                final_path = self.download_track_audio(
-                    search_query,
-                    filepath,
-                    expected_duration_s=expected_dur,
-                    expected_title=track_title,
-                    expected_artists=artists,
-                )
-            except Exception as error_status:
-                error_msg = self._get_user_friendly_error(error_status, track_title)
-                self.error_signal.emit(error_msg)
-                # concise reason at WARNING (the per-attempt yt-dlp reason is
-                # already logged above); full traceback only when verbose
-                log.warning("track failed: '%s': %s", track_title, str(error_status)[:200])
-                log.debug("track failure traceback for '%s'", track_title, exc_info=True)
-                with self._failed_lock:
-                    self._failed_tracks.append(track_title)
-                self._finish_track_ui(ok=False)
-                return track_title
-
-            if not final_path or not os.path.exists(final_path):
-                self.error_signal.emit(f"'{track_title}' - download failed")
-                log.warning(
-                    "track produced no audio file (no confident match or blocked): '%s'",
-                    track_title,
-                )
-                with self._failed_lock:
-                    self._failed_tracks.append(track_title)
-                self._finish_track_ui(ok=False)
-                return track_title
-
-            self._record_in_manifest(track.id, final_path)
-            song_meta["file"] = final_path
-            self.add_song_meta.emit(song_meta)
-            self._finish_track_ui(ok=True)
-            return None
-        finally:
-            with self._filename_lock:
-                self._in_flight_files.discard(filepath)
-
-    def _finish_track_ui(self, ok: bool) -> None:
-        """Update counter + progress bar after a track completes or fails."""
-        self.increment_counter()
-        if self._parallel_mode and self._total_tracks > 0:
-            # Aggregate progress across all workers: show how many tracks are
-            # done as a percentage. Avoids the N-workers-jittering-one-bar
-            # problem where per-byte emits from 4 downloads make the bar jump.
-            pct = int(self.counter / self._total_tracks * 100)
-            self.dlprogress_signal.emit(min(pct, 100))
-        elif ok:
-            self.dlprogress_signal.emit(100)
-
-    def _load_manifest(self, folder: str) -> set:
-        """Load the set of track IDs already downloaded into `folder`.
-
-        The manifest is a JSON-lines file inside the folder; each line is a
-        `{"id", "file"}` record. Entries whose file is missing are ignored so
-        a track the user deleted re-downloads. Returns the set of valid IDs
-        and arms `_manifest_path` for incremental appends during this run.
-        """
-        import json
-
-        path = os.path.join(folder, MANIFEST_FILENAME)
-        self._manifest_path = path
-        done: set[str] = set()
-        if not os.path.exists(path):
-            return done
-        try:
-            with open(path, encoding="utf-8") as handle:
-                for line in handle:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        record = json.loads(line)
-                    except ValueError:
-                        continue
-                    track_id = record.get("id")
-                    filename = record.get("file")
-                    if track_id and filename and os.path.exists(os.path.join(folder, filename)):
-                        done.add(track_id)
-        except OSError:
-            return set()
-        return done
-
-    def _record_in_manifest(self, track_id, filepath: str) -> None:
-        """Append a completed track to the manifest (thread-safe).
-
-        Append-only JSON-lines so recording a track is O(1) regardless of how
-        large the playlist is. Failures are swallowed: the manifest is an
-        optimization for resuming, never a hard dependency of a download.
-        """
-        if not track_id or not self._manifest_path:
-            return
-        import json
-
-        record = json.dumps({"id": track_id, "file": os.path.basename(filepath)})
-        with self._manifest_lock:
-            try:
-                with open(self._manifest_path, "a", encoding="utf-8") as handle:
-                    handle.write(record + "\n")
-            except OSError:
-                pass
-
-    def scrape_playlist(self, spotify_playlist_link, music_folder):
-        # Reset mutable state so repeat invocations on the same scraper
-        # instance don't carry stale counters or failure lists.
-        with self._counter_lock:
-            self.counter = 0
-        with self._failed_lock:
-            self._failed_tracks.clear()
-        with self._filename_lock:
-            self._in_flight_files.clear()
-        self._parallel_mode = False
-        self._total_tracks = 0
-
-        # A playlist or an album both flow through here. detect_spotify_url_type
-        # returns ("playlist"|"album", id); albums reuse the same embed-parsing
-        # path with the album embed endpoint (closes #38).
-        content_type, playlist_id = detect_spotify_url_type(spotify_playlist_link)
-        if content_type not in ("playlist", "album"):
-            raise ValueError("Expected a playlist or album URL")
-        self.PlaylistID.emit(playlist_id)
-
-        # Bail before network work if stop was already clicked.
-        if self.is_cancelled():
-            self.PlaylistCompleted.emit("Download cancelled")
-            return
-
-        try:
-            spotify_api = self.ensure_spotifydown_api()
-        except SpotifyDownAPIError as exc:
-            raise RuntimeError(str(exc)) from exc
-
-        metadata = spotify_api.get_playlist_metadata(playlist_id, content_type=content_type)
-        playlist_display_name = self.format_playlist_name(metadata)
-        self.song_Album.emit(playlist_display_name)
-
-        playlist_folder_path = self.prepare_playlist_folder(music_folder, playlist_display_name)
-
-        # Resume support: skip tracks already downloaded in a previous run of
-        # this folder before fetching their (rate-limited) metadata, so a huge
-        # playlist can be finished across multiple sessions (closes #40).
-        already_done = self._load_manifest(playlist_folder_path)
-        if already_done:
-            self.resume_skipped.emit(len(already_done))
-            self.error_signal.emit(
-                f"Resuming: skipping {len(already_done)} already-downloaded track(s)"
+    # engine event -> signal attribute
+    _SIGNALS = {
+        "completed": "PlaylistCompleted",
+        "source_id": "PlaylistID",
+        "album": "song_Album",
+        "track_started": "song_meta",
+        "track_ready": "add_song_meta",
+        "count": "count_updated",
+        "progress": "dlprogress_signal",
+        "progress_reset": "Resetprogress_signal",
+        "resume_skipped": "resume_skipped",
+        "source_progress": "source_progress",
+        "message": "error_signal",
+    }
+
+    def __init__(self, cancel_event: threading.Event | None = None, **engine_opts):
+        # cooperative: QThread.__init__ hands the keywords on to DownloadEngine
+        super().__init__(cancel_event=cancel_event, **engine_opts)
+        for event, signal_name in self._SIGNALS.items():
+            # looked up per emit, not bound once, so a replaced signal
+            # attribute (tests swap in mocks) still receives events
+            self.events.subscribe(
+                event, lambda payload, _name=signal_name: getattr(self, _name).emit(payload)
             )
 
-        # Materialize the generator (not thread-safe; count also picks the
-        # worker pool size). Cancel is checked between yields so huge
-        # playlists abort mid-fetch instead of after the full window.
-        expected_total = metadata.track_count or 0
-        tracks: list = []
-        for track in spotify_api.iter_playlist_tracks(
-            playlist_id, content_type=content_type, skip_ids=already_done
-        ):
-            if self.is_cancelled():
-                break
-            tracks.append(track)
-            if expected_total and len(tracks) % 10 == 0:
-                self.error_signal.emit(
-                    f"Fetching track metadata ({len(tracks)} of {expected_total})..."
-                )
-        self._total_tracks = len(tracks)
-
-        if self.is_cancelled():
-            self.PlaylistCompleted.emit("Download cancelled")
-            return
-
-        self.Resetprogress_signal.emit(0)
-
-        # Small playlists don't benefit from parallelism. Keep 1 worker for
-        # playlists under 3 tracks to preserve the single-track UI feel.
-        worker_count = 1 if len(tracks) < 3 else min(self.MAX_WORKERS, len(tracks))
-        self._parallel_mode = worker_count > 1
-
-        log.info(
-            "%s scrape: name=%r id=%s tracks=%d (resume-skipped %d) mode=%s workers=%d fmt=%s/%s",
-            content_type,
-            playlist_display_name,
-            playlist_id,
-            len(tracks),
-            len(already_done),
-            "parallel" if self._parallel_mode else "sequential",
-            worker_count,
-            self.audio_format,
-            self.audio_quality,
-        )
-
-        # Canonical playlist position over enumerate order: spclient yields
-        # in http-completion order on >100-track playlists (#51). Enumerate
-        # only for albums/small playlists, which arrive already ordered.
-        def _track_num_for(track, idx):
-            return track.position if getattr(track, "position", None) else idx
-
-        if worker_count == 1:
-            for idx, track in enumerate(tracks, start=1):
-                if self.is_cancelled():
-                    break
-                # Reset the per-track progress bar at the top of each iteration
-                # so the single-track UI behaves the way it always has.
-                self.Resetprogress_signal.emit(0)
-                self._download_one_track(
-                    track,
-                    playlist_folder_path,
-                    metadata.cover_url,
-                    track_num=_track_num_for(track, idx),
-                )
-        else:
-            try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=worker_count) as executor:
-                    futures = [
-                        executor.submit(
-                            self._download_one_track,
-                            track,
-                            playlist_folder_path,
-                            metadata.cover_url,
-                            _track_num_for(track, idx),
-                        )
-                        for idx, track in enumerate(tracks, start=1)
-                    ]
-                    for future in concurrent.futures.as_completed(futures):
-                        if self.is_cancelled():
-                            # Cancel remaining futures that haven't started
-                            # yet. In-flight downloads check is_cancelled at
-                            # their own top and return early.
-                            for f in futures:
-                                f.cancel()
-                            break
-                        try:
-                            future.result()
-                        except Exception as exc:
-                            # _download_one_track handles its own errors; this is
-                            # only framework-level fallout (a worker crashed hard).
-                            log.error("unexpected worker error", exc_info=exc)
-                            self.error_signal.emit(f"Unexpected worker error: {exc}")
-            finally:
-                # Reset only after executor shutdown: in-flight workers that
-                # observed False mid-run would emit single-track UI signals.
-                self._parallel_mode = False
-
-        if self.is_cancelled():
-            log.info("scrape cancelled by user (%d done before cancel)", self.counter)
-            self.PlaylistCompleted.emit("Download cancelled")
-            return
-
-        # Report completion with failed track count
-        ok = max(self._total_tracks - len(self._failed_tracks), 0)
-        if self._failed_tracks:
-            log.info("scrape done: %d ok, %d failed", ok, len(self._failed_tracks))
-            log.info("failed tracks: %s", " | ".join(self._failed_tracks))
-            self.PlaylistCompleted.emit(f"Done! {len(self._failed_tracks)} track(s) failed")
-        else:
-            log.info("scrape done: %d ok, 0 failed", self._total_tracks)
-            self.PlaylistCompleted.emit("Download Complete!")
-
-    def returnSPOT_ID(self, link):
-        """Extract playlist ID from Spotify URL."""
-        return extract_playlist_id(link)
-
-    def scrape_track(self, spotify_track_link, music_folder):
-        """Download a single track from Spotify."""
-        url_type, track_id = detect_spotify_url_type(spotify_track_link)
-        if url_type != "track":
-            raise ValueError("Expected a track URL")
-
-        try:
-            spotify_api = self.ensure_spotifydown_api()
-        except SpotifyDownAPIError as exc:
-            raise RuntimeError(str(exc)) from exc
-
-        track = spotify_api.get_track(track_id)
-        log.info(
-            "single-track scrape: %r by %r id=%s fmt=%s/%s",
-            track.title,
-            track.artists,
-            track_id,
-            self.audio_format,
-            self.audio_quality,
-        )
-        self.song_Album.emit("Single Track Download")
-
-        if not os.path.exists(music_folder):
-            os.makedirs(music_folder)
-
-        self.Resetprogress_signal.emit(0)
-
-        track_title = track.title
-        artists = track.artists
-        sanitized_title = self.sanitize_text(track_title)
-        sanitized_artists = self.sanitize_text(artists)
-        first, second = self._name_parts(sanitized_title, sanitized_artists)
-        filename = f"{first} - {second}.mp3"
-        filepath = os.path.join(music_folder, cap_filename(filename))
-
-        album_name = track.album or ""
-        release_date = track.release_date or ""
-        cover_url = track.cover_url
-
-        song_meta = {
-            "title": track_title,
-            "artists": artists,
-            "album": album_name,
-            "releaseDate": release_date,
-            "cover": cover_url or "",
-            "file": filepath,
-            "trackNumber": 1,
-        }
-
-        self.song_meta.emit(dict(song_meta))
-
-        if os.path.exists(filepath):
-            self.add_song_meta.emit(song_meta)
-            self.increment_counter()
-            self.PlaylistCompleted.emit("Track already exists!")
-            return
-
-        # Download via YouTube search
-        search_query = f"ytsearch1:{track_title} {artists} audio"
-        expected_dur = (track.duration_ms / 1000) if track.duration_ms else None
-        try:
-            final_path = self.download_track_audio(
-                search_query, filepath, expected_duration_s=expected_dur
-            )
-        except Exception as error_status:
-            error_msg = self._get_user_friendly_error(error_status, track_title)
-            log.error("single-track download failed: '%s'", track_title, exc_info=True)
-            self.PlaylistCompleted.emit(error_msg)
-            return
-
-        if not final_path or not os.path.exists(final_path):
-            log.warning("single-track produced no audio file: '%s'", track_title)
-            self.PlaylistCompleted.emit("Download failed - no audio file produced")
-            return
-
-        song_meta["file"] = final_path
-        self.add_song_meta.emit(song_meta)
-        self.increment_counter()
-        self.dlprogress_signal.emit(100)
-        self.PlaylistCompleted.emit("Download Complete!")
-
-    def increment_counter(self):
-        with self._counter_lock:
-            self.counter += 1
-            current = self.counter
-        self.count_updated.emit(current)  # Emit the signal with the updated count
-
 
 # Scraper Thread
 class ScraperThread(QThread):
@@ -1476,12 +196,14 @@ class ScraperThread(QThread):
         spotify_link,
         music_folder=None,
         cancel_event: threading.Event | None = None,
+        profile: bool = False,
         **scraper_opts,
     ):
         super().__init__()
         self.spotify_link = spotify_link
         self.music_folder = music_folder or os.path.join(os.getcwd(), "music")
         self._cancel_event = cancel_event or threading.Event()
+        self._profile = profile  # the settings dialog's hidden debug toggle
         # MusicScraper's explicit signature validates the option names
         self.scraper = MusicScraper(cancel_event=self._cancel_event, **scraper_opts)
 
@@ -1490,160 +212,32 @@ class ScraperThread(QThread):
         self._cancel_event.set()
 
     def run(self):
+        if not self._profile:
+            self._scrape()
+            return
+        import sunnify_profile
+
+        profiler = sunnify_profile.Profiler()
+        with profiler:
+            self._scrape()
+        try:
+            paths = profiler.write(_log_dir(), "app")
+        except OSError as exc:
+            log.warning("profile not written: %s", exc)
+        else:
+            log.info("profile: %d samples -> %s", profiler.samples, ", ".join(paths))
+
+    def _scrape(self):
         self.progress_update.emit("Scraping started...")
         try:
-            # Detect URL type and handle accordingly
-            url_type, _ = detect_spotify_url_type(self.spotify_link)
-            if url_type == "track":
-                self.scraper.scrape_track(self.spotify_link, self.music_folder)
-            else:
-                self.scraper.scrape_playlist(self.spotify_link, self.music_folder)
+            # a list of links (the GUI queue) runs through one shared pool
+            self.scraper.download(self.spotify_link, self.music_folder)
             self.progress_update.emit("Scraping completed.")
         except Exception as e:
             log.exception("scrape failed for %s", self.spotify_link)
             self.progress_update.emit(f"{e}")
 
 
-def _fetch_cover_bytes(url: str) -> bytes | None:
-    """Download cover image bytes, returning None on any failure."""
-    if not url:
-        return None
-    try:
-        resp = requests.get(url, timeout=15)
-        if resp.status_code == 200 and resp.content:
-            return resp.content
-    except (requests.RequestException, OSError) as exc:
-        log.debug("cover fetch failed: %s", exc)
-    return None
-
-
-def _detect_image_mime(data: bytes) -> str:
-    """Return the MIME string for image bytes, sniffed from magic numbers.
-
-    Spotify currently serves JPEG covers; this function exists so a future
-    switch to PNG (or a mid-flight content-type change) doesn't silently
-    produce broken cover-art frames mis-tagged as JPEG.
-
-    ref: JPEG magic ff d8 ff (any JFIF/Exif variant), per ISO/IEC 10918-1
-    ref: PNG signature 89 50 4e 47 0d 0a 1a 0a, per W3C PNG spec section 5.2
-    """
-    if data[:3] == b"\xff\xd8\xff":
-        return "image/jpeg"
-    if data[:8] == b"\x89PNG\r\n\x1a\n":
-        return "image/png"
-    return "image/jpeg"  # safe default; Spotify has served JPEG since 2015
-
-
-def _write_metadata_mp3(filename: str, tags: dict, cover_bytes: bytes | None) -> None:
-    """Write ID3 tags + embedded cover art to an MP3.
-
-    Tags and the APIC cover frame are written as ID3v2.3 with UTF-16 text
-    encoding instead of mutagen's v2.4 / UTF-8 default. v2.3 + UTF-16 is the
-    lowest common denominator that's understood by older iTunes, Windows
-    Media Player, most car head-units, and stock Android players, none of
-    which read v2.4 APIC frames reliably (closes #46).
-
-    ref: ID3v2.3 spec section 3.3 (only encoding values $00 ISO-8859-1
-         and $01 Unicode UTF-16+BOM are defined) https://id3.org/id3v2.3.0
-    ref: ID3v2.4 spec adds $02 UTF-16BE and $03 UTF-8 (which is what
-         mutagen writes by default) https://id3.org/id3v2.4.0-frames
-    ref: mutagen `update_to_v23()` downgrades any UTF-8 frames to UTF-16
-         before saving as v2.3 https://mutagen.readthedocs.io/en/latest/api/id3.html
-    """
-    audio = EasyID3(filename)
-    audio["title"] = tags.get("title", "")
-    audio["artist"] = tags.get("artists", "")
-    audio["album"] = tags.get("album", "")
-    audio["date"] = tags.get("releaseDate", "")
-    track_num = tags.get("trackNumber") or 0
-    if track_num:
-        audio["tracknumber"] = str(track_num)
-    # EasyID3.save() defaults to v2.4 + UTF-8. Passing v2_version=3 tells
-    # mutagen to downgrade text frames to a v2.3-allowed encoding (UTF-16
-    # with BOM for non-ASCII, Latin-1 for ASCII) before writing.
-    audio.save(v2_version=3)
-    if cover_bytes:
-        id3 = ID3(filename)
-        mime = _detect_image_mime(cover_bytes)
-        # encoding=1 (UTF-16+BOM) is the only Unicode encoding v2.3 defines.
-        # type=3 is "Cover (front)" per the v2.3 APIC enum.
-        id3.add(APIC(encoding=1, mime=mime, type=3, desc="Cover", data=cover_bytes))
-        id3.update_to_v23()
-        id3.save(v2_version=3)
-
-
-def _write_metadata_m4a(filename: str, tags: dict, cover_bytes: bytes | None) -> None:
-    """Write iTunes atom tags + embedded cover art to an M4A/MP4.
-
-    iTunes atoms (`covr`, `\xa9nam`, etc.) are a stable, version-less spec
-    used by every MP4-aware player. The only knob worth getting right is
-    the cover-art image format, which we sniff so a future PNG cover from
-    Spotify doesn't get mis-tagged as JPEG.
-
-    ref: mutagen MP4Tags atom keys (`\xa9nam`/`\xa9ART`/`\xa9alb`/`\xa9day`/
-         `trkn`/`covr`) and MP4Cover.FORMAT_JPEG/PNG, which is the spec we
-         write against https://mutagen.readthedocs.io/en/latest/api/mp4.html
-    """
-    from mutagen.mp4 import MP4, MP4Cover
-
-    audio = MP4(filename)
-    audio["\xa9nam"] = tags.get("title", "")
-    audio["\xa9ART"] = tags.get("artists", "")
-    audio["\xa9alb"] = tags.get("album", "")
-    date = tags.get("releaseDate", "")
-    if date:
-        audio["\xa9day"] = date
-    track_num = tags.get("trackNumber") or 0
-    if track_num:
-        audio["trkn"] = [(int(track_num), 0)]
-    if cover_bytes:
-        mime = _detect_image_mime(cover_bytes)
-        fmt = MP4Cover.FORMAT_PNG if mime == "image/png" else MP4Cover.FORMAT_JPEG
-        audio["covr"] = [MP4Cover(cover_bytes, imageformat=fmt)]
-    audio.save()
-
-
-def _write_metadata_flac(filename: str, tags: dict, cover_bytes: bytes | None) -> None:
-    """Write Vorbis comments + embedded cover art to a FLAC.
-
-    FLAC's Picture block carries an explicit MIME string, so we sniff the
-    image type and pass it through. Vorbis comments are always UTF-8 and
-    universally supported, so nothing else is version-sensitive here.
-
-    ref: FLAC METADATA_BLOCK_PICTURE format spec
-         https://xiph.org/flac/format.html#metadata_block_picture
-    """
-    from mutagen.flac import FLAC, Picture
-
-    audio = FLAC(filename)
-    audio["title"] = tags.get("title", "")
-    audio["artist"] = tags.get("artists", "")
-    audio["album"] = tags.get("album", "")
-    date = tags.get("releaseDate", "")
-    if date:
-        audio["date"] = date
-    track_num = tags.get("trackNumber") or 0
-    if track_num:
-        audio["tracknumber"] = str(track_num)
-    if cover_bytes:
-        # add_picture() appends; clear first so a re-tag doesn't stack duplicate covers
-        audio.clear_pictures()
-        pic = Picture()
-        pic.type = 3  # Front cover
-        pic.mime = _detect_image_mime(cover_bytes)
-        pic.desc = "Cover"
-        pic.data = cover_bytes
-        audio.add_picture(pic)
-    audio.save()
-
-
-_METADATA_WRITERS = {
-    ".mp3": _write_metadata_mp3,
-    ".m4a": _write_metadata_m4a,
-    ".flac": _write_metadata_flac,
-}
-
-
 class WritingMetaTagsThread(QThread):
     tags_success = pyqtSignal(str)
 
@@ -1653,26 +247,9 @@ class WritingMetaTagsThread(QThread):
         self.filename = filename
 
     def run(self):
-        """Write tags + cover art synchronously, dispatching on file extension.
-
-        Each container uses a different tag system (ID3 for mp3, iTunes atoms
-        for m4a, Vorbis comments for flac). Opus/WAV are skipped with a log
-        line; those formats have limited or no standard cover-art story that
-        would repay the extra dependency surface for this project's scope.
-        """
-        try:
-            log.info("writing tags: %s", self.filename)
-            ext = os.path.splitext(self.filename)[1].lower()
-            writer = _METADATA_WRITERS.get(ext)
-            if writer is None:
-                self.tags_success.emit("Tags skipped (unsupported container)")
-                return
-
-            cover_bytes = _fetch_cover_bytes(self.tags.get("cover", ""))
-            writer(self.filename, self.tags, cover_bytes)
-            self.tags_success.emit("Tags added successfully")
-        except Exception:
-            log.error("tag write failed: %s", self.filename, exc_info=True)
+        status = write_tags(self.tags, self.filename)
+        if status:
+            self.tags_success.emit(status)
 
 
 class DownloadThumbnail(QThread):
@@ -1688,10 +265,14 @@ class DownloadThumbnail(QThread):
         if not self.url:
             return
         try:
-            response = requests.get(self.url, stream=True, timeout=10)
+            # interactive: the user is looking at this one, so it goes ahead
+            # of the run's queued cover and metadata fetches to the same hosts
+            response = sunnify_http.get(
+                self.url, traffic="thumbnail", priority=sunnify_http.INTERACTIVE, timeout=10
+            )
             if response.status_code == 200:
                 self.thumbnail_ready.emit(response.content)
-        except Exception as exc:
+        except requests.RequestException as exc:
             log.debug("thumbnail fetch failed: %s", exc)
 
     def _update_ui(self, data):
@@ -1765,6 +346,17 @@ class SettingsDialog(QDialog):
         self._loose_match_cb = QCheckBox()
         self._loose_match_cb.setChecked(self._config.get("loose_match", False))
 
+        self._verify_audio_cb = QCheckBox()
+        self._verify_audio_cb.setChecked(self._config.get("verify_audio", False))
+
+        # hidden debug toggle: shown when the dialog is opened with Alt/Option
+        # held, or while it's on (so it can be turned off again)
+        self._profile_cb = None
+        alt_held = QApplication.keyboardModifiers() & Qt.KeyboardModifier.AltModifier
+        if self._config.get("profile_runs", False) or alt_held:
+            self._profile_cb = QCheckBox()
+            self._profile_cb.setChecked(self._config.get("profile_runs", False))
+
         # initial enable/disable sync needs every dependent combo to exist
         self._on_format_change(self._format_cb.currentText())
 
@@ -1820,7 +412,25 @@ class SettingsDialog(QDialog):
                 "songs whose YouTube title is in another script (Greek, Cyrillic, "
                 "Korean) but may let an occasional cover or remix slip through.",
             ),
+            (
+                "Check audio against preview:",
+                self._verify_audio_cb,
+                "Compares each download with Spotify's 30-second preview and "
+                "skips it if the audio is a different recording. Makes the "
+                "closest-result fallback safe to leave on. Needs numpy; "
+                "tracks without a preview are not checked.",
+            ),
         ]
+        if self._profile_cb is not None:
+            _settings.append(
+                (
+                    "Profile downloads (debug):",
+                    self._profile_cb,
+                    "Samples where each download spends its time and writes a "
+                    "profile-*.pstats and a flamegraph-ready profile-*.collapsed "
+                    "file to the logs folder when it finishes.",
+                )
+            )
         _fm = QFontMetrics(self.font())
         LABEL_W = max(_fm.horizontalAdvance(lbl) for lbl, _, _ in _settings) + 8
 
@@ -1935,6 +545,9 @@ class SettingsDialog(QDialog):
         label_to_value = {v: k for k, v in self._sample_rate_labels.items()}
         self._config["sample_rate"] = label_to_value.get(self._sample_rate_cb.currentText(), "auto")
         self._config["loose_match"] = self._loose_match_cb.isChecked()
+        self._config["verify_audio"] = self._verify_audio_cb.isChecked()
+        if self._profile_cb is not None:
+            self._config["profile_runs"] = self._profile_cb.isChecked()
         return self._config
 
 
@@ -2374,9 +987,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 return
 
         try:
-            # Validate URL type
-            url_type, _ = detect_spotify_url_type(spotify_url)
-            self.statusMsg.setText(f"Detected: {url_type}")
+            # Several whitespace-separated links queue into one batch run
+            links = spotify_url.split()
+            for link in links:
+                url_type, _ = detect_spotify_url_type(link)
+            if len(links) > 1:
+                self.statusMsg.setText(f"Queued: {len(links)} links")
+                spotify_url = links
+            else:
+                self.statusMsg.setText(f"Detected: {url_type}")
 
             # Reset cancel event and set downloading state
             self._cancel_event = threading.Event()
@@ -2387,6 +1006,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 spotify_url,
                 self.download_path,
                 cancel_event=self._cancel_event,
+                profile=self._config.get("profile_runs", False),
+                embed_tags=self.AddMetaDataCheck.isChecked(),
                 **scraper_kwargs_from(self._config),
             )
             self.scraper_thread.progress_update.connect(self.update_progress)
@@ -2463,7 +1084,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     @pyqtSlot(dict)
     def add_song_META(self, song_meta):
-        if self.AddMetaDataCheck.isChecked():
+        # the engine already tagged it before giving it its final name
+        if self.AddMetaDataCheck.isChecked() and not song_meta.get("tagged"):
             meta_thread = WritingMetaTagsThread(song_meta, song_meta["file"])
             meta_thread.tags_success.connect(lambda x: self.statusMsg.setText(f"{x}"))
             self._active_threads.append(meta_thread)
@@ -2554,30 +1176,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
 # Main
 if __name__ == "__main__":
-    # Headless CLI dispatch (before any Qt/logging setup): a known first arg
-    # routes to sunnify_cli; anything else - including a bare double-click -
-    # is the GUI, byte-identical to before. The alias makes the frozen
-    # binary's __main__ and `import Spotify_Downloader` the same module.
-    _cli_commands = ("download", "info", "status", "config", "doctor", "help")
-    _arg1 = sys.argv[1] if len(sys.argv) > 1 else ""
-    if _arg1 in _cli_commands or _arg1 in ("--version", "-V", "--help", "-h"):
-        sys.modules.setdefault("Spotify_Downloader", sys.modules[__name__])
-        import sunnify_cli
-
-        sys.exit(sunnify_cli.main(sys.argv[1:]))
-    if _arg1.isascii() and _arg1.isalpha():
-        # a bare word is a command attempt, not launcher argv (macOS -psn_*,
-        # file paths all carry non-letters); don't swallow it into a GUI launch
-        import difflib
-
-        close = difflib.get_close_matches(_arg1.lower(), _cli_commands, n=1)
-        hint = f" (did you mean '{close[0]}'?)" if close else ""
-        print(
-            f"sunnify: unknown command '{_arg1}'{hint}\nrun 'sunnify --help' for usage",
-            file=sys.stderr,
-        )
-        sys.exit(2)
-
     # Logging must never stop the app from launching (e.g. a locked-down or
     # read-only log dir). Failure here just means no log file this session.
     with contextlib.suppress(Exception):
@@ -79,7 +79,19 @@ a = Analysis(
         ('Template.py', '.'),
     ] + ffmpeg_datas,
     hiddenimports=[
+        'sunnify_cassette',
         'sunnify_cli',
+        'sunnify_concurrency',
+        'sunnify_core',
+        'sunnify_daemon',
+        'sunnify_engine',
+        'sunnify_fingerprint',
+        'sunnify_http',
+        'sunnify_metrics',
+        'sunnify_profile',
+        'sunnify_queue',
+        'sunnify_timing',
+        'sunnify_verify',
         'PyQt6',
         'PyQt6.QtCore',
         'PyQt6.QtGui',
@@ -0,0 +1,83 @@
+"""Micro-benchmark for YouTube candidate selection (DownloadEngine._select_youtube_match).
+
+Replays the golden corpus in tests/data/match_corpus.json - the same cases
+the golden test pins - through the real selector with yt-dlp swapped for a
+canned result list, so only matching/scoring is timed. Reports the first
+pass (normalization caches cold) and the best of the repeat passes.
+
+    python scripts/bench_match.py [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import sunnify_engine  # noqa: E402
+
+CORPUS = ROOT / "tests" / "data" / "match_corpus.json"
+
+
+class _CannedYDL:
+    """Stands in for YoutubeDL: returns the current case's entries."""
+
+    entries: list = []
+
+    def __init__(self, _opts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def extract_info(self, _query, download=False):
+        return {"entries": _CannedYDL.entries}
+
+
+def _one_pass(cases, strict, loose) -> float:
+    t0 = time.perf_counter()
+    for case in cases:
+        _CannedYDL.entries = case["entries"]
+        engine = loose if case["loose_match"] else strict
+        engine._select_youtube_match(
+            "ytsearch5:q",
+            case["expected_duration_s"],
+            expected_title=case["expected_title"],
+            expected_artists=case["expected_artists"],
+        )
+    return time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="warm passes (default 20)")
+    args = parser.parse_args(argv)
+
+    cases = json.loads(CORPUS.read_text(encoding="utf-8"))
+    candidates = sum(len(c["entries"]) for c in cases)
+    sunnify_engine.log.disabled = True
+    sunnify_engine.YoutubeDL = _CannedYDL
+    strict = sunnify_engine.DownloadEngine()
+    loose = sunnify_engine.DownloadEngine(loose_match=True)
+
+    cold = _one_pass(cases, strict, loose)
+    warm = min(_one_pass(cases, strict, loose) for _ in range(max(args.repeat, 1)))
+    print(f"{len(cases)} searches, {candidates} candidates")
+    print(f"cold pass: {cold * 1000:8.2f} ms  ({cold / len(cases) * 1e6:7.1f} us/search)")
+    print(f"warm best: {warm * 1000:8.2f} ms  ({warm / len(cases) * 1e6:7.1f} us/search)")
+    logging.shutdown()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual benchmark
+    raise SystemExit(main())
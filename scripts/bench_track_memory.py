@@ -0,0 +1,236 @@
+"""Memory benchmark for holding a large playlist's tracks (TrackInfo, TrackTable).
+
+Builds --tracks tracks the way a playlist enumeration does - the first 100
+parsed from embed trackList entries, the rest from per-track embed entities
+(the spclient fallback) - through the real SpotifyEmbedAPI parsers, with the
+HTTP fetch swapped for freshly json-decoded payloads shaped like Spotify's.
+Each layout is measured with tracemalloc as what stays allocated once the
+payloads are gone, per track:
+
+    python scripts/bench_track_memory.py [--tracks 10000]
+
+dataclass + raw:  the old TrackInfo, a dict-backed dataclass holding a copy
+                  of its embed entity (and so everything nested in it)
+payload dicts:    the backend's list of frontend dicts, built per track
+TrackInfo:        the slotted TrackInfo, raw dropped (keep_raw=False)
+TrackTable:       the columnar table, repeated strings stored once
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import gc
+import json
+import random
+import string
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / "web-app" / "sunnify-backend"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from spotifydown_api import SpotifyEmbedAPI, TrackInfo, TrackTable  # noqa: E402
+
+EMBED_LIMIT = 100
+
+
+@dataclasses.dataclass
+class LegacyTrackInfo:
+    """TrackInfo as it was: no slots, and raw always kept."""
+
+    id: str
+    title: str
+    artists: str
+    album: str | None
+    release_date: str | None
+    cover_url: str | None
+    duration_ms: int | None
+    preview_url: str | None
+    raw: dict[str, object]
+    position: int | None = None
+
+
+def _base62(rng: random.Random, n: int = 22) -> str:
+    return "".join(rng.choices(string.ascii_letters + string.digits, k=n))
+
+
+def _hex(rng: random.Random, n: int = 40) -> str:
+    return "".join(rng.choices("0123456789abcdef", k=n))
+
+
+class _Corpus:
+    """JSON payloads for one synthetic playlist: ~150 artists on ~400
+    albums, so artist, album, cover and release date repeat like they do in
+    a real playlist."""
+
+    def __init__(self, tracks: int, seed: int = 7):
+        rng = random.Random(seed)
+        artists = [
+            {"name": f"Artist {_base62(rng, 6)}", "uri": f"spotify:artist:{_base62(rng)}"}
+            for _ in range(150)
+        ]
+        albums = []
+        for n in range(400):
+            cover = _hex(rng)
+            albums.append(
+                {
+                    "name": f"Album {n} {_base62(rng, 8)}",
+                    "artists": rng.sample(artists, rng.choice((1, 1, 1, 2))),
+                    "release": f"20{rng.randint(0, 24):02d}-{rng.randint(1, 12):02d}-01",
+                    "images": [
+                        {"url": f"https://i.scdn.co/image/ab67616d0000{w}{cover}", "maxWidth": w}
+                        for w in (64, 300, 640)
+                    ],
+                }
+            )
+        self.ids = [_base62(rng) for _ in range(tracks)]
+        self.payloads = []
+        for n, track_id in enumerate(self.ids):
+            album = rng.choice(albums)
+            preview = f"https://p.scdn.co/mp3-preview/{_hex(rng)}?cid={_hex(rng, 32)}"
+            title = f"Song {n} {_base62(rng, rng.randint(6, 24))}"
+            duration = rng.randint(120_000, 360_000)
+            if n < EMBED_LIMIT:
+                entry = {
+                    "uri": f"spotify:track:{track_id}",
+                    "uid": _hex(rng, 20),
+                    "title": title,
+                    "subtitle": ", ".join(a["name"] for a in album["artists"]),
+                    "isExplicit": rng.random() < 0.2,
+                    "isNineteenPlus": False,
+                    "duration": duration,
+                    "isPlayable": True,
+                    "audioPreview": {"format": "MP3_96", "url": preview},
+                    "entityType": "track",
+                }
+            else:
+                entry = {
+                    "type": "track",
+                    "name": title,
+                    "uri": f"spotify:track:{track_id}",
+                    "id": track_id,
+                    "title": title,
+                    "artists": album["artists"],
+                    "releaseDate": {"isoString": album["release"] + "T00:00:00Z"},
+                    "duration": duration,
+                    "isPlayable": True,
+                    "isExplicit": False,
+                    "audioPreview": {"url": preview, "format": "MP3_96"},
+                    "hasVideo": False,
+                    "relatedEntityUri": f"spotify:artist:{_base62(rng)}",
+                    "visualIdentity": {
+                        "backgroundBase": {"alpha": 255, "blue": 60, "green": 40, "red": 80},
+                        "textBase": {"alpha": 255, "blue": 255, "green": 255, "red": 255},
+                        "image": album["images"],
+                    },
+                }
+            self.payloads.append((json.dumps(entry), album["name"]))
+
+
+class _CorpusAPI(SpotifyEmbedAPI):
+    """The real parsers, fed from the corpus instead of the network."""
+
+    def __init__(self, corpus: _Corpus, keep_raw: bool):
+        super().__init__(session=object(), keep_raw=keep_raw)
+        self._corpus = corpus
+        self._n = 0
+
+    def _fetch_embed_data(self, url):
+        payload, _album = self._corpus.payloads[self._n]
+        return {"props": {"pageProps": {"state": {"data": {"entity": json.loads(payload)}}}}}
+
+    def _fetch_track_album_from_page(self, track_id):
+        return self._corpus.payloads[self._n][1]
+
+    def track(self, n: int) -> TrackInfo:
+        self._n = n
+        if n < EMBED_LIMIT:
+            info = self._parse_track(json.loads(self._corpus.payloads[n][0]), self._corpus.ids[n])
+            info.album = self._corpus.payloads[n][1]  # the spclient album backfill
+        else:
+            info = self._fetch_track_metadata(self._corpus.ids[n])
+        info.position = n + 1
+        return info
+
+
+def _legacy(corpus):
+    api = _CorpusAPI(corpus, keep_raw=True)
+    tracks = []
+    for n in range(len(corpus.ids)):
+        t = api.track(n)
+        fields = {f.name: getattr(t, f.name) for f in dataclasses.fields(LegacyTrackInfo)}
+        tracks.append(LegacyTrackInfo(**fields))
+    return tracks
+
+
+def _payload_dicts(corpus):
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app import _track_payload
+
+    api = _CorpusAPI(corpus, keep_raw=False)
+    return [_track_payload(api.track(n)) for n in range(len(corpus.ids))]
+
+
+def _slotted(corpus):
+    api = _CorpusAPI(corpus, keep_raw=False)
+    return [api.track(n) for n in range(len(corpus.ids))]
+
+
+def _table(corpus):
+    api = _CorpusAPI(corpus, keep_raw=False)
+    return TrackTable(api.track(n) for n in range(len(corpus.ids)))
+
+
+LAYOUTS = {
+    "dataclass + raw": _legacy,
+    "payload dicts": _payload_dicts,
+    "TrackInfo": _slotted,
+    "TrackTable": _table,
+}
+
+
+def measure(build, corpus) -> int:
+    """Bytes still allocated after build(corpus), its garbage collected."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        held = build(corpus)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del held
+    return after - before
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    corpus = _Corpus(args.tracks)
+    # warm-up: module imports and parser caches aren't the tracks' memory
+    for build in LAYOUTS.values():
+        build(_Corpus(EMBED_LIMIT + 10, seed=1))
+
+    print(f"{args.tracks} tracks ({min(args.tracks, EMBED_LIMIT)} from the playlist embed)")
+    print(f"{'layout':<18}{'bytes/track':>12}{'total MB':>10}")
+    baseline = None
+    for name, build in LAYOUTS.items():
+        nbytes = measure(build, corpus)
+        baseline = baseline or nbytes
+        per_track = nbytes / args.tracks
+        print(
+            f"{name:<18}{per_track:>12,.0f}{nbytes / 2**20:>10.2f}"
+            + ("" if nbytes == baseline else f"   {baseline / nbytes:.1f}x smaller")
+        )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual benchmark
+    raise SystemExit(main())
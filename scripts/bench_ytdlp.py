@@ -0,0 +1,121 @@
+"""Benchmark for per-thread YoutubeDL reuse (DownloadEngine._ytdlp).
+
+Drives download_track_audio over N tracks with yt-dlp's network side
+swapped for a local stub: searches go through a real SearchInfoExtractor
+that returns canned candidates, and "downloads" just create the file at
+the instance's current output template (so the landed-file check, which
+would reject an empty file, is skipped). Everything else - YoutubeDL
+construction, extractor registration, the FFmpeg postprocessor setup,
+match scoring - is the real code, so the gap between the two modes is the
+construction overhead the pool saves.
+
+    python scripts/bench_ytdlp.py [--tracks 500]
+
+fresh:  the pool is closed after every track, so each track builds its own
+        search and download instances (the behavior before pooling)
+pooled: one search and one download instance per thread, re-bound per track
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from yt_dlp import YoutubeDL  # noqa: E402
+from yt_dlp.extractor.common import SearchInfoExtractor  # noqa: E402
+
+import sunnify_engine  # noqa: E402
+
+
+class StubSearchIE(SearchInfoExtractor):
+    """`stubsearchN:query` -> N flat candidates titled after the query."""
+
+    IE_NAME = "stubsearch"
+    _SEARCH_KEY = "stubsearch"
+    _MAX_RESULTS = 5
+
+    def _search_results(self, query):
+        title = query.removesuffix(" audio")
+        for n in range(self._MAX_RESULTS):
+            yield {
+                "_type": "url",
+                "id": f"v{n}",
+                "url": f"stub:v{n}",
+                "title": title if n == 0 else f"{title} (live {n})",
+                "duration": 200 + 40 * n,
+            }
+
+
+class StubYDL(YoutubeDL):
+    """A real YoutubeDL whose searches hit StubSearchIE and whose downloads
+    only touch the output file."""
+
+    def __init__(self, params=None, auto_init=True):
+        super().__init__(params, auto_init)
+        self.add_info_extractor(StubSearchIE())
+
+    def extract_info(self, url, download=True, *args, **kwargs):
+        if url.startswith("ytsearch"):
+            query = "stubsearch" + url[len("ytsearch") :]
+            return super().extract_info(query, download=False, ie_key="StubSearch")
+        target = self.params["outtmpl"]["default"].replace("%(ext)s", "mp3")
+        Path(target).touch()
+        return {"id": url}
+
+
+def _run(engine, tracks: int, folder: str, fresh: bool) -> float:
+    t0 = time.perf_counter()
+    for n in range(tracks):
+        title, artists = f"Song {n}", f"Artist {n}"
+        dest = os.path.join(folder, f"{n:04d}. {title} - {artists}.mp3")
+        engine.download_track_audio(
+            f"ytsearch1:{title} {artists} audio",
+            dest,
+            expected_duration_s=200,
+            expected_title=title,
+            expected_artists=artists,
+        )
+        if fresh:
+            engine._ytdlp.close()
+    engine._ytdlp.close()
+    return time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=500, help="tracks per mode (default 500)")
+    args = parser.parse_args(argv)
+    tracks = max(args.tracks, 1)
+
+    sunnify_engine.log.disabled = True
+    sunnify_engine.YoutubeDL = StubYDL
+    sunnify_engine.get_ffmpeg_path = lambda: "ffmpeg"
+
+    results = {}
+    for mode in ("fresh", "pooled"):
+        engine = sunnify_engine.DownloadEngine()
+        engine._check_landed = lambda *_a: None
+        with tempfile.TemporaryDirectory() as folder:
+            elapsed = _run(engine, tracks, folder, fresh=mode == "fresh")
+        results[mode] = elapsed
+        print(
+            f"{mode:>6}: {elapsed:7.2f} s  ({elapsed / tracks * 1000:6.2f} ms/track, "
+            f"{engine._ytdlp.created} instances)"
+        )
+    saved = (results["fresh"] - results["pooled"]) / tracks * 1000
+    print(f" saved: {saved:6.2f} ms/track over {tracks} tracks")
+    logging.shutdown()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual benchmark
+    raise SystemExit(main())
@@ -6,12 +6,20 @@ Tests:
 3. oEmbed API (quick validation)
 4. Track-page album scrape (og:description via facebookexternalhit UA, v2.0.9)
 5. YouTube raw reachability via yt-dlp (ytsearch1)
-6. YouTube real download selector (ytsearch5 + MusicScraper._select_youtube_match,
+6. YouTube real download selector (ytsearch5 + DownloadEngine._select_youtube_match,
    i.e. the actual title/artist/duration matching the app uses since v2.0.9)
+
+    python scripts/check_api_status.py [--record FILE | --replay FILE]
+
+--record saves every response the probes get to a cassette (sunnify_cassette);
+--replay runs the probes against it offline, e.g. to time parsing and matching
+without the network's noise.
 """
 
 from __future__ import annotations
 
+import argparse
+import contextlib
 import json
 import sys
 from dataclasses import dataclass
@@ -24,10 +32,6 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-# Import the real download selector so the YouTube check exercises the same
-# path the app does (ytsearch5 + title/artist/duration filter), not a stale
-# ytsearch1 top-hit. Bare instance avoids spinning up the QThread/Qt stack.
-from Spotify_Downloader import MusicScraper  # noqa: E402
 from spotifydown_api import (  # noqa: E402
     PlaylistClient,
     SpotifyDownAPIError,
@@ -35,6 +39,11 @@ from spotifydown_api import (  # noqa: E402
     TrackInfo,
 )
 
+# Import the real download selector so the YouTube check exercises the same
+# path the app does (ytsearch5 + title/artist/duration filter), not a stale
+# ytsearch1 top-hit. The engine is Qt-free, so this never loads the GUI stack.
+from sunnify_engine import DownloadEngine  # noqa: E402
+
 
 @dataclass
 class EndpointResult:
@@ -186,9 +195,7 @@ def check_youtube_match(track: TrackInfo) -> EndpointResult:
     rejects everything (or vice versa).
     """
     search = f"ytsearch5:{track.title} {track.artists} audio"
-    # Bare instance: skip QThread.__init__ (no Qt), the selector only needs the
-    # class's static/class methods + duration constants.
-    matcher = MusicScraper.__new__(MusicScraper)
+    matcher = DownloadEngine()
     duration_s = (track.duration_ms / 1000) if track.duration_ms else None
     try:
         url = matcher._select_youtube_match(
@@ -313,7 +320,32 @@ def check_oembed_validation(client: PlaylistClient, playlist_id: str) -> Endpoin
         )
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="FILE", help="save every response to a cassette")
+    group.add_argument("--replay", metavar="FILE", help="probe a saved cassette, offline")
+    parser.add_argument(
+        "--latency",
+        default="recorded",
+        help="with --replay: 'recorded' or a fixed number of seconds per response",
+    )
+    args = parser.parse_args(argv)
+    if args.record or args.replay:
+        import sunnify_cassette
+
+        if args.replay:
+            latency = args.latency if args.latency == "recorded" else float(args.latency)
+            cassette = sunnify_cassette.Cassette.replay(args.replay, latency)
+        else:
+            cassette = sunnify_cassette.Cassette.record(args.record)
+    else:
+        cassette = contextlib.nullcontext()
+    with cassette:
+        return _probe_all()
+
+
+def _probe_all() -> int:
     playlist_id = "37i9dQZF1DXcBWIGoYBM5M"  # Spotify's "Today's Top Hits"
     large_playlist_id = "37i9dQZF1DX5Ejj0EkURtP"  # "All Out 2010s" - 150 tracks
     query = "Rick Astley Never Gonna Give You Up"
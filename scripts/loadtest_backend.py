@@ -0,0 +1,445 @@
+"""Load test for the Flask metadata backend (web-app/sunnify-backend/app.py).
+
+Starts a local Spotify stand-in that serves embed pages, spclient playlist
+JSON, per-track embeds and track pages in the shapes spotifydown_api parses,
+each after --latency-ms. Then, per playlist size, runs a fresh backend in a
+child process with its Spotify URLs pointed at the stand-in and drives
+concurrent POST /api/scrape-playlist requests at it.
+
+    python scripts/loadtest_backend.py [--sizes 10,100,2000] [--requests 8]
+        [--concurrency 4] [--latency-ms 50] [--server gunicorn|werkzeug]
+
+The report gives requests/sec, p50/p99 latency and the backend's peak RSS
+against the free tier's 512 MB (--budget-mb). The exit code is 1 when a
+size errored or went over budget. The backend runs under gunicorn with one
+sync worker, like render.yaml, or under werkzeug's threaded dev server when
+gunicorn isn't installed. The stand-in's two hosts (localhost for
+open.spotify.com, 127.0.0.1 for spclient) keep the production per-host
+budgets from sunnify_http.
+
+A 2,000-track playlist costs the backend ~3,800 stand-in requests, so one
+request takes tens of seconds at the default latency. Under gunicorn its
+30 s worker timeout applies, as it does in production.
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / "web-app" / "sunnify-backend"
+for _path in (ROOT, BACKEND_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+import requests  # noqa: E402
+
+from sunnify_timing import percentile  # noqa: E402
+
+_TOKEN_TTL_MS = 3_600_000
+
+
+def playlist_id(tracks: int) -> str:
+    """A valid 22-character playlist id that encodes its size."""
+    return f"loadtest{tracks:014d}"
+
+
+def _track_id(n: int) -> str:
+    return f"loadtrack{n:013d}"
+
+
+def _page(entity: dict) -> bytes:
+    """An embed page: the entity and an anonymous token in __NEXT_DATA__."""
+    data = {
+        "props": {
+            "pageProps": {
+                "state": {
+                    "data": {"entity": entity},
+                    "settings": {
+                        "session": {
+                            "accessToken": "loadtest-token",
+                            "accessTokenExpirationTimestampMs": int(time.time() * 1000)
+                            + _TOKEN_TTL_MS,
+                        }
+                    },
+                }
+            }
+        }
+    }
+    return (
+        "<!DOCTYPE html><html><head><title>Spotify Embed</title></head><body>"
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(data)}</script></body></html>"
+    ).encode()
+
+
+def _list_entry(n: int) -> dict:
+    tid = _track_id(n)
+    return {
+        "uri": f"spotify:track:{tid}",
+        "uid": f"uid{n:013d}",
+        "title": f"Load Song {n}",
+        "subtitle": f"Load Artist {n % 97}",
+        "duration": 180_000 + n % 120_000,
+        "isExplicit": False,
+        "isPlayable": True,
+        "entityType": "track",
+        "audioPreview": {"url": f"https://p.scdn.co/mp3-preview/{tid}", "format": "MP3_96"},
+    }
+
+
+def playlist_page(tracks: int) -> bytes:
+    """The playlist embed: metadata and (like Spotify's) the first 100 tracks."""
+    return _page(
+        {
+            "type": "playlist",
+            "name": f"Load test ({tracks} tracks)",
+            "subtitle": "sunnify",
+            "uri": f"spotify:playlist:{playlist_id(tracks)}",
+            "coverArt": {
+                "sources": [
+                    {"url": "https://i.scdn.co/image/loadtest300", "width": 300, "height": 300},
+                    {"url": "https://i.scdn.co/image/loadtest640", "width": 640, "height": 640},
+                ]
+            },
+            "trackList": [_list_entry(n) for n in range(min(tracks, 100))],
+        }
+    )
+
+
+def spclient_playlist(tracks: int) -> bytes:
+    return json.dumps(
+        {
+            "length": tracks,
+            "contents": {
+                "items": [
+                    {
+                        "uri": f"spotify:track:{_track_id(n)}",
+                        "attributes": {"timestamp": "1700000000000", "formatAttributes": []},
+                    }
+                    for n in range(tracks)
+                ]
+            },
+        }
+    ).encode()
+
+
+def track_page(track_id: str) -> bytes:
+    """The single-track embed spotifydown_api fetches past the first 100."""
+    return _page(
+        {
+            "type": "track",
+            "name": f"Load Song {track_id}",
+            "uri": f"spotify:track:{track_id}",
+            "artists": [{"name": "Load Artist", "uri": "spotify:artist:loadartist0000000000000"}],
+            "releaseDate": {"isoString": "2024-01-01T00:00:00Z"},
+            "duration": 200_000,
+            "audioPreview": {"url": f"https://p.scdn.co/mp3-preview/{track_id}"},
+            "visualIdentity": {
+                "image": [
+                    {"url": f"https://i.scdn.co/image/{track_id}64", "maxWidth": 64},
+                    {"url": f"https://i.scdn.co/image/{track_id}300", "maxWidth": 300},
+                ]
+            },
+        }
+    )
+
+
+def social_page(track_id: str) -> bytes:
+    """The /track/ page the album name is scraped from (og:description)."""
+    return (
+        "<!DOCTYPE html><html><head>"
+        f'<meta property="og:title" content="Load Song {track_id}">'
+        '<meta property="og:description" content="Load Artist · Load Album · Song · 2024">'
+        "</head><body></body></html>"
+    ).encode()
+
+
+class StandIn(ThreadingHTTPServer):
+    """Spotify's embed, track page and spclient endpoints on one local port,
+    each answering after `latency_s`."""
+
+    daemon_threads = True
+
+    def __init__(self, latency_s: float):
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.latency_s = latency_s
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._playlists: dict[str, tuple[bytes, bytes]] = {}
+
+    def playlist(self, item_id: str) -> tuple[bytes, bytes] | None:
+        """(embed page, spclient json) for a loadtest id, built once."""
+        if not item_id.startswith("loadtest"):
+            return None
+        with self._lock:
+            if item_id not in self._playlists:
+                tracks = int(item_id[len("loadtest") :])
+                self._playlists[item_id] = (playlist_page(tracks), spclient_playlist(tracks))
+            return self._playlists[item_id]
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real hosts
+    server: StandIn
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency_s)
+        segments = [s for s in urlsplit(self.path).path.split("/") if s]
+        body, ctype = None, "text/html; charset=utf-8"
+        if segments[:2] == ["embed", "playlist"] and len(segments) == 3:
+            found = self.server.playlist(segments[2])
+            body = found and found[0]
+        elif segments[:3] == ["playlist", "v2", "playlist"] and len(segments) == 4:
+            found = self.server.playlist(segments[3])
+            body, ctype = found and found[1], "application/json"
+        elif segments[:2] == ["embed", "track"] and len(segments) == 3:
+            body = track_page(segments[2])
+        elif segments[:1] == ["track"] and len(segments) == 2:
+            body = social_page(segments[1])
+        status = 200 if body else 404
+        body = body or b"not found"
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _point_backend_at(standin_port: int) -> None:
+    """Send the backend's Spotify traffic to the stand-in: localhost plays
+    open.spotify.com and 127.0.0.1 plays spclient, each with its real
+    per-host budget. Runs in the backend process before its first request."""
+    import sunnify_http
+    from spotifydown_api import SpotifyEmbedAPI
+
+    limits = sunnify_http.HOST_LIMITS
+    sunnify_http.HOST_LIMITS = {
+        "localhost": limits["open.spotify.com"],
+        "127.0.0.1": limits["spclient.wg.spotify.com"],
+    }
+    web = f"http://localhost:{standin_port}"
+    SpotifyEmbedAPI._EMBED_PLAYLIST_URL = web + "/embed/playlist/{playlist_id}"
+    SpotifyEmbedAPI._EMBED_ALBUM_URL = web + "/embed/album/{playlist_id}"
+    SpotifyEmbedAPI._EMBED_TRACK_URL = web + "/embed/track/{track_id}"
+    SpotifyEmbedAPI._TRACK_PAGE_URL = web + "/track/{track_id}"
+    SpotifyEmbedAPI._OEMBED_URL = web + "/oembed"
+    SpotifyEmbedAPI._SPCLIENT_URL = (
+        f"http://127.0.0.1:{standin_port}" + "/playlist/v2/playlist/{playlist_id}"
+    )
+
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process or any child it reaped (the gunicorn worker)."""
+    import resource  # posix only, like gunicorn
+
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # bytes on macOS, KiB elsewhere
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def serve_backend(port: int, standin_port: int, server: str) -> None:
+    """The child process: the real app against the stand-in. Prints its peak
+    RSS as one JSON line on stdout when SIGTERM stops it."""
+    _point_backend_at(standin_port)
+    from app import app
+
+    master = os.getpid()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        if server == "gunicorn":
+            from gunicorn.app.base import BaseApplication
+
+            class _Gunicorn(BaseApplication):
+                def load_config(self):
+                    # render.yaml's startCommand: default sync worker, one of them
+                    self.cfg.set("bind", f"127.0.0.1:{port}")
+                    self.cfg.set("workers", 1)
+                    self.cfg.set("loglevel", "warning")
+
+                def load(self):
+                    return app
+
+            _Gunicorn().run()
+        else:
+            import logging
+
+            from werkzeug.serving import make_server
+
+            logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request lines
+
+            make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+    finally:
+        if os.getpid() == master:  # not a forked gunicorn worker unwinding
+            print(json.dumps({"peak_rss_mb": round(_peak_rss_mb(), 1)}), flush=True)
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_backend(standin_port: int, server: str) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            __file__,
+            "--serve-backend",
+            str(port),
+            "--standin-port",
+            str(standin_port),
+            "--server",
+            server,
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"backend exited with {proc.returncode} before serving")
+        try:
+            if requests.get(base + "/api/health", timeout=1).status_code == 200:
+                return proc, base
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("backend did not answer /api/health within 30s")
+
+
+def _stop_backend(proc: subprocess.Popen) -> float | None:
+    proc.send_signal(signal.SIGTERM)
+    try:
+        out, _ = proc.communicate(timeout=60)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        return None
+    for line in reversed(out.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)["peak_rss_mb"]
+    return None
+
+
+def _scrape(base: str, tracks: int) -> tuple[float, str | None]:
+    """One POST /api/scrape-playlist: (seconds, error or None)."""
+    url = f"https://open.spotify.com/playlist/{playlist_id(tracks)}"
+    started = time.perf_counter()
+    try:
+        resp = requests.post(base + "/api/scrape-playlist", json={"playlistUrl": url}, timeout=300)
+    except requests.RequestException as exc:
+        return time.perf_counter() - started, type(exc).__name__
+    elapsed = time.perf_counter() - started
+    if resp.status_code != 200:
+        return elapsed, f"HTTP {resp.status_code}"
+    got = len(resp.json()["data"]["tracks"])
+    return elapsed, None if got == tracks else f"{got}/{tracks} tracks"
+
+
+def run_size(standin: StandIn, tracks: int, total: int, concurrency: int, server: str) -> dict:
+    proc, base = _start_backend(standin.server_address[1], server)
+    try:
+        _scrape(base, min(tracks, 10))  # import and connection warm-up, not timed
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(lambda _n: _scrape(base, tracks), range(total)))
+        wall = time.perf_counter() - started
+    finally:
+        peak = _stop_backend(proc)
+    latencies = [seconds * 1000 for seconds, _error in results]
+    errors = [error for _seconds, error in results if error]
+    return {
+        "tracks": tracks,
+        "requests": total,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "rps": total / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "peak_rss_mb": peak,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", default="10,100,2000", help="playlist sizes in tracks (default 10,100,2000)"
+    )
+    parser.add_argument("--requests", type=int, default=8, help="requests per size (default 8)")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight (default 4)")
+    parser.add_argument(
+        "--latency-ms", type=float, default=50.0, help="stand-in latency per request (default 50)"
+    )
+    parser.add_argument("--budget-mb", type=float, default=512.0, help="RSS budget (default 512)")
+    parser.add_argument(
+        "--server",
+        choices=("gunicorn", "werkzeug"),
+        default=None,
+        help="backend server (default: gunicorn if installed, like production)",
+    )
+    parser.add_argument("--serve-backend", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--standin-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.server is None:
+        import importlib.util
+
+        args.server = "gunicorn" if importlib.util.find_spec("gunicorn") else "werkzeug"
+    if args.serve_backend is not None:
+        serve_backend(args.serve_backend, args.standin_port, args.server)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    standin = StandIn(args.latency_ms / 1000)
+    threading.Thread(target=standin.serve_forever, daemon=True).start()
+    print(
+        f"backend on {args.server}, stand-in latency {args.latency_ms:g} ms, "
+        f"{args.requests} requests x {args.concurrency} in flight per size"
+    )
+    print(f"{'tracks':>7} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'peak RSS':>10}")
+    failed = False
+    try:
+        for tracks in sizes:
+            before = standin.requests
+            row = run_size(standin, tracks, args.requests, args.concurrency, args.server)
+            peak = row["peak_rss_mb"]
+            over = peak is None or peak > args.budget_mb
+            failed = failed or over or row["errors"] > 0
+            rss = "unknown" if peak is None else f"{peak:.0f} MB"
+            print(
+                f"{tracks:>7} {row['rps']:>8.2f} {row['p50_ms']:>9.0f} {row['p99_ms']:>9.0f} "
+                f"{row['errors']:>7} {rss:>10}{'  OVER BUDGET' if over else ''}"
+                f"{'  first error: ' + row['first_error'] if row['first_error'] else ''}"
+                f"  ({standin.requests - before} upstream requests)"
+            )
+    finally:
+        standin.shutdown()
+    print(f"budget {args.budget_mb:g} MB: {'FAILED' if failed else 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual load test
+    raise SystemExit(main())
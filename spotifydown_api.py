@@ -16,12 +16,18 @@ import logging
 import re
 import time
 import unicodedata
-from collections.abc import Callable, Iterator, Sequence
-from dataclasses import dataclass
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
 from typing import Any, TypeVar
+from urllib.parse import urlsplit
 
 import requests
 
+import sunnify_http
+import sunnify_metrics
+from sunnify_concurrency import AdaptiveLimit, run_adaptive
+
 T = TypeVar("T")
 
 # child of the desktop app's "sunnify" logger, so spotify-side retries/429s land
@@ -51,6 +57,18 @@ class RateLimitError(SpotifyDownAPIError):
     """Rate limited by Spotify - should back off before retrying."""
 
 
+def _endpoint_label(url: str) -> str:
+    """The metrics label for a Spotify URL: "spclient", "oembed", "track" or
+    "embed_<type>", never the id (one label per endpoint, not per page)."""
+    parts = urlsplit(url)
+    if parts.hostname and parts.hostname.startswith("spclient."):
+        return "spclient"
+    segments = [s for s in parts.path.split("/") if s]
+    if segments[:1] == ["embed"] and len(segments) > 1:
+        return f"embed_{segments[1]}"
+    return segments[0] if segments else "root"
+
+
 def retry_on_network_error(
     max_attempts: int = 3,
     backoff_factor: float = 1.0,
@@ -83,6 +101,7 @@ def retry_on_network_error(
                             max_attempts,
                             wait_time,
                         )
+                        sunnify_metrics.RETRIES.inc(function=func.__name__)
                         time.sleep(wait_time)
             raise last_exception  # type: ignore
 
@@ -100,7 +119,7 @@ class PlaylistInfo:
     track_count: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackInfo:
     id: str
     title: str
@@ -110,7 +129,10 @@ class TrackInfo:
     cover_url: str | None
     duration_ms: int | None
     preview_url: str | None
-    raw: dict[str, object]
+    # The embed dict the track was parsed from. None unless the client was
+    # built with keep_raw=True: nothing in sunnify reads it, and on a 10k-
+    # track playlist the copies outweigh everything else a track holds.
+    raw: dict[str, object] | None = None
     # 1-based position in the playlist as Spotify presents it. None for tracks
     # not yielded from a playlist context (e.g. single-track downloads), or as
     # a fallback when the spclient ordering couldn't be resolved. Callers that
@@ -124,6 +146,101 @@ class TrackInfo:
         return self.id
 
 
+class TrackTable:
+    """Many tracks stored column by column, for holding a whole playlist.
+
+    A TrackInfo costs an object plus a str per field. Here each field is a
+    column: durations and positions sit in int arrays, and the strings a
+    playlist repeats (artists, album, release date, cover) are stored once
+    and referenced by index. Indexing and iterating build TrackInfo objects
+    on the fly; `raw` is not kept. append() takes TrackInfo-typed fields
+    only (str ids and titles, str-or-None text, int-or-None numbers) and
+    raises TypeError naming the first field that isn't.
+    """
+
+    _SHARED = ("artists", "album", "release_date", "cover_url")
+    _TEXT = ("id", "title")
+    _OPTIONAL_TEXT = ("artists", "album", "release_date", "cover_url", "preview_url")
+    _NUMBERS = ("duration_ms", "position")
+
+    def __init__(self, tracks: Iterable[TrackInfo] = ()):
+        self._ids: list[str] = []
+        self._titles: list[str] = []
+        self._previews: list[str | None] = []
+        self._durations = array("i")  # -1 for None
+        self._positions = array("i")  # 0 for None (positions are 1-based)
+        self._refs = {name: array("I") for name in self._SHARED}
+        self._strings: list[str | None] = [None]
+        self._string_refs: dict[str | None, int] = {None: 0}
+        self.extend(tracks)
+
+    def _ref(self, value: str | None) -> int:
+        ref = self._string_refs.get(value)
+        if ref is None:
+            ref = self._string_refs[value] = len(self._strings)
+            self._strings.append(value)
+        return ref
+
+    @classmethod
+    def _check(cls, track: TrackInfo) -> None:
+        for names, types, wanted in (
+            (cls._TEXT, str, "str"),
+            (cls._OPTIONAL_TEXT, (str, type(None)), "str or None"),
+            (cls._NUMBERS, (int, type(None)), "int or None"),
+        ):
+            for name in names:
+                value = getattr(track, name)
+                if not isinstance(value, types):
+                    raise TypeError(
+                        f"TrackTable needs {name} as {wanted}, got {type(value).__name__}"
+                    )
+
+    def append(self, track: TrackInfo) -> None:
+        self._check(track)
+        self._ids.append(track.id)
+        self._titles.append(track.title)
+        self._previews.append(track.preview_url)
+        self._durations.append(-1 if track.duration_ms is None else track.duration_ms)
+        self._positions.append(track.position or 0)
+        for name, refs in self._refs.items():
+            refs.append(self._ref(getattr(track, name)))
+
+    def extend(self, tracks: Iterable[TrackInfo]) -> None:
+        for track in tracks:
+            self.append(track)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _track(self, i: int) -> TrackInfo:
+        strings, refs = self._strings, self._refs
+        duration = self._durations[i]
+        return TrackInfo(
+            id=self._ids[i],
+            title=self._titles[i],
+            artists=strings[refs["artists"][i]] or "",
+            album=strings[refs["album"][i]],
+            release_date=strings[refs["release_date"][i]],
+            cover_url=strings[refs["cover_url"][i]],
+            duration_ms=None if duration < 0 else duration,
+            preview_url=self._previews[i],
+            position=self._positions[i] or None,
+        )
+
+    def __getitem__(self, index: int | slice) -> TrackInfo | list[TrackInfo]:
+        if isinstance(index, slice):
+            return [self._track(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("track index out of range")
+        return self._track(index)
+
+    def __iter__(self) -> Iterator[TrackInfo]:
+        for i in range(len(self)):
+            yield self._track(i)
+
+
 class SpotifyEmbedAPI:
     """Fetch playlist data from Spotify's embed page.
 
@@ -146,8 +263,19 @@ class SpotifyEmbedAPI:
     _SPCLIENT_URL = "https://spclient.wg.spotify.com/playlist/v2/playlist/{playlist_id}"
     _NEXT_DATA_PATTERN = re.compile(r'<script id="__NEXT_DATA__"[^>]*>([^<]+)</script>')
 
-    def __init__(self, *, session: requests.Session | None = None) -> None:
-        self._session = session or requests.Session()
+    def __init__(
+        self,
+        *,
+        session: requests.Session | None = None,
+        scheduler: sunnify_http.HttpScheduler | None = None,
+        keep_raw: bool = False,
+    ) -> None:
+        # every request takes a per-host slot on the shared scheduler (and,
+        # unless a session is passed, its keep-alive pool)
+        self._http = scheduler or sunnify_http.shared()
+        self._session = session or self._http.session
+        # TrackInfo.raw: the parsed embed dict, only for callers that ask
+        self._keep_raw = keep_raw
         self._cached_token: str | None = None
         self._token_expiry: float = 0
         # Per-instance album cache (track_id -> album name or None). FIFO-
@@ -157,6 +285,8 @@ class SpotifyEmbedAPI:
         # because the lru_cache decorator on a method keeps self alive for
         # the lifetime of the process (B019).
         self._album_cache: dict[str, str | None] = {}
+        # 429s seen by this client; the metadata pool backs off when it moves
+        self._rate_limited = 0
 
     @staticmethod
     def _deep_find(data: dict, key: str, max_depth: int = 6) -> dict | None:
@@ -182,6 +312,17 @@ class SpotifyEmbedAPI:
             result = result.get(key)
         return result
 
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        endpoint = _endpoint_label(url)
+        try:
+            with self._http.slot(url, "metadata"):
+                response = self._session.get(url, **kwargs)
+        except requests.RequestException:
+            sunnify_metrics.SPOTIFY_REQUESTS.inc(endpoint=endpoint, status="error")
+            raise
+        sunnify_metrics.SPOTIFY_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+        return response
+
     def _headers(self) -> dict[str, str]:
         return {
             "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -203,7 +344,7 @@ class SpotifyEmbedAPI:
             ExtractionError: When page structure is unexpected (not retryable)
         """
         try:
-            response = self._session.get(url, headers=self._headers(), timeout=30)
+            response = self._get(url, headers=self._headers(), timeout=30)
         except (requests.Timeout, requests.ConnectionError) as exc:
             raise NetworkError(f"Network error fetching embed page: {exc}") from exc
         except requests.RequestException as exc:
@@ -211,6 +352,7 @@ class SpotifyEmbedAPI:
 
         if response.status_code == 429:
             log.warning("spotify rate-limited (429): %s", url)
+            self._rate_limited += 1
             raise RateLimitError("Rate limited by Spotify - please wait before retrying")
         if response.status_code in (401, 403):
             raise ExtractionError(
@@ -280,7 +422,9 @@ class SpotifyEmbedAPI:
     def _get_access_token(self, playlist_id: str) -> str | None:
         """Get a valid access token, refreshing if needed."""
         if self._cached_token and time.time() < self._token_expiry - 60:
+            sunnify_metrics.CACHE_LOOKUPS.inc(cache="token", result="hit")
             return self._cached_token
+        sunnify_metrics.CACHE_LOOKUPS.inc(cache="token", result="miss")
 
         # Fetch embed page to get fresh token
         url = self._EMBED_PLAYLIST_URL.format(playlist_id=playlist_id)
@@ -338,7 +482,7 @@ class SpotifyEmbedAPI:
                 if token:
                     spclient_url = self._SPCLIENT_URL.format(playlist_id=playlist_id)
                     headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-                    resp = self._session.get(spclient_url, headers=headers, timeout=10)
+                    resp = self._get(spclient_url, headers=headers, timeout=10)
                     if resp.status_code == 200:
                         spc_data = resp.json()
                         track_count = spc_data.get("length", track_count)
@@ -358,11 +502,16 @@ class SpotifyEmbedAPI:
         playlist_id: str,
         content_type: str = "playlist",
         skip_ids: frozenset[str] | set[str] | None = None,
+        limit: AdaptiveLimit | None = None,
     ) -> Iterator[TrackInfo]:
         """Iterate over playlist or album tracks.
 
         `content_type` is "playlist" (default) or "album".
 
+        `limit` sizes the per-track metadata pool for large playlists (see
+        sunnify_concurrency); by default it starts at 4 fetches and adapts
+        between 1 and 16.
+
         `skip_ids` is a set of Spotify track IDs already downloaded in a prior
         run. Matching tracks are skipped before any per-track metadata fetch,
         so resuming a large playlist does not re-pay the rate-limited
@@ -425,7 +574,7 @@ class SpotifyEmbedAPI:
         try:
             spclient_url = self._SPCLIENT_URL.format(playlist_id=playlist_id)
             headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-            resp = self._session.get(spclient_url, headers=headers, timeout=30)
+            resp = self._get(spclient_url, headers=headers, timeout=30)
 
             if resp.status_code != 200:
                 return
@@ -476,22 +625,26 @@ class SpotifyEmbedAPI:
             # available. The downloader uses TrackInfo.position to write the
             # right number into the filename / TRCK tag, so this completion
             # ordering is invisible in the final output.
-            import concurrent.futures as _cf
-
-            # Manual executor lifecycle so GeneratorExit (caller break on cancel)
-            # can shut the pool down with cancel_futures=True instead of blocking
-            # on ~700 pending HTTP fetches inside the implicit __exit__.
-            pool = _cf.ThreadPoolExecutor(max_workers=4, thread_name_prefix="sunnify-meta")
+            #
+            # The pool's size adapts: it grows while fetches/sec improve and
+            # halves when Spotify answers 429. Closing the generator (caller
+            # break on cancel) stops it taking new fetches instead of blocking
+            # on ~700 pending ones.
+            if limit is None:
+                limit = AdaptiveLimit(4, 1, 16, name="metadata", window_s=2.0)
+            seen_429s = self._rate_limited
+            outcomes = run_adaptive(
+                pending,
+                lambda job: self._fetch_track_metadata(job[0]),
+                limit,
+                name="sunnify-meta",
+            )
             try:
-                future_to_info = {
-                    pool.submit(self._fetch_track_metadata, tid): (tid, uri) for tid, uri in pending
-                }
-                for future in _cf.as_completed(future_to_info):
-                    track_id, uri = future_to_info[future]
-                    try:
-                        info = future.result()
-                    except Exception:
-                        info = None
+                for (track_id, uri), info, _error in outcomes:
+                    if self._rate_limited != seen_429s:
+                        seen_429s = self._rate_limited
+                        limit.throttled()
+                    limit.record(ok=info is not None)
                     if info is None:
                         info = TrackInfo(
                             id=track_id,
@@ -502,12 +655,12 @@ class SpotifyEmbedAPI:
                             cover_url=None,
                             duration_ms=None,
                             preview_url=None,
-                            raw={"uri": uri},
+                            raw={"uri": uri} if self._keep_raw else None,
                         )
                     info.position = position_map.get(track_id)
                     yield info
             finally:
-                pool.shutdown(wait=False, cancel_futures=True)
+                outcomes.close()
 
         except Exception:
             pass  # spclient fallback failed, just return what we have
@@ -538,7 +691,7 @@ class SpotifyEmbedAPI:
             cover_url=None,
             duration_ms=int(duration_ms) if duration_ms else None,
             preview_url=preview_url,
-            raw=dict(track),
+            raw=dict(track) if self._keep_raw else None,
         )
 
     # og:description on Spotify's social-share page is the canonical source
@@ -597,7 +750,9 @@ class SpotifyEmbedAPI:
         errors don't silently drop the album tag for that track.
         """
         if track_id in self._album_cache:
+            sunnify_metrics.CACHE_LOOKUPS.inc(cache="album", result="hit")
             return self._album_cache[track_id]
+        sunnify_metrics.CACHE_LOOKUPS.inc(cache="album", result="miss")
 
         @retry_on_network_error(
             max_attempts=3,
@@ -611,7 +766,7 @@ class SpotifyEmbedAPI:
             headers = dict(self._headers())
             headers["user-agent"] = self._SOCIAL_CRAWLER_UA
             try:
-                resp = self._session.get(url, headers=headers, timeout=15)
+                resp = self._get(url, headers=headers, timeout=15)
             except (requests.Timeout, requests.ConnectionError) as exc:
                 raise NetworkError(f"Network error fetching track page: {exc}") from exc
             except requests.RequestException:
@@ -693,14 +848,14 @@ class SpotifyEmbedAPI:
             cover_url=cover_url,
             duration_ms=entity.get("duration"),
             preview_url=preview_url,
-            raw=dict(entity),
+            raw=dict(entity) if self._keep_raw else None,
         )
 
     def validate_playlist(self, playlist_id: str) -> bool:
         """Quick validation using oEmbed API (no full data fetch)."""
         try:
             params = {"url": f"https://open.spotify.com/playlist/{playlist_id}"}
-            resp = self._session.get(self._OEMBED_URL, params=params, timeout=10)
+            resp = self._get(self._OEMBED_URL, params=params, timeout=10)
             return resp.status_code == 200
         except Exception:
             return False
@@ -793,9 +948,14 @@ class PlaylistClient:
         *,
         session: requests.Session | None = None,
         base_urls: Sequence[str] | None = None,  # Ignored - kept for compatibility
+        scheduler: sunnify_http.HttpScheduler | None = None,
+        keep_raw: bool = False,
     ) -> None:
-        self._session = session or requests.Session()
-        self._embed_api = SpotifyEmbedAPI(session=self._session)
+        self._http = scheduler or sunnify_http.shared()
+        self._session = session or self._http.session
+        self._embed_api = SpotifyEmbedAPI(
+            session=self._session, scheduler=self._http, keep_raw=keep_raw
+        )
 
     def get_playlist_metadata(
         self, playlist_id: str, content_type: str = "playlist"
@@ -808,15 +968,17 @@ class PlaylistClient:
         playlist_id: str,
         content_type: str = "playlist",
         skip_ids: frozenset[str] | set[str] | None = None,
+        limit: AdaptiveLimit | None = None,
     ) -> Iterator[TrackInfo]:
         """Iterate over all playlist or album tracks (`content_type`: playlist | album).
 
         For large playlists (>100 tracks), automatically uses fallback
         methods to retrieve complete track list. `skip_ids` omits tracks
-        already downloaded in a prior run (resume support).
+        already downloaded in a prior run (resume support); `limit` sizes
+        the metadata pool those fallbacks fetch on.
         """
         yield from self._embed_api.iter_playlist_tracks(
-            playlist_id, content_type=content_type, skip_ids=skip_ids
+            playlist_id, content_type=content_type, skip_ids=skip_ids, limit=limit
         )
 
     def validate_playlist(self, playlist_id: str) -> bool:
@@ -915,6 +1077,91 @@ def detect_spotify_url_type(url: str) -> tuple[str, str]:
         raise ValueError("Invalid Spotify URL. Must be a track, playlist, or album URL.") from exc
 
 
+@dataclass
+class BatchItem:
+    """One input URL's result from `resolve_many`.
+
+    `tracks` holds only tracks not already returned for an earlier URL in the
+    same batch; `duplicates` lists the IDs that were dropped for that reason.
+    `error` is set (and `tracks` empty) when the URL was invalid or its fetch
+    failed - one bad link never aborts the rest of the batch.
+    """
+
+    index: int
+    url: str
+    type: str
+    id: str | None
+    playlist: PlaylistInfo | None = None
+    tracks: list[TrackInfo] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+def _resolve_one(client: PlaylistClient, url_type: str, item_id: str):
+    if url_type == "track":
+        return None, [client.get_track(item_id)]
+    meta = client.get_playlist_metadata(item_id, content_type=url_type)
+    return meta, list(client.iter_playlist_tracks(item_id, content_type=url_type))
+
+
+def resolve_many(
+    urls: Sequence[str],
+    *,
+    client: PlaylistClient | None = None,
+    max_workers: int = 4,
+) -> Iterator[BatchItem]:
+    """Resolve many playlist/album/track URLs concurrently through one client.
+
+    Every URL shares `client` (one session, one cached anonymous token, one
+    album cache), and repeated links to the same entity are fetched once.
+    Results are yielded in input order as soon as each one is ready, so a
+    slow playlist early in the list only delays output, never the fetches
+    behind it. Track IDs are de-duplicated across the whole batch in input
+    order, which keeps the output deterministic however the fetches race.
+    """
+    client = client or PlaylistClient()
+    keys: list[tuple[str, str] | None] = []
+    for url in urls:
+        try:
+            keys.append(detect_spotify_url_type(url))
+        except ValueError:
+            keys.append(None)
+    unique = list(dict.fromkeys(k for k in keys if k))
+
+    import concurrent.futures as _cf
+
+    # Same manual lifecycle as iter_playlist_tracks: a caller that stops
+    # consuming early shouldn't block on every fetch still queued.
+    pool = _cf.ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(unique) or 1)),
+        thread_name_prefix="sunnify-batch",
+    )
+    try:
+        futures = {key: pool.submit(_resolve_one, client, *key) for key in unique}
+        seen: set[str] = set()
+        for index, (url, key) in enumerate(zip(urls, keys, strict=True)):
+            if key is None:
+                yield BatchItem(index, url, "unknown", None, error="Invalid Spotify URL.")
+                continue
+            url_type, item_id = key
+            try:
+                playlist, tracks = futures[key].result()
+            except Exception as exc:
+                log.warning("batch resolve failed for %s: %s", url, exc)
+                yield BatchItem(index, url, url_type, item_id, error=str(exc) or type(exc).__name__)
+                continue
+            item = BatchItem(index, url, url_type, item_id, playlist=playlist)
+            for track in tracks:
+                if track.id in seen:
+                    item.duplicates.append(track.id)
+                else:
+                    seen.add(track.id)
+                    item.tracks.append(track)
+            yield item
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 # Characters reserved on Windows (the strictest of our three target platforms;
 # macOS forbids only "/" and NUL, Linux only "/" and NUL). Removing the Windows
 # set is therefore always safe everywhere.
@@ -1015,6 +1262,7 @@ def cap_filename(name: str, max_bytes: int = 250) -> str:
 
 
 __all__ = [
+    "BatchItem",
     "ExtractionError",
     "NetworkError",
     "PlaylistClient",
@@ -1030,5 +1278,6 @@ __all__ = [
     "extract_album_id",
     "extract_playlist_id",
     "extract_track_id",
+    "resolve_many",
     "sanitize_filename",
 ]
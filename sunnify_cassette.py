@@ -0,0 +1,394 @@
+"""Record and replay sunnify's HTTP, for deterministic offline runs.
+
+A live run with a recording cassette writes every response it gets - embed
+pages, spclient, track pages, covers, and yt-dlp's YouTube search and
+extractor requests - to a JSON-lines file. A replaying cassette serves the
+same run from that file without touching the network, so a regression in
+parsing, scheduling or matching can be re-run and timed offline:
+
+    with Cassette.record("run.jsonl"):
+        ...  # a live run
+    with Cassette.replay("run.jsonl", latency="recorded"):
+        ...  # the same run, offline
+
+Both sides are hooked where their clients already allow it: the requests
+side as a transport adapter mounted on the shared sunnify_http session, the
+yt-dlp side as a RequestHandler (CassetteRH), registered when this module is
+imported, that yt-dlp's request director prefers while a cassette is in use.
+
+Media (googlevideo.com) is never recorded: a recording run downloads audio
+as usual, and a replayed download fails at the audio fetch after the
+search and match have run.
+
+Each line is one response: the client, method, url, a digest of the request
+body, status, headers, the body (text, or base64 when it isn't UTF-8) and
+the seconds it took. Replay matches on method, url and body digest, falling
+back to method and url; repeated requests get the recorded responses in
+order, the last one repeating.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import BaseAdapter
+from yt_dlp.networking.common import (
+    _REQUEST_HANDLERS,
+    RequestHandler,
+    Response,
+    register_preference,
+    register_rh,
+)
+from yt_dlp.networking.exceptions import HTTPError, RequestError, UnsupportedRequest
+
+import sunnify_http
+
+log = logging.getLogger("sunnify")
+
+RECORD = "record"
+REPLAY = "replay"
+
+# audio streams: too big to keep, and not what a replayed run measures
+_MEDIA_HOSTS = ("googlevideo.com",)
+# the stored body is decoded and whole; these would describe the wire form
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+_active: Cassette | None = None
+_active_lock = threading.Lock()
+
+
+class CassetteMiss(requests.RequestException):
+    """A replayed request the cassette has no response for. Not a
+    ConnectionError, so retry_on_network_error doesn't back off on it."""
+
+
+def _is_media(url: str) -> bool:
+    host = (urlsplit(url).hostname or "").lower()
+    return any(host == rule or host.endswith("." + rule) for rule in _MEDIA_HOSTS)
+
+
+def _digest(body) -> str | None:
+    if body is None:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if not isinstance(body, bytes | bytearray):
+        return None  # a stream or generator: matched on url alone
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def _stored_headers(headers) -> list[list[str]]:
+    return [[k, v] for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS]
+
+
+class Cassette:
+    """One JSON-lines file of recorded responses; a context manager that
+    routes the shared session and yt-dlp through it.
+
+    `latency` (replay only) is "recorded" to sleep each response's recorded
+    time, or a number of seconds to sleep for every response (0 for none).
+    """
+
+    def __init__(self, path: str, mode: str, latency: str | float = "recorded"):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"cassette mode must be {RECORD!r} or {REPLAY!r}, not {mode!r}")
+        if latency != "recorded" and float(latency) < 0:
+            raise ValueError("replay latency can't be negative")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries: dict[tuple, list[dict]] = {}
+        self._served: dict[tuple, int] = {}
+        self._mounted: list[tuple[requests.Session, dict]] = []
+        if mode == REPLAY:
+            self._load()
+
+    @classmethod
+    def record(cls, path: str) -> Cassette:
+        return cls(path, RECORD)
+
+    @classmethod
+    def replay(cls, path: str, latency: str | float = "recorded") -> Cassette:
+        return cls(path, REPLAY, latency)
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    keys = (
+                        (entry["method"], entry["url"], entry.get("request")),
+                        (entry["method"], entry["url"]),
+                    )
+                except (ValueError, KeyError, TypeError) as exc:
+                    raise ValueError(f"{self.path}:{n}: not a cassette entry ({exc})") from exc
+                for key in keys:
+                    self._entries.setdefault(key, []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for key, entries in self._entries.items() if len(key) == 2)
+
+    # -- recording and lookup -------------------------------------------------
+
+    def _write(
+        self,
+        client,
+        method,
+        url,
+        request_body,
+        status,
+        reason,
+        headers,
+        body,
+        elapsed,
+        *,
+        final_url=None,
+    ):
+        entry = {
+            "client": client,
+            "method": method,
+            "url": url,
+            "request": _digest(request_body),
+            "status": status,
+            "reason": reason,
+            "headers": _stored_headers(headers),
+            "elapsed": round(elapsed, 6),
+        }
+        if final_url and final_url != url:
+            entry["final_url"] = final_url
+        try:
+            entry["text"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["base64"] = base64.b64encode(body).decode("ascii")
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "w", encoding="utf-8")  # noqa: SIM115
+            # one flushed line per response: a crashed run keeps what it got
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def _lookup(self, method: str, url: str, request_body) -> dict:
+        """The next recorded response for this request; raises CassetteMiss."""
+        with self._lock:
+            for key in ((method, url, _digest(request_body)), (method, url)):
+                entries = self._entries.get(key)
+                if entries:
+                    n = self._served.get(key, 0)
+                    self._served[key] = n + 1
+                    self.replayed += 1
+                    entry = entries[min(n, len(entries) - 1)]
+                    break
+            else:
+                self.misses += 1
+                raise CassetteMiss(f"{self.path} has no recorded response for {method} {url}")
+        delay = entry.get("elapsed", 0) if self.latency == "recorded" else float(self.latency)
+        if delay > 0:
+            time.sleep(delay)
+        return entry
+
+    @staticmethod
+    def _body(entry: dict) -> bytes:
+        if "base64" in entry:
+            return base64.b64decode(entry["base64"])
+        return entry.get("text", "").encode("utf-8")
+
+    # -- the requests side ----------------------------------------------------
+
+    def mount(self, session: requests.Session) -> None:
+        """Route every request `session` makes through the cassette, over
+        the adapters it already has (so recording keeps their pools)."""
+        adapters = dict(session.adapters)
+        for prefix, adapter in adapters.items():
+            session.mount(prefix, CassetteAdapter(self, adapter))
+        self._mounted.append((session, adapters))
+
+    def unmount(self) -> None:
+        while self._mounted:
+            session, adapters = self._mounted.pop()
+            for prefix, adapter in adapters.items():
+                session.mount(prefix, adapter)
+
+    def __enter__(self) -> Cassette:
+        global _active
+        with _active_lock:
+            if _active is not None:
+                raise RuntimeError("another cassette is already in use")
+            _active = self
+        self.mount(sunnify_http.shared().session)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _active
+        self.unmount()
+        with _active_lock:
+            _active = None
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.mode == REPLAY:
+            log.info("cassette %s: %d replayed, %d missing", self.path, self.replayed, self.misses)
+        else:
+            log.info("cassette %s: %d recorded", self.path, self.recorded)
+
+
+class CassetteAdapter(BaseAdapter):
+    """A requests transport adapter that records what `inner` returns, or
+    replays it from the cassette without calling `inner` at all."""
+
+    def __init__(self, cassette: Cassette, inner: BaseAdapter):
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        cassette = self.cassette
+        if cassette.mode == REPLAY:
+            entry = cassette._lookup(request.method, request.url, request.body)
+            raw = urllib3.HTTPResponse(
+                body=io.BytesIO(cassette._body(entry)),
+                headers=entry["headers"],
+                status=entry["status"],
+                reason=entry.get("reason"),
+                preload_content=False,
+                decode_content=False,
+            )
+            return self.inner.build_response(request, raw)
+        started = time.monotonic()
+        response = self.inner.send(
+            request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies
+        )
+        if _is_media(request.url):
+            return response
+        # reading it here is what lets a streaming caller's iter_content
+        # still work: requests serves the rest from .content
+        body = response.content
+        cassette._write(
+            "requests",
+            request.method,
+            request.url,
+            request.body,
+            response.status_code,
+            response.reason,
+            response.headers,
+            body,
+            time.monotonic() - started,
+        )
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class CassetteRH(RequestHandler):
+    """yt-dlp's side of the cassette. Registered for the process, but it
+    turns every request down unless a cassette is in use, and the director
+    then falls back to yt-dlp's own handlers."""
+
+    _SUPPORTED_URL_SCHEMES = ("http", "https")
+    _SUPPORTED_PROXY_SCHEMES = None
+    _SUPPORTED_FEATURES = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._kwargs = kwargs
+        self._inner = None
+
+    def _check_extensions(self, extensions):
+        super()._check_extensions(extensions)
+        for name in ("cookiejar", "timeout", "legacy_ssl", "keep_header_casing"):
+            extensions.pop(name, None)
+
+    def _validate(self, request):
+        cassette = _active
+        if cassette is None:
+            raise UnsupportedRequest("no cassette in use")
+        if cassette.mode == RECORD and _is_media(request.url):
+            raise UnsupportedRequest("media is not recorded")
+        super()._validate(request)
+
+    def _live(self) -> RequestHandler:
+        # recording sends through the handler yt-dlp would have used
+        if self._inner is None:
+            rh = _REQUEST_HANDLERS.get("Requests") or _REQUEST_HANDLERS["Urllib"]
+            self._inner = rh(**self._kwargs)
+        return self._inner
+
+    def _send(self, request):
+        cassette = _active
+        if cassette is None:
+            raise UnsupportedRequest("no cassette in use")
+        if cassette.mode == REPLAY:
+            try:
+                entry = cassette._lookup(request.method, request.url, request.data)
+            except CassetteMiss as exc:
+                raise RequestError(str(exc)) from exc
+            response = Response(
+                io.BytesIO(cassette._body(entry)),
+                entry.get("final_url") or request.url,
+                dict(entry["headers"]),
+                status=entry["status"],
+                reason=entry.get("reason"),
+            )
+            if not 200 <= response.status < 300:
+                raise HTTPError(response)
+            return response
+        started = time.monotonic()
+        error = None
+        try:
+            response = self._live().send(request)
+        except HTTPError as exc:
+            error, response = exc, exc.response
+        body = response.read()
+        cassette._write(
+            "yt-dlp",
+            request.method,
+            request.url,
+            request.data,
+            response.status,
+            response.reason,
+            response.headers,
+            body,
+            time.monotonic() - started,
+            final_url=response.url,
+        )
+        recorded = Response(
+            io.BytesIO(body),
+            response.url,
+            dict(_stored_headers(response.headers)),
+            status=response.status,
+            reason=response.reason,
+        )
+        if error is not None:
+            raise HTTPError(recorded, redirect_loop=error.redirect_loop)
+        return recorded
+
+    def close(self):
+        if self._inner is not None:
+            self._inner.close()
+
+
+@register_preference(CassetteRH)
+def _prefer_cassette(rh, request) -> int:
+    return 10_000
+
+
+register_rh(CassetteRH)
@@ -1,11 +1,12 @@
 """Sunnify headless CLI - the GUI's engine with a terminal face.
 
 Same matcher, same naming, same tag writer, same config file as the desktop
-app: the CLI constructs the GUI's own MusicScraper and drives it without a
-QApplication, so behavior can never drift between the two.
+app: the CLI drives the same Qt-free DownloadEngine the GUI wraps, so
+behavior can never drift between the two and a download never imports Qt.
 
 Design contract (stable for scripts and AI agents):
-- subcommands: download, info, status, config, doctor
+- subcommands: download, info, status, verify, repair, queue, work, config,
+  doctor, serve
 - `--json` emits NDJSON events on stdout for download, one JSON document for
   the others (schema in docs/CLI.md); human output otherwise
 - exit codes: 0 success, 1 some tracks failed/stopped, 2 usage error,
@@ -17,6 +18,7 @@ Design contract (stable for scripts and AI agents):
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import contextlib
 import json
 import os
@@ -24,9 +26,13 @@ import signal
 import sys
 import threading
 import time
+from typing import TYPE_CHECKING
 
-import Spotify_Downloader as app
-from spotifydown_api import PlaylistClient, SpotifyEmbedAPI
+import sunnify_core as core
+
+if TYPE_CHECKING:
+    from spotifydown_api import PlaylistClient
+    from sunnify_engine import DownloadEngine
 
 EXIT_OK = 0
 EXIT_PARTIAL = 1
@@ -35,6 +41,12 @@ EXIT_FATAL = 3
 
 _LOCK_NAME = ".sunnify-cli.lock"
 
+# Finalizing a landed download (cover fetch + mutagen rewrite, the rename,
+# the manifest record) runs on its own small pool so a download worker moves
+# straight on to its next track; two keep pace with the engine's four
+# download workers.
+TAG_WORKERS = 2
+
 
 def _ensure_windows_console() -> None:
     """Attach to the parent console when the windowed exe runs interactively.
@@ -66,22 +78,27 @@ def _ensure_windows_console() -> None:
 class _Emitter:
     """Thread-safe progress output: human lines or NDJSON events."""
 
-    def __init__(self, as_json: bool, quiet: bool = False):
-        self.as_json = as_json
+    def __init__(self, as_json: bool, quiet: bool = False, sink=None):
+        # sink: optional callable taking each event dict instead of stdout
+        # (the serve daemon records per-job event streams through it)
+        self.as_json = as_json or sink is not None
         self.quiet = quiet
+        self.sink = sink
         self._lock = threading.Lock()
 
-    def event(self, name: str, **fields) -> None:
+    def event(self, name: str, /, **fields) -> None:
         with self._lock:
-            if self.as_json:
+            if self.sink is not None:
+                self.sink({"event": name, **fields})
+            elif self.as_json:
                 print(json.dumps({"event": name, **fields}, ensure_ascii=False), flush=True)
             elif not self.quiet:
                 self._human(name, fields)
 
-    def error(self, message: str, code: str = "error", hint: str | None = None) -> None:
+    def error(self, message: str, code: str = "error", hint: str | None = None, **fields) -> None:
         """Typed error envelope: agents branch on `code`, humans read the hint."""
         if self.as_json:
-            self.event("error", code=code, message=message, hint=hint)
+            self.event("error", code=code, message=message, hint=hint, **fields)
         else:
             print(f"error: {message}", file=sys.stderr, flush=True)
             if hint:
@@ -89,13 +106,85 @@ class _Emitter:
 
     def _human(self, name: str, f: dict) -> None:
         if name == "run_started":
-            print(f"» {f['url']}  ->  {f['folder']}  [{f['format']}]", flush=True)
+            if "tracks" in f:
+                what = f"{f['tracks']} tracks to {'download' if 'worker' in f else 'repair'}"
+            else:
+                what = f.get("url") or f"{len(f['urls'])} links"
+            print(f"» {what}  ->  {f['folder']}  [{f['format']}]", flush=True)
+        elif name == "source_started":
+            label = f["name"] or f["url"]
+            extra = f", {f['duplicates']} duplicate" if f["duplicates"] else ""
+            print(f"+ {label}  [{f['type']}, {f['tracks']} queued{extra}]", flush=True)
+        elif name == "source_done" and f.get("error"):
+            print(f"  ! {f['url']}: {f['error']}", flush=True)
         elif name == "track_done":
             print(f"  ✓ {os.path.basename(f['file'])}", flush=True)
         elif name == "track_skipped":
             print(f"  = {os.path.basename(f['file'])} (already on disk)", flush=True)
         elif name == "warning":
             print(f"  ! {f['message']}", flush=True)
+        elif name == "resolved":
+            if "title" in f:
+                print(f"{f['title']} - {f['artists']}  [track]", flush=True)
+            elif "name" in f:
+                print(f"{f['name']}  [{f['type']}, {f['track_count']} tracks]", flush=True)
+            else:
+                print(f"{f['url']}  [duplicate]", flush=True)
+        elif name == "batch_summary":
+            print(
+                f"resolved {f['resolved']}/{f['urls']} urls: {f['tracks']} unique tracks, "
+                f"{f['duplicates']} duplicates, {f['failed']} failed",
+                flush=True,
+            )
+        elif name == "verified" and not f["ok"]:
+            print(f"  ✗ {f['file']}: {', '.join(f['problems'])}", flush=True)
+        elif name == "verify_summary":
+            print(
+                f"verified {f['files']} files: {f['ok']} ok, {f['problems']} with problems "
+                f"({f['cached']} unchanged since the last scan) in {f['elapsed_s']}s",
+                flush=True,
+            )
+        elif name == "concurrency" and f["pool"] == "download":
+            print(
+                f"  ~ parallel downloads {f['previous']} -> {f['current']} ({f['reason']})",
+                flush=True,
+            )
+        elif name == "lanes" and "requeued" in f:
+            track = f["requeued"]
+            when = f"in {track['delay_s']:.0f}s" if track["lane"] == "retry" else "after the rest"
+            print(f"  ~ {track['title']}: {track['lane']} {when} ({track['reason']})", flush=True)
+        elif name == "repair_queued":
+            print(f"  ✗ {f['file']}: {', '.join(f['problems'])}", flush=True)
+        elif name == "repair_scan":
+            print(
+                f"checked {f['tracks']} recorded tracks: {f['broken']} to repair"
+                + (f", {f['unresolved']} without metadata" if f["unresolved"] else ""),
+                flush=True,
+            )
+        elif name == "queue_published":
+            print(
+                f"+ {f['name'] or f['url']}  [{f['type']}, {f['added']} of {f['tracks']} "
+                f"tracks newly queued]",
+                flush=True,
+            )
+        elif name == "queue_summary":
+            print(
+                f"queue {f['db']}: {f['queued']} queued, {f['leased']} in progress, "
+                f"{f['done']} done, {f['failed']} failed",
+                flush=True,
+            )
+        elif name == "work_started":
+            print(f"worker {f['worker']}: {f['queued']} jobs queued  ->  {f['folder']}", flush=True)
+        elif name == "work_summary":
+            print(
+                f"worker {f['worker']} done: {f['done']} downloaded, {f['failed']} failed, "
+                f"{f['retried']} handed back for another try in {f['elapsed_s']}s",
+                flush=True,
+            )
+        elif name == "metrics_started":
+            print(f"metrics at {f['url']}", flush=True)
+        elif name == "serve_started":
+            print(f"sunnify daemon listening on {f['url']} (pid {f['pid']}, ^C stops)", flush=True)
         elif name == "run_summary":
             print(
                 f"done: {f['landed']} landed, {f['skipped']} already present, "
@@ -164,12 +253,29 @@ class _FolderLock:
             os.remove(self.path)
 
 
+def _source_of(meta: dict) -> dict:
+    """Batch runs tag track events with the link that queued them."""
+    return {"source": meta["source"]} if "source" in meta else {}
+
+
+_AUDIO_FIELDS = ("audio_path", "source_codec", "postprocess_ms", "streamed", "stream_ms")
+
+
+def _audio_of(meta: dict) -> dict:
+    """How the engine produced the file: stream copy or transcode, and how long ffmpeg took."""
+    return {k: meta[k] for k in _AUDIO_FIELDS if k in meta}
+
+
 class _RunState:
-    """Collects per-track outcomes from the scraper's signals.
+    """Collects per-track outcomes from the engine's events.
 
-    song_meta fires before the exists-check result is acted on, so the
+    track_started fires before the exists-check result is acted on, so the
     pre-existing test here (before download starts) cleanly separates
-    "skipped, was already on disk" from "landed this run".
+    "skipped, was already on disk" from "landed this run". The engine hands
+    each landed download to the tagging pool here (its tag_pool), which
+    tags it, renames it into place and records it before track_ready, so a
+    track is done on arrival; drain() waits for the pool before the run is
+    summarized.
     """
 
     def __init__(self, emitter: _Emitter):
@@ -177,46 +283,83 @@ class _RunState:
         self.landed: list[str] = []
         self.skipped: list[str] = []
         self.resume_skipped = 0
+        self.failed_sources: list[str] = []
+        # "copy"/"transcode" -> landed tracks produced that way
+        self.audio_paths: dict[str, int] = {}
         self._preexisting: set[str] = set()
         self._lock = threading.Lock()
+        self._tagger = concurrent.futures.ThreadPoolExecutor(
+            max_workers=TAG_WORKERS, thread_name_prefix="sunnify-tag"
+        )
 
     def on_resume_skipped(self, count: int) -> None:
         self.resume_skipped = int(count)
 
-    def on_song_meta(self, meta: dict) -> None:
+    def on_source_progress(self, record: dict) -> None:
+        """scrape_many's per-link records become source_started/source_done."""
+        record = dict(record)
+        phase = record.pop("phase", "")
+        if phase == "done" and record.get("error"):
+            self.failed_sources.append(record.get("url", ""))
+        self.emitter.event(f"source_{phase}", **record)
+
+    def on_track_started(self, meta: dict) -> None:
         path = meta.get("file", "")
         if path and os.path.exists(path):
             with self._lock:
                 self._preexisting.add(path)
 
-    def on_add_song_meta(self, meta: dict) -> None:
+    def on_track_ready(self, meta: dict) -> None:
         path = meta.get("file", "")
         with self._lock:
             pre = path in self._preexisting
         if pre:
             self.skipped.append(path)
-            self.emitter.event("track_skipped", title=meta.get("title", ""), file=path)
+            self.emitter.event(
+                "track_skipped", title=meta.get("title", ""), file=path, **_source_of(meta)
+            )
             return
-        # same tag writer the GUI uses, run synchronously (no thread started)
-        app.WritingMetaTagsThread(meta, path).run()
+        self._done(meta, path)
+
+    def _done(self, meta: dict, path: str) -> None:
         if os.path.exists(path):
-            self.landed.append(path)
+            audio = _audio_of(meta)
+            with self._lock:
+                self.landed.append(path)
+                if "audio_path" in audio:
+                    kind = audio["audio_path"]
+                    self.audio_paths[kind] = self.audio_paths.get(kind, 0) + 1
             self.emitter.event(
                 "track_done",
                 title=meta.get("title", ""),
                 artists=meta.get("artists", ""),
                 file=path,
                 bytes=os.path.getsize(path),
+                **audio,
+                **_source_of(meta),
             )
 
-    def on_error(self, message: str) -> None:
+    def on_message(self, message: str) -> None:
         self.emitter.event("warning", message=str(message))
 
+    def on_concurrency(self, change: dict) -> None:
+        self.emitter.event("concurrency", **change)
+
+    def on_lanes(self, depths: dict) -> None:
+        self.emitter.event("lanes", **depths)
+
+    def on_track_timing(self, timing: dict) -> None:
+        self.emitter.event("track_timing", **timing)
+
+    def drain(self) -> None:
+        """Block until every queued finalize (and its track_done) is finished."""
+        self._tagger.shutdown(wait=True)
+
 
 def _resolve_settings(args, cfg: dict) -> dict:
     """flags > saved config > defaults, driven entirely by the registry."""
     resolved = dict(cfg)
-    for s in app.SETTINGS:
+    for s in core.SETTINGS:
         if s.cli_flag is None:
             continue
         flag_value = getattr(args, s.cli_flag.lstrip("-").replace("-", "_"), None)
@@ -225,28 +368,122 @@ def _resolve_settings(args, cfg: dict) -> dict:
     return resolved
 
 
-def _build_scraper(args, cfg: dict, cancel_event: threading.Event) -> app.MusicScraper:
-    return app.MusicScraper(
-        cancel_event=cancel_event, **app.scraper_kwargs_from(_resolve_settings(args, cfg))
+def _load_engine():
+    """Import the download engine (yt-dlp, mutagen) on first use.
+
+    Only download runs need it, so status/config/info/--version start without
+    paying for it. Logs the yt-dlp version the session header may not have
+    been able to name yet.
+    """
+    first = "sunnify_engine" not in sys.modules
+    import sunnify_engine
+
+    if first:
+        core.log.info("engine loaded: yt-dlp=%s", core.ytdlp_version())
+    return sunnify_engine
+
+
+def _build_scraper(args, cfg: dict, cancel_event: threading.Event) -> DownloadEngine:
+    return _load_engine().DownloadEngine(
+        cancel_event=cancel_event,
+        embed_tags=True,
+        **core.scraper_kwargs_from(_resolve_settings(args, cfg)),
     )
 
 
 def cmd_download(args) -> int:
-    cfg = app.load_config()
-    out_dir = _resolve_out_dir(args.out, cfg)
     emitter = _Emitter(args.json, args.quiet)
+    from_file = getattr(args, "from_file", None)
+
+    urls: list[str] = []
+    if from_file:
+        if args.url:
+            print("error: pass either a url or --from-file, not both", file=sys.stderr)
+            return EXIT_USAGE
+        try:
+            urls = _read_url_list(from_file)
+        except OSError as exc:
+            emitter.error(
+                f"cannot read url list {from_file}: {exc}",
+                code="batch_file_unreadable",
+                hint="pass a text file with one spotify url per line, or - for stdin",
+            )
+            return EXIT_FATAL
+        if not urls:
+            print(f"error: no urls in {from_file}", file=sys.stderr)
+            return EXIT_USAGE
+    elif not args.url:
+        print("error: download needs a url (or --from-file FILE)", file=sys.stderr)
+        return EXIT_USAGE
+    if not _serve_metrics(getattr(args, "metrics_port", None), emitter):
+        return EXIT_FATAL
+    return _run_download(args, urls, emitter, threading.Event())
+
+
+def _serve_metrics(port: int | None, emitter: _Emitter) -> bool:
+    """Export the run's metrics on 127.0.0.1:`port` for its lifetime
+    (--metrics-port); False when the port can't be bound."""
+    if port is None:
+        return True
+    import sunnify_metrics
 
     try:
-        url_type, item_id = app.detect_spotify_url_type(args.url)
-    except ValueError:
-        url_type, item_id = "unknown", None
-    if url_type == "unknown" or not item_id:
+        server = sunnify_metrics.serve(port)
+    except OSError as exc:
         emitter.error(
-            f"not a spotify playlist/album/track url: {args.url}",
-            code="invalid_url",
-            hint="expected https://open.spotify.com/{playlist,album,track}/... or a spotify: uri",
+            f"cannot serve metrics on port {port}: {exc}",
+            code="port_unavailable",
+            hint="pass a free --metrics-port",
         )
-        return EXIT_FATAL
+        return False
+    host, bound = server.server_address[:2]
+    emitter.event("metrics_started", url=f"http://{host}:{bound}/metrics")
+    return True
+
+
+def _run_download(
+    args,
+    urls: list[str],
+    emitter: _Emitter,
+    cancel_event: threading.Event,
+    *,
+    client: PlaylistClient | None = None,
+    foreground: bool = True,
+    repair: list[tuple] | None = None,
+    worker: str | None = None,
+    on_track=None,
+) -> int:
+    """One download run: `urls` queues a batch, `repair` the known tracks
+    `sunnify repair` found broken, otherwise `args.url` alone.
+
+    Shared by `download`, `repair`, `work` and the serve daemon's jobs; the
+    daemon passes its warm `client` and foreground=False (no ^C handler, it
+    isn't our terminal). `work` passes its `repair` batch with the `worker`
+    name, which skips the folder lock (the job queue's leases keep workers
+    apart) and leaves other machines' unfinished downloads alone, and an
+    `on_track(track, result)` callback for each track's outcome.
+    """
+    from spotifydown_api import detect_spotify_url_type
+
+    cfg = core.load_config()
+    out_dir = _resolve_out_dir(args.out, cfg)
+    if repair is not None:
+        url_type = "work" if worker else "repair"
+    elif urls:
+        url_type = "batch"
+    else:
+        try:
+            url_type, item_id = detect_spotify_url_type(args.url)
+        except ValueError:
+            url_type, item_id = "unknown", None
+        if url_type == "unknown" or not item_id:
+            emitter.error(
+                f"not a spotify playlist/album/track url: {args.url}",
+                code="invalid_url",
+                hint="expected https://open.spotify.com/{playlist,album,track}/... "
+                "or a spotify: uri",
+            )
+            return EXIT_FATAL
     try:
         os.makedirs(out_dir, exist_ok=True)
     except OSError as exc:
@@ -263,7 +500,7 @@ def cmd_download(args) -> int:
             hint="pass a writable folder with --out",
         )
         return EXIT_FATAL
-    if app.get_ffmpeg_path() is None:
+    if core.get_ffmpeg_path() is None:
         emitter.error(
             "ffmpeg not found",
             code="ffmpeg_missing",
@@ -275,7 +512,7 @@ def cmd_download(args) -> int:
         return EXIT_FATAL
 
     lock = _FolderLock(out_dir)
-    lock_err = lock.acquire()
+    lock_err = None if worker else lock.acquire()
     if lock_err:
         emitter.error(
             lock_err,
@@ -284,33 +521,43 @@ def cmd_download(args) -> int:
         )
         return EXIT_FATAL
 
-    cancel_event = threading.Event()
     scraper = _build_scraper(args, cfg, cancel_event)
+    if client is not None:
+        scraper.spotifydown_api = client
     state = _RunState(emitter)
-    # workers emit from pool threads; with no qt event loop running, queued
-    # (auto) connections are never delivered, so force direct delivery
-    from PyQt6.QtCore import Qt
-
-    direct = Qt.ConnectionType.DirectConnection
-    scraper.song_meta.connect(state.on_song_meta, type=direct)
-    scraper.add_song_meta.connect(state.on_add_song_meta, type=direct)
-    scraper.resume_skipped.connect(state.on_resume_skipped, type=direct)
-    scraper.error_signal.connect(state.on_error, type=direct)
+    scraper.tag_pool = state._tagger
+    # events arrive on the engine's pool threads; the emitter is lock-guarded
+    scraper.events.subscribe("track_started", state.on_track_started)
+    scraper.events.subscribe("track_ready", state.on_track_ready)
+    scraper.events.subscribe("resume_skipped", state.on_resume_skipped)
+    scraper.events.subscribe("message", state.on_message)
+    scraper.events.subscribe("source_progress", state.on_source_progress)
+    scraper.events.subscribe("concurrency", state.on_concurrency)
+    scraper.events.subscribe("lanes", state.on_lanes)
+    scraper.events.subscribe("track_timing", state.on_track_timing)
 
     # graceful ^C: first stops after in-flight tracks, second is immediate
     def _sigint(_sig, _frame):
         if cancel_event.is_set():
-            lock.release()
+            if not worker:
+                lock.release()
             os._exit(130)
         cancel_event.set()
         emitter.error("stopping after in-flight tracks finish (^C again to force quit)")
 
-    with contextlib.suppress(Exception):
-        signal.signal(signal.SIGINT, _sigint)
+    if foreground:
+        with contextlib.suppress(Exception):
+            signal.signal(signal.SIGINT, _sigint)
 
     emitter.event(
         "run_started",
-        url=args.url,
+        **(
+            {"tracks": len(repair), **({"worker": worker} if worker else {})}
+            if repair is not None
+            else {"urls": urls}
+            if urls
+            else {"url": args.url}
+        ),
         type=url_type,
         folder=out_dir,
         format=scraper.audio_format,
@@ -319,43 +566,169 @@ def cmd_download(args) -> int:
         artist_first=scraper.artist_first,
         track_numbers=scraper.include_track_number,
         loose_match=scraper.loose_match,
+        verify_audio=scraper.verify_audio,
+        stream_transcode=scraper.stream_transcode,
+        shortest_first=scraper.shortest_first,
+        concurrency={
+            "start": scraper.concurrency or scraper.MAX_WORKERS,
+            "min": scraper.concurrency_min,
+            "max": scraper.concurrency_max,
+        },
     )
     t0 = time.monotonic()
     try:
-        if url_type == "track":
-            scraper.scrape_track(args.url, out_dir)
+        if repair is not None:
+            scraper.download_tracks(repair, on_track, sweep=worker is None)
         else:
-            scraper.scrape_playlist(args.url, out_dir)
+            scraper.download(urls or args.url, out_dir)
     except Exception as exc:
         emitter.error(f"download run failed: {exc}", code="run_failed", hint="run `sunnify doctor`")
         return EXIT_FATAL
     finally:
-        lock.release()
+        # tags are still being written into the folder; finish before unlocking
+        state.drain()
+        if not worker:
+            lock.release()
 
     failed = list(scraper._failed_tracks)
     stopped = cancel_event.is_set()
-    code = EXIT_PARTIAL if (failed or stopped) else EXIT_OK
+    code = EXIT_PARTIAL if (failed or stopped or state.failed_sources) else EXIT_OK
     emitter.event(
         "run_summary",
         landed=len(state.landed),
         skipped=len(state.skipped) + state.resume_skipped,
         failed=len(failed),
         failed_titles=failed,
+        **({"failed_sources": state.failed_sources} if urls else {}),
+        **({"audio_paths": state.audio_paths} if state.audio_paths else {}),
+        **({"concurrency": scraper.pool_stats} if scraper.pool_stats else {}),
+        **({"requeued": scraper.requeued} if scraper.requeued else {}),
+        **({"timing": scraper.timing_stats} if scraper.timing_stats else {}),
         stopped=stopped,
         elapsed_s=round(time.monotonic() - t0, 1),
         folder=out_dir,
         exit_code=code,
     )
-    if failed and not args.json:
+    if failed and not emitter.as_json:
         for title in failed:
             print(f"  failed: {title}", file=sys.stderr)
     return code
 
 
+def _info_payload(url_type: str, item_id: str, playlist, tracks) -> dict:
+    """The `info` JSON document for one resolved url (shared by single and batch)."""
+    if url_type == "track":
+        track = tracks[0]
+        return {
+            "type": "track",
+            "id": track.spotify_id,
+            "title": track.title,
+            "artists": track.artists,
+            "album": track.album or "",
+            "release_date": track.release_date or "",
+            "duration_ms": track.duration_ms or 0,
+        }
+    return {
+        "type": url_type,
+        "id": item_id,
+        "name": playlist.name,
+        "owner": playlist.owner or "",
+        "track_count": len(tracks),
+        "tracks": [
+            {
+                "id": t.spotify_id,
+                "title": t.title,
+                "artists": t.artists,
+                "duration_ms": t.duration_ms or 0,
+            }
+            for t in tracks
+        ],
+    }
+
+
+def _read_url_list(path: str) -> list[str]:
+    """One url per line; blank lines and `#` comments skipped; `-` is stdin."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+    return [ln.strip() for ln in lines if ln.strip() and not ln.strip().startswith("#")]
+
+
+def cmd_info_batch(args) -> int:
+    """`info --batch`: every url through one shared client, one event per url."""
+    emitter = _Emitter(args.json)
+    try:
+        urls = _read_url_list(args.batch)
+    except OSError as exc:
+        emitter.error(
+            f"cannot read url list {args.batch}: {exc}",
+            code="batch_file_unreadable",
+            hint="pass a text file with one spotify url per line, or - for stdin",
+        )
+        return EXIT_FATAL
+    from spotifydown_api import PlaylistClient
+
+    return _run_info_batch(urls, emitter, PlaylistClient())
+
+
+def _run_info_batch(urls: list[str], emitter: _Emitter, client: PlaylistClient) -> int:
+    from spotifydown_api import resolve_many
+
+    resolved = failed = unique = dupes = 0
+    for item in resolve_many(urls, client=client):
+        if item.error is not None:
+            failed += 1
+            invalid = item.type == "unknown"
+            emitter.error(
+                f"{item.url}: {item.error}",
+                code="invalid_url" if invalid else "metadata_fetch_failed",
+                hint=None if invalid else "check the url is public and reachable",
+                url=item.url,
+                index=item.index,
+            )
+            continue
+        resolved += 1
+        unique += len(item.tracks)
+        dupes += len(item.duplicates)
+        payload = _info_payload(item.type, item.id, item.playlist, item.tracks)
+        if item.type == "track" and not item.tracks:
+            # the whole entity was already returned earlier in this batch
+            payload = {"type": "track", "id": item.id}
+        emitter.event(
+            "resolved", index=item.index, url=item.url, duplicates=item.duplicates, **payload
+        )
+    emitter.event(
+        "batch_summary",
+        urls=len(urls),
+        resolved=resolved,
+        failed=failed,
+        tracks=unique,
+        duplicates=dupes,
+    )
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
 def cmd_info(args) -> int:
+    if getattr(args, "batch", None):
+        if args.url:
+            print("error: pass either a url or --batch, not both", file=sys.stderr)
+            return EXIT_USAGE
+        return cmd_info_batch(args)
+    if not args.url:
+        print("error: info needs a url (or --batch FILE)", file=sys.stderr)
+        return EXIT_USAGE
+    from spotifydown_api import (
+        PlaylistClient,
+        SpotifyEmbedAPI,
+        TrackTable,
+        detect_spotify_url_type,
+    )
+
     emitter = _Emitter(args.json)
     try:
-        url_type, item_id = app.detect_spotify_url_type(args.url)
+        url_type, item_id = detect_spotify_url_type(args.url)
     except ValueError:
         url_type, item_id = "unknown", None
     if url_type == "unknown" or not item_id:
@@ -367,36 +740,12 @@ def cmd_info(args) -> int:
         return EXIT_FATAL
     try:
         if url_type == "track":
-            track = SpotifyEmbedAPI().get_track(item_id)
-            payload = {
-                "type": "track",
-                "id": track.spotify_id,
-                "title": track.title,
-                "artists": track.artists,
-                "album": track.album or "",
-                "release_date": track.release_date or "",
-                "duration_ms": track.duration_ms or 0,
-            }
+            payload = _info_payload(url_type, item_id, None, [SpotifyEmbedAPI().get_track(item_id)])
         else:
             client = PlaylistClient()
             meta = client.get_playlist_metadata(item_id, content_type=url_type)
-            tracks = [
-                {
-                    "id": t.spotify_id,
-                    "title": t.title,
-                    "artists": t.artists,
-                    "duration_ms": t.duration_ms or 0,
-                }
-                for t in client.iter_playlist_tracks(item_id, content_type=url_type)
-            ]
-            payload = {
-                "type": url_type,
-                "id": item_id,
-                "name": meta.name,
-                "owner": meta.owner or "",
-                "track_count": len(tracks),
-                "tracks": tracks,
-            }
+            tracks = TrackTable(client.iter_playlist_tracks(item_id, content_type=url_type))
+            payload = _info_payload(url_type, item_id, meta, tracks)
     except Exception as exc:
         emitter.error(
             f"could not fetch metadata: {exc}",
@@ -417,9 +766,9 @@ def cmd_info(args) -> int:
 
 
 def cmd_status(args) -> int:
-    cfg = app.load_config()
+    cfg = core.load_config()
     folder = os.path.abspath(os.path.expanduser(args.folder or _resolve_out_dir(None, cfg)))
-    manifest = os.path.join(folder, app.MANIFEST_FILENAME)
+    manifest = os.path.join(folder, core.MANIFEST_FILENAME)
     entries: list[dict] = []
     if os.path.exists(manifest):
         with contextlib.suppress(OSError), open(manifest, encoding="utf-8") as fh:
@@ -430,7 +779,7 @@ def cmd_status(args) -> int:
     # downloads never write a manifest, so count real audio files too
     on_disk = [e for e in entries if os.path.exists(os.path.join(folder, e.get("file", "")))]
     missing = [e for e in entries if e not in on_disk]
-    exts = tuple(f".{spec['ext']}" for spec in app.SUPPORTED_FORMATS.values())
+    exts = tuple(f".{spec['ext']}" for spec in core.SUPPORTED_FORMATS.values())
     audio_files: list[str] = []
     with contextlib.suppress(OSError):
         audio_files = sorted(n for n in os.listdir(folder) if n.lower().endswith(exts))
@@ -453,9 +802,362 @@ def cmd_status(args) -> int:
     return EXIT_OK
 
 
+def cmd_verify(args) -> int:
+    """Integrity-check the audio under a folder or library (see sunnify_verify)."""
+    import sunnify_verify
+
+    cfg = core.load_config()
+    root = os.path.abspath(os.path.expanduser(args.folder or _resolve_out_dir(None, cfg)))
+    emitter = _Emitter(args.json, args.quiet)
+    if not os.path.isdir(root):
+        emitter.error(
+            f"not a folder: {root}",
+            code="folder_missing",
+            hint="pass a download folder or library root, e.g. sunnify verify ~/Music/Sunnify",
+        )
+        return EXIT_FATAL
+
+    def _on_result(rel: str, expected_s, result: dict, cached: bool) -> None:
+        emitter.event(
+            "verified",
+            file=rel,
+            ok=not result["problems"],
+            problems=result["problems"],
+            duration_s=result["duration_s"],
+            expected_s=expected_s,
+            cached=cached,
+        )
+
+    t0 = time.monotonic()
+    summary = sunnify_verify.scan(
+        root, _on_result, workers=args.workers, use_cache=not args.no_cache
+    )
+    code = EXIT_PARTIAL if summary["problems"] else EXIT_OK
+    emitter.event(
+        "verify_summary",
+        folder=root,
+        **summary,
+        elapsed_s=round(time.monotonic() - t0, 1),
+        exit_code=code,
+    )
+    return code
+
+
+def _repair_track(record: dict, client: PlaylistClient):
+    """Rebuild the TrackInfo a manifest record was written for, and the
+    number its file was named with (None for an unnumbered file). Records
+    from before the manifest kept Spotify metadata cost one track lookup;
+    nothing is re-enumerated."""
+    from spotifydown_api import TrackInfo
+
+    if record.get("title"):
+        track = TrackInfo(
+            id=record["id"],
+            title=record["title"],
+            artists=record.get("artists") or "",
+            album=record.get("album"),
+            release_date=record.get("release_date"),
+            cover_url=record.get("cover_url"),
+            duration_ms=record.get("duration_ms"),
+            preview_url=record.get("preview_url"),
+        )
+    else:
+        track = client.get_track(record["id"])
+    number = record.get("number")
+    if not number:
+        prefix = record.get("file", "").split(". ", 1)[0]
+        number = int(prefix) if prefix.isdigit() else None
+    return track, number
+
+
+def cmd_repair(args) -> int:
+    """Re-download only the recorded tracks whose files are missing or fail
+    the integrity checks (see sunnify_verify.find_broken)."""
+    import sunnify_verify
+    from spotifydown_api import PlaylistClient, SpotifyDownAPIError
+
+    cfg = core.load_config()
+    root = os.path.abspath(os.path.expanduser(args.folder or _resolve_out_dir(None, cfg)))
+    emitter = _Emitter(args.json, args.quiet)
+    if not os.path.isdir(root):
+        emitter.error(
+            f"not a folder: {root}",
+            code="folder_missing",
+            hint="pass a download folder or library root, e.g. sunnify repair ~/Music/Sunnify",
+        )
+        return EXIT_FATAL
+
+    t0 = time.monotonic()
+    checked, broken = sunnify_verify.find_broken(
+        root, workers=args.workers, use_cache=not args.no_cache
+    )
+    client = PlaylistClient()
+    jobs: list[tuple] = []
+    unresolved = 0
+    for item in broken:
+        record, folder = item["record"], item["folder"]
+        rel = os.path.relpath(os.path.join(folder, record["file"]), root)
+        try:
+            track, number = _repair_track(record, client)
+        except (SpotifyDownAPIError, KeyError) as exc:
+            unresolved += 1
+            emitter.error(
+                f"cannot look up {rel}: {exc}",
+                code="track_unresolved",
+                hint="delete the file and re-run the playlist's download to replace it",
+            )
+            continue
+        emitter.event(
+            "repair_queued",
+            file=rel,
+            id=track.id,
+            title=track.title,
+            artists=track.artists,
+            problems=item["problems"],
+        )
+        jobs.append((track, folder, number, os.path.join(folder, record["file"])))
+    emitter.event(
+        "repair_scan",
+        folder=root,
+        tracks=checked,
+        broken=len(broken),
+        unresolved=unresolved,
+        elapsed_s=round(time.monotonic() - t0, 1),
+    )
+    if not jobs or args.dry_run:
+        return EXIT_PARTIAL if unresolved or (broken and args.dry_run) else EXIT_OK
+    # a repair re-matches a track whose last match was wrong or cut short,
+    # so check the new one against its preview unless told not to
+    if args.verify_audio is None:
+        args.verify_audio = True
+    args.out = root
+    code = _run_download(args, [], emitter, threading.Event(), client=client, repair=jobs)
+    return code if code != EXIT_OK or not unresolved else EXIT_PARTIAL
+
+
+def _queue_record(track, number: int, cover_url: str | None) -> dict:
+    """A track as `sunnify queue` publishes it: the manifest record shape
+    _repair_track rebuilds tracks from, so a worker never looks it up."""
+    record = {
+        "id": track.id,
+        "title": track.title,
+        "artists": track.artists,
+        "album": track.album,
+        "release_date": track.release_date,
+        "cover_url": track.cover_url or cover_url,
+        "preview_url": track.preview_url,
+        "duration_ms": track.duration_ms,
+        "number": number,
+    }
+    return {key: value for key, value in record.items() if value}
+
+
+def _open_queue(path: str, emitter: _Emitter):
+    import sqlite3
+
+    import sunnify_queue
+
+    try:
+        return sunnify_queue.JobQueue(path)
+    except sqlite3.Error as exc:
+        emitter.error(
+            f"cannot open job queue {path}: {exc}",
+            code="queue_unusable",
+            hint="pass a --db file on storage every worker can read and write",
+        )
+        return None
+
+
+def cmd_queue(args) -> int:
+    """Enumerate playlists, albums and tracks once and publish a job per
+    track for `sunnify work` (see sunnify_queue)."""
+    import sunnify_verify
+    from spotifydown_api import PlaylistClient, SpotifyDownAPIError, detect_spotify_url_type
+
+    cfg = core.load_config()
+    root = _resolve_out_dir(args.out, cfg)
+    emitter = _Emitter(args.json, args.quiet)
+    queue = _open_queue(args.db, emitter)
+    if queue is None:
+        return EXIT_FATAL
+    urls = list(args.urls)
+    if args.from_file:
+        try:
+            urls += _read_url_list(args.from_file)
+        except OSError as exc:
+            emitter.error(
+                f"cannot read url list {args.from_file}: {exc}",
+                code="batch_file_unreadable",
+                hint="pass a text file with one spotify url per line, or - for stdin",
+            )
+            return EXIT_FATAL
+    if not urls:
+        print("error: queue needs a url (or --from-file FILE)", file=sys.stderr)
+        return EXIT_USAGE
+
+    # folder names come from the engine, so workers land tracks exactly
+    # where `sunnify download` would have
+    engine = _load_engine().DownloadEngine()
+    client = PlaylistClient()
+    failed = 0
+    for url in urls:
+        try:
+            url_type, item_id = detect_spotify_url_type(url)
+        except ValueError:
+            url_type, item_id = "unknown", None
+        try:
+            if url_type == "track" and item_id:
+                name, folder = None, root
+                records = [_queue_record(client.get_track(item_id), 0, None)]
+            elif url_type in ("playlist", "album") and item_id:
+                metadata = client.get_playlist_metadata(item_id, content_type=url_type)
+                name = engine.format_playlist_name(metadata)
+                folder = engine.prepare_playlist_folder(root, name)
+                done = {r["id"] for r in sunnify_verify.manifest_records(folder) if r.get("id")}
+                # numbered the way scrape_playlist numbers them
+                records = [
+                    _queue_record(track, track.position or n, metadata.cover_url)
+                    for n, track in enumerate(
+                        client.iter_playlist_tracks(item_id, content_type=url_type, skip_ids=done),
+                        start=1,
+                    )
+                ]
+            else:
+                failed += 1
+                emitter.error(
+                    f"not a spotify playlist/album/track url: {url}",
+                    code="invalid_url",
+                    hint="expected https://open.spotify.com/{playlist,album,track}/... "
+                    "or a spotify: uri",
+                )
+                continue
+        except (SpotifyDownAPIError, OSError) as exc:
+            failed += 1
+            emitter.error(f"cannot queue {url}: {exc}", code="source_failed")
+            continue
+        rel = os.path.relpath(folder, root)
+        added = queue.publish("" if rel == "." else rel, records)
+        emitter.event(
+            "queue_published",
+            url=url,
+            type=url_type,
+            name=name,
+            folder=folder,
+            tracks=len(records),
+            added=added,
+        )
+    code = EXIT_PARTIAL if failed else EXIT_OK
+    emitter.event("queue_summary", db=args.db, folder=root, **queue.counts(), exit_code=code)
+    return code
+
+
+def cmd_work(args) -> int:
+    """Claim track jobs from a `sunnify queue` database and download them
+    into the shared library until none are left (see sunnify_queue)."""
+    import socket
+
+    from spotifydown_api import PlaylistClient, SpotifyDownAPIError
+
+    cfg = core.load_config()
+    root = _resolve_out_dir(args.out, cfg)
+    emitter = _Emitter(args.json, args.quiet)
+    queue = _open_queue(args.db, emitter)
+    if queue is None or not _serve_metrics(getattr(args, "metrics_port", None), emitter):
+        return EXIT_FATAL
+    worker = args.worker or f"{socket.gethostname()}:{os.getpid()}"
+    client = PlaylistClient()
+    cancel_event = threading.Event()
+    totals = {"done": 0, "failed": 0, "retried": 0}
+    emitter.event("work_started", db=args.db, worker=worker, folder=root, **queue.counts())
+    t0 = time.monotonic()
+    code = EXIT_OK
+
+    def _settle(job, error: str | None) -> None:
+        state = queue.finish(job.id, worker, error)
+        if state is not None:
+            totals["retried" if state == "queued" else state] += 1
+
+    while not cancel_event.is_set():
+        jobs = queue.claim(worker, limit=args.batch, lease_s=args.lease)
+        if not jobs:
+            wait = queue.next_expiry_s()
+            if wait is None:
+                break  # drained: nothing queued and nobody holding a lease
+            # the rest is leased to other workers; stay in case one of them
+            # dies and its lease runs out
+            cancel_event.wait(min(wait + 1, 30))
+            continue
+        batch: list[tuple] = []
+        claimed: dict[int, object] = {}
+        for job in jobs:
+            try:
+                track, number = _repair_track(job.record, client)
+            except (SpotifyDownAPIError, KeyError) as exc:
+                _settle(job, f"cannot look up track: {exc}")
+                continue
+            batch.append((track, os.path.join(root, job.folder), number, None))
+            claimed[id(track)] = job
+        if not batch:
+            continue
+
+        # _on_track pops from `claimed` while the renewer reads it
+        claimed_lock = threading.Lock()
+
+        def _on_track(track, result, claimed=claimed, lock=claimed_lock) -> None:
+            with lock:
+                job = claimed.pop(id(track))
+            _settle(job, None if result is None else str(result))
+
+        # renew the batch's leases while it downloads
+        stop_renewing = threading.Event()
+
+        def _renew(claimed=claimed, lock=claimed_lock, stop=stop_renewing) -> None:
+            while not stop.wait(args.lease / 3):
+                with lock:
+                    ids = [job.id for job in claimed.values()]
+                with contextlib.suppress(Exception):
+                    queue.renew(worker, ids, lease_s=args.lease)
+
+        renewer = threading.Thread(target=_renew, name="sunnify-lease", daemon=True)
+        renewer.start()
+        try:
+            rc = _run_download(
+                args,
+                [],
+                emitter,
+                cancel_event,
+                client=client,
+                repair=batch,
+                worker=worker,
+                on_track=_on_track,
+            )
+        finally:
+            stop_renewing.set()
+            # claimed but never started (a cancel, a fatal error): hand back
+            with claimed_lock:
+                unstarted = list(claimed.values())
+            for job in unstarted:
+                queue.release(job.id, worker)
+        if rc == EXIT_FATAL:
+            code = EXIT_FATAL
+            break
+    if code != EXIT_FATAL and (totals["failed"] or cancel_event.is_set()):
+        code = EXIT_PARTIAL
+    emitter.event(
+        "work_summary",
+        worker=worker,
+        **totals,
+        queue=queue.counts(),
+        stopped=cancel_event.is_set(),
+        elapsed_s=round(time.monotonic() - t0, 1),
+        exit_code=code,
+    )
+    return code
+
+
 def cmd_config(args) -> int:
-    cfg = app.load_config()
-    registry = {s.key: s for s in app.SETTINGS}
+    cfg = core.load_config()
+    registry = {s.key: s for s in core.SETTINGS}
     if args.set:
         for pair in args.set:
             key, sep, value = pair.partition("=")
@@ -480,10 +1182,20 @@ def cmd_config(args) -> int:
                     )
                     return EXIT_USAGE
                 cfg[key] = value
+            elif setting.kind == "int":
+                number = int(value) if value.isdigit() else None
+                if number not in setting.choices:
+                    print(
+                        f"error: {key} must be a whole number from "
+                        f"{setting.choices[0]} to {setting.choices[-1]}",
+                        file=sys.stderr,
+                    )
+                    return EXIT_USAGE
+                cfg[key] = number
             else:
                 cfg[key] = value
-        app.save_config(cfg)
-    visible = {k: v for k, v in cfg.items() if k not in ("version", "star_prompt_shown")}
+        core.save_config(cfg)
+    visible = {k: v for k, v in cfg.items() if k not in ("version", *core.INTERNAL_FLAGS)}
     if args.json:
         print(json.dumps(visible, ensure_ascii=False, indent=2))
     else:
@@ -496,7 +1208,7 @@ def cmd_doctor(args) -> int:
     """Environment self-check: the command to run when downloads misbehave."""
     checks: list[dict] = []
 
-    ffmpeg = app.get_ffmpeg_path()
+    ffmpeg = core.get_ffmpeg_path()
     checks.append(
         {
             "check": "ffmpeg",
@@ -506,15 +1218,17 @@ def cmd_doctor(args) -> int:
         }
     )
 
-    cfg_ok, cfg_detail = True, app._config_path()
+    cfg_ok, cfg_detail = True, core._config_path()
     try:
-        app.load_config()
+        core.load_config()
     except Exception as exc:  # load_config swallows almost everything; belt and braces
         cfg_ok, cfg_detail = False, str(exc)
     checks.append({"check": "config", "ok": cfg_ok, "detail": cfg_detail})
-    checks.append({"check": "logs", "ok": True, "detail": app._log_dir()})
+    checks.append({"check": "logs", "ok": True, "detail": core._log_dir()})
 
     try:
+        from spotifydown_api import SpotifyEmbedAPI
+
         SpotifyEmbedAPI().get_track("4uLU6hMCjMI75M1A2tKUQC")  # never gonna give you up
         checks.append(
             {"check": "spotify_metadata", "ok": True, "detail": "embed endpoint reachable"}
@@ -531,23 +1245,34 @@ def cmd_doctor(args) -> int:
     except Exception as exc:
         checks.append({"check": "yt_dlp", "ok": False, "detail": str(exc)})
 
+    # optional: only --verify-audio needs it, so a missing numpy is not a failure
+    try:
+        import numpy
+
+        detail = f"version {numpy.__version__} (--verify-audio available)"
+    except ImportError:
+        detail = "not installed (only needed for --verify-audio: pip install numpy)"
+    checks.append({"check": "numpy", "ok": True, "detail": detail})
+
     # ok stays True either way: being behind is a nudge, not an unhealthy env
     try:
-        r = app.requests.get(
-            app._LATEST_RELEASE_API, timeout=5, headers={"Accept": "application/vnd.github+json"}
+        import requests
+
+        r = requests.get(
+            core._LATEST_RELEASE_API, timeout=5, headers={"Accept": "application/vnd.github+json"}
         )
         tag = (r.json().get("tag_name") or "").lstrip("vV") if r.status_code == 200 else ""
-        if tag and app._is_newer_version(tag, app.__version__):
-            detail = f"{app.__version__} installed, {tag} available: {app._RELEASES_PAGE}"
+        if tag and core._is_newer_version(tag, core.__version__):
+            detail = f"{core.__version__} installed, {tag} available: {core._RELEASES_PAGE}"
         elif tag:
-            detail = f"{app.__version__} is the latest release"
+            detail = f"{core.__version__} is the latest release"
         elif r.status_code in (403, 429):
             # unauthenticated github rest is 60 req/hour/ip; never worth failing over
-            detail = f"{app.__version__} (release check rate-limited by github, try later)"
+            detail = f"{core.__version__} (release check rate-limited by github, try later)"
         else:
-            detail = f"{app.__version__} (release check got http {r.status_code})"
+            detail = f"{core.__version__} (release check got http {r.status_code})"
     except Exception as exc:
-        detail = f"{app.__version__} (release check unreachable: {exc})"
+        detail = f"{core.__version__} (release check unreachable: {exc})"
     checks.append({"check": "version", "ok": True, "detail": detail})
 
     all_ok = all(c["ok"] for c in checks)
@@ -560,8 +1285,41 @@ def cmd_doctor(args) -> int:
     return EXIT_OK if all_ok else EXIT_FATAL
 
 
+def _add_setting_flags(parser: argparse.ArgumentParser, cfg: dict) -> None:
+    # every scraper setting becomes a flag straight from the registry, so a
+    # new app setting reaches the CLI with no changes here
+    short = {"--format": "-f", "--quality": "-q"}
+    for s in core.SETTINGS:
+        if s.cli_flag is None:
+            continue
+        names = [s.cli_flag] + ([short[s.cli_flag]] if s.cli_flag in short else [])
+        if s.kind == "bool":
+            parser.add_argument(
+                *names,
+                action=argparse.BooleanOptionalAction,
+                default=None,
+                help=f"{s.help} (default: {cfg[s.key]})",
+            )
+        elif s.kind == "int":
+            parser.add_argument(
+                *names,
+                type=int,
+                choices=s.choices,
+                metavar="N",
+                default=None,
+                help=f"{s.help}, {s.choices[0]}-{s.choices[-1]} (default: {cfg[s.key]})",
+            )
+        else:
+            parser.add_argument(
+                *names,
+                choices=s.choices,
+                default=None,
+                help=f"{s.help} (default: {cfg[s.key]}, from saved settings)",
+            )
+
+
 def build_parser() -> argparse.ArgumentParser:
-    cfg = app.load_config()
+    cfg = core.load_config()
     parser = argparse.ArgumentParser(
         prog="sunnify",
         description=(
@@ -574,14 +1332,22 @@ def build_parser() -> argparse.ArgumentParser:
             '  sunnify download "https://open.spotify.com/track/..." -o ~/Music -f flac --sample-rate 44100\n'
             '  sunnify download "<url>" --json           # NDJSON progress events for scripts/agents\n'
             '  sunnify info "<url>" --json               # metadata only, no download\n'
+            '  sunnify info "<url>" --record-http run.jsonl  # save responses to replay offline\n'
+            "  sunnify download --from-file urls.txt     # queue many links into one run\n"
+            "  sunnify info --batch urls.txt --json      # many urls at once, NDJSON per url\n"
             "  sunnify status                            # what's landed in the download folder\n"
+            "  sunnify verify ~/Music --json             # find truncated/untagged files\n"
+            "  sunnify repair ~/Music                    # re-download just the broken ones\n"
+            '  sunnify queue "<url>" --db /mnt/music/jobs.db -o /mnt/music   # share a playlist out\n'
+            "  sunnify work --db /mnt/music/jobs.db -o /mnt/music  # on each machine\n"
             "  sunnify config --set format=m4a           # persist a setting (shared with the GUI)\n"
             "  sunnify doctor                            # self-check when downloads misbehave\n"
+            "  sunnify serve                             # local job daemon, no cold starts\n"
             "\nfull reference: https://github.com/sunnypatell/sunnify-spotify-downloader/blob/main/docs/CLI.md"
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
-    parser.add_argument("--version", "-V", action="version", version=f"sunnify {app.__version__}")
+    parser.add_argument("--version", "-V", action="version", version=f"sunnify {core.__version__}")
     sub = parser.add_subparsers(dest="command", required=True, metavar="command")
 
     dl = sub.add_parser(
@@ -592,35 +1358,37 @@ def build_parser() -> argparse.ArgumentParser:
             "Tracks already in the folder are skipped, so re-running resumes automatically."
         ),
     )
-    dl.add_argument("url", help="spotify playlist/album/track url (or spotify: uri)")
+    dl.add_argument("url", nargs="?", help="spotify playlist/album/track url (or spotify: uri)")
+    dl.add_argument(
+        "--from-file",
+        metavar="FILE",
+        default=None,
+        help="download every url in FILE (one per line, - for stdin) through one shared "
+        "worker pool; tracks repeated across links download once",
+    )
     dl.add_argument(
         "--out",
         "-o",
         default=None,
         help=f"output folder (default: {cfg.get('download_path') or '~/Music/Sunnify'})",
     )
-    # every scraper setting becomes a flag straight from the registry, so a
-    # new app setting reaches the CLI with no changes here
-    short = {"--format": "-f", "--quality": "-q"}
-    for s in app.SETTINGS:
-        if s.cli_flag is None:
-            continue
-        names = [s.cli_flag] + ([short[s.cli_flag]] if s.cli_flag in short else [])
-        if s.kind == "bool":
-            dl.add_argument(
-                *names,
-                action=argparse.BooleanOptionalAction,
-                default=None,
-                help=f"{s.help} (default: {cfg[s.key]})",
-            )
-        else:
-            dl.add_argument(
-                *names,
-                choices=s.choices,
-                default=None,
-                help=f"{s.help} (default: {cfg[s.key]}, from saved settings)",
-            )
+    _add_setting_flags(dl, cfg)
+    dl.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="serve Prometheus/OpenMetrics metrics at http://127.0.0.1:PORT/metrics "
+        "while the download runs",
+    )
     dl.add_argument("--json", action="store_true", help="emit NDJSON progress events on stdout")
+    dl.add_argument(
+        "--profile",
+        action="store_true",
+        help="sample every thread's stack while the download runs and write pstats and "
+        "flamegraph-ready collapsed stacks next to the log file",
+    )
+    _add_cassette_flags(dl)
     dl.add_argument(
         "--quiet", "-Q", action="store_true", help="suppress progress (errors still print)"
     )
@@ -631,8 +1399,22 @@ def build_parser() -> argparse.ArgumentParser:
         help="fetch metadata without downloading",
         description="Print playlist/album/track metadata. No downloads, no ffmpeg needed.",
     )
-    info.add_argument("url", help="spotify playlist/album/track url")
+    info.add_argument("url", nargs="?", help="spotify playlist/album/track url")
+    info.add_argument(
+        "--batch",
+        metavar="FILE",
+        default=None,
+        help="resolve every url in FILE (one per line, - for stdin) concurrently; "
+        "with --json, one NDJSON event per url",
+    )
     info.add_argument("--json", action="store_true", help="emit one JSON document")
+    info.add_argument(
+        "--profile",
+        action="store_true",
+        help="sample every thread's stack while the lookup runs and write pstats and "
+        "flamegraph-ready collapsed stacks next to the log file",
+    )
+    _add_cassette_flags(info)
     info.set_defaults(func=cmd_info)
 
     status = sub.add_parser(
@@ -652,6 +1434,170 @@ def build_parser() -> argparse.ArgumentParser:
     status.add_argument("--json", action="store_true", help="emit one JSON document")
     status.set_defaults(func=cmd_status)
 
+    verify = sub.add_parser(
+        "verify",
+        help="check downloaded audio for truncated, broken or untagged files",
+        description=(
+            "Scan a folder (or a whole library, recursively) in parallel: read each audio "
+            "file's headers, compare its length with the Spotify duration in the resume "
+            "manifest, and flag empty, unreadable, truncated, untagged or coverless files "
+            "and leftover partial downloads. Unchanged files reuse their last result."
+        ),
+    )
+    verify.add_argument(
+        "folder",
+        nargs="?",
+        default=None,
+        help="folder or library root to scan (default: the configured download folder)",
+    )
+    verify.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="processes to check files with (default: one per cpu)",
+    )
+    verify.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="re-check every file, ignoring results from earlier scans",
+    )
+    verify.add_argument("--json", action="store_true", help="emit NDJSON events on stdout")
+    verify.add_argument(
+        "--quiet", "-Q", action="store_true", help="suppress per-file output (errors still print)"
+    )
+    verify.set_defaults(func=cmd_verify)
+
+    repair = sub.add_parser(
+        "repair",
+        help="re-download only the tracks whose files are broken or wrong",
+        description=(
+            "Check every track recorded in the resume manifests under a folder (or a whole "
+            "library) with the same probe as verify, and download again only the ones whose "
+            "file is missing, empty, unreadable, cut short or a different length than on "
+            "Spotify. Tracks are rebuilt from the metadata the manifest stored, so playlists "
+            "aren't fetched again. A broken file is kept until its replacement lands. "
+            "Preview verification is on unless --no-verify-audio is passed."
+        ),
+    )
+    repair.add_argument(
+        "folder",
+        nargs="?",
+        default=None,
+        help="folder or library root to repair (default: the configured download folder)",
+    )
+    repair.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="list what would be re-downloaded, download nothing",
+    )
+    repair.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="processes to check files with (default: one per cpu)",
+    )
+    repair.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="re-check every file, ignoring results from earlier verify scans",
+    )
+    _add_setting_flags(repair, cfg)
+    repair.add_argument("--json", action="store_true", help="emit NDJSON progress events on stdout")
+    repair.add_argument(
+        "--quiet", "-Q", action="store_true", help="suppress progress (errors still print)"
+    )
+    repair.set_defaults(func=cmd_repair)
+
+    queue = sub.add_parser(
+        "queue",
+        help="publish a playlist's tracks as jobs for `sunnify work` on several machines",
+        description=(
+            "Enumerate playlists, albums and tracks once and publish one job per track into "
+            "a shared SQLite job file, for `sunnify work` processes on any number of "
+            "machines to download into the same library. Tracks already in a folder's "
+            "resume manifest or already queued are left out, so queueing a playlist again "
+            "only adds what's new."
+        ),
+    )
+    queue.add_argument("urls", nargs="*", help="spotify playlist, album or track urls")
+    queue.add_argument(
+        "--db", required=True, metavar="FILE", help="job file, on storage every worker can reach"
+    )
+    queue.add_argument(
+        "--from-file",
+        metavar="FILE",
+        help="also queue the urls in FILE, one per line (- for stdin)",
+    )
+    queue.add_argument(
+        "--out",
+        "-o",
+        default=None,
+        help="library root the workers share (default: the configured download folder)",
+    )
+    queue.add_argument("--json", action="store_true", help="emit NDJSON events on stdout")
+    queue.add_argument(
+        "--quiet", "-Q", action="store_true", help="suppress progress (errors still print)"
+    )
+    queue.set_defaults(func=cmd_queue)
+
+    work = sub.add_parser(
+        "work",
+        help="download jobs from a `sunnify queue` file until none are left",
+        description=(
+            "Claim track jobs from a shared job file in batches and download them into the "
+            "shared library, recording each in its folder's resume manifest. Claims are "
+            "leases the worker renews while it runs; a worker that dies stops renewing, and "
+            "its jobs go back to the others once the lease runs out. A failed track is "
+            "retried by whichever worker claims it next, up to 3 times. Exits once every "
+            "job is done or failed."
+        ),
+    )
+    work.add_argument(
+        "--db", required=True, metavar="FILE", help="job file written by `sunnify queue`"
+    )
+    work.add_argument(
+        "--out",
+        "-o",
+        default=None,
+        help="the library root the jobs were queued for (default: the configured download folder)",
+    )
+    work.add_argument(
+        "--batch",
+        type=int,
+        default=8,
+        metavar="N",
+        help="jobs to claim at a time (default: 8)",
+    )
+    work.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="how long a claim lasts without renewal before other workers may take it "
+        "(default: 300)",
+    )
+    work.add_argument(
+        "--worker",
+        default=None,
+        help="name recorded on claimed jobs (default: host:pid)",
+    )
+    _add_setting_flags(work, cfg)
+    work.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="serve Prometheus/OpenMetrics metrics at http://127.0.0.1:PORT/metrics "
+        "while the worker runs",
+    )
+    work.add_argument("--json", action="store_true", help="emit NDJSON progress events on stdout")
+    work.add_argument(
+        "--quiet", "-Q", action="store_true", help="suppress progress (errors still print)"
+    )
+    work.set_defaults(func=cmd_work)
+
     config = sub.add_parser(
         "config",
         help="show or change saved settings (shared with the GUI)",
@@ -674,26 +1620,158 @@ def build_parser() -> argparse.ArgumentParser:
     doctor.add_argument("--json", action="store_true", help="emit one JSON document")
     doctor.set_defaults(func=cmd_doctor)
 
+    serve = sub.add_parser(
+        "serve",
+        help="run a local job daemon (warm sessions, no per-run cold start)",
+        description=(
+            "Keep the engine, Spotify session and token warm and accept download/info jobs "
+            "over localhost HTTP; job events stream as the same NDJSON as --json. "
+            "See docs/CLI.md for the job API."
+        ),
+    )
+    serve.add_argument("--host", default="127.0.0.1", help="bind address (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="port (default: 8765; 0 = any)")
+    serve.add_argument("--json", action="store_true", help="emit NDJSON lifecycle events")
+    serve.set_defaults(func=cmd_serve)
+
     return parser
 
 
+def cmd_serve(args) -> int:
+    """Run the local job daemon until ^C (see sunnify_daemon)."""
+    import sunnify_daemon
+
+    emitter = _Emitter(args.json)
+    daemon = sunnify_daemon.Daemon()
+    try:
+        server = sunnify_daemon.make_server(args.host, args.port, daemon)
+    except OSError as exc:
+        daemon.shutdown()
+        emitter.error(
+            f"cannot listen on {args.host}:{args.port}: {exc}",
+            code="port_unavailable",
+            hint="pass a free --port, or stop the daemon already listening there",
+        )
+        return EXIT_FATAL
+    host, port = server.server_address[:2]
+    core.log.info("serve: listening on %s:%d", host, port)
+    emitter.event("serve_started", url=f"http://{host}:{port}", pid=os.getpid())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.shutdown()
+        server.server_close()
+    emitter.event("serve_stopped")
+    return EXIT_OK
+
+
 def _forensic_sigterm(sig, _frame):
     """Same signal forensics as the app: name the killer, then die normally."""
     import logging
 
     with contextlib.suppress(Exception):
-        app.log.info("terminated by signal %s (cli)", signal.Signals(sig).name)
+        core.log.info("terminated by signal %s (cli)", signal.Signals(sig).name)
         logging.shutdown()
     signal.signal(sig, signal.SIG_DFL)
     os.kill(os.getpid(), sig)
 
 
+def _replay_latency(value: str) -> str | float:
+    if value == "recorded":
+        return value
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = -1.0
+    if seconds < 0:
+        raise argparse.ArgumentTypeError("expected 'recorded' or a number of seconds >= 0")
+    return seconds
+
+
+def _add_cassette_flags(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--record-http",
+        metavar="FILE",
+        default=None,
+        help="save every spotify and youtube response this run gets to FILE (a cassette)",
+    )
+    group.add_argument(
+        "--replay-http",
+        metavar="FILE",
+        default=None,
+        help="serve the run from a cassette saved with --record-http, offline",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=_replay_latency,
+        default="recorded",
+        metavar="SECONDS",
+        help="with --replay-http: wait each response's recorded time (the default, "
+        "'recorded') or a fixed number of seconds (0 for none)",
+    )
+
+
+def _run_with_cassette(args, run) -> int:
+    """--record-http / --replay-http: run the command with the shared
+    session and yt-dlp going through a cassette (see sunnify_cassette)."""
+    record, replay = getattr(args, "record_http", None), getattr(args, "replay_http", None)
+    if not record and not replay:
+        return run(args)
+    import sunnify_cassette
+
+    try:
+        if replay:
+            latency = getattr(args, "replay_latency", "recorded")
+            cassette = sunnify_cassette.Cassette.replay(replay, latency)
+        else:
+            cassette = sunnify_cassette.Cassette.record(record)
+    except (OSError, ValueError) as exc:
+        print(f"cassette not readable: {exc}", file=sys.stderr)
+        return EXIT_USAGE
+    with cassette:
+        rc = run(args)
+    # stderr, so --json stdout stays pure NDJSON
+    if replay:
+        print(
+            f"replayed {cassette.replayed} responses from {replay}"
+            + (f", {cassette.misses} not in the cassette" if cassette.misses else ""),
+            file=sys.stderr,
+        )
+    else:
+        print(f"recorded {cassette.recorded} responses to {record}", file=sys.stderr)
+    return rc
+
+
+def _run_profiled(args) -> int:
+    """--profile: run the command under the sampling profiler and write its
+    pstats and collapsed stacks next to the session log (see sunnify_profile)."""
+    import sunnify_profile
+
+    profiler = sunnify_profile.Profiler()
+    profiler.start()
+    try:
+        return args.func(args)
+    finally:
+        profiler.stop()
+        try:
+            paths = profiler.write(os.path.dirname(core.log_file_path()), args.command)
+        except OSError as exc:
+            print(f"profile not written: {exc}", file=sys.stderr)
+        else:
+            core.log.info("profile: %d samples -> %s", profiler.samples, ", ".join(paths))
+            # stderr, so --json stdout stays pure NDJSON
+            print(f"profile: {paths[0]}\nstacks:  {paths[1]}", file=sys.stderr)
+
+
 def main(argv: list[str] | None = None) -> int:
     _ensure_windows_console()
     # same rotating session log as the GUI; never a reason to fail a run
     with contextlib.suppress(Exception):
-        app.setup_logging()
-        app.log.info("cli invoked: %s", " ".join(argv or sys.argv[1:]))
+        core.setup_logging()
+        core.log.info("cli invoked: %s", " ".join(argv or sys.argv[1:]))
     with contextlib.suppress(Exception):
         signal.signal(signal.SIGTERM, _forensic_sigterm)
     if argv is None:
@@ -704,11 +1782,12 @@ def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
     try:
-        rc = args.func(args)
+        run = _run_profiled if getattr(args, "profile", False) else args.func
+        rc = _run_with_cassette(args, run)
     except KeyboardInterrupt:
         rc = 130
     with contextlib.suppress(Exception):
-        app.log.info("cli exit: code=%d", rc)
+        core.log.info("cli exit: code=%d", rc)
     return rc
 
 
@@ -0,0 +1,332 @@
+"""Adaptive worker concurrency for sunnify's download and metadata pools.
+
+A fixed pool size is right for one machine and one network at most: four
+downloads under-use a server with a fast uplink and over-drive a laptop whose
+IP YouTube has started bot-challenging. AdaptiveLimit is an AIMD controller
+in the TCP congestion-control mould:
+
+- additive increase: throughput (successful jobs per second) is measured
+  over windows of at least `current` completions and `window_s` seconds. The
+  first window sets a baseline, then the limit probes one worker up; while
+  each step up keeps improving throughput by more than GAIN it keeps
+  climbing, a step up that cost more than GAIN is undone, and a flat run
+  re-probes every REPROBE windows in case conditions changed.
+- multiplicative decrease: a throttle signal (an HTTP 429, a YouTube bot
+  challenge) halves the limit at once, and the baseline is measured afresh.
+  Signals within one window of a decrease count as the same burst.
+
+run_adaptive() is the pool that follows the limit: it keeps exactly
+`current` worker threads alive (spawning on growth, retiring a worker after
+its job on a decrease) and hands outcomes back on the caller's thread.
+Given a LaneQueue instead of a plain job list, it takes jobs lane by lane in
+priority order and keeps running while delayed jobs are still waiting, so
+the caller can put a failed job back for a later retry; run_inline() is the
+same loop without threads, for runs that download one track at a time.
+
+Stdlib only, so spotifydown_api can use it without the engine.
+"""
+
+from __future__ import annotations
+
+import collections
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+
+import sunnify_metrics
+
+log = logging.getLogger("sunnify.concurrency")
+
+# relative throughput change that counts as better or worse, not noise
+GAIN = 0.05
+# flat windows before the limit probes upward again
+REPROBE = 3
+# longest a runner sleeps while only delayed jobs are waiting, so a stop
+# request is noticed promptly
+_POLL_S = 0.5
+
+
+class AdaptiveLimit:
+    """How many jobs a pool should run at once, between minimum and maximum.
+
+    record() each finished job and call throttled() on a rate-limit signal;
+    both are thread-safe. `current` is the live value. on_change(old, new,
+    reason) is called, outside the lock, whenever it moves.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int | None = None,
+        *,
+        name: str = "pool",
+        window_s: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        on_change: Callable[[int, int, str], None] | None = None,
+    ):
+        self.name = name
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum if maximum is not None else initial))
+        self.current = min(max(int(initial), self.minimum), self.maximum)
+        self.peak = self.current
+        self.throttles = 0
+        self.window_s = window_s
+        self._clock = clock
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._window_start = clock()
+        self._done = 0
+        self._ok = 0
+        self._last_rate: float | None = None
+        self._last_step = 0
+        self._flat = 0
+        self._quiet_until = 0.0
+        sunnify_metrics.POOL_WORKERS.set(self.current, pool=name)
+
+    @property
+    def fixed(self) -> bool:
+        return self.minimum == self.maximum
+
+    def snapshot(self) -> dict:
+        return {
+            "current": self.current,
+            "min": self.minimum,
+            "max": self.maximum,
+            "peak": self.peak,
+            "throttles": self.throttles,
+        }
+
+    def record(self, ok: bool = True) -> None:
+        """One job finished; `ok` when it produced what it was for."""
+        with self._lock:
+            self._done += 1
+            self._ok += int(ok)
+            now = self._clock()
+            elapsed = now - self._window_start
+            if self._done < self.current or elapsed < self.window_s:
+                return
+            rate = self._ok / elapsed if elapsed > 0 else 0.0
+            previous, self._last_rate = self._last_rate, rate
+            self._window_start, self._done, self._ok = now, 0, 0
+            if previous is None:
+                step, reason = 1, "probe"
+            elif rate > previous * (1 + GAIN) and self._last_step >= 0:
+                step, reason = 1, "throughput up"
+            elif rate < previous * (1 - GAIN) and self._last_step > 0:
+                step, reason = -1, "throughput down"
+            else:
+                self._flat += 1
+                step, reason = (1, "re-probe") if self._flat >= REPROBE else (0, "")
+            if step:
+                self._flat = 0
+            change = self._set(self.current + step, reason)
+            self._last_step = step if change else 0
+        self._notify(change)
+
+    def throttled(self) -> None:
+        """A rate limit or bot challenge: halve the limit (once per burst)."""
+        with self._lock:
+            self.throttles += 1
+            now = self._clock()
+            if now < self._quiet_until:
+                return
+            self._quiet_until = now + self.window_s
+            change = self._set(self.current // 2, "throttled")
+            # re-measure from here; the first full window probes back up
+            self._window_start, self._done, self._ok = now, 0, 0
+            self._last_rate = None
+            self._last_step = -1
+            self._flat = 0
+        self._notify(change)
+
+    def _set(self, value: int, reason: str) -> tuple[int, int, str] | None:
+        value = min(max(value, self.minimum), self.maximum)
+        if value == self.current:
+            return None
+        old, self.current = self.current, value
+        self.peak = max(self.peak, value)
+        sunnify_metrics.POOL_WORKERS.set(value, pool=self.name)
+        return old, value, reason
+
+    def _notify(self, change) -> None:
+        if change is None:
+            return
+        old, new, reason = change
+        log.info("%s concurrency %d -> %d (%s)", self.name, old, new, reason)
+        if self._on_change is not None:
+            try:
+                self._on_change(old, new, reason)
+            except Exception:
+                log.exception("concurrency on_change callback failed")
+
+
+class LaneQueue:
+    """Jobs in priority lanes.
+
+    take() returns the next due job from the first lane, in the order the
+    lanes were named, that has one. put() appends to a lane; with `delay_s`
+    the job waits in its lane until due. Thread-safe.
+    """
+
+    def __init__(self, lanes: Sequence[str], *, clock: Callable[[], float] = time.monotonic):
+        self.lanes = tuple(lanes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ready: dict[str, collections.deque] = {lane: collections.deque() for lane in lanes}
+        # lane -> heap of (due, seq, job); seq keeps equal due times FIFO
+        self._delayed: dict[str, list] = {lane: [] for lane in lanes}
+        self._seq = itertools.count()
+
+    def put(self, job, lane: str | None = None, delay_s: float = 0.0) -> None:
+        lane = lane or self.lanes[0]
+        with self._lock:
+            if delay_s > 0:
+                heapq.heappush(self._delayed[lane], (self._clock() + delay_s, next(self._seq), job))
+            else:
+                self._ready[lane].append(job)
+
+    def take(self):
+        """The next due job, or None when nothing is due yet."""
+        now = self._clock()
+        with self._lock:
+            for lane in self.lanes:
+                delayed = self._delayed[lane]
+                if delayed and delayed[0][0] <= now:
+                    return heapq.heappop(delayed)[2]
+                if self._ready[lane]:
+                    return self._ready[lane].popleft()
+        return None
+
+    def ready(self) -> int:
+        """How many jobs take() could hand out right now."""
+        now = self._clock()
+        with self._lock:
+            return sum(len(q) for q in self._ready.values()) + sum(
+                1 for heap in self._delayed.values() for due, _seq, _job in heap if due <= now
+            )
+
+    def wait_s(self) -> float | None:
+        """Seconds until the next delayed job is due (None: none waiting)."""
+        now = self._clock()
+        with self._lock:
+            waits = [heap[0][0] - now for heap in self._delayed.values() if heap]
+        return max(min(waits), 0.0) if waits else None
+
+    def depths(self) -> dict[str, int]:
+        """Jobs waiting per lane, due or not."""
+        with self._lock:
+            return {lane: len(self._ready[lane]) + len(self._delayed[lane]) for lane in self.lanes}
+
+    def __len__(self) -> int:
+        return sum(self.depths().values())
+
+
+def _as_lanes(jobs) -> LaneQueue:
+    if isinstance(jobs, LaneQueue):
+        return jobs
+    lanes = LaneQueue(("jobs",))
+    for job in jobs:
+        lanes.put(job)
+    return lanes
+
+
+def run_inline(
+    jobs: Iterable | LaneQueue, run: Callable, *, stop: Callable[[], bool] | None = None
+) -> Iterator[tuple]:
+    """run_adaptive() for a pool of one, on the caller's own thread.
+
+    Yields (job, result, error) after each job; sleeps while only delayed
+    jobs are left.
+    """
+    todo = _as_lanes(jobs)
+    while len(todo) and not (stop and stop()):
+        job = todo.take()
+        if job is None:
+            time.sleep(min(todo.wait_s() or 0.0, _POLL_S))
+            continue
+        try:
+            result = run(job)
+        except Exception as exc:
+            yield job, None, exc
+            continue
+        yield job, result, None
+
+
+def run_adaptive(
+    jobs: Iterable | LaneQueue,
+    run: Callable,
+    limit: AdaptiveLimit,
+    *,
+    stop: Callable[[], bool] | None = None,
+    name: str = "sunnify-worker",
+) -> Iterator[tuple]:
+    """Run `run(job)` for every job on `limit.current` worker threads.
+
+    Yields (job, result, error) in completion order on the caller's thread;
+    error is the exception `run` raised, or None. The caller reports each
+    outcome to `limit`; the worker count follows it before the next wait.
+    A LaneQueue may be added to while the outcomes are being consumed, and
+    the pool lasts until it is empty (delayed jobs included). Workers stop
+    taking jobs once `stop()` is true or the generator is closed; jobs
+    already running finish on their (daemon) threads.
+    """
+    todo = _as_lanes(jobs)
+    outcomes: queue.SimpleQueue = queue.SimpleQueue()
+    lock = threading.Lock()
+    live = 0  # workers that haven't decided to exit (guarded by lock)
+    closed = False
+    spawned = 0
+    exited = 0
+
+    def _worker() -> None:
+        nonlocal live
+        while True:
+            with lock:
+                job = None
+                if not (closed or live > limit.current or (stop and stop())):
+                    job = todo.take()
+                if job is None:
+                    live -= 1
+                    break
+            sunnify_metrics.POOL_BUSY.inc(pool=limit.name)
+            try:
+                outcomes.put((job, run(job), None))
+            except Exception as exc:
+                outcomes.put((job, None, exc))
+            finally:
+                sunnify_metrics.POOL_BUSY.dec(pool=limit.name)
+        outcomes.put(None)
+
+    def _top_up() -> None:
+        nonlocal live, spawned
+        with lock:
+            want = min(limit.current - live, todo.ready())
+            if closed or (stop and stop()):
+                want = 0
+            want = max(want, 0)
+            live += want
+        for _ in range(want):
+            spawned += 1
+            threading.Thread(target=_worker, name=f"{name}-{spawned}", daemon=True).start()
+
+    try:
+        _top_up()
+        while exited < spawned or (len(todo) and not (stop and stop())):
+            wait = todo.wait_s()
+            try:
+                item = outcomes.get(timeout=None if wait is None else min(wait, _POLL_S))
+            except queue.Empty:
+                item = False  # a delayed job may be due: top up
+            if item is None:
+                exited += 1
+            elif item:
+                yield item
+            _top_up()
+    finally:
+        with lock:
+            closed = True
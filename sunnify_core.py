@@ -0,0 +1,472 @@
+"""Sunnify core: version, settings registry, config, logging, ffmpeg lookup.
+
+Everything here is stdlib-only at import time (requests is imported inside the
+update check), so the headless commands that only read settings or the disk -
+`sunnify status`, `config`, `--version` - start without PyQt6, yt-dlp,
+mutagen or requests. Spotify_Downloader re-exports the names it used to define, so the GUI and
+older imports keep working unchanged.
+"""
+
+from __future__ import annotations
+
+__version__ = "2.2.1"
+
+import atexit
+import contextlib
+import faulthandler
+import logging
+import os
+import platform
+import sys
+import threading
+from logging.handlers import RotatingFileHandler
+
+# Module logger. Stays a no-op (no handlers) until _setup_logging() runs at
+# startup, so importing this module in tests stays silent and writes nothing.
+log = logging.getLogger("sunnify")
+
+
+def _log_excepthook(exc_type, exc, tb):
+    """Route uncaught main-thread exceptions to the log before the default handler."""
+    # ctrl+c and an intentional sys.exit() are clean exits, not crashes
+    if not issubclass(exc_type, (KeyboardInterrupt, SystemExit)):
+        with contextlib.suppress(Exception):
+            log.critical("uncaught exception", exc_info=(exc_type, exc, tb))
+    if sys.stderr is not None:  # windowed builds have no stderr to write to
+        sys.__excepthook__(exc_type, exc, tb)
+
+
+def _thread_excepthook(args):
+    """Same, for python threads; qt threads log inside their own run()."""
+    if issubclass(args.exc_type, SystemExit):
+        return
+    with contextlib.suppress(Exception):
+        log.critical(
+            "uncaught exception in thread %s",
+            args.thread.name if args.thread else "?",
+            exc_info=(args.exc_type, args.exc_value, args.exc_traceback),
+        )
+
+
+def _install_crash_handlers() -> None:
+    """Make every abnormal exit land in the log; logging is our only diagnostic."""
+    sys.excepthook = _log_excepthook
+    threading.excepthook = _thread_excepthook
+    # faulthandler catches native crashes (qt/ffmpeg segfaults) excepthook can't;
+    # crash.log sits next to sunnify.log and stays open for the process lifetime.
+    with contextlib.suppress(Exception):
+        crash_path = os.path.join(os.path.dirname(log_file_path()), "crash.log")
+        faulthandler.enable(open(crash_path, "a"))  # noqa: SIM115
+    atexit.register(lambda: log.info("==== sunnify session end ===="))
+
+
+def get_ffmpeg_path():
+    """Get path to FFmpeg - checks bundled first, then system paths."""
+    # Check bundled FFmpeg first (for PyInstaller builds)
+    if getattr(sys, "frozen", False):
+        base_path = sys._MEIPASS
+        if sys.platform == "win32":
+            ffmpeg = os.path.join(base_path, "ffmpeg", "ffmpeg.exe")
+        else:
+            ffmpeg = os.path.join(base_path, "ffmpeg", "ffmpeg")
+        if os.path.exists(ffmpeg):
+            return os.path.join(base_path, "ffmpeg")
+
+    # Check common system paths (for homebrew/system installs)
+    ffmpeg_name = "ffmpeg.exe" if sys.platform == "win32" else "ffmpeg"
+    common_paths = [
+        "/opt/homebrew/bin",  # macOS ARM homebrew
+        "/usr/local/bin",  # macOS Intel homebrew / Linux
+        "/usr/bin",  # Linux system
+    ]
+
+    for path in common_paths:
+        ffmpeg = os.path.join(path, ffmpeg_name)
+        if os.path.exists(ffmpeg):
+            return path
+
+    # Check if ffmpeg is in PATH
+    import shutil
+
+    ffmpeg_in_path = shutil.which("ffmpeg")
+    if ffmpeg_in_path:
+        return os.path.dirname(ffmpeg_in_path)
+
+    return None
+
+
+def ffmpeg_executable(ffmpeg_dir: str) -> str:
+    """The ffmpeg binary inside the directory get_ffmpeg_path() returns."""
+    return os.path.join(ffmpeg_dir, "ffmpeg.exe" if sys.platform == "win32" else "ffmpeg")
+
+
+# Supported output formats. "lossy" means quality/bitrate applies; "lossless"
+# means the ffmpeg postprocessor ignores preferredquality. "stream" is the
+# youtube audio codec (yt-dlp acodec prefix) that lands in the format as-is:
+# the engine prefers that stream so ffmpeg remuxes instead of re-encoding.
+SUPPORTED_FORMATS = {
+    "mp3": {"ext": "mp3", "lossy": True},
+    "m4a": {"ext": "m4a", "lossy": True, "stream": "mp4a"},
+    "opus": {"ext": "opus", "lossy": True, "stream": "opus"},
+    "flac": {"ext": "flac", "lossy": False},
+    "wav": {"ext": "wav", "lossy": False},
+}
+SUPPORTED_QUALITIES = ("128", "192", "256", "320")
+# "auto" keeps whatever rate the source stream has (YouTube audio is 48 kHz).
+SUPPORTED_SAMPLE_RATES = ("auto", "44100", "48000")
+# Bounds for the adaptive worker concurrency settings.
+CONCURRENCY_RANGE = range(1, 65)
+
+
+class _Setting:
+    """One user setting: config key, validation, scraper wiring, CLI surface."""
+
+    __slots__ = ("key", "default", "kind", "choices", "scraper_kwarg", "cli_flag", "help")
+
+    def __init__(self, key, default, kind, choices=(), scraper_kwarg=None, cli_flag=None, help=""):
+        self.key = key
+        self.default = default
+        self.kind = kind  # "choice" | "bool" | "int" | "path"; int choices are a range
+        self.choices = choices
+        self.scraper_kwarg = scraper_kwarg
+        self.cli_flag = cli_flag
+        self.help = help
+
+    def coerce(self, value):
+        """Validated value or the default - never raises on user data."""
+        if self.kind == "bool":
+            return value if isinstance(value, bool) else self.default
+        if self.kind == "choice":
+            return value if value in self.choices else self.default
+        if self.kind == "int":
+            ok = isinstance(value, int) and not isinstance(value, bool) and value in self.choices
+            return value if ok else self.default
+        return value if isinstance(value, str) or value is None else self.default
+
+
+# Single source of truth for user settings. Config load/validation, scraper
+# construction, and every CLI flag derive from this - a new setting added
+# here reaches the CLI with zero CLI changes (the dialog row stays bespoke).
+SETTINGS = (
+    _Setting("download_path", None, "path", help="where downloads land"),
+    _Setting(
+        "format",
+        "mp3",
+        "choice",
+        tuple(SUPPORTED_FORMATS),
+        scraper_kwarg="audio_format",
+        cli_flag="--format",
+        help="audio format",
+    ),
+    _Setting(
+        "quality",
+        "192",
+        "choice",
+        SUPPORTED_QUALITIES,
+        scraper_kwarg="audio_quality",
+        cli_flag="--quality",
+        help="bitrate in kbps, lossy formats only",
+    ),
+    _Setting(
+        "sample_rate",
+        "auto",
+        "choice",
+        SUPPORTED_SAMPLE_RATES,
+        scraper_kwarg="sample_rate",
+        cli_flag="--sample-rate",
+        help="output sample rate, applies to mp3/flac/wav",
+    ),
+    _Setting(
+        "include_track_number",
+        False,
+        "bool",
+        scraper_kwarg="include_track_number",
+        cli_flag="--track-numbers",
+        help="prefix filenames with playlist position",
+    ),
+    _Setting(
+        "artist_first",
+        False,
+        "bool",
+        scraper_kwarg="artist_first",
+        cli_flag="--artist-first",
+        help='name files "Artist - Song" instead of "Song - Artist"',
+    ),
+    _Setting(
+        "loose_match",
+        False,
+        "bool",
+        scraper_kwarg="loose_match",
+        cli_flag="--loose-match",
+        help="fall back to the closest result when strict matching finds nothing",
+    ),
+    _Setting(
+        "verify_audio",
+        False,
+        "bool",
+        scraper_kwarg="verify_audio",
+        cli_flag="--verify-audio",
+        help="check each download against the Spotify preview clip (needs numpy)",
+    ),
+    _Setting(
+        "stream_transcode",
+        False,
+        "bool",
+        scraper_kwarg="stream_transcode",
+        cli_flag="--stream-transcode",
+        help="pipe audio straight into ffmpeg instead of saving the source first",
+    ),
+    _Setting(
+        "shortest_first",
+        False,
+        "bool",
+        scraper_kwarg="shortest_first",
+        cli_flag="--shortest-first",
+        help="download the shortest tracks first, so the most finish early",
+    ),
+    _Setting(
+        "concurrency",
+        4,
+        "int",
+        CONCURRENCY_RANGE,
+        scraper_kwarg="concurrency",
+        cli_flag="--concurrency",
+        help="parallel downloads to start with; adapts to throughput and throttling",
+    ),
+    _Setting(
+        "concurrency_min",
+        1,
+        "int",
+        CONCURRENCY_RANGE,
+        scraper_kwarg="concurrency_min",
+        cli_flag="--min-concurrency",
+        help="fewest parallel downloads the adaptive limit backs off to",
+    ),
+    _Setting(
+        "concurrency_max",
+        8,
+        "int",
+        CONCURRENCY_RANGE,
+        scraper_kwarg="concurrency_max",
+        cli_flag="--max-concurrency",
+        help="most parallel downloads the adaptive limit grows to (min = max pins it)",
+    ),
+)
+
+
+def scraper_kwargs_from(settings: dict) -> dict:
+    """Registry-derived MusicScraper kwargs from a config/settings dict."""
+    return {s.scraper_kwarg: settings.get(s.key, s.default) for s in SETTINGS if s.scraper_kwarg}
+
+
+# Resume manifest: JSON-lines file per playlist folder recording landed tracks,
+# so a rate-limited playlist finishes across sessions instead of restarting (#40).
+MANIFEST_FILENAME = ".sunnify-manifest.jsonl"
+
+
+def _config_dir() -> str:
+    """Return the per-user config directory, creating it if needed."""
+    import json as _json  # noqa: F401 (used by load/save)
+
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA", os.path.expanduser("~"))
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config"))
+    path = os.path.join(base, "Sunnify")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _log_dir() -> str:
+    """Return the per-user log directory path (does not create it).
+
+    Pure path computation, no filesystem side effects, so callers that only
+    need the string (e.g. a settings tooltip) don't create stray folders;
+    setup_logging() and _open_logs() create the dir when they actually use it.
+
+    Uses each platform's conventional spot for app logs (not config), so the
+    files are where a user (or a support request) would expect them:
+      windows -> %LOCALAPPDATA%\\Sunnify\\logs
+      macOS   -> ~/Library/Logs/Sunnify
+      linux   -> $XDG_STATE_HOME/sunnify/logs (defaults to ~/.local/state)
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA", os.path.expanduser("~"))
+        path = os.path.join(base, "Sunnify", "logs")
+    elif sys.platform == "darwin":
+        path = os.path.join(os.path.expanduser("~"), "Library", "Logs", "Sunnify")
+    else:
+        base = os.environ.get(
+            "XDG_STATE_HOME", os.path.join(os.path.expanduser("~"), ".local", "state")
+        )
+        path = os.path.join(base, "sunnify", "logs")
+    return path
+
+
+def log_file_path() -> str:
+    """Absolute path of the current log file (used by the 'open logs' action)."""
+    return os.path.join(_log_dir(), "sunnify.log")
+
+
+def setup_logging() -> str:
+    """Configure file logging once; return the log file path.
+
+    Rotating handler caps disk use at ~6MB total (1MB x 5 backups) so logs are
+    diagnostic, never bloat. Idempotent: safe to call more than once. The line
+    format is deliberately dense (timestamp, level, function:line) so a single
+    log pasted into an issue is enough to pinpoint where a download went wrong.
+    A session header records the environment every launch.
+    """
+    if any(getattr(h, "_sunnify", False) for h in log.handlers):
+        return log_file_path()
+
+    path = log_file_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = RotatingFileHandler(
+        path, maxBytes=1_000_000, backupCount=5, encoding="utf-8", delay=True
+    )
+    handler._sunnify = True  # tag so we don't double-attach on re-call
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s %(levelname)-7s [%(funcName)s:%(lineno)d] %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    )
+    # default INFO stays lean (scales with failures, not track count); set
+    # SUNNIFY_DEBUG=1 to get the full per-track + yt-dlp trail for hard cases.
+    level = logging.DEBUG if os.environ.get("SUNNIFY_DEBUG") else logging.INFO
+    log.setLevel(level)
+    log.addHandler(handler)
+    log.propagate = False
+
+    ytdlp_ver = ytdlp_version()
+    log.info("==== sunnify session start ====")
+    log.info(
+        "version=%s platform=%s python=%s yt-dlp=%s",
+        __version__,
+        f"{sys.platform}-{platform.machine()}",
+        platform.python_version(),
+        ytdlp_ver,
+    )
+    log.info("ffmpeg=%s", get_ffmpeg_path() or "(not found)")
+    log.info("logs=%s level=%s", path, logging.getLevelName(level))
+    _install_crash_handlers()
+    return path
+
+
+def ytdlp_version() -> str:
+    """yt-dlp's version if the engine has loaded it, without importing it: the
+    headless commands never need its ~0.3s import. The CLI logs the version
+    again once a download loads the engine."""
+    module = sys.modules.get("yt_dlp")
+    if module is None:
+        return "(not loaded)"
+    try:
+        return module.version.__version__
+    except Exception:
+        return "?"
+
+
+def _config_path() -> str:
+    return os.path.join(_config_dir(), "config.json")
+
+
+# App state saved beside the settings but not a setting: no CLI flag, not
+# listed by `sunnify config`. All default to False. profile_runs is the
+# settings dialog's hidden debug toggle (sample each run, see sunnify_profile).
+INTERNAL_FLAGS = ("star_prompt_shown", "profile_runs")
+
+
+def load_config() -> dict:
+    """Load persisted user config. Missing or corrupt file returns defaults.
+
+    Every user setting is validated through the SETTINGS registry;
+    INTERNAL_FLAGS are internal state, not settings."""
+    import json
+
+    defaults = {s.key: s.default for s in SETTINGS}
+    defaults["version"] = 1
+    defaults.update(dict.fromkeys(INTERNAL_FLAGS, False))
+    try:
+        with open(_config_path(), encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return defaults
+        for s in SETTINGS:
+            if s.key in data:
+                defaults[s.key] = s.coerce(data[s.key])
+        for key in INTERNAL_FLAGS:
+            if isinstance(data.get(key), bool):
+                defaults[key] = data[key]
+        return defaults
+    except (OSError, json.JSONDecodeError):
+        return defaults
+
+
+def save_config(config: dict) -> None:
+    """Persist user config to disk. Best-effort, swallows IO errors."""
+    import json
+
+    try:
+        with open(_config_path(), "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+    except OSError as exc:
+        log.warning("could not save config: %s", exc)
+
+
+GITHUB_REPO = "sunnypatell/sunnify-spotify-downloader"
+_LATEST_RELEASE_API = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
+_RELEASES_PAGE = f"https://github.com/{GITHUB_REPO}/releases/latest"
+
+
+def _parse_version(s: str) -> tuple:
+    """'v2.0.13' / '2.0.13' / '2.0.13-beta' -> (2, 0, 13). Stops at the first non-int part."""
+    parts = []
+    for chunk in (s or "").strip().lstrip("vV").split("."):
+        num = ""
+        for ch in chunk:
+            if ch.isdigit():
+                num += ch
+            else:
+                break
+        if not num:
+            break
+        parts.append(int(num))
+    return tuple(parts)
+
+
+def _is_newer_version(latest: str, current: str) -> bool:
+    """True if latest is a strictly newer release than current (numeric, not lexical)."""
+    lv, cv = _parse_version(latest), _parse_version(current)
+    return bool(lv) and lv > cv
+
+
+def _check_for_update(current: str, timeout: int = 5):
+    """Return (latest_version, release_url) if a newer release exists, else None.
+
+    Fail-silent (returns None) on any network/parse error so launch is never
+    blocked or crashed by the check.
+    """
+    try:
+        import requests
+
+        r = requests.get(
+            _LATEST_RELEASE_API,
+            timeout=timeout,
+            headers={"Accept": "application/vnd.github+json"},
+        )
+        if r.status_code != 200:
+            log.debug("update check: github api returned %s", r.status_code)
+            return None
+        data = r.json()
+        tag = data.get("tag_name") or ""
+        url = data.get("html_url") or _RELEASES_PAGE
+        if _is_newer_version(tag, current):
+            return (tag.lstrip("vV"), url)
+        log.debug("update check: on latest (%s, newest %s)", current, tag or "?")
+        return None
+    except Exception as exc:  # network/parse must never disrupt launch
+        log.debug("update check skipped: %s", exc)
+        return None
@@ -0,0 +1,365 @@
+"""`sunnify serve`: a long-running local job daemon for the CLI engine.
+
+Every `sunnify download` pays the same cold start: import yt-dlp and mutagen,
+build an engine, fetch an anonymous Spotify token, then throw all of
+it away on exit. The daemon pays that once. It keeps one warm PlaylistClient
+(session, token, album cache) and the imported engine for its lifetime, and
+accepts download/info jobs over localhost HTTP:
+
+    POST /jobs                  {"kind": "download", "url": "..."} -> 202 {"id", ...}
+    GET  /jobs                  every known job, oldest first
+    GET  /jobs/<id>             one job's status
+    GET  /jobs/<id>/events      NDJSON, the same events as `--json`; follows
+                                until the job ends (?follow=0 to just dump)
+    POST /jobs/<id>/cancel      stop after in-flight tracks (queued: never start)
+    GET  /health
+    GET  /metrics               Prometheus/OpenMetrics text (see sunnify_metrics)
+
+Download jobs run one at a time in submission order (they share disk,
+network and the per-folder lock anyway); info jobs run immediately on their
+own thread. Binds 127.0.0.1 by default and requires a JSON content type on
+every POST, so a web page can't submit jobs without a CORS preflight we never
+answer.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+import sunnify_cli as cli
+import sunnify_core as core
+import sunnify_metrics
+from spotifydown_api import PlaylistClient
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# finished jobs kept for GET /jobs and event replay before the oldest go
+MAX_FINISHED_JOBS = 200
+
+_TERMINAL = ("done", "failed", "cancelled")
+
+
+class Job:
+    """One submitted job: its spec, lifecycle, and recorded event stream."""
+
+    def __init__(self, job_id: str, kind: str, spec: dict):
+        self.id = job_id
+        self.kind = kind
+        self.spec = spec
+        self.status = "queued"
+        self.exit_code: int | None = None
+        self.created = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.cancel_event = threading.Event()
+        self.events: list[dict] = []
+        self._cond = threading.Condition()
+
+    def push(self, event: dict) -> None:
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def start(self) -> None:
+        with self._cond:
+            self.status = "running"
+            self.started = time.time()
+
+    def finish(self, status: str, exit_code: int | None) -> None:
+        with self._cond:
+            self.status = status
+            self.exit_code = exit_code
+            self.finished = time.time()
+            self._cond.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self.status in _TERMINAL
+
+    def follow(self, start: int = 0, follow: bool = True):
+        """Yield recorded events from `start`, then new ones until the job ends."""
+        index = start
+        while True:
+            with self._cond:
+                while follow and index >= len(self.events) and not self.done:
+                    self._cond.wait()
+                batch = self.events[index:]
+                finished = self.done or not follow
+            yield from batch
+            index += len(batch)
+            if finished and index >= len(self.events):
+                return
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "events": len(self.events),
+            "spec": self.spec,
+        }
+
+
+def _job_args(spec: dict) -> SimpleNamespace:
+    """The argparse-shaped namespace `_run_download` expects, from a job spec."""
+    args = {"url": spec.get("url"), "out": spec.get("out"), "json": True, "quiet": True}
+    overrides = spec.get("settings") or {}
+    for s in core.SETTINGS:
+        if s.cli_flag:
+            args[s.cli_flag.lstrip("-").replace("-", "_")] = overrides.get(s.key)
+    return SimpleNamespace(**args)
+
+
+def validate_spec(spec) -> dict:
+    """Normalized job spec, or ValueError naming the first problem."""
+    if not isinstance(spec, dict):
+        raise ValueError("job must be a JSON object")
+    kind = spec.get("kind", "download")
+    if kind not in ("download", "info"):
+        raise ValueError("kind must be 'download' or 'info'")
+    url, urls = spec.get("url"), spec.get("urls")
+    if (url is None) == (urls is None):
+        raise ValueError("pass exactly one of 'url' or 'urls'")
+    if url is not None and (not isinstance(url, str) or not url.strip()):
+        raise ValueError("'url' must be a non-empty string")
+    if urls is not None and (
+        not isinstance(urls, list) or not urls or not all(isinstance(u, str) for u in urls)
+    ):
+        raise ValueError("'urls' must be a non-empty list of strings")
+    out = spec.get("out")
+    if out is not None and not isinstance(out, str):
+        raise ValueError("'out' must be a string")
+    settings = spec.get("settings") or {}
+    if not isinstance(settings, dict):
+        raise ValueError("'settings' must be an object")
+    known = {s.key: s for s in core.SETTINGS if s.cli_flag}
+    for key, value in settings.items():
+        if key not in known:
+            raise ValueError(f"unknown setting '{key}' (known: {', '.join(known)})")
+        if known[key].coerce(value) != value:
+            raise ValueError(f"invalid value for '{key}': {value!r}")
+    normalized = {"kind": kind, "out": out, "settings": settings}
+    if url is not None:
+        normalized["url"] = url.strip()
+    else:
+        normalized["urls"] = [u.strip() for u in urls if u.strip()]
+    return normalized
+
+
+class Daemon:
+    """Job registry plus the serial download runner, over one warm client."""
+
+    def __init__(self, client: PlaylistClient | None = None):
+        self.client = client or PlaylistClient()
+        self.started = time.time()
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._downloads: queue.Queue[Job | None] = queue.Queue()
+        self._runner = threading.Thread(
+            target=self._download_loop, name="sunnify-serve-downloads", daemon=True
+        )
+        self._runner.start()
+
+    def submit(self, spec) -> Job:
+        spec = validate_spec(spec)
+        job = Job(f"j{next(self._ids)}", spec["kind"], spec)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        if job.kind == "download":
+            self._downloads.put(job)
+        else:
+            threading.Thread(
+                target=self._execute, args=(job,), name=f"sunnify-serve-{job.id}", daemon=True
+            ).start()
+        core.log.info("serve: queued %s job %s", job.kind, job.id)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Job | None:
+        job = self.get(job_id)
+        if job is not None and not job.done:
+            job.cancel_event.set()
+        return job
+
+    def shutdown(self) -> None:
+        for job in self.jobs():
+            job.cancel_event.set()
+        self._downloads.put(None)
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    def _download_loop(self) -> None:
+        while True:
+            job = self._downloads.get()
+            if job is None:
+                return
+            self._execute(job)
+
+    def _execute(self, job: Job) -> None:
+        if job.cancel_event.is_set():
+            job.finish("cancelled", None)
+            return
+        job.start()
+        emitter = cli._Emitter(True, sink=job.push)
+        spec = job.spec
+        try:
+            if job.kind == "info":
+                urls = spec.get("urls") or [spec["url"]]
+                code = cli._run_info_batch(urls, emitter, self.client)
+            else:
+                code = cli._run_download(
+                    _job_args(spec),
+                    spec.get("urls") or [],
+                    emitter,
+                    job.cancel_event,
+                    client=self.client,
+                    foreground=False,
+                )
+        except Exception as exc:
+            core.log.exception("serve: job %s crashed", job.id)
+            emitter.error(f"job failed: {exc}", code="run_failed", hint="run `sunnify doctor`")
+            job.finish("failed", cli.EXIT_FATAL)
+            return
+        if job.cancel_event.is_set():
+            status = "cancelled"
+        else:
+            status = "failed" if code == cli.EXIT_FATAL else "done"
+        job.finish(status, code)
+        core.log.info("serve: %s job %s %s (exit %d)", job.kind, job.id, status, code)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = f"sunnify/{core.__version__}"
+    daemon: Daemon  # set on the per-server subclass
+
+    def log_message(self, format, *args):
+        core.log.debug("serve: %s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, code: str, message: str) -> None:
+        self._send_json(status, {"event": "error", "code": code, "message": message, "hint": None})
+
+    def _route(self) -> tuple[list[str], dict]:
+        parts = urlsplit(self.path)
+        return [p for p in parts.path.split("/") if p], parse_qs(parts.query)
+
+    def do_GET(self):
+        segments, query = self._route()
+        if segments == ["health"]:
+            jobs = self.daemon.jobs()
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    "version": core.__version__,
+                    "uptime_s": round(time.time() - self.daemon.started, 1),
+                    "jobs": {
+                        state: sum(1 for j in jobs if j.status == state)
+                        for state in ("queued", "running", *_TERMINAL)
+                    },
+                },
+            )
+        elif segments == ["metrics"]:
+            body = sunnify_metrics.REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", sunnify_metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif segments == ["jobs"]:
+            self._send_json(200, [j.summary() for j in self.daemon.jobs()])
+        elif len(segments) == 2 and segments[0] == "jobs":
+            job = self.daemon.get(segments[1])
+            if job is None:
+                self._error(404, "job_not_found", f"no job {segments[1]}")
+            else:
+                self._send_json(200, job.summary())
+        elif len(segments) == 3 and segments[0] == "jobs" and segments[2] == "events":
+            job = self.daemon.get(segments[1])
+            if job is None:
+                self._error(404, "job_not_found", f"no job {segments[1]}")
+                return
+            follow = query.get("follow", ["1"])[0] not in ("0", "false")
+            self._stream(job, follow)
+        else:
+            self._error(404, "not_found", f"no route for GET {self.path}")
+
+    def _stream(self, job: Job, follow: bool) -> None:
+        # HTTP/1.0 semantics: no length, the body ends when we close
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+            for event in job.follow(follow=follow):
+                line = json.dumps(event, ensure_ascii=False) + "\n"
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+        self.close_connection = True
+
+    def do_POST(self):
+        segments, _ = self._route()
+        ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if ctype != "application/json":
+            self._error(415, "unsupported_media_type", "POST bodies must be application/json")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if segments == ["jobs"]:
+            try:
+                spec = json.loads(raw or b"null")
+                job = self.daemon.submit(spec)
+            except ValueError as exc:
+                self._error(400, "invalid_job", str(exc))
+                return
+            self._send_json(202, job.summary())
+        elif len(segments) == 3 and segments[0] == "jobs" and segments[2] == "cancel":
+            job = self.daemon.cancel(segments[1])
+            if job is None:
+                self._error(404, "job_not_found", f"no job {segments[1]}")
+            else:
+                self._send_json(200, job.summary())
+        else:
+            self._error(404, "not_found", f"no route for POST {self.path}")
+
+
+def make_server(
+    host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, daemon: Daemon | None = None
+) -> ThreadingHTTPServer:
+    """A bound (not yet serving) HTTP server; port 0 picks a free one."""
+    handler = type("SunnifyHandler", (_Handler,), {"daemon": daemon or Daemon()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,2735 @@
+"""The download engine: Spotify metadata in, tagged audio files out.
+
+Qt-free on purpose. The GUI, the CLI and `sunnify serve` all drive the same
+DownloadEngine; it reports progress through a plain EventBus instead of Qt
+signals, so headless runs never import PyQt6 and the engine can live in a
+server process or a worker pool. The GUI's MusicScraper is a thin adapter
+that re-emits these events as the signals its widgets are wired to.
+
+Events (one payload each, emitted on whichever thread did the work):
+
+    track_started    dict  a track began (title/artists/album/cover/file/...)
+    track_ready      dict  a track's file is complete under its final name
+                           ("tagged": True when embed_tags already tagged it)
+    completed        str   the run's final status line
+    message          str   a user-facing warning or progress note
+    album            str   the playlist/album/queue being worked on
+    source_id        str   the playlist/album id being scraped
+    source_progress  dict  scrape_many's per-link started/done records
+    resume_skipped   int   tracks skipped because the manifest has them
+    count            int   tracks finished so far
+    progress         int   0-100 for the progress bar
+    progress_reset   int   reset the progress bar
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import functools
+import logging
+import os
+import queue
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import unicodedata
+import weakref
+from dataclasses import dataclass
+
+import mutagen
+import requests
+from mutagen import MutagenError
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import APIC, ID3
+from yt_dlp import YoutubeDL
+
+import sunnify_fingerprint as fingerprint
+import sunnify_http
+import sunnify_metrics
+from spotifydown_api import (
+    ExtractionError,
+    NetworkError,
+    PlaylistClient,
+    PlaylistInfo,
+    RateLimitError,
+    SpotifyDownAPIError,
+    cap_filename,
+    detect_spotify_url_type,
+    extract_playlist_id,
+    sanitize_filename,
+)
+from sunnify_concurrency import AdaptiveLimit, LaneQueue, run_adaptive, run_inline
+from sunnify_core import (
+    MANIFEST_FILENAME,
+    SUPPORTED_FORMATS,
+    SUPPORTED_QUALITIES,
+    SUPPORTED_SAMPLE_RATES,
+    ffmpeg_executable,
+    get_ffmpeg_path,
+    log,
+)
+from sunnify_timing import StageStats, TrackTiming
+
+EVENTS = (
+    "track_started",
+    "track_ready",
+    "completed",
+    "message",
+    "album",
+    "source_id",
+    "source_progress",
+    "resume_skipped",
+    "count",
+    "progress",
+    "progress_reset",
+    "concurrency",
+    "lanes",
+    "track_timing",
+)
+
+
+class EventBus:
+    """Synchronous publish/subscribe for engine events.
+
+    emit() calls every subscriber on the emitting thread - usually a download
+    worker - so callbacks must be thread-safe and quick. A subscriber that
+    raises is logged and skipped: a broken listener must never fail a track.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, callback):
+        """Call `callback(payload)` on every `name` event; "*" gets every
+        event as `callback(name, payload)`. Returns the callback."""
+        if name != "*" and name not in EVENTS:
+            raise ValueError(f"unknown engine event {name!r}")
+        with self._lock:
+            self._subscribers.setdefault(name, []).append(callback)
+        return callback
+
+    def unsubscribe(self, name: str, callback) -> None:
+        with self._lock:
+            callbacks = self._subscribers.get(name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def emit(self, name: str, payload=None) -> None:
+        with self._lock:
+            named = tuple(self._subscribers.get(name, ()))
+            wildcard = tuple(self._subscribers.get("*", ()))
+        for callback in named:
+            try:
+                callback(payload)
+            except Exception:
+                log.exception("event subscriber failed on %s", name)
+        for callback in wildcard:
+            try:
+                callback(name, payload)
+            except Exception:
+                log.exception("event subscriber failed on %s", name)
+
+
+_CLOSED = object()
+
+
+class EventQueue:
+    """Thread-safe buffer of (name, payload) pairs for a consumer that handles
+    events on its own thread, e.g. a server streaming a run to a client.
+
+    Subscribes to every event on `bus`; iterating blocks for the next event
+    and stops once close() is called and the buffer has drained.
+    """
+
+    def __init__(self, bus: EventBus | None = None):
+        self._queue: queue.Queue = queue.Queue()
+        if bus is not None:
+            bus.subscribe("*", self.put)
+
+    def put(self, name: str, payload=None) -> None:
+        self._queue.put((name, payload))
+
+    def close(self) -> None:
+        self._queue.put(_CLOSED)
+
+    def get(self, timeout: float | None = None):
+        """The next (name, payload), or None once closed. queue.Empty on timeout."""
+        item = self._queue.get(timeout=timeout)
+        if item is _CLOSED:
+            self._queue.put(_CLOSED)  # stay closed for every later get()
+            return None
+        return item
+
+    def __iter__(self):
+        while (item := self.get()) is not None:
+            yield item
+
+
+# how yt-dlp words YouTube throttling this IP: rate limits and bot challenges
+_THROTTLE_MARKERS = ("http error 429", "too many requests", "sign in to confirm", "not a bot")
+
+
+def _is_throttle(text: str | None) -> bool:
+    return bool(text) and any(marker in text.lower() for marker in _THROTTLE_MARKERS)
+
+
+# failures a later attempt can get past: throttling, the network, a server
+# error; "unavailable" or "no match" are the same answer next time
+_TRANSIENT_MARKERS = (
+    *_THROTTLE_MARKERS,
+    "timed out",
+    "connection reset",
+    "connection aborted",
+    "connection refused",
+    "remote end closed",
+    "temporary failure in name resolution",
+    "http error 5",
+    "unable to download webpage",
+)
+
+
+def _is_transient(text: str | None) -> bool:
+    return bool(text) and any(marker in text.lower() for marker in _TRANSIENT_MARKERS)
+
+
+class RetryableTrackError(RuntimeError):
+    """download_track_audio() came up empty, but a later lane might not:
+    `transient` when an attempt hit throttling, the network or a cut-off
+    transfer, `fallback` when the simplified query was held back for the
+    fallback lane (queries="widened")."""
+
+    def __init__(self, message: str, *, transient: bool, fallback: bool):
+        super().__init__(message)
+        self.transient = transient
+        self.fallback = fallback
+
+
+@dataclass
+class _LaneJob:
+    """A pooled job and how far through the lanes it has come."""
+
+    job: tuple
+    queries: str = "widened"
+    retries: int = 0
+
+
+@dataclass
+class _Requeue:
+    """_download_one_track's result for a track headed back into a lane."""
+
+    lane: str
+    reason: str
+
+
+class _YtdlpLog:
+    """Bridge yt-dlp's own output into our log and remember the last error.
+
+    With ignoreerrors=True a failed download won't raise, so capturing error()
+    here is the only way to record *why* no audio file landed (bot-block vs
+    unavailable vs format vs nsig). Routine yt-dlp chatter goes to our DEBUG so
+    the default INFO log stays lean.
+    """
+
+    def __init__(self):
+        self.last_error = None
+
+    def debug(self, msg):
+        log.debug("yt-dlp: %s", msg)
+
+    info = debug
+
+    def warning(self, msg):
+        log.debug("yt-dlp warning: %s", msg)
+
+    def error(self, msg):
+        self.last_error = msg
+        log.debug("yt-dlp error: %s", msg)
+
+
+# Streaming transcode: output muxer and encoder per format, and the size of
+# each ranged GET (youtube throttles single long reads; yt-dlp uses 10 MiB)
+_STREAM_ENCODERS = {
+    "mp3": ("mp3", "libmp3lame"),
+    "m4a": ("ipod", "aac"),
+    "opus": ("opus", "libopus"),
+    "flac": ("flac", "flac"),
+    "wav": ("wav", "pcm_s16le"),
+}
+_STREAM_CHUNK = 10 * 1024 * 1024
+
+
+def _audio_path(audio_format: str, source_codec: str) -> str:
+    """ "copy" when FFmpegExtractAudio stream-copies `source_codec` into
+    `audio_format` (yt-dlp's rule: aac into m4a, else the same codec), or
+    "transcode" when it re-encodes."""
+    codec = source_codec.split(".")[0].lower()
+    if codec == "mp4a":
+        codec = "aac"
+    if (audio_format == "m4a" and codec == "aac") or audio_format == codec:
+        return "copy"
+    return "transcode"
+
+
+# Downloads land as "<stem>.partial.<ext>" (yt-dlp's own .part/.ytdl and
+# ffmpeg's intermediates hang off that name too) and only take the real name
+# once finalized, so a file under the real name is always complete and a
+# crash leaves nothing but marked debris for sweep_partials().
+PARTIAL_MARK = ".partial"
+# A broken file `sunnify repair` is replacing waits as "<name>.repair" while
+# the new download runs, and is put back if that run dies part-way.
+REPAIR_MARK = ".repair"
+
+
+def _final_name(path: str) -> str:
+    """The real name of a "<stem>.partial.<ext>" download (unchanged otherwise)."""
+    stem, ext = os.path.splitext(path)
+    return stem.removesuffix(PARTIAL_MARK) + ext
+
+
+def sweep_partials(folder: str) -> int:
+    """Delete the unfinished downloads a crashed or killed run left in
+    `folder`, and put back files a killed repair had moved aside (dropping
+    the aside copy where the repaired file did land). Returns how many
+    unfinished downloads were removed."""
+    removed = 0
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return 0
+    for name in names:
+        if name.endswith(REPAIR_MARK):
+            _restore_aside(os.path.join(folder, name))
+            continue
+        if PARTIAL_MARK + "." not in name:
+            continue
+        path = os.path.join(folder, name)
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+                removed += 1
+        except OSError as exc:
+            log.debug("could not remove partial %s: %s", name, exc)
+    return removed
+
+
+def _restore_aside(aside: str) -> None:
+    """Settle a "<name>.repair" file: back to <name> when nothing took its
+    place, deleted when the repaired download is there."""
+    original = aside.removesuffix(REPAIR_MARK)
+    try:
+        if not os.path.isfile(aside):
+            return
+        if os.path.exists(original):
+            os.remove(aside)
+        else:
+            os.replace(aside, original)
+            log.info("restored %s from an interrupted repair", os.path.basename(original))
+    except OSError as exc:
+        log.debug("could not settle %s: %s", os.path.basename(aside), exc)
+
+
+def append_line(path: str, line: str) -> None:
+    """Append one line to a text file, holding an exclusive lock while it's
+    written on POSIX: `sunnify work` processes on several machines record
+    into the same manifest, and on a network share an O_APPEND write alone
+    doesn't keep their lines from interleaving."""
+    with open(path, "a", encoding="utf-8") as handle:
+        if os.name == "posix":
+            import fcntl
+
+            fcntl.lockf(handle, fcntl.LOCK_EX)  # released when the file closes
+        handle.write(line + "\n")
+        handle.flush()
+
+
+def _stored_metadata(track, song_meta: dict) -> dict:
+    """The Spotify metadata a manifest record keeps next to the file name,
+    enough for `sunnify repair` to re-download the track without
+    enumerating its playlist again."""
+    return {
+        "title": track.title,
+        "artists": track.artists,
+        "album": track.album,
+        "release_date": song_meta.get("releaseDate") or track.release_date,
+        "cover_url": song_meta.get("cover") or track.cover_url,
+        "preview_url": track.preview_url,
+        "number": song_meta.get("trackNumber"),
+    }
+
+
+class _ThreadToken:
+    """Lives in a thread's local storage next to its yt-dlp instances; its
+    finalizer hands them back to the pool when the thread exits."""
+
+
+class _YtdlpPool:
+    """Per-thread YoutubeDL instances, reused across tracks.
+
+    Building a YoutubeDL registers every extractor, the postprocessors and a
+    fresh request director - ~70 ms, paid for every search and every download
+    attempt when each call built its own. Instead each thread keeps one
+    instance per option set (the search, the default download and the
+    fallback-client download) and get() re-binds the per-track parts, the
+    logger and the output template, before handing it back. yt-dlp keeps the
+    params dict it was built with, so the re-bind is a plain params update.
+
+    A thread that exits leaves its instances on a free list, and the next
+    thread to need that option set takes one from there, so the adaptive
+    pool starting and retiring download workers doesn't build new ones.
+
+    close() exits every instance handed out so far and retires them; threads
+    that come back afterwards build new ones.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open: list = []
+        self._idle: dict[str, list] = {}
+        self._generation = 0
+        self.created = 0
+
+    def get(self, opts: dict, logger=None, outtmpl: str | None = None):
+        """This thread's instance for `opts`, bound to `logger` and `outtmpl`."""
+        cache = getattr(self._local, "cache", None)
+        if cache is None or self._local.generation != self._generation:
+            cache = self._local.cache = {}
+            self._local.generation = self._generation
+            self._local.token = token = _ThreadToken()
+            weakref.finalize(token, self._release, self._generation, cache)
+        key = repr(sorted(opts.items()))
+        ydl = cache.get(key)
+        if ydl is None:
+            with self._lock:
+                idle = self._idle.get(key)
+                ydl = idle.pop() if idle else None
+        if ydl is None:
+            params = {**opts, "logger": logger}
+            if outtmpl is not None:
+                params["outtmpl"] = {"default": outtmpl}
+            ydl = YoutubeDL(params).__enter__()
+            cache[key] = ydl
+            with self._lock:
+                self._open.append(ydl)
+                self.created += 1
+            return ydl
+        cache[key] = ydl
+        ydl.params["logger"] = logger
+        if outtmpl is not None:
+            ydl.params["outtmpl"]["default"] = outtmpl
+        return ydl
+
+    def _release(self, generation: int, instances: dict) -> None:
+        """An exited thread's instances, free for the next thread to take."""
+        with self._lock:
+            if generation != self._generation:
+                return  # closed since
+            for key, ydl in instances.items():
+                self._idle.setdefault(key, []).append(ydl)
+
+    def close(self) -> None:
+        with self._lock:
+            instances, self._open = self._open, []
+            self._idle = {}
+            self._generation += 1
+        for ydl in instances:
+            try:
+                ydl.__exit__(None, None, None)
+            except Exception as exc:
+                log.debug("closing a pooled yt-dlp instance failed: %s", exc)
+
+
+# Match scoring. Each search scores up to five candidates, and a playlist's
+# searches keep seeing the same uploader names, titles and artist strings,
+# so every pattern is compiled once and every normalization is cached.
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_BRACKET_RE = re.compile(r"\[[^\]]*\]")
+_FEAT_TAIL_RE = re.compile(r"\b(feat\.?|ft\.?)\s+.*$", re.IGNORECASE)
+_QUALIFIER_RE = re.compile(r"[\(\[\{].*?[\)\]\}]")
+_SPACES_RE = re.compile(r"\s+")
+_ARTIST_SPLIT_RE = re.compile(r"[,&]+|\s+(?:feat\.?|ft\.?)\s+", re.IGNORECASE)
+_LATIN_RE = re.compile(r"[a-z0-9]")
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_title(s: str | None) -> str:
+    """Lowercase, strip diacritics, drop bracketed segments + `feat./ft.`
+    tails, collapse to word characters + spaces (any script). Used on
+    BOTH sides of title comparison.
+
+    Critically: this does NOT split on ` - ` because YouTube titles
+    commonly use the `Artist - Song` convention; splitting would turn
+    "The Weeknd - Blinding Lights" into just "The Weeknd" and lose the
+    song name. Spotify-side variant stripping (`Title - Remastered`)
+    is handled separately in `_spotify_title_core`.
+    """
+    if not s:
+        return ""
+    # NFKD + drop combining marks: "Café" -> "Cafe"
+    s = "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+    s = s.lower()
+    s = _PAREN_RE.sub(" ", s)  # "Hello (Remix)" -> "Hello "
+    s = _BRACKET_RE.sub(" ", s)  # "Hello [Edit]" -> "Hello "
+    s = _FEAT_TAIL_RE.sub("", s)
+    # Strip apostrophes BEFORE the general punctuation->space step so
+    # "I'm" becomes "im" not "i m".
+    s = s.replace("'", "").replace("’", "")
+    # Keep letters/digits/marks from ANY script (#77). Category M is
+    # load-bearing: indic/thai vowel signs are combining-class-0 marks,
+    # and dropping them collapses distinct words ("दिल"/"दाल").
+    s = "".join(ch if (ch.isspace() or unicodedata.category(ch)[0] in "LNM") else " " for ch in s)
+    return _SPACES_RE.sub(" ", s).strip()
+
+
+def _spotify_title_core(s: str | None) -> str:
+    """Drop the ` - Variant` suffix Spotify adds to differentiate releases.
+
+    Examples:
+        "Bohemian Rhapsody - Remastered 2011" -> "Bohemian Rhapsody"
+        "Hello - Live"                        -> "Hello"
+        "Sweet Disposition - Remix Edit"      -> "Sweet Disposition"
+        "Take-Off"                            -> "Take-Off" (literal hyphen, no spaces)
+        "Mi Gente"                            -> "Mi Gente"
+
+    Only applied to the Spotify-side title before fuzzy comparison so
+    a YouTube upload titled just "Bohemian Rhapsody" still matches.
+    Don't apply this to YouTube titles - they use ` - ` for
+    `Artist - Song` and the strip would lose the song name.
+    """
+    if not s:
+        return ""
+    return s.split(" - ", 1)[0]
+
+
+def _title_hit(yt: str, target: str) -> bool:
+    """Substring match for targets >= 4 chars, word match for shorter ones
+    (so a single-letter song name like "i" doesn't match every video).
+    Both sides already normalized."""
+    if not target or not yt:
+        return False
+    if len(target) >= 4:
+        return target in yt
+    return target in yt.split()
+
+
+@functools.lru_cache(maxsize=1024)
+def _artist_tokens(artists: str) -> tuple[str, ...]:
+    # Split on collaboration separators BEFORE normalizing - normalization
+    # eats commas, which would collapse the multi-artist string into one
+    # unmatchable token.
+    tokens = (_normalize_title(t) for t in _ARTIST_SPLIT_RE.split(artists))
+    return tuple(t for t in tokens if t)
+
+
+@dataclass(frozen=True)
+class ScoredCandidate:
+    """One YouTube search result scored against a Spotify track."""
+
+    entry: dict
+    index: int  # position in the search results
+    title_ok: bool
+    artist_ok: bool  # True for all when the artist gate doesn't apply
+    duration_off: float | None  # None: either side has no duration
+
+    def rank_key(self) -> tuple:
+        # title, then artist, then closest timed duration, then search order
+        off = self.duration_off
+        return (not self.title_ok, not self.artist_ok, off is None, off or 0.0, self.index)
+
+
+def score_candidates(
+    entries: list[dict],
+    expected_title: str,
+    expected_artists: str | None = None,
+    expected_duration_s: float | None = None,
+) -> list[ScoredCandidate]:
+    """Score every candidate in one pass and return them best-first.
+
+    Each candidate title is normalized once (cached across searches) and
+    reused by both the title and the artist check. The artist gate applies
+    when artists are known and at least one title-matching candidate names
+    one of them - or when any artist token is latin, in which case no match
+    means rejection (#52). An all-non-latin artist set that matched nothing
+    is skipped: native-script artists usually appear romanized on YouTube.
+    """
+    target = _normalize_title(_spotify_title_core(expected_title))
+    tokens = _artist_tokens(expected_artists) if expected_artists else ()
+    rows = []
+    for index, entry in enumerate(entries):
+        yt = _normalize_title(entry.get("title") or "")
+        duration = entry.get("duration")
+        rows.append(
+            (
+                entry,
+                index,
+                _title_hit(yt, target),
+                any(artist in yt for artist in tokens),
+                abs(duration - expected_duration_s) if expected_duration_s and duration else None,
+            )
+        )
+    gated = bool(tokens)
+    titled = [artist_ok for _, _, title_ok, artist_ok, _ in rows if title_ok]
+    latin = any(_LATIN_RE.search(t) for t in tokens)
+    if gated and titled and not any(titled) and not latin:
+        log.info(
+            "artist gate skipped: no latin token in %r, falling back to title-only",
+            expected_artists,
+        )
+        gated = False
+    scored = [
+        ScoredCandidate(entry, index, title_ok, artist_ok or not gated, off)
+        for entry, index, title_ok, artist_ok, off in rows
+    ]
+    return sorted(scored, key=ScoredCandidate.rank_key)
+
+
+class _SearchPrefetcher:
+    """Resolves YouTube matches for queued tracks ahead of their download.
+
+    Searching is a few hundred ms of yt-dlp round trips per track that used
+    to sit in front of every download. This stage keeps up to `ahead` queued
+    tracks' searches in flight or resolved, on its own small pool, so a
+    worker that picks up a track usually finds the url waiting. The window
+    slides with the download workers: each take() tops it up to `ahead`
+    tracks past the one taken, so the buffer stays bounded whatever the
+    queue length.
+
+    take() never blocks on work that has not started - such a search is
+    cancelled and the worker does it inline, exactly as without prefetch.
+    """
+
+    def __init__(self, engine, jobs, ahead: int, workers: int):
+        self._engine = engine
+        self._jobs = list(jobs)
+        self._index = {id(job[0]): i for i, job in enumerate(self._jobs)}
+        self._ahead = ahead
+        self._next = 0
+        self._futures: dict[int, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="sunnify-prefetch"
+        )
+        self._fill(ahead)
+
+    def _fill(self, upto: int) -> None:
+        with self._lock:
+            upto = min(upto, len(self._jobs))
+            while not self._closed and self._next < upto:
+                job = self._jobs[self._next]
+                self._futures[id(job[0])] = self._pool.submit(self._engine._prefetch_match, *job)
+                self._next += 1
+
+    def take(self, track) -> dict | None:
+        """The prefetched {query: url} for `track`, or None to search inline."""
+        position = self._index.get(id(track))
+        if position is None:
+            return None
+        self._fill(position + 1 + self._ahead)
+        with self._lock:
+            future = self._futures.pop(id(track), None)
+        if future is None or future.cancel():
+            self.misses += 1
+            return None
+        try:
+            result = future.result()
+        except Exception as exc:
+            log.debug("prefetch search failed for '%s': %s", track.title, exc)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            futures, self._futures = list(self._futures.values()), {}
+        for future in futures:
+            future.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        log.debug("search prefetch: %d hit(s), %d inline", self.hits, self.misses)
+
+
+class DownloadEngine:
+    """Scrapes playlists/albums/tracks and downloads them as tagged audio.
+
+    Thread-agnostic: call download() (or a scrape_* method) on whatever thread
+    should do the work, and listen on `events`. Cancellation is cooperative
+    through `cancel_event`.
+    """
+
+    # Starting number of concurrent track downloads when no `concurrency` is
+    # passed; the adaptive limit moves from here between concurrency_min and
+    # concurrency_max. 4 was the measured sweet spot on a desktop: linear
+    # speedup through 4, diminishing returns past 6 (CPU-bound ffmpeg).
+    MAX_WORKERS = 4
+    # Search look-ahead for multi-track runs: how many queued tracks may have
+    # their YouTube match resolved ahead of the download workers, and how
+    # many threads do the searching. 0 disables the prefetch stage.
+    PREFETCH_AHEAD = 8
+    PREFETCH_WORKERS = 2
+    # Pooled runs take jobs lane by lane: fresh tracks, then tracks waiting
+    # out a transient failure, then tracks that get one more search with the
+    # simplified query. RETRY_DELAYS_S is the backoff before each retry; a
+    # track still failing transiently after the last one has failed.
+    LANES = ("fresh", "retry", "fallback")
+    RETRY_DELAYS_S = (15.0, 60.0)
+
+    def __init__(
+        self,
+        cancel_event: threading.Event | None = None,
+        *,
+        audio_format: str = "mp3",
+        audio_quality: str = "192",
+        include_track_number: bool = False,
+        artist_first: bool = False,
+        sample_rate: str = "auto",
+        loose_match: bool = False,
+        verify_audio: bool = False,
+        stream_transcode: bool = False,
+        embed_tags: bool = False,
+        concurrency: int | None = None,
+        concurrency_min: int = 1,
+        concurrency_max: int = 8,
+        shortest_first: bool = False,
+    ):
+        self.events = EventBus()
+        self.counter = 0  # Initialize counter to zero
+        # one keep-alive pool and per-host budgets for every fetch the
+        # engine makes itself (metadata, covers, previews, streamed audio)
+        self.http = sunnify_http.shared()
+        self.session = self.http.session
+        self.spotifydown_api = None
+        self._cancel_event = cancel_event or threading.Event()
+        self._failed_tracks: list[str] = []  # Track failed downloads
+        # Output options. audio_format must be a key of SUPPORTED_FORMATS;
+        # audio_quality only applies to lossy formats (mp3/m4a/opus).
+        self.audio_format = audio_format if audio_format in SUPPORTED_FORMATS else "mp3"
+        self.audio_quality = audio_quality if audio_quality in SUPPORTED_QUALITIES else "192"
+        self.include_track_number = bool(include_track_number)
+        self.artist_first = bool(artist_first)
+        self.sample_rate = sample_rate if sample_rate in SUPPORTED_SAMPLE_RATES else "auto"
+        # opt-in: when strict title/artist matching fails, fall back to the
+        # duration-closest youtube result (recovers cross-script matches);
+        # off by default so the wrong-audio safeguard (#52) stays the default.
+        self.loose_match = bool(loose_match)
+        # opt-in: fingerprint each download against the track's Spotify
+        # preview clip and reject a mismatch; needs numpy, skipped without it
+        self.verify_audio = bool(verify_audio)
+        if self.verify_audio and not fingerprint.available():
+            log.warning("verify_audio is on but numpy is not installed; downloads go unverified")
+        # opt-in: pipe the source audio into ffmpeg instead of letting yt-dlp
+        # save it next to the output first (one disk write per track, not two)
+        self.stream_transcode = bool(stream_transcode)
+        # write tags + cover art while finalizing each download, before it
+        # takes its real name (track_ready then carries "tagged": True);
+        # off leaves tagging to the track_ready subscriber
+        self.embed_tags = bool(embed_tags)
+        # worker concurrency: where each run's adaptive limit starts (None:
+        # MAX_WORKERS) and the bounds it may move within; a 429 or a bot
+        # challenge halves it, rising throughput grows it (sunnify_concurrency)
+        self.concurrency_min = max(1, int(concurrency_min))
+        self.concurrency_max = max(self.concurrency_min, int(concurrency_max))
+        self.concurrency = None if concurrency is None else int(concurrency)
+        self._limit: AdaptiveLimit | None = None
+        # the last pooled run's download limit, AdaptiveLimit.snapshot() form
+        self.pool_stats: dict | None = None
+        # opt-in: start a run's fresh lane with its shortest tracks, so the
+        # most tracks finish early (unknown durations go last)
+        self.shortest_first = bool(shortest_first)
+        # the last pooled run's requeues per lane ("retry"/"fallback")
+        self.requeued: dict[str, int] = {}
+        self._counter_lock = threading.Lock()
+        self._failed_lock = threading.Lock()
+        self._filename_lock = threading.Lock()
+        self._manifest_lock = threading.Lock()
+        self._manifest_path: str | None = None
+        # folder -> manifest path, so one scrape_many run can append to the
+        # manifest of whichever playlist folder a finished track landed in
+        self._manifest_paths: dict[str, str] = {}
+        self._in_flight_files: set[str] = set()
+        # Set to True during parallel playlist downloads so workers can suppress
+        # per-track UI noise (label flicker, thumbnail spam, progress bar jitter)
+        # that only makes sense for a single active download.
+        self._parallel_mode = False
+        self._total_tracks = 0
+        self._ytdlp = _YtdlpPool()
+        # per-thread: how the last download's audio was produced (_on_postprocess)
+        self._audio_report = threading.local()
+        # per-thread: the lane job being attempted (entry) and whether the
+        # attempt has hit a transient failure so far (transient)
+        self._attempt = threading.local()
+        # per-thread: the TrackTiming of the track being downloaded (track)
+        self._timing = threading.local()
+        self._stage_stats = StageStats()
+        # the last run's per-stage timings, StageStats.summary() form
+        self.timing_stats: dict | None = None
+        # set by _prefetching() while a multi-track run is downloading
+        self._prefetcher: _SearchPrefetcher | None = None
+        # cover art fetched alongside the audio when embed_tags is on
+        self._cover_pool: concurrent.futures.ThreadPoolExecutor | None = None
+        self._cover_lock = threading.Lock()
+        # optional: an executor the caller owns (the CLI's tagging pool) that
+        # finalizes landed downloads - tags, rename, manifest record - so a
+        # download worker goes straight to its next track; None finalizes
+        # on the worker. Pooled runs wait for what they handed over.
+        self.tag_pool: concurrent.futures.Executor | None = None
+        self._finalizing: set[concurrent.futures.Future] = set()
+        self._finalizing_lock = threading.Lock()
+
+    def is_cancelled(self) -> bool:
+        """Check if cancellation has been requested."""
+        return self._cancel_event.is_set()
+
+    def _emit(self, name: str, payload=None) -> None:
+        self.events.emit(name, payload)
+
+    def _concurrency_limit(self, jobs: int, pool: str = "download", **kwargs) -> AdaptiveLimit:
+        """A fresh adaptive limit for `jobs` jobs on `pool`, within the
+        configured bounds and never above the job count. Moves are announced
+        on the "concurrency" event."""
+        initial = self.concurrency if self.concurrency is not None else self.MAX_WORKERS
+        maximum = max(1, min(self.concurrency_max, jobs))
+
+        def _changed(old, new, reason):
+            self._emit(
+                "concurrency",
+                {
+                    "pool": pool,
+                    "previous": old,
+                    "current": new,
+                    "reason": reason,
+                    "min": limit.minimum,
+                    "max": limit.maximum,
+                },
+            )
+
+        limit = AdaptiveLimit(
+            min(initial, maximum),
+            min(self.concurrency_min, maximum),
+            maximum,
+            name=pool,
+            on_change=_changed,
+            **kwargs,
+        )
+        return limit
+
+    def _metadata_limit(self) -> AdaptiveLimit:
+        """The limit for spclient's per-track metadata fetches (playlists past
+        the embed page's 100 tracks): same bounds, short windows, since one
+        fetch takes a fraction of a second rather than a whole download."""
+        return self._concurrency_limit(self.concurrency_max, pool="metadata", window_s=2.0)
+
+    def _throttled(self) -> None:
+        """YouTube is rate-limiting or bot-challenging us: back the download
+        pool off (a no-op outside a pooled run)."""
+        self._attempt.transient = True
+        limit = self._limit
+        if limit is not None:
+            limit.throttled()
+
+    def _note_failure(self, reason: str) -> None:
+        """Classify a failed search or download attempt by yt-dlp's reason."""
+        if _is_throttle(reason):
+            self._throttled()
+        elif _is_transient(reason):
+            self._attempt.transient = True
+
+    def _span(self, stage: str):
+        """Time a block as `stage` of the track this thread is downloading
+        (a no-op off a track, e.g. on the prefetch threads)."""
+        timing = getattr(self._timing, "track", None)
+        return timing.span(stage) if timing is not None else contextlib.nullcontext()
+
+    def _count_bytes(self, stage: str, count: int) -> None:
+        timing = getattr(self._timing, "track", None)
+        if timing is not None and count:
+            timing.add_bytes(stage, count)
+
+    def _start_timing(self) -> TrackTiming:
+        timing = self._timing.track = TrackTiming()
+        return timing
+
+    def _settle_timing(self, track, timing: TrackTiming) -> None:
+        """Report a track's stage timings ("track_timing") and fold them
+        into the run's."""
+        self._timing.track = None
+        snapshot = timing.snapshot()
+        self._stage_stats.add_track(snapshot)
+        sunnify_metrics.TRACKS.inc(outcome=snapshot["outcome"])
+        received = snapshot["stages"].get("download", {}).get("bytes", 0)
+        if received:
+            sunnify_metrics.DOWNLOAD_BYTES.inc(received)
+        self._emit("track_timing", {"id": track.id, "title": track.title, **snapshot})
+
+    def download(self, link, music_folder) -> None:
+        """Run one link (track, playlist or album) or a list of links (one
+        shared pool via scrape_many) into music_folder."""
+        self._stage_stats = StageStats()
+        try:
+            if not isinstance(link, str):
+                self.scrape_many(list(link), music_folder)
+                return
+            url_type, _ = detect_spotify_url_type(link)
+            if url_type == "track":
+                self.scrape_track(link, music_folder)
+            else:
+                self.scrape_playlist(link, music_folder)
+        finally:
+            self._close_run()
+
+    def _close_run(self) -> None:
+        """Release what a run held between tracks: the pooled YoutubeDL
+        instances and the cover-art fetchers. Settles timing_stats."""
+        self.timing_stats = self._stage_stats.summary() or None
+        if self.timing_stats:
+            log.info(
+                "stage timings (p50/p95 ms): %s",
+                ", ".join(
+                    f"{stage} {t['p50_ms']}/{t['p95_ms']}" for stage, t in self.timing_stats.items()
+                ),
+            )
+        self._ytdlp.close()
+        with self._cover_lock:
+            pool, self._cover_pool = self._cover_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_events(self, link, music_folder):
+        """Run download() on a background thread and yield its (name, payload)
+        events on the caller's thread until it finishes. A run that raises
+        ends with a ("completed", <error text>) event."""
+        events = EventQueue()
+        self.events.subscribe("*", events.put)
+
+        def _run():
+            try:
+                self.download(link, music_folder)
+            except Exception as exc:
+                log.exception("download run failed for %s", link)
+                events.put("completed", str(exc))
+            finally:
+                events.close()
+
+        worker = threading.Thread(target=_run, name="sunnify-engine", daemon=True)
+        worker.start()
+        try:
+            yield from events
+        finally:
+            self.events.unsubscribe("*", events.put)
+
+    def _get_user_friendly_error(self, error: Exception, track_title: str = "") -> str:
+        """Convert exception to user-friendly error message."""
+        if isinstance(error, RateLimitError):
+            return "Rate limited by Spotify - waiting..."
+        if isinstance(error, NetworkError):
+            return "Network error - retrying..."
+        if isinstance(error, ExtractionError):
+            return f"Could not access '{track_title}' - may be unavailable"
+        if "HTTP Error 429" in str(error):
+            return "YouTube rate limit - waiting..."
+        error_text = str(error).lower()
+        if "did not match the spotify preview" in error_text:
+            return f"'{track_title}' - no YouTube upload matched the Spotify preview"
+        if "downloaded audio was incomplete" in error_text:
+            return f"'{track_title}' - download was cut off, try again"
+        if (
+            "no video formats" in error_text
+            or "no playable audio source" in error_text
+            or "unavailable" in error_text
+        ):
+            return f"'{track_title}' not found on YouTube"
+        return f"Error: {str(error)[:50]}"
+
+    def ensure_spotifydown_api(self):
+        if self.spotifydown_api is None:
+            self.spotifydown_api = PlaylistClient(session=self.session, scheduler=self.http)
+        return self.spotifydown_api
+
+    def sanitize_text(self, text):
+        """Sanitize text for filename usage."""
+        return sanitize_filename(text, allow_spaces=True)
+
+    def _name_parts(self, sanitized_title, sanitized_artists):
+        """Filename component order per the artist_first setting (#77). Both
+        parts are already sanitized, so the swap can't change path safety."""
+        if self.artist_first:
+            return sanitized_artists, sanitized_title
+        return sanitized_title, sanitized_artists
+
+    def format_playlist_name(self, metadata: PlaylistInfo):
+        owner = metadata.owner or "Spotify"
+        return f"{metadata.name} - {owner}".strip(" -")
+
+    def prepare_playlist_folder(self, base_folder, playlist_name):
+        os.makedirs(base_folder, exist_ok=True)
+        # Same cross-platform sanitizer as track files (windows reserved
+        # chars/device names, posix rules - see sanitize_filename's doc refs).
+        safe_name = sanitize_filename(playlist_name)
+        if not safe_name or safe_name == "Unknown":
+            safe_name = "Sunnify Playlist"
+        playlist_folder = os.path.join(base_folder, safe_name)
+        # If the ascii-allowlist-era folder name ("Name  Owner") exists, keep
+        # using it so re-runs resume there instead of orphaning the manifest (#40).
+        legacy_name = "".join(
+            ch for ch in playlist_name if ch.isalnum() or ch in (" ", "_")
+        ).strip()
+        legacy_folder = os.path.join(base_folder, legacy_name)
+        if legacy_name and legacy_name != safe_name and os.path.isdir(legacy_folder):
+            playlist_folder = legacy_folder
+        try:
+            os.makedirs(playlist_folder, exist_ok=True)
+        except OSError:
+            log.error("could not create playlist folder %r", playlist_folder, exc_info=True)
+            raise
+        return playlist_folder
+
+    @staticmethod
+    def _widen_search(search_query: str) -> str:
+        """Search several YouTube results instead of only the top hit.
+
+        A track's #1 result can be region-locked or removed; `ytsearch1`
+        fails the whole download in that case (closes #42). Widening to
+        `ytsearch5` lets yt-dlp skip unavailable results and download the
+        first one that actually plays.
+        """
+        if search_query.startswith("ytsearch1:"):
+            return "ytsearch5:" + search_query[len("ytsearch1:") :]
+        return search_query
+
+    @staticmethod
+    def _simplify_search(search_query: str) -> str:
+        """Strip parenthetical/bracketed qualifiers for a looser fallback.
+
+        Hyper-specific titles (classical works like `(Wiegenlied, Op. 49,
+        No. 4)`, tone tracks like `(528 Hz)`) can return zero YouTube
+        matches. Dropping the qualifiers widens the net on a second attempt.
+        Returns the original query unchanged if there is nothing to strip.
+        """
+        _, sep, terms = search_query.partition(":")
+        if not sep:
+            terms = search_query
+        stripped = _QUALIFIER_RE.sub(" ", terms)
+        stripped = _SPACES_RE.sub(" ", stripped).strip()
+        if not stripped or stripped == terms.strip():
+            return search_query
+        return f"ytsearch5:{stripped}"
+
+    # Max spotify-vs-youtube length gap to count as the same recording; the
+    # top hit is often the music video or an extended cut.
+    _DURATION_TOLERANCE_S = 7
+
+    # Wider bound for the title+duration combined check: right title but >30s
+    # off means remix/live/extended - fail loudly rather than ship it.
+    _DURATION_TOLERANCE_S_WIDE = 30
+
+    # the matcher's helpers, kept reachable where callers have always found them
+    _normalize_title = staticmethod(_normalize_title)
+    _spotify_title_core = staticmethod(_spotify_title_core)
+
+    @classmethod
+    def _title_plausibly_matches(cls, yt_title: str | None, expected_title: str | None) -> bool:
+        """True when the YouTube candidate's title could reasonably be the
+        Spotify track. The Spotify side gets its variant suffix dropped
+        first so "Hello - Live" matches a plain "Hello" upload; the YouTube
+        side is normalized as-is (its ` - ` is usually `Artist - Song`)."""
+        return _title_hit(
+            _normalize_title(yt_title), _normalize_title(_spotify_title_core(expected_title))
+        )
+
+    def _select_youtube_match(
+        self, search_query, expected_duration_s, expected_title=None, expected_artists=None
+    ):
+        """Return the best YouTube watch URL for a search, or None.
+
+        Selection policy (closes #52):
+          1. Filter to candidates whose title plausibly matches the Spotify
+             track title (substring / word match on a normalized form).
+             Rules out the failure mode where YouTube's top hit is a
+             DIFFERENT track by the SAME artist with a similar duration -
+             e.g. searching "Mi Gente DJ Goja audio" returns "Dj Goja -
+             Mi Chico" at the top, only ~2s off the real Mi Gente, and the
+             prior pure-duration matcher would happily pick it and write
+             Mi Gente metadata onto Mi Chico audio.
+          2. Prefer the subset that ALSO has an artist plausibly appearing
+             in the YouTube title. Falls back to the title-only pool if no
+             candidate matches both - artist isn't always in the YouTube
+             title for legitimate uploads.
+          3. Among the resulting pool, pick the duration-closest if duration
+             is known, but reject the whole result if even the best
+             candidate's duration is >30s off the Spotify track - that means
+             the closest title-matching upload is a remix / live cover /
+             extended edit, and shipping a 5-minute remix under a 2-minute
+             track's metadata still corrupts the library.
+          4. If no candidate's title passes, return None. The caller treats
+             that as "not found on YouTube" - strictly better than shipping
+             the wrong audio under the right cover.
+
+        `expected_title` + `expected_artists` are optional so legacy callers
+        that haven't been updated still work via the older trust-the-top-
+        hit-unless-duration-is-clearly-off policy.
+        """
+        select_opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "skip_download": True,
+            "extract_flat": True,
+            "ignoreerrors": True,
+            "retries": 5,
+            "socket_timeout": 15,
+            "concurrent_fragment_downloads": 4,
+        }
+        log.debug(
+            "yt search: query=%r title=%r artists=%r dur=%ss",
+            search_query,
+            expected_title,
+            expected_artists,
+            expected_duration_s,
+        )
+        # ignoreerrors swallows a failed search; the bridge keeps its reason
+        ytlog = _YtdlpLog()
+        try:
+            info = self._ytdlp.get(select_opts, logger=ytlog).extract_info(
+                search_query, download=False
+            )
+        except Exception as exc:
+            # The single most useful log line for triage: a real exception here
+            # (bot-challenge, SSL, network, region block) is otherwise invisible
+            # because the caller only ever sees "not found on YouTube".
+            log.warning("yt search raised %s: %s", type(exc).__name__, str(exc)[:300])
+            self._note_failure(str(exc))
+            return None
+        entries = [e for e in (info or {}).get("entries", []) if e and e.get("id")]
+        if not entries:
+            # Only a reported throttle or network error is worth a retry (and,
+            # for a throttle, backing the pool off); a clean empty result is
+            # a final no-match. Distinct from "found results but filtered out".
+            reason = ytlog.last_error
+            log.warning(
+                "yt search returned 0 entries for %r: %s",
+                search_query,
+                (reason or "no results")[:300],
+            )
+            self._note_failure(reason)
+            return None
+        log.debug("yt search returned %d entries", len(entries))
+
+        if expected_title:
+            # One batched pass scores every candidate; the best-ranked one
+            # is then accepted or rejected by the #52 policy above.
+            ranked = score_candidates(
+                entries, expected_title, expected_artists, expected_duration_s
+            )
+            best = ranked[0]
+            if not best.title_ok:
+                log.info(
+                    "title filter rejected all %d candidates for %r (e.g. %r)",
+                    len(entries),
+                    expected_title,
+                    entries[0].get("title"),
+                )
+                if self.loose_match:
+                    return self._loose_pick(entries, expected_duration_s)
+                return None
+            if not best.artist_ok:
+                # Require an artist in the YouTube title alongside the song
+                # name: rejects right-title-wrong-uploader remixes. Prefer
+                # not-found over wrong audio (#52).
+                title_ok = [c.entry for c in sorted(ranked, key=lambda c: c.index) if c.title_ok]
+                log.info(
+                    "artist filter rejected all %d title-matches (artists=%r)",
+                    len(title_ok),
+                    expected_artists,
+                )
+                if self.loose_match:
+                    return self._loose_pick(title_ok, expected_duration_s)
+                return None
+            off = best.duration_off
+            if off is not None and off > self._DURATION_TOLERANCE_S_WIDE:
+                # Right title+artist but wildly wrong duration = live
+                # cover / extended mix; still the wrong audio to ship.
+                log.info(
+                    "closest candidate duration off by %.0fs (>%ss), rejecting",
+                    off,
+                    self._DURATION_TOLERANCE_S_WIDE,
+                )
+                return None
+            chosen = best.entry
+            log.debug("selected youtube video %s", chosen["id"])
+            return f"https://www.youtube.com/watch?v={chosen['id']}"
+
+        # Legacy path - kept for any caller that hasn't been updated yet.
+        chosen = entries[0]
+        if expected_duration_s:
+            top_duration = chosen.get("duration")
+            top_off = top_duration is None or (
+                abs(top_duration - expected_duration_s) > self._DURATION_TOLERANCE_S
+            )
+            if top_off:
+                timed = [e for e in entries if e.get("duration")]
+                if timed:
+                    chosen = min(timed, key=lambda e: abs(e["duration"] - expected_duration_s))
+        return f"https://www.youtube.com/watch?v={chosen['id']}"
+
+    def _loose_pick(self, candidates, expected_duration_s):
+        """Opt-in fallback (Settings: "use closest result if no match").
+
+        When strict title/artist matching finds nothing, return the
+        duration-closest candidate (or the top result if durations are
+        missing). Recovers cross-script matches the ascii title filter can
+        never make - e.g. a Latin Spotify title vs a Greek/Cyrillic/CJK
+        youtube title. Trades the never-grab-the-wrong-audio guarantee for
+        coverage, which is why the caller only reaches here when loose_match
+        is on (off by default).
+        """
+        if not candidates:
+            return None
+        chosen = candidates[0]
+        if expected_duration_s:
+            timed = [e for e in candidates if e.get("duration")]
+            if timed:
+                chosen = min(timed, key=lambda e: abs(e["duration"] - expected_duration_s))
+        log.warning("loose match (no confident title/artist match): selected %s", chosen["id"])
+        return f"https://www.youtube.com/watch?v={chosen['id']}"
+
+    def download_track_audio(
+        self,
+        search_query,
+        destination,
+        expected_duration_s=None,
+        expected_title=None,
+        expected_artists=None,
+        prefetched=None,
+        preview=None,
+        queries="both",
+    ):
+        """Search YouTube and download the best match to "<stem>.partial.<ext>".
+
+        Returns that path once size, duration and `preview` check out (None if
+        cancelled); `prefetched` matches skip the search, `queries` picks which.
+        """
+        prefetched = prefetched or {}
+        self._attempt.transient = False
+        # Check for FFmpeg first
+        ffmpeg_path = get_ffmpeg_path()
+        if not ffmpeg_path:
+            raise RuntimeError(
+                "FFmpeg not found! Install via: brew install ffmpeg (macOS) "
+                "or apt install ffmpeg (Linux)"
+            )
+
+        fmt = self.audio_format if self.audio_format in SUPPORTED_FORMATS else "mp3"
+        ext = SUPPORTED_FORMATS[fmt]["ext"]
+        is_lossy = SUPPORTED_FORMATS[fmt]["lossy"]
+        # m4a/opus: prefer the youtube stream already in that codec, which
+        # FFmpegExtractAudio then stream-copies; anything else transcodes
+        stream = SUPPORTED_FORMATS[fmt].get("stream")
+        audio_format = f"bestaudio[acodec^={stream}]/bestaudio/best" if stream else "bestaudio/best"
+
+        base = os.path.splitext(destination)[0] + PARTIAL_MARK
+        output_template = base + ".%(ext)s"
+        postprocessor = {
+            "key": "FFmpegExtractAudio",
+            "preferredcodec": fmt,
+        }
+        if is_lossy:
+            postprocessor["preferredquality"] = self.audio_quality
+
+        ydl_opts = {
+            "format": audio_format,
+            "quiet": True,
+            "no_warnings": True,
+            "ffmpeg_location": ffmpeg_path,
+            "retries": 5,
+            "socket_timeout": 15,
+            "concurrent_fragment_downloads": 4,
+            "ignoreerrors": True,
+            "postprocessors": [postprocessor],
+            "postprocessor_hooks": [self._on_postprocess],
+            "progress_hooks": [self._on_progress],
+        }
+        if self.sample_rate != "auto" and fmt in ("mp3", "flac", "wav"):
+            # "extractaudio" is the only key yt-dlp matches for this PP.
+            # opus excluded (libopus is 48 kHz-only); m4a excluded (may
+            # stream-copy aac, where ffmpeg silently drops -ar).
+            ydl_opts["postprocessor_args"] = {"extractaudio": ["-ar", self.sample_rate]}
+
+        expected_path = base + "." + ext
+
+        # Widened query then a simplified fallback; success = an audio file
+        # actually on disk, so an empty search fails loudly.
+        widened = self._widen_search(search_query)
+        fallback = self._simplify_search(search_query)
+        held_back = queries == "widened" and fallback != widened
+        if queries == "simplified":
+            query_set = [fallback]
+        elif queries == "widened" or fallback == widened:
+            query_set = [widened]
+        else:
+            query_set = [widened, fallback]
+
+        # Default web client first, then the alternate player clients:
+        # youtube bot-challenges web per-IP while android/ios/tv endpoints
+        # often still serve. Fallback only runs when no file landed.
+        fallback_opts = {
+            **ydl_opts,
+            "extractor_args": {
+                "youtube": {"player_client": ["android", "ios", "tv", "web_safari"]}
+            },
+        }
+        attempts = [("default", ydl_opts), ("fallback", fallback_opts)]
+        mismatched = False
+        broken = None
+
+        for query in query_set:
+            if query in prefetched:
+                video_url = prefetched[query]
+            else:
+                with self._span("search"):
+                    video_url = self._select_youtube_match(
+                        query,
+                        expected_duration_s,
+                        expected_title=expected_title,
+                        expected_artists=expected_artists,
+                    )
+            if not video_url:
+                continue
+            for label, opts in attempts:
+                # per-attempt bridge captures yt-dlp's own error even when
+                # ignoreerrors swallows it (no exception, no file)
+                ytlog = _YtdlpLog()
+                self._audio_report.meta = {}
+                try:
+                    with self._span("download"):
+                        ydl = self._ytdlp.get(opts, logger=ytlog, outtmpl=output_template)
+                        if not self.stream_transcode:
+                            ydl.extract_info(video_url, download=True)
+                        else:
+                            info = ydl.extract_info(video_url, download=False)
+                            streamed = self._stream_transcode(
+                                info, video_url, expected_path, ffmpeg_path
+                            )
+                            if streamed is None or self.is_cancelled():
+                                return None
+                            if not streamed and info:
+                                # yt-dlp's own download of the format already resolved
+                                ydl.process_ie_result(info, download=True)
+                except Exception as exc:
+                    log.warning(
+                        "download attempt (%s) failed for %s: %s",
+                        label,
+                        video_url,
+                        str(exc)[:300],
+                    )
+                    self._note_failure(str(exc))
+                else:
+                    if not os.path.exists(expected_path):
+                        # the silent case: yt-dlp produced no file without
+                        # raising; the bridge holds the real reason
+                        reason = (ytlog.last_error or "no error reported by yt-dlp").strip()
+                        log.warning(
+                            "download attempt (%s) produced no file for %s: %s",
+                            label,
+                            video_url,
+                            reason[:300],
+                        )
+                        self._note_failure(reason)
+                if os.path.exists(expected_path):
+                    problem = self._check_landed(expected_path, expected_duration_s)
+                    if problem:
+                        # a cut-off transfer; the next attempt fetches it afresh
+                        log.warning("discarding %s: %s", os.path.basename(expected_path), problem)
+                        with contextlib.suppress(OSError):
+                            os.remove(expected_path)
+                        broken = problem
+                        continue
+                    matches = None
+                    if preview:
+                        with self._span("verify"):
+                            matches = self._matches_preview(expected_path, preview, ffmpeg_path)
+                    if matches is False:
+                        # a different client serves the same video; only
+                        # another query can pick different audio
+                        os.remove(expected_path)
+                        mismatched = True
+                        break
+                    if label != "default":
+                        log.info("recovered via %s player clients", label)
+                    return expected_path
+
+        if mismatched:
+            message = "downloaded audio did not match the Spotify preview"
+        elif broken:
+            message = f"downloaded audio was incomplete ({broken})"
+        else:
+            log.debug("no playable audio landed for query set %r", query_set)
+            message = "no playable audio source found on YouTube for this track"
+        transient = bool(broken) or getattr(self._attempt, "transient", False)
+        if transient or held_back:
+            raise RetryableTrackError(message, transient=transient, fallback=held_back)
+        raise RuntimeError(message)
+
+    def _stream_transcode(self, info, video_url, expected_path, ffmpeg_path) -> bool | None:
+        """Download the audio format yt-dlp resolved for `video_url` (`info`)
+        straight into ffmpeg's stdin.
+
+        The encoded output goes to `expected_path`.part and is renamed into
+        place only once ffmpeg exits cleanly, so the source never touches the
+        disk and a half-written file never carries the final name. Returns
+        False - having left nothing behind - when the format isn't a plain
+        http(s) stream (dash/hls fragments) or anything fails, so the caller
+        falls back to yt-dlp's own download + FFmpegExtractAudio, and None,
+        likewise having left nothing behind, when the run was cancelled.
+        """
+        if not info or info.get("protocol") not in ("http", "https") or not info.get("url"):
+            log.debug("stream transcode: no plain http stream for %s, using yt-dlp", video_url)
+            return False
+        fmt = self.audio_format if self.audio_format in SUPPORTED_FORMATS else "mp3"
+        muxer, encoder = _STREAM_ENCODERS[fmt]
+        source = info.get("acodec") or ""
+        path = _audio_path(fmt, source)
+        if path == "copy":
+            codec_args = ["-c:a", "copy"]
+        else:
+            codec_args = ["-c:a", encoder]
+            if SUPPORTED_FORMATS[fmt]["lossy"]:
+                codec_args += ["-b:a", f"{self.audio_quality}k"]
+            if self.sample_rate != "auto" and fmt in ("mp3", "flac", "wav"):
+                codec_args += ["-ar", self.sample_rate]
+        part = expected_path + ".part"
+        cmd = [ffmpeg_executable(ffmpeg_path), "-nostdin", "-v", "error", "-y", "-i", "pipe:0"]
+        cmd += ["-vn", *codec_args, "-f", muxer, part]
+        started = time.monotonic()
+        with tempfile.TemporaryFile() as errors:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=errors)
+            try:
+                fed = self._feed_stream(info, proc.stdin)
+                proc.stdin.close()
+                if fed:
+                    proc.wait(timeout=300)
+            except (OSError, requests.RequestException, subprocess.TimeoutExpired) as exc:
+                # BrokenPipeError here means ffmpeg already quit; its stderr says why
+                log.warning("stream transcode failed for %s: %s", video_url, str(exc)[:300])
+                fed = False
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+            errors.seek(0)
+            reason = errors.read().decode("utf-8", "replace").strip()
+        if not fed or proc.returncode != 0 or not os.path.exists(part):
+            if fed is None:
+                log.info("stream transcode cancelled for %s", video_url)
+            elif proc.returncode:
+                log.warning("stream transcode: ffmpeg exited %s: %s", proc.returncode, reason[:300])
+            with contextlib.suppress(OSError):
+                os.remove(part)
+            return None if fed is None else False
+        os.replace(part, expected_path)
+        self._audio_report.meta = {
+            "audio_path": path,
+            "source_codec": source.split(".")[0] or None,
+            "postprocess_ms": None,
+            "streamed": True,
+            "stream_ms": round((time.monotonic() - started) * 1000),
+        }
+        return True
+
+    def _feed_stream(self, info: dict, sink) -> bool | None:
+        """Write the format at info["url"] to `sink` in ranged chunks.
+        True once it's all written; None if the run was cancelled part-way."""
+        headers = dict(info.get("http_headers") or {})
+        total = info.get("filesize") or 0
+        start = 0
+        while True:
+            if self.is_cancelled():
+                return None
+            with self.http.slot(info["url"], "audio"):
+                response = self.session.get(
+                    info["url"],
+                    headers={**headers, "Range": f"bytes={start}-{start + _STREAM_CHUNK - 1}"},
+                    stream=True,
+                    timeout=30,
+                )
+                if response.status_code == 416:  # asked past the end: done
+                    return True
+                response.raise_for_status()
+                received = 0
+                for block in response.iter_content(chunk_size=64 * 1024):
+                    sink.write(block)
+                    received += len(block)
+            start += received
+            self._count_bytes("download", received)
+            if total and not self._parallel_mode:
+                self._emit("progress", min(int(start / total * 100), 100))
+            # 200 = the server ignored Range and sent everything
+            if response.status_code == 200 or received < _STREAM_CHUNK:
+                return True
+
+    def _on_postprocess(self, status: dict) -> None:
+        """yt-dlp postprocessor hook: time FFmpegExtractAudio and record
+        whether it stream-copied or transcoded. Runs on the downloading
+        thread, so the report lands in that thread's _audio_report."""
+        if status.get("postprocessor") != "ExtractAudio":
+            return
+        report = self._audio_report
+        if status.get("status") == "started":
+            report.started = time.monotonic()
+        elif status.get("status") == "finished":
+            source = (status.get("info_dict") or {}).get("acodec") or ""
+            started = getattr(report, "started", None)
+            elapsed_ms = (time.monotonic() - started) * 1000 if started is not None else None
+            report.meta = {
+                "audio_path": _audio_path(self.audio_format, source),
+                "source_codec": source.split(".")[0] or None,
+                "postprocess_ms": round(elapsed_ms) if elapsed_ms is not None else None,
+            }
+            timing = getattr(self._timing, "track", None)
+            if timing is not None and elapsed_ms is not None:
+                timing.add("ffmpeg", elapsed_ms)
+
+    def _on_progress(self, status: dict) -> None:
+        """yt-dlp progress hook: count a finished transfer's bytes toward
+        the track's download stage."""
+        if status.get("status") == "finished":
+            self._count_bytes(
+                "download", status.get("downloaded_bytes") or status.get("total_bytes") or 0
+            )
+
+    def take_audio_report(self) -> dict:
+        """The calling thread's last download's audio_path / source_codec /
+        postprocess_ms (empty if its postprocessor never reported)."""
+        meta = getattr(self._audio_report, "meta", None) or {}
+        self._audio_report.meta = {}
+        return meta
+
+    def _check_landed(self, path: str, expected_duration_s=None) -> str | None:
+        """Why the audio at `path` can't be trusted as a whole track, or None.
+
+        An empty file, one mutagen can't parse, or one that plays shorter
+        than the Spotify duration by more than the match tolerance is a
+        transfer or encode that stopped part-way.
+        """
+        try:
+            if os.path.getsize(path) == 0:
+                return "empty file"
+            audio = mutagen.File(path)
+        except (MutagenError, OSError) as exc:
+            return f"unreadable audio: {exc}"
+        length = getattr(getattr(audio, "info", None), "length", None)
+        if (
+            expected_duration_s
+            and length
+            and length + self._DURATION_TOLERANCE_S_WIDE < expected_duration_s
+        ):
+            return f"{length:.0f}s of an expected {expected_duration_s:.0f}s"
+        return None
+
+    def _cover_future(self, url: str):
+        """Start fetching cover art for embed_tags, so it is on hand by the
+        time the audio lands. None when tags aren't embedded or no url."""
+        if not (self.embed_tags and url):
+            return None
+        with self._cover_lock:
+            if self._cover_pool is None:
+                self._cover_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="sunnify-cover"
+                )
+            return self._cover_pool.submit(_fetch_cover_bytes, url)
+
+    def _finalize_track(self, landed: str, song_meta: dict, track=None, cover=None) -> str:
+        """Tag a verified "<stem>.partial.<ext>" download (embed_tags), rename
+        it to its real name in one step, then record `track` in the manifest.
+
+        Updates song_meta's "file" (and "tagged") and returns the final path.
+        Raises RuntimeError, having removed the partial, when tags can't be
+        written: mutagen refusing the file is one more sign it's damaged.
+        """
+        final_path = _final_name(landed)
+        if self.embed_tags:
+            with self._span("tag"):
+                cover_bytes = cover.result() if cover is not None else None
+                tagged = write_tags(song_meta, landed, cover_bytes=cover_bytes)
+            if tagged is None:
+                with contextlib.suppress(OSError):
+                    os.remove(landed)
+                raise RuntimeError("could not write tags to the downloaded audio")
+            song_meta["tagged"] = True
+        if final_path != landed:
+            os.replace(landed, final_path)
+        if track is not None:
+            self._record_in_manifest(
+                track.id, final_path, track.duration_ms, **_stored_metadata(track, song_meta)
+            )
+        song_meta["file"] = final_path
+        return final_path
+
+    def _sweep_partials(self, folder: str) -> None:
+        removed = sweep_partials(folder)
+        if removed:
+            log.info("removed %d unfinished download(s) from %s", removed, folder)
+
+    def _preview_kwargs(self, track) -> dict:
+        """download_track_audio's `preview` argument for a track, when on."""
+        if self.verify_audio and track.preview_url:
+            return {"preview": (track.id, track.preview_url)}
+        return {}
+
+    def _matches_preview(self, path, preview, ffmpeg_path) -> bool | None:
+        """Whether the audio at `path` contains the track's Spotify preview.
+
+        None when it can't be checked (numpy missing, preview fetch or decode
+        failed); callers treat that as a pass, like verification being off.
+        The preview's fingerprint is cached per track ID.
+        """
+        track_id, preview_url = preview
+        if not fingerprint.available():
+            return None
+        try:
+            clip = fingerprint.PREVIEW_CACHE.get(track_id) if track_id else None
+            sunnify_metrics.CACHE_LOOKUPS.inc(
+                cache="preview", result="miss" if clip is None else "hit"
+            )
+            if clip is None:
+                with self.http.slot(preview_url, "preview"):
+                    response = self.session.get(preview_url, timeout=15)
+                response.raise_for_status()
+                clip = fingerprint.chroma_fingerprint(
+                    fingerprint.decode_pcm(ffmpeg_path, data=response.content)
+                )
+                if track_id:
+                    fingerprint.PREVIEW_CACHE.put(track_id, clip)
+            landed = fingerprint.chroma_fingerprint(fingerprint.decode_pcm(ffmpeg_path, path))
+        except (requests.RequestException, RuntimeError, OSError, subprocess.TimeoutExpired) as exc:
+            log.info("preview check skipped for %s: %s", os.path.basename(path), exc)
+            return None
+        score = fingerprint.similarity(clip, landed)
+        ok = score >= fingerprint.MATCH_THRESHOLD
+        log.log(
+            logging.INFO if ok else logging.WARNING,
+            "preview check %s: %.2f for %s",
+            "passed" if ok else "REJECTED",
+            score,
+            os.path.basename(path),
+        )
+        return ok
+
+    def download_http_file(self, url, destination):
+        with self.http.slot(url, "audio"):
+            response = self.session.get(url, stream=True, timeout=60)
+            response.raise_for_status()
+            total = int(response.headers.get("content-length", 0))
+            downloaded = 0
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            with open(destination, "wb") as handle:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if not chunk:
+                        continue
+                    handle.write(chunk)
+                    downloaded += len(chunk)
+                    if total:
+                        progress = int(downloaded / total * 100)
+                        self._emit("progress", progress)
+        return destination
+
+    @staticmethod
+    def _search_for(track) -> tuple[str, float | None]:
+        """The base YouTube query and expected duration (s) for a track."""
+        expected_dur = (track.duration_ms / 1000) if track.duration_ms else None
+        return f"ytsearch1:{track.title} {track.artists} audio", expected_dur
+
+    def _track_path(self, track, folder, track_num=0, numbered=True, tag="") -> str:
+        """Where a track lands: "NN. first - second.mp3" (or unnumbered),
+        with `tag` appended to the stem by the collision guard."""
+        first, second = self._name_parts(
+            self.sanitize_text(track.title), self.sanitize_text(track.artists)
+        )
+        filename = f"{first} - {second}{tag}.mp3"
+        if numbered and self.include_track_number:
+            filename = f"{track_num:02d}. {filename}"
+        return os.path.join(folder, cap_filename(filename))
+
+    def _prefetch_match(self, track, folder, track_num, numbered) -> dict:
+        """Resolve a queued track's first (widened) search ahead of its
+        download. Returns {query: video url or None}; {} when the track is
+        already on disk or the run was cancelled, so nothing is searched.
+
+        A search that failed temporarily (throttled, bot-challenged, a
+        network error) is not cached either: the temporary-failure mark it
+        set lives on this prefetch thread, so the worker searches again and
+        classifies the failure itself.
+        """
+        if self.is_cancelled() or os.path.exists(
+            self._track_path(track, folder, track_num, numbered)
+        ):
+            return {}
+        search_query, expected_dur = self._search_for(track)
+        query = self._widen_search(search_query)
+        self._attempt.transient = False
+        video_url = self._select_youtube_match(
+            query,
+            expected_dur,
+            expected_title=track.title,
+            expected_artists=track.artists,
+        )
+        if video_url is None and self._attempt.transient:
+            return {}
+        return {query: video_url}
+
+    @contextlib.contextmanager
+    def _prefetching(self, jobs):
+        """Run a _SearchPrefetcher over `jobs` ((track, folder, num, numbered)
+        in queue order) for the duration of the block."""
+        if self.PREFETCH_AHEAD <= 0 or len(jobs) < 2:
+            yield
+            return
+        self._prefetcher = _SearchPrefetcher(
+            self, jobs, ahead=self.PREFETCH_AHEAD, workers=self.PREFETCH_WORKERS
+        )
+        try:
+            yield
+        finally:
+            prefetcher, self._prefetcher = self._prefetcher, None
+            prefetcher.close()
+
+    def _download_one_track(
+        self,
+        track,
+        playlist_folder_path,
+        default_cover_url,
+        track_num=0,
+        *,
+        source: str | None = None,
+        numbered: bool = True,
+        hand_off: bool = True,
+    ):
+        """Download one track on a pool worker, then finalize it (tags, rename,
+        manifest record, track_ready) here or, with a tag_pool and hand_off, there.
+
+        Returns None on success, the title on failure, or a _Requeue.
+        """
+        if self.is_cancelled():
+            return None
+
+        timing = self._start_timing()
+        handed_off = False
+        track_title = track.title
+        artists = track.artists
+        filepath = self._track_path(track, playlist_folder_path, track_num, numbered)
+
+        # Collision guard: distinct tracks can sanitize to the same name, and
+        # parallel workers racing os.path.exists would clobber each other.
+        # Claim under a lock; if taken, suffix the track id.
+        with self._filename_lock:
+            if filepath in self._in_flight_files:
+                filepath = self._track_path(
+                    track, playlist_folder_path, track_num, numbered, tag=f" [{track.id}]"
+                )
+            self._in_flight_files.add(filepath)
+
+        # Per-track cover enrichment: the playlist embed has no per-track
+        # cover urls (the "all 300 songs have the same cover" report), so
+        # fetch /embed/track/{id} when missing. ~100-300ms per track,
+        # overlapped by other workers in parallel mode.
+        cover_url = track.cover_url
+        release_date = track.release_date or ""
+        if (
+            not cover_url
+            and track.id
+            and self.spotifydown_api is not None
+            and not self.is_cancelled()
+        ):
+            try:
+                with self._span("enrich"):
+                    enriched = self.spotifydown_api.get_track(track.id)
+                if enriched:
+                    if enriched.cover_url:
+                        cover_url = enriched.cover_url
+                    if not release_date and enriched.release_date:
+                        release_date = enriched.release_date
+            except SpotifyDownAPIError as exc:
+                log.debug("cover enrichment failed for '%s': %s", track_title, exc)
+
+        cover_url = cover_url or default_cover_url
+        album_name = track.album or ""
+
+        song_meta = {
+            "title": track_title,
+            "artists": artists,
+            "album": album_name,
+            "releaseDate": release_date,
+            "cover": cover_url or "",
+            "file": filepath,
+            "trackNumber": track_num,
+        }
+        if source is not None:
+            song_meta["source"] = source
+
+        # Preview panel shows whichever track most recently started; the
+        # worker race is fine (better than a blank panel).
+        self._emit("track_started", dict(song_meta))
+
+        try:
+            if os.path.exists(filepath):
+                self._record_in_manifest(
+                    track.id, filepath, track.duration_ms, **_stored_metadata(track, song_meta)
+                )
+                self._emit("track_ready", song_meta)
+                self._finish_track_ui(ok=True)
+                timing.outcome = "skipped"
+                return None
+
+            search_query, expected_dur = self._search_for(track)
+            extra = self._preview_kwargs(track)
+            entry = getattr(self._attempt, "entry", None)
+            if entry is not None:
+                extra["queries"] = entry.queries
+            if self._prefetcher is not None:
+                with self._span("search"):  # waiting on the look-ahead
+                    prefetched = self._prefetcher.take(track)
+                if prefetched is not None:
+                    extra["prefetched"] = prefetched
+            cover = self._cover_future(song_meta["cover"])
+            try:
+                landed = self.download_track_audio(
+                    search_query,
+                    filepath,
+                    expected_duration_s=expected_dur,
+                    expected_title=track_title,
+                    expected_artists=artists,
+                    **extra,
+                )
+                if landed and os.path.exists(landed):
+                    if hand_off and self.tag_pool is not None:
+                        song_meta.update(self.take_audio_report())
+                        self._hand_off(landed, song_meta, track, cover)
+                        handed_off = True
+                        timing.outcome = "landed"
+                        return None
+                    self._finalize_track(landed, song_meta, track, cover)
+            except Exception as error_status:
+                lane = self._next_lane(error_status)
+                if lane is not None:
+                    log.info("track '%s' -> %s lane: %s", track_title, lane, error_status)
+                    timing.outcome = "requeued"
+                    return _Requeue(lane, str(error_status))
+                error_msg = self._get_user_friendly_error(error_status, track_title)
+                self._emit("message", error_msg)
+                # concise reason at WARNING (the per-attempt yt-dlp reason is
+                # already logged above); full traceback only when verbose
+                log.warning("track failed: '%s': %s", track_title, str(error_status)[:200])
+                log.debug("track failure traceback for '%s'", track_title, exc_info=True)
+                with self._failed_lock:
+                    self._failed_tracks.append(track_title)
+                self._finish_track_ui(ok=False)
+                return track_title
+
+            if not landed or not os.path.exists(song_meta["file"]):
+                self._emit("message", f"'{track_title}' - download failed")
+                log.warning(
+                    "track produced no audio file (no confident match or blocked): '%s'",
+                    track_title,
+                )
+                with self._failed_lock:
+                    self._failed_tracks.append(track_title)
+                self._finish_track_ui(ok=False)
+                return track_title
+
+            song_meta.update(self.take_audio_report())
+            self._emit("track_ready", song_meta)
+            self._finish_track_ui(ok=True)
+            timing.outcome = "landed"
+            return None
+        finally:
+            if not handed_off:  # a handed-off file keeps its name until finalized
+                with self._filename_lock:
+                    self._in_flight_files.discard(filepath)
+            self._settle_timing(track, timing)
+
+    def _hand_off(self, landed: str, song_meta: dict, track, cover) -> None:
+        """Queue a landed download's finalize on tag_pool; track_ready (or
+        the failure) is reported from there."""
+        future = self.tag_pool.submit(self._finalize_handed_off, landed, song_meta, track, cover)
+        with self._finalizing_lock:
+            self._finalizing.add(future)
+        future.add_done_callback(self._finalizing_done)
+
+    def _finalizing_done(self, future: concurrent.futures.Future) -> None:
+        with self._finalizing_lock:
+            self._finalizing.discard(future)
+
+    def _finalize_handed_off(self, landed: str, song_meta: dict, track, cover) -> None:
+        filepath = song_meta["file"]
+        try:
+            self._finalize_track(landed, song_meta, track, cover)
+        except Exception as exc:
+            self._emit("message", self._get_user_friendly_error(exc, track.title))
+            log.warning("track failed: '%s': %s", track.title, str(exc)[:200])
+            with self._failed_lock:
+                self._failed_tracks.append(track.title)
+            self._finish_track_ui(ok=False)
+        else:
+            self._emit("track_ready", song_meta)
+            self._finish_track_ui(ok=True)
+        finally:
+            with self._filename_lock:
+                self._in_flight_files.discard(filepath)
+
+    def _await_finalizing(self) -> None:
+        """Wait for every download this engine handed to tag_pool."""
+        with self._finalizing_lock:
+            pending = list(self._finalizing)
+        concurrent.futures.wait(pending)
+
+    def _next_lane(self, error: Exception) -> str | None:
+        """The lane a failed pooled attempt goes back into, or None when the
+        failure is final: a transient one is retried while RETRY_DELAYS_S
+        lasts, a track with its simplified query still untried falls back."""
+        entry = getattr(self._attempt, "entry", None)
+        if entry is None or not isinstance(error, RetryableTrackError):
+            return None
+        if error.transient and entry.retries < len(self.RETRY_DELAYS_S):
+            return "retry"
+        if error.fallback:
+            return "fallback"
+        return None
+
+    def _finish_track_ui(self, ok: bool) -> None:
+        """Update counter + progress bar after a track completes or fails."""
+        self.increment_counter()
+        if self._parallel_mode and self._total_tracks > 0:
+            # Aggregate progress across all workers: show how many tracks are
+            # done as a percentage. Avoids the N-workers-jittering-one-bar
+            # problem where per-byte emits from 4 downloads make the bar jump.
+            pct = int(self.counter / self._total_tracks * 100)
+            self._emit("progress", min(pct, 100))
+        elif ok:
+            self._emit("progress", 100)
+
+    def _load_manifest(self, folder: str) -> set:
+        """Load the set of track IDs already downloaded into `folder`.
+
+        The manifest is a JSON-lines file inside the folder; each line is a
+        `{"id", "file"}` record. Entries whose file is missing are ignored so
+        a track the user deleted re-downloads. Returns the set of valid IDs
+        and arms `_manifest_path` for incremental appends during this run.
+        """
+        import json
+
+        path = os.path.join(folder, MANIFEST_FILENAME)
+        self._manifest_path = path
+        self._manifest_paths[folder] = path
+        done: set[str] = set()
+        if not os.path.exists(path):
+            return done
+        try:
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    track_id = record.get("id")
+                    filename = record.get("file")
+                    if track_id and filename and os.path.exists(os.path.join(folder, filename)):
+                        done.add(track_id)
+        except OSError:
+            return set()
+        return done
+
+    def _record_in_manifest(self, track_id, filepath: str, duration_ms=None, **details) -> None:
+        """Append a completed track to the manifest (thread-safe).
+
+        Append-only JSON-lines so recording a track is O(1) regardless of how
+        large the playlist is. Failures are swallowed: the manifest is an
+        optimization for resuming, never a hard dependency of a download.
+        The manifest armed for the file's own folder wins over `_manifest_path`.
+        The Spotify duration, when known, is what `sunnify verify` checks the
+        file's length against; `details` (see _stored_metadata) are what
+        `sunnify repair` rebuilds the track from. Empty values are left out.
+        """
+        manifest = self._manifest_paths.get(os.path.dirname(filepath), self._manifest_path)
+        if not track_id or not manifest:
+            return
+        import json
+
+        record = {"id": track_id, "file": os.path.basename(filepath)}
+        if duration_ms:
+            record["duration_ms"] = duration_ms
+        record.update((key, value) for key, value in details.items() if value)
+        with self._manifest_lock, contextlib.suppress(OSError):
+            append_line(manifest, json.dumps(record))
+
+    def scrape_playlist(self, spotify_playlist_link, music_folder):
+        # Reset mutable state so repeat invocations on the same scraper
+        # instance don't carry stale counters or failure lists.
+        with self._counter_lock:
+            self.counter = 0
+        with self._failed_lock:
+            self._failed_tracks.clear()
+        with self._filename_lock:
+            self._in_flight_files.clear()
+        self._manifest_paths.clear()
+        self._parallel_mode = False
+        self._total_tracks = 0
+
+        # A playlist or an album both flow through here. detect_spotify_url_type
+        # returns ("playlist"|"album", id); albums reuse the same embed-parsing
+        # path with the album embed endpoint (closes #38).
+        content_type, playlist_id = detect_spotify_url_type(spotify_playlist_link)
+        if content_type not in ("playlist", "album"):
+            raise ValueError("Expected a playlist or album URL")
+        self._emit("source_id", playlist_id)
+
+        # Bail before network work if stop was already clicked.
+        if self.is_cancelled():
+            self._emit("completed", "Download cancelled")
+            return
+
+        try:
+            spotify_api = self.ensure_spotifydown_api()
+        except SpotifyDownAPIError as exc:
+            raise RuntimeError(str(exc)) from exc
+
+        enumerate_started = time.monotonic()
+        metadata = spotify_api.get_playlist_metadata(playlist_id, content_type=content_type)
+        playlist_display_name = self.format_playlist_name(metadata)
+        self._emit("album", playlist_display_name)
+
+        playlist_folder_path = self.prepare_playlist_folder(music_folder, playlist_display_name)
+        self._sweep_partials(playlist_folder_path)
+
+        # Resume support: skip tracks already downloaded in a previous run of
+        # this folder before fetching their (rate-limited) metadata, so a huge
+        # playlist can be finished across multiple sessions (closes #40).
+        already_done = self._load_manifest(playlist_folder_path)
+        if already_done:
+            self._emit("resume_skipped", len(already_done))
+            self._emit(
+                "message", f"Resuming: skipping {len(already_done)} already-downloaded track(s)"
+            )
+
+        # Materialize the generator (not thread-safe; count also picks the
+        # worker pool size). Cancel is checked between yields so huge
+        # playlists abort mid-fetch instead of after the full window.
+        expected_total = metadata.track_count or 0
+        tracks: list = []
+        for track in spotify_api.iter_playlist_tracks(
+            playlist_id,
+            content_type=content_type,
+            skip_ids=already_done,
+            limit=self._metadata_limit(),
+        ):
+            if self.is_cancelled():
+                break
+            tracks.append(track)
+            if expected_total and len(tracks) % 10 == 0:
+                self._emit(
+                    "message", f"Fetching track metadata ({len(tracks)} of {expected_total})..."
+                )
+        self._stage_stats.add("enumerate", (time.monotonic() - enumerate_started) * 1000)
+        self._total_tracks = len(tracks)
+
+        if self.is_cancelled():
+            self._emit("completed", "Download cancelled")
+            return
+
+        self._emit("progress_reset", 0)
+
+        # Small playlists don't benefit from parallelism. Keep 1 worker for
+        # playlists under 3 tracks to preserve the single-track UI feel.
+        limit = self._concurrency_limit(len(tracks) if len(tracks) >= 3 else 1)
+        sequential = limit.maximum == 1
+
+        log.info(
+            "%s scrape: name=%r id=%s tracks=%d (resume-skipped %d) mode=%s "
+            "workers=%d (%d-%d) fmt=%s/%s",
+            content_type,
+            playlist_display_name,
+            playlist_id,
+            len(tracks),
+            len(already_done),
+            "sequential" if sequential else "parallel",
+            limit.current,
+            limit.minimum,
+            limit.maximum,
+            self.audio_format,
+            self.audio_quality,
+        )
+
+        # Canonical playlist position over enumerate order: spclient yields
+        # in http-completion order on >100-track playlists (#51). Enumerate
+        # only for albums/small playlists, which arrive already ordered.
+        def _track_num_for(track, idx):
+            return track.position if getattr(track, "position", None) else idx
+
+        jobs = [
+            (
+                track,
+                playlist_folder_path,
+                metadata.cover_url,
+                _track_num_for(track, idx),
+                None,
+                True,
+            )
+            for idx, track in enumerate(tracks, start=1)
+        ]
+
+        def _run(job):
+            track, folder, cover, num, _source, _numbered = job
+            if sequential:
+                # Reset the per-track progress bar before each track so the
+                # single-track UI behaves the way it always has.
+                self._emit("progress_reset", 0)
+            return self._download_one_track(track, folder, cover, track_num=num)
+
+        self._run_pool(jobs, limit, _run, inline=sequential)
+
+        if self.is_cancelled():
+            log.info("scrape cancelled by user (%d done before cancel)", self.counter)
+            self._emit("completed", "Download cancelled")
+            return
+
+        # Report completion with failed track count
+        ok = max(self._total_tracks - len(self._failed_tracks), 0)
+        if self._failed_tracks:
+            log.info("scrape done: %d ok, %d failed", ok, len(self._failed_tracks))
+            log.info("failed tracks: %s", " | ".join(self._failed_tracks))
+            self._emit("completed", f"Done! {len(self._failed_tracks)} track(s) failed")
+        else:
+            log.info("scrape done: %d ok, 0 failed", self._total_tracks)
+            self._emit("completed", "Download Complete!")
+
+    def scrape_many(self, links, music_folder):
+        """Download several playlist/album/track links through one worker pool.
+
+        Every link is enumerated first (playlists into their own folder with
+        their own resume manifest, single tracks straight into music_folder),
+        then all tracks run as one job list on a single pool of up to
+        MAX_WORKERS, so ten small albums parallelize like one big playlist.
+        A track ID already queued by an earlier link is dropped as a
+        duplicate. Per-link progress goes out on source_progress: a "started"
+        record after enumeration and a "done" record once its last track
+        finishes.
+        """
+        with self._counter_lock:
+            self.counter = 0
+        with self._failed_lock:
+            self._failed_tracks.clear()
+        with self._filename_lock:
+            self._in_flight_files.clear()
+        self._manifest_paths.clear()
+        self._parallel_mode = False
+        self._total_tracks = 0
+
+        try:
+            spotify_api = self.ensure_spotifydown_api()
+        except SpotifyDownAPIError as exc:
+            raise RuntimeError(str(exc)) from exc
+
+        # (track, folder, default cover, track number, source link, numbered)
+        jobs: list[tuple] = []
+        stats: dict[str, dict] = {}
+        queued_ids: set[str] = set()
+        seen_sources: set[tuple[str, str]] = set()
+        swept: set[str] = set()
+        resumed_total = 0
+
+        for link in links:
+            if self.is_cancelled():
+                break
+            try:
+                content_type, item_id = detect_spotify_url_type(link)
+            except ValueError:
+                content_type, item_id = "unknown", None
+            record = {"url": link, "type": content_type, "name": "", "folder": ""}
+            if content_type == "unknown" or not item_id:
+                record.update(phase="done", error="Invalid Spotify URL")
+                self._emit("source_progress", record)
+                continue
+            if (content_type, item_id) in seen_sources:
+                record.update(phase="done", duplicate=True)
+                self._emit("source_progress", record)
+                continue
+            seen_sources.add((content_type, item_id))
+
+            enumerate_started = time.monotonic()
+            try:
+                if content_type == "track":
+                    found = [spotify_api.get_track(item_id)]
+                    folder, cover, resumed, name = music_folder, None, 0, ""
+                    os.makedirs(music_folder, exist_ok=True)
+                else:
+                    metadata = spotify_api.get_playlist_metadata(item_id, content_type=content_type)
+                    name = self.format_playlist_name(metadata)
+                    self._emit("album", name)
+                    folder = self.prepare_playlist_folder(music_folder, name)
+                    already_done = self._load_manifest(folder)
+                    resumed = len(already_done)
+                    cover = metadata.cover_url
+                    found = []
+                    for track in spotify_api.iter_playlist_tracks(
+                        item_id,
+                        content_type=content_type,
+                        skip_ids=already_done,
+                        limit=self._metadata_limit(),
+                    ):
+                        if self.is_cancelled():
+                            break
+                        found.append(track)
+            except (SpotifyDownAPIError, OSError) as exc:
+                log.warning("could not enumerate %s: %s", link, exc)
+                self._emit("message", self._get_user_friendly_error(exc, link))
+                record.update(phase="done", error=str(exc)[:200])
+                self._emit("source_progress", record)
+                continue
+            self._stage_stats.add("enumerate", (time.monotonic() - enumerate_started) * 1000)
+
+            if folder not in swept:
+                swept.add(folder)
+                self._sweep_partials(folder)
+            resumed_total += resumed
+            duplicates = 0
+            queued = 0
+            for idx, track in enumerate(found, start=1):
+                if track.id and track.id in queued_ids:
+                    duplicates += 1
+                    continue
+                if track.id:
+                    queued_ids.add(track.id)
+                num = track.position if getattr(track, "position", None) else idx
+                jobs.append((track, folder, cover, num, link, content_type != "track"))
+                queued += 1
+            stats[link] = {"type": content_type, "remaining": queued, "landed": 0, "failed": 0}
+            record.update(
+                phase="started",
+                name=name,
+                folder=folder,
+                tracks=queued,
+                duplicates=duplicates,
+                resumed=resumed,
+            )
+            self._emit("source_progress", record)
+            if not queued:
+                self._emit(
+                    "source_progress",
+                    {"url": link, "type": content_type, "phase": "done", "landed": 0, "failed": 0},
+                )
+
+        # one manifest per folder from here on; a standalone track's folder
+        # has none, so it must not fall back to the last playlist's manifest
+        self._manifest_path = None
+        self._total_tracks = len(jobs)
+        if resumed_total:
+            self._emit("resume_skipped", resumed_total)
+        if self.is_cancelled():
+            self._emit("completed", "Download cancelled")
+            return
+
+        self._emit("album", f"Queue: {len(stats)} link(s)")
+        self._emit("progress_reset", 0)
+        limit = self._concurrency_limit(len(jobs) if len(jobs) >= 3 else 1)
+        log.info(
+            "batch scrape: links=%d tracks=%d (resume-skipped %d) workers=%d (%d-%d) fmt=%s/%s",
+            len(links),
+            len(jobs),
+            resumed_total,
+            limit.current,
+            limit.minimum,
+            limit.maximum,
+            self.audio_format,
+            self.audio_quality,
+        )
+
+        def _settle(link, result) -> None:
+            entry = stats[link]
+            entry["remaining"] -= 1
+            entry["failed" if result else "landed"] += 1
+            if entry["remaining"] == 0:
+                self._emit(
+                    "source_progress",
+                    {
+                        "url": link,
+                        "type": entry["type"],
+                        "phase": "done",
+                        "landed": entry["landed"],
+                        "failed": entry["failed"],
+                    },
+                )
+
+        def _run(job):
+            track, folder, cover, num, link, numbered = job
+            return self._download_one_track(
+                track, folder, cover, num, source=link, numbered=numbered
+            )
+
+        self._run_jobs(jobs, limit, _run, lambda job, result: _settle(job[4], result))
+
+    def _run_pool(self, jobs, limit: AdaptiveLimit, run, on_result=None, *, inline=False) -> None:
+        """Run `jobs` ((track, folder, cover, num, source, numbered) each)
+        through `run` on worker threads that follow `limit` (or, `inline`,
+        one at a time on this thread), search prefetch included.
+
+        Jobs are taken lane by lane (LANES): fresh ones in queue order, or
+        shortest first with shortest_first. A track that fails transiently
+        waits out RETRY_DELAYS_S in the retry lane; one whose widened search
+        found nothing usable gets the simplified query in the fallback lane,
+        after all fresh work. Each final outcome (None = the track landed) is
+        fed back to the limit, then on_result(job, result) is called on this
+        thread and the lane depths go out on the "lanes" event. Once
+        cancelled, no new job starts and in-flight ones finish.
+        """
+        if self.shortest_first:
+            jobs = sorted(jobs, key=lambda job: job[0].duration_ms or float("inf"))
+        lanes = LaneQueue(self.LANES)
+        for job in jobs:
+            lanes.put(_LaneJob(job))
+        self.requeued = {}
+
+        def _attempt(entry):
+            self._attempt.entry = entry
+            try:
+                return run(entry.job)
+            finally:
+                self._attempt.entry = None
+
+        self._parallel_mode = limit.maximum > 1
+        self._limit = limit
+        if inline:
+            outcomes = run_inline(lanes, _attempt, stop=self.is_cancelled)
+        else:
+            outcomes = run_adaptive(
+                lanes, _attempt, limit, stop=self.is_cancelled, name="sunnify-download"
+            )
+        try:
+            with self._prefetching([(job[0], job[1], job[3], job[5]) for job in jobs]):
+                for entry, result, error in outcomes:
+                    if error is not None:
+                        # _download_one_track handles its own errors; this is
+                        # only framework-level fallout (a worker crashed hard)
+                        log.error("unexpected worker error", exc_info=error)
+                        self._emit("message", f"Unexpected worker error: {error}")
+                        result = "worker error"
+                    limit.record(ok=result is None)
+                    if isinstance(result, _Requeue):
+                        self._requeue(lanes, entry, result)
+                        continue
+                    if on_result is not None:
+                        on_result(entry.job, result)
+                    self._emit("lanes", lanes.depths())
+        finally:
+            outcomes.close()
+            self._await_finalizing()
+            # reset only once every worker is done: one still in flight that
+            # observed False would emit single-track UI events
+            self._limit = None
+            self._parallel_mode = False
+            self.pool_stats = limit.snapshot()
+        log.info("download pool done: %s (requeued %s)", self.pool_stats, self.requeued)
+
+    def _requeue(self, lanes: LaneQueue, entry: _LaneJob, requeue: _Requeue) -> None:
+        """Put a track back into the lane _download_one_track chose for it."""
+        delay = 0.0
+        if requeue.lane == "retry":
+            delay = self.RETRY_DELAYS_S[entry.retries]
+            entry.retries += 1
+        else:
+            entry.queries = "simplified"
+        self.requeued[requeue.lane] = self.requeued.get(requeue.lane, 0) + 1
+        lanes.put(entry, requeue.lane, delay)
+        self._emit(
+            "lanes",
+            {
+                **lanes.depths(),
+                "requeued": {
+                    "title": entry.job[0].title,
+                    "lane": requeue.lane,
+                    "delay_s": delay,
+                    "reason": requeue.reason[:200],
+                },
+            },
+        )
+
+    def _run_jobs(self, jobs, limit: AdaptiveLimit, run, on_result=None) -> None:
+        """_run_pool, then the batch's "completed" event."""
+        self._run_pool(jobs, limit, run, on_result)
+
+        if self.is_cancelled():
+            log.info("batch cancelled by user (%d done before cancel)", self.counter)
+            self._emit("completed", "Download cancelled")
+            return
+        if self._failed_tracks:
+            log.info("batch done: %d failed", len(self._failed_tracks))
+            self._emit("completed", f"Done! {len(self._failed_tracks)} track(s) failed")
+        else:
+            self._emit("completed", "Download Complete!")
+
+    def download_tracks(self, jobs, on_result=None, *, sweep: bool = True) -> None:
+        """Re-download known tracks without asking Spotify for their playlists.
+
+        `jobs` are (track, folder, track number, replaces) tuples, as
+        `sunnify repair` builds them from resume manifests (a number of None
+        keeps the file unnumbered, as single-track links are); `replaces` is the
+        path of the broken file the track stands in for, or None. Each one is
+        moved aside while its track downloads, deleted once the new file has
+        landed and put back if the track fails or the run is cancelled, so a
+        failed repair never leaves the folder worse off. Runs on the same
+        pool, prefetch and finalization as scrape_many, and records repaired
+        tracks in their folders' manifests.
+
+        on_result(track, result) is called for each track that ran to an
+        outcome (None = it landed), not for ones a cancel cut short.
+        sweep=False leaves unfinished downloads in the folders alone, for
+        `sunnify work`, whose folders other machines are downloading into.
+        """
+        with self._counter_lock:
+            self.counter = 0
+        with self._failed_lock:
+            self._failed_tracks.clear()
+        with self._filename_lock:
+            self._in_flight_files.clear()
+        self._manifest_paths.clear()
+        self._parallel_mode = False
+        self._stage_stats = StageStats()
+        try:
+            for folder in dict.fromkeys(job[1] for job in jobs):
+                if sweep:
+                    self._sweep_partials(folder)
+                self._load_manifest(folder)
+            self._manifest_path = None
+            self._total_tracks = len(jobs)
+            replaces = {id(track): old for track, _folder, _num, old in jobs}
+            ext = SUPPORTED_FORMATS[self.audio_format]["ext"]
+
+            def _run(job):
+                track, folder, _cover, num, _source, numbered = job
+                if self.is_cancelled():
+                    return None
+                old = replaces[id(track)]
+                aside = old + REPAIR_MARK if old and os.path.exists(old) else None
+                if aside:
+                    os.replace(old, aside)
+                result = None
+                try:
+                    # finalized here: the outcome decides whether the old
+                    # file comes back and how the track's result settles
+                    result = self._download_one_track(
+                        track, folder, track.cover_url, num, numbered=numbered, hand_off=False
+                    )
+                finally:
+                    if aside:
+                        new = self._track_path(track, folder, num, numbered)
+                        new = os.path.splitext(new)[0] + f".{ext}"
+                        if result is None and os.path.exists(new):
+                            os.remove(aside)
+                        else:
+                            os.replace(aside, old)
+                return result
+
+            self._emit("album", f"Repair: {len(jobs)} track(s)")
+            self._emit("progress_reset", 0)
+            limit = self._concurrency_limit(len(jobs) if len(jobs) >= 3 else 1)
+            log.info(
+                "repair: tracks=%d workers=%d (%d-%d) fmt=%s/%s",
+                len(jobs),
+                limit.current,
+                limit.minimum,
+                limit.maximum,
+                self.audio_format,
+                self.audio_quality,
+            )
+
+            def _settle(job, result):
+                if on_result is not None and (result is not None or not self.is_cancelled()):
+                    on_result(job[0], result)
+
+            self._run_jobs(
+                [
+                    (track, folder, None, num or 0, None, num is not None)
+                    for track, folder, num, _old in jobs
+                ],
+                limit,
+                _run,
+                _settle,
+            )
+        finally:
+            self._close_run()
+
+    def returnSPOT_ID(self, link):
+        """Extract playlist ID from Spotify URL."""
+        return extract_playlist_id(link)
+
+    def scrape_track(self, spotify_track_link, music_folder):
+        """Download a single track from Spotify."""
+        url_type, track_id = detect_spotify_url_type(spotify_track_link)
+        if url_type != "track":
+            raise ValueError("Expected a track URL")
+
+        try:
+            spotify_api = self.ensure_spotifydown_api()
+        except SpotifyDownAPIError as exc:
+            raise RuntimeError(str(exc)) from exc
+
+        track = spotify_api.get_track(track_id)
+        log.info(
+            "single-track scrape: %r by %r id=%s fmt=%s/%s",
+            track.title,
+            track.artists,
+            track_id,
+            self.audio_format,
+            self.audio_quality,
+        )
+        self._emit("album", "Single Track Download")
+
+        if not os.path.exists(music_folder):
+            os.makedirs(music_folder)
+        self._sweep_partials(music_folder)
+
+        self._emit("progress_reset", 0)
+
+        track_title = track.title
+        artists = track.artists
+        sanitized_title = self.sanitize_text(track_title)
+        sanitized_artists = self.sanitize_text(artists)
+        first, second = self._name_parts(sanitized_title, sanitized_artists)
+        filename = f"{first} - {second}.mp3"
+        filepath = os.path.join(music_folder, cap_filename(filename))
+
+        album_name = track.album or ""
+        release_date = track.release_date or ""
+        cover_url = track.cover_url
+
+        song_meta = {
+            "title": track_title,
+            "artists": artists,
+            "album": album_name,
+            "releaseDate": release_date,
+            "cover": cover_url or "",
+            "file": filepath,
+            "trackNumber": 1,
+        }
+
+        timing = self._start_timing()
+        try:
+            self._emit("track_started", dict(song_meta))
+
+            if os.path.exists(filepath):
+                self._emit("track_ready", song_meta)
+                self.increment_counter()
+                self._emit("completed", "Track already exists!")
+                timing.outcome = "skipped"
+                return
+
+            # Download via YouTube search
+            search_query = f"ytsearch1:{track_title} {artists} audio"
+            expected_dur = (track.duration_ms / 1000) if track.duration_ms else None
+            cover = self._cover_future(song_meta["cover"])
+            try:
+                landed = self.download_track_audio(
+                    search_query,
+                    filepath,
+                    expected_duration_s=expected_dur,
+                    **self._preview_kwargs(track),
+                )
+                if landed and os.path.exists(landed):
+                    self._finalize_track(landed, song_meta, cover=cover)
+            except Exception as error_status:
+                error_msg = self._get_user_friendly_error(error_status, track_title)
+                log.error("single-track download failed: '%s'", track_title, exc_info=True)
+                self._emit("completed", error_msg)
+                return
+
+            if not landed or not os.path.exists(song_meta["file"]):
+                log.warning("single-track produced no audio file: '%s'", track_title)
+                self._emit("completed", "Download failed - no audio file produced")
+                return
+
+            song_meta.update(self.take_audio_report())
+            self._emit("track_ready", song_meta)
+            self.increment_counter()
+            self._emit("progress", 100)
+            timing.outcome = "landed"
+            self._emit("completed", "Download Complete!")
+        finally:
+            self._settle_timing(track, timing)
+
+    def increment_counter(self):
+        with self._counter_lock:
+            self.counter += 1
+            current = self.counter
+        self._emit("count", current)
+
+
+def _fetch_cover_bytes(url: str) -> bytes | None:
+    """Download cover image bytes, returning None on any failure."""
+    if not url:
+        return None
+    try:
+        resp = sunnify_http.get(url, traffic="cover", timeout=15)
+        if resp.status_code == 200 and resp.content:
+            return resp.content
+    except (requests.RequestException, OSError) as exc:
+        log.debug("cover fetch failed: %s", exc)
+    return None
+
+
+def _detect_image_mime(data: bytes) -> str:
+    """Return the MIME string for image bytes, sniffed from magic numbers.
+
+    Spotify currently serves JPEG covers; this function exists so a future
+    switch to PNG (or a mid-flight content-type change) doesn't silently
+    produce broken cover-art frames mis-tagged as JPEG.
+
+    ref: JPEG magic ff d8 ff (any JFIF/Exif variant), per ISO/IEC 10918-1
+    ref: PNG signature 89 50 4e 47 0d 0a 1a 0a, per W3C PNG spec section 5.2
+    """
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    return "image/jpeg"  # safe default; Spotify has served JPEG since 2015
+
+
+def _write_metadata_mp3(filename: str, tags: dict, cover_bytes: bytes | None) -> None:
+    """Write ID3 tags + embedded cover art to an MP3.
+
+    Tags and the APIC cover frame are written as ID3v2.3 with UTF-16 text
+    encoding instead of mutagen's v2.4 / UTF-8 default. v2.3 + UTF-16 is the
+    lowest common denominator that's understood by older iTunes, Windows
+    Media Player, most car head-units, and stock Android players, none of
+    which read v2.4 APIC frames reliably (closes #46).
+
+    ref: ID3v2.3 spec section 3.3 (only encoding values $00 ISO-8859-1
+         and $01 Unicode UTF-16+BOM are defined) https://id3.org/id3v2.3.0
+    ref: ID3v2.4 spec adds $02 UTF-16BE and $03 UTF-8 (which is what
+         mutagen writes by default) https://id3.org/id3v2.4.0-frames
+    ref: mutagen `update_to_v23()` downgrades any UTF-8 frames to UTF-16
+         before saving as v2.3 https://mutagen.readthedocs.io/en/latest/api/id3.html
+    """
+    audio = EasyID3(filename)
+    audio["title"] = tags.get("title", "")
+    audio["artist"] = tags.get("artists", "")
+    audio["album"] = tags.get("album", "")
+    audio["date"] = tags.get("releaseDate", "")
+    track_num = tags.get("trackNumber") or 0
+    if track_num:
+        audio["tracknumber"] = str(track_num)
+    # EasyID3.save() defaults to v2.4 + UTF-8. Passing v2_version=3 tells
+    # mutagen to downgrade text frames to a v2.3-allowed encoding (UTF-16
+    # with BOM for non-ASCII, Latin-1 for ASCII) before writing.
+    audio.save(v2_version=3)
+    if cover_bytes:
+        id3 = ID3(filename)
+        mime = _detect_image_mime(cover_bytes)
+        # encoding=1 (UTF-16+BOM) is the only Unicode encoding v2.3 defines.
+        # type=3 is "Cover (front)" per the v2.3 APIC enum.
+        id3.add(APIC(encoding=1, mime=mime, type=3, desc="Cover", data=cover_bytes))
+        id3.update_to_v23()
+        id3.save(v2_version=3)
+
+
+def _write_metadata_m4a(filename: str, tags: dict, cover_bytes: bytes | None) -> None:
+    """Write iTunes atom tags + embedded cover art to an M4A/MP4.
+
+    iTunes atoms (`covr`, `\xa9nam`, etc.) are a stable, version-less spec
+    used by every MP4-aware player. The only knob worth getting right is
+    the cover-art image format, which we sniff so a future PNG cover from
+    Spotify doesn't get mis-tagged as JPEG.
+
+    ref: mutagen MP4Tags atom keys (`\xa9nam`/`\xa9ART`/`\xa9alb`/`\xa9day`/
+         `trkn`/`covr`) and MP4Cover.FORMAT_JPEG/PNG, which is the spec we
+         write against https://mutagen.readthedocs.io/en/latest/api/mp4.html
+    """
+    from mutagen.mp4 import MP4, MP4Cover
+
+    audio = MP4(filename)
+    audio["\xa9nam"] = tags.get("title", "")
+    audio["\xa9ART"] = tags.get("artists", "")
+    audio["\xa9alb"] = tags.get("album", "")
+    date = tags.get("releaseDate", "")
+    if date:
+        audio["\xa9day"] = date
+    track_num = tags.get("trackNumber") or 0
+    if track_num:
+        audio["trkn"] = [(int(track_num), 0)]
+    if cover_bytes:
+        mime = _detect_image_mime(cover_bytes)
+        fmt = MP4Cover.FORMAT_PNG if mime == "image/png" else MP4Cover.FORMAT_JPEG
+        audio["covr"] = [MP4Cover(cover_bytes, imageformat=fmt)]
+    audio.save()
+
+
+def _write_metadata_flac(filename: str, tags: dict, cover_bytes: bytes | None) -> None:
+    """Write Vorbis comments + embedded cover art to a FLAC.
+
+    FLAC's Picture block carries an explicit MIME string, so we sniff the
+    image type and pass it through. Vorbis comments are always UTF-8 and
+    universally supported, so nothing else is version-sensitive here.
+
+    ref: FLAC METADATA_BLOCK_PICTURE format spec
+         https://xiph.org/flac/format.html#metadata_block_picture
+    """
+    from mutagen.flac import FLAC, Picture
+
+    audio = FLAC(filename)
+    audio["title"] = tags.get("title", "")
+    audio["artist"] = tags.get("artists", "")
+    audio["album"] = tags.get("album", "")
+    date = tags.get("releaseDate", "")
+    if date:
+        audio["date"] = date
+    track_num = tags.get("trackNumber") or 0
+    if track_num:
+        audio["tracknumber"] = str(track_num)
+    if cover_bytes:
+        # add_picture() appends; clear first so a re-tag doesn't stack duplicate covers
+        audio.clear_pictures()
+        pic = Picture()
+        pic.type = 3  # Front cover
+        pic.mime = _detect_image_mime(cover_bytes)
+        pic.desc = "Cover"
+        pic.data = cover_bytes
+        audio.add_picture(pic)
+    audio.save()
+
+
+_METADATA_WRITERS = {
+    ".mp3": _write_metadata_mp3,
+    ".m4a": _write_metadata_m4a,
+    ".flac": _write_metadata_flac,
+}
+
+
+def write_tags(tags: dict, filename: str, cover_bytes: bytes | None = None) -> str | None:
+    """Write tags + cover art synchronously, dispatching on file extension.
+
+    Each container uses a different tag system (ID3 for mp3, iTunes atoms
+    for m4a, Vorbis comments for flac). Opus/WAV are skipped with a log
+    line; those formats have limited or no standard cover-art story that
+    would repay the extra dependency surface for this project's scope.
+    `cover_bytes` is art already fetched; without it tags["cover"] is fetched.
+    Returns the status line for the UI, or None if writing failed (logged).
+    """
+    try:
+        log.info("writing tags: %s", filename)
+        ext = os.path.splitext(filename)[1].lower()
+        writer = _METADATA_WRITERS.get(ext)
+        if writer is None:
+            return "Tags skipped (unsupported container)"
+
+        if cover_bytes is None:
+            cover_bytes = _fetch_cover_bytes(tags.get("cover", ""))
+        writer(filename, tags, cover_bytes)
+        return "Tags added successfully"
+    except Exception:
+        log.error("tag write failed: %s", filename, exc_info=True)
+        return None
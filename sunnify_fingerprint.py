@@ -0,0 +1,200 @@
+"""Chroma fingerprints for checking a download against Spotify's preview clip.
+
+Title, artist and duration heuristics can't tell a studio recording from a
+same-length live take, cover or re-record, and loose matching trades that
+safety away entirely. Spotify's 30-second preview is the real recording, so
+comparing it with the downloaded audio answers "is this the right song" from
+the audio itself.
+
+A fingerprint is a compact chroma sequence: mono PCM at 11025 Hz, one frame
+every ~0.19 s, each frame's spectrum folded onto the 12 pitch classes,
+mean-centered, unit-normalized and quantized to int8 (12 bytes a frame,
+~2 KB for a preview). Chroma ignores timbre and loudness, so codec, bitrate
+and mastering differences between the preview and a YouTube upload barely
+move it, while a different song - or the same song in another arrangement -
+does. similarity() slides the preview along the full track and reports the
+best-aligned mean correlation in one matrix product.
+
+numpy is optional (`pip install numpy`): without it available() is False and
+the engine skips verification. Decoding uses the same ffmpeg the downloads do.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from sunnify_core import ffmpeg_executable
+
+SAMPLE_RATE = 11025
+FRAME = 4096
+HOP = 2048
+# pitch-class folding covers A1..~B6; below is rumble, above is mostly
+# harmonics and noise that blur the chroma
+MIN_HZ = 55.0
+MAX_HZ = 2000.0
+# frames quieter than this (RMS of int16 PCM) carry no pitch information
+SILENCE_RMS = 100.0
+# best-offset mean correlation at or above this is the same recording;
+# unrelated songs land near 0, re-arrangements of the same song well below
+MATCH_THRESHOLD = 0.6
+# frames per FFT batch in chroma_fingerprint
+_BLOCK = 256
+# decode at most this much of a download; previews sit in the first minutes
+MAX_SECONDS = 600
+
+
+def available() -> bool:
+    """True when numpy is importable, i.e. fingerprints can be computed."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def decode_pcm(ffmpeg_dir: str, source: str | None = None, data: bytes | None = None):
+    """Mono int16 PCM at SAMPLE_RATE from a file path or in-memory bytes.
+
+    `ffmpeg_dir` is the directory get_ffmpeg_path() returns. Raises
+    RuntimeError when ffmpeg can't decode the input.
+    """
+    import numpy as np
+
+    cmd = [
+        ffmpeg_executable(ffmpeg_dir),
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        "pipe:0" if source is None else source,
+    ]
+    cmd += ["-t", str(MAX_SECONDS), "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"]
+    proc = subprocess.run(cmd, input=data, capture_output=True, timeout=120)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode("utf-8", "replace").strip()[:300] or "decode failed")
+    return np.frombuffer(proc.stdout, dtype=np.int16)
+
+
+@lru_cache(maxsize=1)
+def _chroma_matrix():
+    """(FRAME//2 + 1, 12) fold from rfft bins to pitch classes (C = 0)."""
+    import numpy as np
+
+    freqs = np.fft.rfftfreq(FRAME, d=1.0 / SAMPLE_RATE)
+    fold = np.zeros((freqs.size, 12), dtype=np.float32)
+    band = (freqs >= MIN_HZ) & (freqs <= MAX_HZ)
+    # MIDI note numbers; 60 is middle C, so note % 12 is the pitch class
+    notes = np.rint(69 + 12 * np.log2(freqs[band] / 440.0)).astype(int) % 12
+    fold[np.flatnonzero(band), notes] = 1.0
+    return fold
+
+
+def chroma_fingerprint(pcm):
+    """int8 (frames, 12) chroma fingerprint of mono int16 PCM.
+
+    Silent frames become all-zero rows, which similarity() skips.
+    """
+    import numpy as np
+
+    samples = np.asarray(pcm, dtype=np.float32)
+    if samples.size < FRAME:
+        return np.zeros((0, 12), dtype=np.int8)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP]
+    window = np.hanning(FRAME).astype(np.float32)
+    fold = _chroma_matrix()
+    out = np.empty((frames.shape[0], 12), dtype=np.int8)
+    # FFT in blocks: a whole 10-minute track at once is ~50 MB of float32
+    for start in range(0, frames.shape[0], _BLOCK):
+        block = frames[start : start + _BLOCK]
+        loud = np.sqrt(np.mean(block * block, axis=1)) >= SILENCE_RMS
+        chroma = np.abs(np.fft.rfft(block * window, axis=1)) @ fold
+        chroma -= chroma.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(chroma, axis=1, keepdims=True)
+        chroma = np.divide(chroma, norms, out=np.zeros_like(chroma), where=norms > 0)
+        chroma[~loud] = 0.0
+        out[start : start + block.shape[0]] = np.rint(chroma * 127)
+    return out
+
+
+def _unit(fp):
+    import numpy as np
+
+    rows = fp.astype(np.float32)
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return np.divide(rows, norms, out=np.zeros_like(rows), where=norms > 0)
+
+
+def best_alignment(query, references) -> list[float]:
+    """Best-offset similarity of `query` against each of `references`.
+
+    All references are scored in one matrix product: the query's frames
+    against every reference frame, then each reference's diagonals (one per
+    offset) are averaged over the query's non-silent frames and the best
+    offset wins. A reference shorter than the query scores 0.
+    """
+    import numpy as np
+
+    q = _unit(query)
+    voiced = int(np.count_nonzero(np.any(q != 0, axis=1)))
+    if not references or voiced == 0:
+        return [0.0] * len(references)
+    refs = [_unit(r) for r in references]
+    products = q @ np.concatenate(refs).T  # (query frames, all reference frames)
+    scores = []
+    start = 0
+    n = q.shape[0]
+    for ref in refs:
+        block = products[:, start : start + ref.shape[0]]
+        start += ref.shape[0]
+        if ref.shape[0] < n:
+            scores.append(0.0)
+            continue
+        # diagonals[i, k] = block[i, i + k]: row i of the query at offset k
+        diagonals = np.lib.stride_tricks.as_strided(
+            block,
+            shape=(n, ref.shape[0] - n + 1),
+            strides=(block.strides[0] + block.strides[1], block.strides[1]),
+            writeable=False,
+        )
+        scores.append(float(diagonals.sum(axis=0).max() / voiced))
+    return scores
+
+
+def similarity(query, reference) -> float:
+    """Best-offset similarity of a (shorter) query fingerprint within reference."""
+    return best_alignment(query, [reference])[0]
+
+
+class FingerprintCache:
+    """Thread-safe LRU of fingerprints keyed by Spotify track ID."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._items: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            fp = self._items.get(key)
+            if fp is not None:
+                self._items.move_to_end(key)
+            return fp
+
+    def put(self, key: str, fp) -> None:
+        with self._lock:
+            self._items[key] = fp
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+# Preview fingerprints for the whole process: `sunnify serve` jobs and GUI
+# re-runs of the same playlist skip re-fetching and re-decoding previews.
+PREVIEW_CACHE = FingerprintCache()
@@ -0,0 +1,184 @@
+"""One HTTP scheduler for everything sunnify fetches itself.
+
+Spotify's embed and spclient calls, cover art, preview clips, the GUI's
+preview thumbnail and --stream-transcode's ranged audio reads used to open
+connections independently: a bare requests.get() per cover, a session per
+engine, another per API client. HttpScheduler puts them on one
+requests.Session, whose keep-alive pool is sized to the per-host budgets,
+and gates each request on a slot for its host:
+
+- budgets: at most HOST_LIMITS[host] requests in flight per host (a rule
+  also covers its subdomains, so every googlevideo.com edge shares one
+  budget), DEFAULT_HOST_LIMIT for anything unlisted.
+- priority: a waiting INTERACTIVE request (the thumbnail the user is
+  looking at) takes the next free slot ahead of any BULK one.
+- fairness: within a priority, waiters are served round-robin by traffic
+  class ("metadata", "cover", "preview", "audio", ...), so a burst of cover
+  fetches can't starve the metadata that's queued behind it.
+
+yt-dlp opens its own connections and isn't scheduled here; the download
+pool's size (sunnify_concurrency) is what bounds it.
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import threading
+from collections.abc import Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INTERACTIVE = 0
+BULK = 1
+
+# requests in flight per host; a rule also covers its subdomains
+HOST_LIMITS = {
+    "open.spotify.com": 8,
+    "spclient.wg.spotify.com": 4,
+    "i.scdn.co": 4,  # cover art
+    "p.scdn.co": 4,  # preview clips
+    "googlevideo.com": 8,  # --stream-transcode's ranged reads
+}
+DEFAULT_HOST_LIMIT = 6
+
+
+class _Host:
+    """One host's budget: slots in use and who is waiting for one."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.peak = 0
+        # priority -> traffic class -> waiting events; class order is the
+        # round-robin order (a served class moves to the back)
+        self.waiting: dict[int, collections.OrderedDict] = {}
+
+    def queued(self) -> int:
+        return sum(len(q) for classes in self.waiting.values() for q in classes.values())
+
+    def next_waiter(self) -> threading.Event | None:
+        if not self.waiting:
+            return None
+        priority = min(self.waiting)
+        classes = self.waiting[priority]
+        traffic, waiters = next(iter(classes.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            classes.move_to_end(traffic)
+        else:
+            del classes[traffic]
+            if not classes:
+                del self.waiting[priority]
+        return waiter
+
+    def take(self) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+
+
+class HttpScheduler:
+    """Per-host request slots over one shared keep-alive session.
+
+    Thread-safe. get() for a plain request; slot() around a request whose
+    body is streamed, so the slot is held until the body has been read.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session | None = None,
+        *,
+        host_limits: dict[str, int] | None = None,
+        default_limit: int = DEFAULT_HOST_LIMIT,
+    ):
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        if session is None:
+            session = requests.Session()
+            # one pooled connection per slot, so a slot never waits on the pool
+            adapter = HTTPAdapter(
+                pool_connections=len(self.host_limits) + 8,
+                pool_maxsize=max([default_limit, *self.host_limits.values()]),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self._lock = threading.Lock()
+        self._hosts: dict[str, _Host] = {}
+
+    def budget_for(self, url: str) -> tuple[str, int]:
+        """The budget `url` draws from: (rule or host name, limit)."""
+        host = (urlsplit(url).hostname or "").lower()
+        for rule, limit in self.host_limits.items():
+            if host == rule or host.endswith("." + rule):
+                return rule, limit
+        return host, self.default_limit
+
+    @contextlib.contextmanager
+    def slot(self, url: str, traffic: str = "metadata", priority: int = BULK) -> Iterator[None]:
+        """Hold one of `url`'s host slots for the duration of the block."""
+        name, limit = self.budget_for(url)
+        waiter = None
+        with self._lock:
+            host = self._hosts.get(name)
+            if host is None:
+                host = self._hosts[name] = _Host(limit)
+            if host.active < host.limit and not host.waiting:
+                host.take()
+            else:
+                waiter = threading.Event()
+                classes = host.waiting.setdefault(priority, collections.OrderedDict())
+                classes.setdefault(traffic, collections.deque()).append(waiter)
+        if waiter is not None:
+            waiter.wait()  # release() counted us in before setting it
+        try:
+            yield
+        finally:
+            with self._lock:
+                host.active -= 1
+                granted = host.next_waiter()
+                if granted is not None:
+                    host.take()
+            if granted is not None:
+                granted.set()
+
+    def get(
+        self, url: str, *, traffic: str = "metadata", priority: int = BULK, **kwargs
+    ) -> requests.Response:
+        """session.get(url, **kwargs) inside a slot. Not for stream=True:
+        the slot would be released before the body is read (use slot())."""
+        with self.slot(url, traffic, priority):
+            return self.session.get(url, **kwargs)
+
+    def stats(self) -> dict[str, dict]:
+        """Per budget: limit, active, queued and the peak in flight."""
+        with self._lock:
+            return {
+                name: {
+                    "limit": host.limit,
+                    "active": host.active,
+                    "queued": host.queued(),
+                    "peak": host.peak,
+                }
+                for name, host in self._hosts.items()
+            }
+
+
+_shared: HttpScheduler | None = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> HttpScheduler:
+    """The process-wide scheduler every sunnify component fetches through."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HttpScheduler()
+        return _shared
+
+
+def get(url: str, *, traffic: str = "metadata", priority: int = BULK, **kwargs):
+    """shared().get(...): a one-off fetch through the shared scheduler."""
+    return shared().get(url, traffic=traffic, priority=priority, **kwargs)
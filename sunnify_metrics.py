@@ -0,0 +1,235 @@
+"""OpenMetrics counters, gauges and histograms for sunnify's long runs.
+
+The backend serves them at /metrics, `sunnify serve` at GET /metrics and
+`sunnify download --metrics-port N` on a port of its own, so a Prometheus
+scrape sees what a run is doing while it does it:
+
+- SPOTIFY_REQUESTS: metadata calls by endpoint (embed_playlist, spclient,
+  ...) and HTTP status, "error" when no response came back.
+- RETRIES: backoff retries taken by retry_on_network_error, per function.
+- CACHE_LOOKUPS: hits and misses per cache (token, album, preview); the
+  hit ratio is hit / (hit + miss).
+- TRACKS and DOWNLOAD_BYTES: track attempts by outcome, audio received.
+- POOL_WORKERS and POOL_BUSY: each worker pool's adaptive limit and how
+  many of its jobs are running (utilization is busy / workers).
+- REQUEST_SECONDS: backend request latency per route.
+
+Stdlib only: the text format is small, and a client library isn't worth a
+dependency for the CLI.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import threading
+import time
+from collections.abc import Iterator
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    """The metrics one exposition renders, in registration order."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """The OpenMetrics text exposition of every registered metric."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.extend(metric.samples())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "unknown"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...] = (), registry: Registry | None = None
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple, *extra: tuple[str, str]) -> str:
+        pairs = [*zip(self.labelnames, key, strict=True), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A running total; exposed as <name>_total."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}_total{self._labels(key)} {_number(value)}"
+
+
+class Gauge(_Metric):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{self._labels(key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative `buckets` (upper bounds)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), registry=None, *, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1  # +Inf
+            self._values[key] = (counts, total + value)
+
+    @contextlib.contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the block's duration in seconds."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(
+                (key, (list(counts), total)) for key, (counts, total) in self._values.items()
+            )
+        for key, (counts, total) in values:
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                le = self._labels(key, ("le", _number(bound)))
+                yield f"{self.name}_bucket{le} {count}"
+            yield f"{self.name}_count{self._labels(key)} {counts[-1]}"
+            yield f"{self.name}_sum{self._labels(key)} {_number(total)}"
+
+
+SPOTIFY_REQUESTS = Counter(
+    "sunnify_spotify_requests",
+    "Spotify metadata requests by endpoint and HTTP status",
+    ("endpoint", "status"),
+)
+RETRIES = Counter(
+    "sunnify_retries", "Network retries taken by retry_on_network_error", ("function",)
+)
+CACHE_LOOKUPS = Counter(
+    "sunnify_cache_lookups", "Cache lookups by cache and result (hit or miss)", ("cache", "result")
+)
+TRACKS = Counter("sunnify_tracks", "Track download attempts by outcome", ("outcome",))
+DOWNLOAD_BYTES = Counter("sunnify_download_bytes", "Audio bytes received from YouTube")
+POOL_WORKERS = Gauge("sunnify_pool_workers", "Jobs a worker pool may run at once", ("pool",))
+POOL_BUSY = Gauge("sunnify_pool_busy", "Jobs a worker pool is running", ("pool",))
+REQUEST_SECONDS = Histogram(
+    "sunnify_request_duration_seconds",
+    "Backend request latency by route, method and status",
+    ("route", "method", "status"),
+)
+
+
+def serve(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """Serve `registry` at http://host:port/metrics on a daemon thread;
+    returns the server (its server_address has the bound port). Raises
+    OSError when the port can't be bound."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="sunnify-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,146 @@
+"""A sampling profiler for `--profile` runs and the app's debug toggle.
+
+cProfile only sees the thread that enabled it, and a download run does its
+work on pool threads. Profiler instead samples every thread's stack
+(sys._current_frames) from a background thread every few milliseconds, which
+leaves the run alone between samples, and writes two files when it's done:
+
+- <name>.pstats: the samples as a pstats file (`python -m pstats`, snakeviz).
+  Times are sampled wall-clock seconds and call counts are sample counts.
+- <name>.collapsed: one "thread;outer;...;inner count" line per distinct
+  stack, what flamegraph.pl, speedscope and inferno read.
+
+Sampling is wall-clock: a worker waiting on YouTube or Spotify shows up in
+the blocking call, which is usually the answer to "where did the time go".
+
+Stdlib only.
+"""
+
+from __future__ import annotations
+
+import collections
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+
+INTERVAL_S = 0.005
+
+# pool threads are numbered ("sunnify-worker-3"); one flamegraph root per pool
+_THREAD_SUFFIX = re.compile(r"[-_ ]\d+(?: \(.*\))?$")
+
+
+def _frame_key(code) -> tuple[str, int, str]:
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+class Profiler:
+    """Samples every other thread's stack until stop(); usable as a
+    context manager."""
+
+    def __init__(self, interval_s: float = INTERVAL_S):
+        self.interval_s = interval_s
+        self.samples = 0
+        self._stacks: collections.Counter[tuple] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def start(self) -> None:
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="sunnify-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._elapsed = time.monotonic() - self._started
+
+    def __enter__(self) -> Profiler:
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            self.sample(skip=own)
+
+    def sample(self, skip: int | None = None) -> None:
+        """Record one stack per live thread (except `skip`)."""
+        names = {t.ident: _THREAD_SUFFIX.sub("", t.name) for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self._stacks[(names.get(ident, str(ident)), *stack)] += 1
+        self.samples += 1
+
+    def pstats(self) -> dict:
+        """The samples in the marshal layout pstats.Stats loads: per function
+        (cc, nc, tt, ct, callers), a function counted once per sample no
+        matter how deep it recurses."""
+        # a sample stands for the wall time between samples; stop() measures it
+        sample_s = (
+            self._elapsed / self.samples if self._elapsed and self.samples else self.interval_s
+        )
+        totals: dict[tuple, list] = {}
+        callers: dict[tuple, dict[tuple, list]] = {}
+        for (_thread, *stack), count in self._stacks.items():
+            if not stack:
+                continue
+            seconds = count * sample_s
+            for func in set(stack):
+                entry = totals.setdefault(func, [0, 0, 0.0, 0.0])
+                entry[0] += count
+                entry[1] += count
+                entry[3] += seconds
+            totals[stack[-1]][2] += seconds
+            for caller, callee in set(zip(stack, stack[1:], strict=False)):
+                edge = callers.setdefault(callee, {}).setdefault(caller, [0, 0, 0.0, 0.0])
+                edge[0] += count
+                edge[1] += count
+                edge[3] += seconds
+                if callee == stack[-1]:
+                    edge[2] += seconds
+        return {
+            func: (
+                cc,
+                nc,
+                tt,
+                ct,
+                {caller: tuple(edge) for caller, edge in callers.get(func, {}).items()},
+            )
+            for func, (cc, nc, tt, ct) in totals.items()
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, heaviest stacks first."""
+        lines = []
+        for (thread, *stack), count in self._stacks.most_common():
+            frames = [thread] + [
+                f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack
+            ]
+            lines.append(";".join(f.replace(";", ":") for f in frames) + f" {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, directory: str, label: str) -> tuple[str, str]:
+        """Write profile-<timestamp>-<label>.pstats and .collapsed into
+        `directory`; returns both paths."""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{label}")
+        with open(stem + ".pstats", "wb") as f:
+            marshal.dump(self.pstats(), f)
+        with open(stem + ".collapsed", "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return stem + ".pstats", stem + ".collapsed"
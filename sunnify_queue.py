@@ -0,0 +1,203 @@
+"""A shared job queue for downloading one library on several machines.
+
+`sunnify queue` enumerates playlists once and publishes one job per track
+into a SQLite file that every machine can reach (usually on the same share
+the music goes to). `sunnify work` on each machine claims jobs in batches,
+downloads them into the shared folder and marks them done:
+
+- leases: a claim holds its jobs for `lease_s` seconds, and the worker
+  renews the lease while it downloads. A worker that dies or loses the
+  share stops renewing; once its lease runs out any worker may claim the
+  job again.
+- attempts: a failed job goes back into the queue until MAX_ATTEMPTS claims
+  have failed it (lost leases included), then stays "failed".
+- dedup: a track is published once per folder, so publishing a playlist
+  again only adds the tracks that are new.
+
+Every operation is one short transaction on its own connection; claims take
+the write lock up front (BEGIN IMMEDIATE), so two workers never claim the
+same job. The journal stays in rollback mode because WAL needs shared
+memory, which network filesystems don't provide.
+
+Stdlib only.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+LEASE_S = 300.0
+MAX_ATTEMPTS = 3
+STATES = ("queued", "leased", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    track_id TEXT NOT NULL,
+    record TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL NOT NULL,
+    UNIQUE (folder, track_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, lease_until);
+"""
+
+
+@dataclass
+class Job:
+    """One claimed track: `folder` is relative to the library root and
+    `record` is manifest-shaped (see sunnify_cli._repair_track)."""
+
+    id: int
+    folder: str
+    record: dict
+    attempts: int
+
+
+class JobQueue:
+    """Track jobs in the SQLite file at `path` (created on first use)."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_attempts: int = MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.time,
+    ):
+        # wall-clock time: leases are compared across machines
+        self.path = path
+        self.max_attempts = max_attempts
+        self._clock = clock
+        db = sqlite3.connect(path, timeout=30)
+        try:
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def publish(self, folder: str, records: Iterable[dict]) -> int:
+        """Queue a job per record (each needs an "id") for `folder`; tracks
+        already published for that folder are left as they are. Returns how
+        many were added."""
+        now = self._clock()
+        rows = [(folder, record["id"], json.dumps(record), now) for record in records]
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO jobs (folder, track_id, record, updated) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            return db.total_changes - before
+
+    def claim(self, worker: str, *, limit: int = 1, lease_s: float = LEASE_S) -> list[Job]:
+        """Lease up to `limit` jobs to `worker`: queued ones in publish
+        order, and ones whose lease ran out. A job whose last allowed
+        attempt lost its lease is marked failed instead."""
+        now = self._clock()
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = 'failed', error = 'lease expired', updated = ? "
+                "WHERE state = 'leased' AND lease_until <= ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            rows = db.execute(
+                "SELECT id, folder, record, attempts FROM jobs "
+                "WHERE state = 'queued' OR (state = 'leased' AND lease_until <= ?) "
+                "ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            db.executemany(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                [(worker, now + lease_s, now, row[0]) for row in rows],
+            )
+        return [
+            Job(id=job_id, folder=folder, record=json.loads(record), attempts=attempts + 1)
+            for job_id, folder, record, attempts in rows
+        ]
+
+    def renew(self, worker: str, job_ids: Iterable[int], *, lease_s: float = LEASE_S) -> int:
+        """Extend `worker`'s leases on `job_ids`; returns how many it still
+        held (a job another worker reclaimed is not taken back)."""
+        now = self._clock()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "UPDATE jobs SET lease_until = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                [(now + lease_s, now, job_id, worker) for job_id in job_ids],
+            )
+            return db.total_changes - before
+
+    def finish(self, job_id: int, worker: str, error: str | None = None) -> str | None:
+        """Settle a job `worker` holds: done, or on `error` back to queued
+        (failed once its attempts are used up). Returns the new state, or
+        None when the lease had already passed to another worker."""
+        now = self._clock()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND worker = ? AND state = 'leased'",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return None
+            if error is None:
+                state = "done"
+            else:
+                state = "failed" if row[0] >= self.max_attempts else "queued"
+            db.execute(
+                "UPDATE jobs SET state = ?, error = ?, lease_until = NULL, updated = ? "
+                "WHERE id = ?",
+                (state, error, now, job_id),
+            )
+        return state
+
+    def release(self, job_id: int, worker: str) -> None:
+        """Hand back a job `worker` never started (a cancelled run), without
+        counting the attempt."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = 'queued', lease_until = NULL, "
+                "attempts = attempts - 1, updated = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (self._clock(), job_id, worker),
+            )
+
+    def counts(self) -> dict[str, int]:
+        """Jobs per state."""
+        with self._transaction() as db:
+            found = dict(db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return {state: found.get(state, 0) for state in STATES}
+
+    def next_expiry_s(self) -> float | None:
+        """Seconds until the earliest live lease runs out (None: no job is
+        leased)."""
+        with self._transaction() as db:
+            (until,) = db.execute(
+                "SELECT MIN(lease_until) FROM jobs WHERE state = 'leased'"
+            ).fetchone()
+        return None if until is None else max(until - self._clock(), 0.0)
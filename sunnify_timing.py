@@ -0,0 +1,125 @@
+"""Per-track stage timings for download runs.
+
+A slow run is spent somewhere: Spotify enumeration, per-track cover
+enrichment, the YouTube search, the transfer, ffmpeg, the preview check or
+tagging. The engine times each stage of a track as a span on a TrackTiming
+(monotonic clock, byte counts where the stage moves bytes) and reports it as
+a "track_timing" event when the track settles; StageStats folds those into
+per-stage percentiles for the run summary.
+
+Spans nest: a span's time excludes what was recorded inside it (ffmpeg's
+time, reported by yt-dlp's postprocessor hook while a download span is
+open, isn't counted as download time too), so a track's stages add up to
+at most its wall time.
+
+Stdlib only.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import threading
+import time
+from collections.abc import Callable, Iterator
+
+# the stages the engine records, in the order a track goes through them
+STAGES = ("enumerate", "enrich", "search", "download", "ffmpeg", "verify", "tag")
+
+
+class TrackTiming:
+    """One track's stage spans. Not thread-safe: each track is timed on
+    the worker thread downloading it."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._started = clock()
+        self._open: list[float] = []  # per open span: ms recorded inside it
+        self.stages: dict[str, dict] = {}
+        self.outcome = "failed"
+
+    @contextlib.contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the block as `stage`, less whatever is recorded inside it."""
+        started = self._clock()
+        self._open.append(0.0)
+        try:
+            yield
+        finally:
+            nested = self._open.pop()
+            elapsed = (self._clock() - started) * 1000
+            self._record(stage, elapsed - nested)
+            if self._open:
+                self._open[-1] += elapsed
+
+    def add(self, stage: str, ms: float) -> None:
+        """Record `ms` measured elsewhere (a yt-dlp hook) as `stage`."""
+        self._record(stage, ms)
+        if self._open:
+            self._open[-1] += ms
+
+    def add_bytes(self, stage: str, count: int) -> None:
+        entry = self.stages.setdefault(stage, {"ms": 0.0, "count": 0})
+        entry["bytes"] = entry.get("bytes", 0) + count
+
+    def _record(self, stage: str, ms: float) -> None:
+        entry = self.stages.setdefault(stage, {"ms": 0.0, "count": 0})
+        entry["ms"] += max(ms, 0.0)
+        entry["count"] += 1
+
+    def snapshot(self) -> dict:
+        """{"outcome", "total_ms", "stages": {stage: {"ms", "count"[, "bytes"]}}}.
+        A stage that only counted bytes has a count of 0."""
+        return {
+            "outcome": self.outcome,
+            "total_ms": round((self._clock() - self._started) * 1000),
+            "stages": {
+                stage: {**entry, "ms": round(entry["ms"])} for stage, entry in self.stages.items()
+            },
+        }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """The nearest-rank `q`th percentile (0-100) of non-empty `values`."""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class StageStats:
+    """Stage times across a run's tracks. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ms: dict[str, list[float]] = {}
+        self._bytes: dict[str, int] = {}
+
+    def add(self, stage: str, ms: float, count: int = 0) -> None:
+        with self._lock:
+            self._ms.setdefault(stage, []).append(ms)
+            if count:
+                self._bytes[stage] = self._bytes.get(stage, 0) + count
+
+    def add_track(self, snapshot: dict) -> None:
+        """Fold in a TrackTiming.snapshot(); a stage counts once per track."""
+        for stage, entry in snapshot["stages"].items():
+            if entry["count"]:
+                self.add(stage, entry["ms"], entry.get("bytes", 0))
+
+    def summary(self) -> dict:
+        """Per stage, in STAGES order: how many tracks went through it, the
+        p50/p95 and total time, and the bytes moved where counted."""
+        with self._lock:
+            stages = sorted(self._ms, key=lambda s: (STAGES + (s,)).index(s))
+            out = {}
+            for stage in stages:
+                values = self._ms[stage]
+                out[stage] = {
+                    "count": len(values),
+                    "p50_ms": round(percentile(values, 50)),
+                    "p95_ms": round(percentile(values, 95)),
+                    "total_ms": round(sum(values)),
+                }
+                if stage in self._bytes:
+                    out[stage]["bytes"] = self._bytes[stage]
+            return out
@@ -0,0 +1,290 @@
+"""`sunnify verify`: an integrity scan of a download folder or a whole library.
+
+`status` and the resume manifest only ask whether a file exists. verify opens
+each audio file's container headers with mutagen (no decoding) and reports
+the ones that can't be trusted:
+
+    empty              zero bytes
+    unreadable         mutagen can't parse the container
+    no_audio           it parses but has no duration
+    truncated          plays shorter than the manifest's Spotify duration
+    duration_mismatch  plays longer than it (likely not the same recording)
+    no_tags            no title tag (mp3/m4a/flac, the containers sunnify tags)
+    no_cover           no embedded cover art (same containers)
+    partial            an unfinished ".partial." download a killed run left
+
+Files are checked on a process pool: mutagen's parsing is pure Python, so
+threads would serialize on the GIL. Results are cached at the scan root in
+.sunnify-verify.json, keyed by relative path with the file's mtime and size
+and the duration it was checked against; a file whose stat (and expected
+duration) hasn't changed reuses its last result without being opened, so a
+re-scan of an unchanged library costs one stat per file.
+
+find_broken() joins a scan with the resume manifests for `sunnify repair`:
+the recorded tracks whose file is missing or whose audio can't be trusted
+(REPAIRABLE problems; missing tags alone don't warrant a re-download).
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import json
+import os
+
+from sunnify_core import MANIFEST_FILENAME, SUPPORTED_FORMATS
+
+CACHE_FILENAME = ".sunnify-verify.json"
+_CACHE_VERSION = 1
+AUDIO_EXTS = tuple(f".{spec['ext']}" for spec in SUPPORTED_FORMATS.values())
+# the engine's widest match tolerance: a download may legitimately differ
+# from the Spotify duration by this much
+DURATION_TOLERANCE_S = 30
+# below this many files to open, a process pool costs more than it saves
+_INLINE_MAX = 32
+# files per pool task; amortizes pickling and scheduling per call
+_CHUNK = 64
+# problems a fresh download fixes; the rest (tags, cover) it doesn't need
+REPAIRABLE = ("missing", "empty", "unreadable", "no_audio", "truncated", "duration_mismatch")
+
+
+def manifest_records(folder: str) -> list[dict]:
+    """`folder`'s resume manifest records, in the order they were written
+    (unparseable lines and records without a file name skipped)."""
+    records = []
+    with (
+        contextlib.suppress(OSError),
+        open(os.path.join(folder, MANIFEST_FILENAME), encoding="utf-8") as fh,
+    ):
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("file"):
+                records.append(record)
+    return records
+
+
+def _manifest_durations(folder: str) -> dict[str, float | None]:
+    """basename -> Spotify duration (s) from `folder`'s resume manifest.
+    Records from before durations were recorded map to None."""
+    durations: dict[str, float | None] = {}
+    for record in manifest_records(folder):
+        ms = record.get("duration_ms")
+        durations[record["file"]] = ms / 1000 if ms else None
+    return durations
+
+
+def discover(root: str) -> list[tuple[str, float | None]]:
+    """Every audio file (and leftover partial) under `root`, as
+    (path relative to root, expected duration in seconds or None)."""
+    found = []
+    for folder, dirs, names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        durations = _manifest_durations(folder)
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            if ".partial." in name or name.lower().endswith(AUDIO_EXTS):
+                rel = os.path.relpath(os.path.join(folder, name), root)
+                found.append((rel, durations.get(name)))
+    return found
+
+
+def _tag_problems(audio) -> list[str]:
+    """no_tags / no_cover for the containers sunnify writes tags into."""
+    tags = audio.tags
+    kind = type(audio).__name__
+    if kind in ("MP3", "EasyMP3"):
+        title = tags is not None and "TIT2" in tags
+        cover = tags is not None and bool(tags.getall("APIC"))
+    elif kind == "MP4":
+        title = tags is not None and "\xa9nam" in tags
+        cover = tags is not None and "covr" in tags
+    elif kind == "FLAC":
+        title = tags is not None and "title" in tags
+        cover = bool(audio.pictures)
+    else:  # opus/wav: sunnify never tags them, so nothing is missing
+        return []
+    problems = []
+    if not title:
+        problems.append("no_tags")
+    if not cover:
+        problems.append("no_cover")
+    return problems
+
+
+def check_file(path: str, expected_s: float | None = None) -> dict:
+    """Check one file: {"duration_s": float | None, "problems": [...]}.
+
+    Module-level (and mutagen imported here) so pool workers can run it.
+    """
+    if ".partial." in os.path.basename(path):
+        return {"duration_s": None, "problems": ["partial"]}
+    import mutagen
+
+    try:
+        if os.path.getsize(path) == 0:
+            return {"duration_s": None, "problems": ["empty"]}
+        audio = mutagen.File(path)
+    except (mutagen.MutagenError, OSError):
+        return {"duration_s": None, "problems": ["unreadable"]}
+    if audio is None:
+        return {"duration_s": None, "problems": ["unreadable"]}
+    length = getattr(audio.info, "length", None) or 0
+    if length <= 0:
+        return {"duration_s": None, "problems": ["no_audio"]}
+    problems = []
+    if expected_s:
+        if length + DURATION_TOLERANCE_S < expected_s:
+            problems.append("truncated")
+        elif length > expected_s + DURATION_TOLERANCE_S:
+            problems.append("duration_mismatch")
+    problems += _tag_problems(audio)
+    return {"duration_s": round(length, 1), "problems": problems}
+
+
+def _check_batch(root: str, batch: list[tuple[str, float | None]]) -> list[dict]:
+    return [check_file(os.path.join(root, rel), expected) for rel, expected in batch]
+
+
+class VerifyCache:
+    """rel path -> {"mtime_ns", "size", "expected_s", "result"} at the scan root."""
+
+    def __init__(self, root: str):
+        self.path = os.path.join(root, CACHE_FILENAME)
+        self.entries: dict[str, dict] = {}
+        with contextlib.suppress(OSError, ValueError), open(self.path, encoding="utf-8") as fh:
+            data = json.load(fh)
+            if data.get("version") == _CACHE_VERSION:
+                self.entries = data.get("files") or {}
+
+    def lookup(self, rel: str, st: os.stat_result, expected_s) -> dict | None:
+        entry = self.entries.get(rel)
+        if (
+            entry
+            and entry.get("mtime_ns") == st.st_mtime_ns
+            and entry.get("size") == st.st_size
+            and entry.get("expected_s") == expected_s
+        ):
+            return entry["result"]
+        return None
+
+    def store(self, rel: str, st: os.stat_result, expected_s, result: dict) -> None:
+        self.entries[rel] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "expected_s": expected_s,
+            "result": result,
+        }
+
+    def save(self, keep: set[str]) -> None:
+        """Write the cache (files no longer on disk dropped); a read-only
+        library just goes uncached."""
+        files = {rel: e for rel, e in self.entries.items() if rel in keep}
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"version": _CACHE_VERSION, "files": files}, fh)
+            os.replace(tmp, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+
+def scan(root: str, on_result, *, workers: int | None = None, use_cache: bool = True) -> dict:
+    """Verify every audio file under `root`.
+
+    on_result(rel, expected_s, result, cached) is called once per file, on
+    the calling thread. Returns counts: files, ok, problems, cached and
+    by_problem (problem name -> files).
+    """
+    cache = VerifyCache(root) if use_cache else None
+    summary = {"files": 0, "ok": 0, "problems": 0, "cached": 0, "by_problem": {}}
+
+    def _report(rel, expected, result, cached):
+        summary["files"] += 1
+        summary["cached"] += int(cached)
+        if result["problems"]:
+            summary["problems"] += 1
+            for name in result["problems"]:
+                summary["by_problem"][name] = summary["by_problem"].get(name, 0) + 1
+        else:
+            summary["ok"] += 1
+        on_result(rel, expected, result, cached)
+
+    todo: list[tuple[str, float | None, os.stat_result]] = []
+    seen: set[str] = set()
+    for rel, expected in discover(root):
+        try:
+            st = os.stat(os.path.join(root, rel))
+        except OSError:
+            continue
+        seen.add(rel)
+        hit = cache.lookup(rel, st, expected) if cache else None
+        if hit is not None:
+            _report(rel, expected, hit, True)
+        else:
+            todo.append((rel, expected, st))
+
+    batches = [
+        [(rel, expected) for rel, expected, _st in todo[i : i + _CHUNK]]
+        for i in range(0, len(todo), _CHUNK)
+    ]
+    if len(todo) <= _INLINE_MAX or workers == 1:
+        results = (_check_batch(root, batch) for batch in batches)
+        pool = None
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_check_batch, [root] * len(batches), batches)
+    try:
+        done = 0
+        for batch_results in results:
+            for result in batch_results:
+                rel, expected, st = todo[done]
+                done += 1
+                if cache:
+                    cache.store(rel, st, expected, result)
+                _report(rel, expected, result, False)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if cache:
+            cache.save(seen)
+    return summary
+
+
+def find_broken(
+    root: str, *, workers: int | None = None, use_cache: bool = True
+) -> tuple[int, list[dict]]:
+    """The manifest-recorded tracks under `root` that need downloading again.
+
+    Scans `root` (cache and pool as scan()), then walks each folder's
+    manifest, latest record per track id, and keeps the tracks whose file
+    is missing or has a REPAIRABLE problem. Returns (tracks checked,
+    [{"folder", "record", "problems"}]).
+    """
+    results: dict[str, dict] = {}
+    scan(
+        root,
+        lambda rel, _expected, result, _cached: results.__setitem__(rel, result),
+        workers=workers,
+        use_cache=use_cache,
+    )
+    checked = 0
+    broken = []
+    for folder, dirs, _names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        latest = {r["id"]: r for r in manifest_records(folder) if r.get("id")}
+        for record in latest.values():
+            checked += 1
+            path = os.path.join(folder, record["file"])
+            result = results.get(os.path.relpath(path, root))
+            if result is None:
+                problems = [] if os.path.exists(path) else ["missing"]
+            else:
+                problems = [p for p in result["problems"] if p in REPAIRABLE]
+            if problems:
+                broken.append({"folder": folder, "record": record, "problems": problems})
+    return checked, broken
@@ -34,6 +34,15 @@ def qapp():
     # mid-test cleanup can race with widget destruction.
 
 
+# The search prefetch stage would run real yt-dlp searches behind the stubbed
+# download_track_audio the scrape tests use; tests that cover it turn it back on.
+@pytest.fixture(autouse=True)
+def _no_search_prefetch(monkeypatch):
+    import sunnify_engine
+
+    monkeypatch.setattr(sunnify_engine.DownloadEngine, "PREFETCH_AHEAD", 0)
+
+
 # Sample Spotify embed page HTML with __NEXT_DATA__
 SAMPLE_EMBED_HTML = """
 <!DOCTYPE html>
@@ -266,6 +275,17 @@ def sample_embed_html_flat():
     return SAMPLE_EMBED_HTML_FLAT
 
 
+# One MPEG-1 layer III frame of silence (128 kbps, 44.1 kHz, 1152 samples):
+# repeated, it is a stand-in download mutagen can read a duration from.
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+
+
+@pytest.fixture
+def silent_mp3():
+    """Return a function building `seconds` of silent mp3 bytes."""
+    return lambda seconds=1: SILENT_MP3_FRAME * round(seconds * 44100 / 1152)
+
+
 @pytest.fixture
 def mock_session(mocker):
     """Create a mock requests session."""
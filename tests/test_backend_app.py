@@ -4,6 +4,7 @@ from __future__ import annotations
 
 # Check if Flask is installed
 import importlib.util
+import json
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -109,6 +110,8 @@ class TestScrapePlaylistEndpoint:
     @patch("app.get_playlist_client")
     def test_valid_playlist_url(self, mock_get_client, client):
         """Valid playlist URL should return track data."""
+        from spotifydown_api import TrackInfo
+
         # Create mock client
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
@@ -121,13 +124,16 @@ class TestScrapePlaylistEndpoint:
         mock_client.get_playlist_metadata.return_value = mock_metadata
 
         # Mock track iteration
-        mock_track = MagicMock()
-        mock_track.spotify_id = "abc123"
-        mock_track.title = "Test Song"
-        mock_track.artists = "Test Artist"
-        mock_track.album = "Test Album"
-        mock_track.cover_url = None
-        mock_track.release_date = "2024-01-01"
+        mock_track = TrackInfo(
+            id="abc123",
+            title="Test Song",
+            artists="Test Artist",
+            album="Test Album",
+            release_date="2024-01-01",
+            cover_url=None,
+            duration_ms=180000,
+            preview_url=None,
+        )
         mock_client.iter_playlist_tracks.return_value = [mock_track]
 
         response = client.post(
@@ -142,22 +148,64 @@ class TestScrapePlaylistEndpoint:
         assert data["data"]["playlistName"] == "Test Playlist - Test User"
         assert len(data["data"]["tracks"]) == 1
         assert data["data"]["tracks"][0]["title"] == "Test Song"
+        # no track cover: the playlist's stands in
+        assert data["data"]["tracks"][0]["cover"] == "https://example.com/cover.jpg"
+
+    @patch("app.get_playlist_client")
+    def test_large_playlist_streams_every_track_in_order(self, mock_get_client, client):
+        from spotifydown_api import PlaylistInfo, TrackInfo
+
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.get_playlist_metadata.return_value = PlaylistInfo(
+            name='Big "Mix"', owner=None, description=None, cover_url=None
+        )
+        mock_client.iter_playlist_tracks.return_value = [
+            TrackInfo(
+                id=f"t{n}",
+                title=f"Song {n}",
+                artists="Same Artist",
+                album="Same Album",
+                release_date=None,
+                cover_url=None,
+                duration_ms=None,
+                preview_url=None,
+            )
+            for n in range(120)
+        ]
+
+        response = client.post(
+            "/api/scrape-playlist",
+            json={"playlistUrl": "https://open.spotify.com/playlist/abc123"},
+        )
+
+        assert response.mimetype == "application/json"
+        data = json.loads(response.get_data(as_text=True))
+        assert data["event"] == "complete"
+        assert data["data"]["playlistName"] == 'Big "Mix" - Unknown'
+        assert [t["id"] for t in data["data"]["tracks"]] == [f"t{n}" for n in range(120)]
+        assert data["data"]["tracks"][-1]["album"] == "Same Album"
 
     @patch("app.SpotifyEmbedAPI")
     def test_valid_track_url(self, mock_api_class, client):
         """Valid track URL should return single track data."""
+        from spotifydown_api import TrackInfo
+
         # Create mock API instance
         mock_api = MagicMock()
         mock_api_class.return_value = mock_api
 
         # Mock track data
-        mock_track = MagicMock()
-        mock_track.spotify_id = "xyz789"
-        mock_track.title = "Single Track"
-        mock_track.artists = "Solo Artist"
-        mock_track.album = "Solo Album"
-        mock_track.cover_url = "https://example.com/track-cover.jpg"
-        mock_track.release_date = "2024-06-15"
+        mock_track = TrackInfo(
+            id="xyz789",
+            title="Single Track",
+            artists="Solo Artist",
+            album="Solo Album",
+            release_date="2024-06-15",
+            cover_url="https://example.com/track-cover.jpg",
+            duration_ms=200000,
+            preview_url=None,
+        )
         mock_api.get_track.return_value = mock_track
 
         response = client.post(
@@ -173,6 +221,70 @@ class TestScrapePlaylistEndpoint:
         assert data["data"]["tracks"][0]["title"] == "Single Track"
 
 
+class TestScrapeBatchEndpoint:
+    """Tests for /api/scrape-batch endpoint."""
+
+    def test_missing_urls_returns_400(self, client):
+        response = client.post("/api/scrape-batch", json={})
+        assert response.status_code == 400
+        assert response.get_json()["event"] == "error"
+
+    def test_too_many_urls_returns_400(self, client):
+        from app import MAX_BATCH_URLS
+
+        urls = ["https://open.spotify.com/track/x"] * (MAX_BATCH_URLS + 1)
+        response = client.post("/api/scrape-batch", json={"urls": urls})
+        assert response.status_code == 400
+
+    @patch("app.get_playlist_client")
+    def test_streams_one_line_per_url(self, mock_get_client, client):
+        from spotifydown_api import PlaylistInfo, TrackInfo
+
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.get_playlist_metadata.return_value = PlaylistInfo(
+            name="Mix", owner="Me", description=None, cover_url="https://example.com/c.jpg"
+        )
+        track = TrackInfo(
+            id="t1",
+            title="Song",
+            artists="Artist",
+            album=None,
+            release_date=None,
+            cover_url=None,
+            duration_ms=None,
+            preview_url=None,
+            raw={},
+        )
+        mock_client.iter_playlist_tracks.return_value = [track]
+
+        response = client.post(
+            "/api/scrape-batch",
+            json={
+                "urls": [
+                    "https://open.spotify.com/playlist/abc123",
+                    "not a url",
+                    "https://open.spotify.com/playlist/abc123",
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [line["event"] for line in lines] == ["result", "error", "result", "complete"]
+        assert lines[0]["data"]["playlistName"] == "Mix - Me"
+        assert lines[0]["data"]["tracks"][0]["cover"] == "https://example.com/c.jpg"
+        assert lines[1]["data"] == {
+            "index": 1,
+            "url": "not a url",
+            "message": "Invalid Spotify URL",
+        }
+        assert lines[2]["data"]["tracks"] == [] and lines[2]["data"]["duplicates"] == ["t1"]
+        assert lines[3]["data"] == {"urls": 3, "resolved": 2, "failed": 1}
+        assert mock_client.iter_playlist_tracks.call_count == 1
+
+
 class TestCORS:
     """Tests for CORS configuration."""
 
@@ -191,3 +303,23 @@ class TestCORS:
         )
         # Should not error
         assert response.status_code in (200, 204)
+
+
+class TestMetricsEndpoint:
+    """Tests for /metrics."""
+
+    def test_metrics_are_openmetrics_text(self, client):
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type.startswith("application/openmetrics-text")
+        assert response.get_data(as_text=True).endswith("# EOF\n")
+
+    def test_request_latency_is_recorded_per_route(self, client):
+        import sunnify_metrics
+
+        latency = sunnify_metrics.REQUEST_SECONDS
+        labels = {"route": "/api/health", "method": "GET", "status": "200"}
+        before = (latency.value(**labels) or ([0], 0.0))[0][-1]
+        client.get("/api/health")
+        assert latency.value(**labels)[0][-1] == before + 1
+        assert 'route="/api/health"' in client.get("/metrics").get_data(as_text=True)
@@ -18,7 +18,7 @@ class TestGetFfmpegPath:
     def test_bundled_ffmpeg_macos(self, tmp_path):
         """Test bundled FFmpeg detection on macOS."""
         # Import the function
-        from Spotify_Downloader import get_ffmpeg_path
+        from sunnify_core import get_ffmpeg_path
 
         # Mock frozen attribute for PyInstaller
         with (
@@ -37,7 +37,7 @@ class TestGetFfmpegPath:
 
     def test_bundled_ffmpeg_windows(self, tmp_path):
         """Test bundled FFmpeg detection on Windows."""
-        from Spotify_Downloader import get_ffmpeg_path
+        from sunnify_core import get_ffmpeg_path
 
         with (
             patch.object(sys, "frozen", True, create=True),
@@ -59,7 +59,7 @@ class TestGetFfmpegPath:
     )
     def test_homebrew_ffmpeg(self, tmp_path):
         """Test homebrew FFmpeg detection."""
-        from Spotify_Downloader import get_ffmpeg_path
+        from sunnify_core import get_ffmpeg_path
 
         # Mock not frozen (running from source)
         with (
@@ -83,7 +83,7 @@ class TestGetFfmpegPath:
     )
     def test_system_ffmpeg_linux(self, tmp_path):
         """Test system FFmpeg detection on Linux."""
-        from Spotify_Downloader import get_ffmpeg_path
+        from sunnify_core import get_ffmpeg_path
 
         with (
             patch.object(sys, "frozen", False, create=True),
@@ -101,7 +101,7 @@ class TestGetFfmpegPath:
 
     def test_ffmpeg_in_path(self):
         """Test FFmpeg detection via PATH."""
-        from Spotify_Downloader import get_ffmpeg_path
+        from sunnify_core import get_ffmpeg_path
 
         with (
             patch.object(sys, "frozen", False, create=True),
@@ -113,7 +113,7 @@ class TestGetFfmpegPath:
 
     def test_ffmpeg_not_found(self):
         """Test when FFmpeg is not found anywhere."""
-        from Spotify_Downloader import get_ffmpeg_path
+        from sunnify_core import get_ffmpeg_path
 
         with (
             patch.object(sys, "frozen", False, create=True),
@@ -292,6 +292,19 @@ class TestResumeManifest:
 
         assert self._scraper()._load_manifest(folder) == {"present"}
 
+    def test_record_keeps_the_spotify_duration(self, tmp_path):
+        """`sunnify verify` checks lengths against the recorded duration."""
+        import json
+
+        writer = self._scraper()
+        writer._load_manifest(str(tmp_path))
+        writer._record_in_manifest("id_a", str(tmp_path / "a.mp3"), 201_000)
+        writer._record_in_manifest("id_b", str(tmp_path / "b.mp3"))
+        with open(tmp_path / ".sunnify-manifest.jsonl", encoding="utf-8") as fh:
+            records = [json.loads(line) for line in fh]
+        assert records[0]["duration_ms"] == 201_000
+        assert "duration_ms" not in records[1]
+
     def test_record_without_manifest_path_is_noop(self, tmp_path):
         """Recording before a manifest is armed must not raise or write."""
         scraper = self._scraper()
@@ -309,8 +322,8 @@ class TestDownloadTrackAudioOpts:
 
         scraper = MusicScraper()
         with (
-            patch("Spotify_Downloader.get_ffmpeg_path", return_value="/usr/bin"),
-            patch("Spotify_Downloader.YoutubeDL") as mock_ydl,
+            patch("sunnify_engine.get_ffmpeg_path", return_value="/usr/bin"),
+            patch("sunnify_engine.YoutubeDL") as mock_ydl,
         ):
             mock_ydl.return_value.__enter__ = MagicMock(return_value=mock_ydl)
             mock_ydl.return_value.__exit__ = MagicMock(return_value=False)
@@ -327,8 +340,8 @@ class TestDownloadTrackAudioOpts:
 
         scraper = MusicScraper()
         with (
-            patch("Spotify_Downloader.get_ffmpeg_path", return_value="/usr/bin"),
-            patch("Spotify_Downloader.YoutubeDL") as mock_ydl,
+            patch("sunnify_engine.get_ffmpeg_path", return_value="/usr/bin"),
+            patch("sunnify_engine.YoutubeDL") as mock_ydl,
         ):
             mock_ydl.return_value.__enter__ = MagicMock(return_value=mock_ydl)
             mock_ydl.return_value.__exit__ = MagicMock(return_value=False)
@@ -343,8 +356,8 @@ class TestDownloadTrackAudioOpts:
 
         scraper = MusicScraper()
         with (
-            patch("Spotify_Downloader.get_ffmpeg_path", return_value="/usr/bin"),
-            patch("Spotify_Downloader.YoutubeDL") as mock_ydl,
+            patch("sunnify_engine.get_ffmpeg_path", return_value="/usr/bin"),
+            patch("sunnify_engine.YoutubeDL") as mock_ydl,
         ):
             mock_ydl.return_value.__enter__ = MagicMock(return_value=mock_ydl)
             mock_ydl.return_value.__exit__ = MagicMock(return_value=False)
@@ -370,7 +383,7 @@ class TestYoutubeMatchSelection:
 
     def _patched(self, entries):
         candidates = {"entries": entries}
-        ctx = patch("Spotify_Downloader.YoutubeDL")
+        ctx = patch("sunnify_engine.YoutubeDL")
         mock_ydl = ctx.start()
         mock_ydl.return_value.__enter__ = MagicMock(return_value=mock_ydl)
         mock_ydl.return_value.__exit__ = MagicMock(return_value=False)
@@ -712,21 +725,21 @@ class TestDetectImageMime:
     """
 
     def test_jpeg_magic(self):
-        from Spotify_Downloader import _detect_image_mime
+        from sunnify_engine import _detect_image_mime
 
         # JPEG: every variant starts with FF D8 FF (JFIF / Exif / SOI markers)
         assert _detect_image_mime(b"\xff\xd8\xff\xe0\x00\x10JFIF") == "image/jpeg"
         assert _detect_image_mime(b"\xff\xd8\xff\xdb") == "image/jpeg"
 
     def test_png_magic(self):
-        from Spotify_Downloader import _detect_image_mime
+        from sunnify_engine import _detect_image_mime
 
         # PNG: 8-byte signature per W3C spec section 5.2
         png = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
         assert _detect_image_mime(png) == "image/png"
 
     def test_unknown_falls_back_to_jpeg(self):
-        from Spotify_Downloader import _detect_image_mime
+        from sunnify_engine import _detect_image_mime
 
         # Anything we can't identify (a future webp/avif response, say) is
         # claimed as jpeg so we still hand the writer *something* coherent.
@@ -759,7 +772,7 @@ class TestMp3MetadataIsV23:
         empty.save(path)
 
     def test_writes_id3v23_header(self, tmp_path):
-        from Spotify_Downloader import _write_metadata_mp3
+        from sunnify_engine import _write_metadata_mp3
 
         path = str(tmp_path / "v23.mp3")
         self._minimal_mp3(path)
@@ -779,7 +792,7 @@ class TestMp3MetadataIsV23:
     def test_apic_frame_v23_encoding(self, tmp_path):
         from mutagen.id3 import ID3
 
-        from Spotify_Downloader import _write_metadata_mp3
+        from sunnify_engine import _write_metadata_mp3
 
         path = str(tmp_path / "apic.mp3")
         self._minimal_mp3(path)
@@ -815,7 +828,7 @@ class TestMp3MetadataIsV23:
         """Non-ASCII titles/artists must survive the v2.3 downgrade."""
         from mutagen.easyid3 import EasyID3
 
-        from Spotify_Downloader import _write_metadata_mp3
+        from sunnify_engine import _write_metadata_mp3
 
         path = str(tmp_path / "unicode.mp3")
         self._minimal_mp3(path)
@@ -841,7 +854,7 @@ class TestMp3MetadataIsV23:
         """A PNG-magic cover must produce APIC mime=image/png, not jpeg."""
         from mutagen.id3 import ID3
 
-        from Spotify_Downloader import _write_metadata_mp3
+        from sunnify_engine import _write_metadata_mp3
 
         path = str(tmp_path / "png.mp3")
         self._minimal_mp3(path)
@@ -890,7 +903,7 @@ class TestFlacMetadata:
     def test_single_write_embeds_one_cover_and_tags(self, tmp_path):
         from mutagen.flac import FLAC
 
-        from Spotify_Downloader import _write_metadata_flac
+        from sunnify_engine import _write_metadata_flac
 
         path = str(tmp_path / "one.flac")
         self._minimal_flac(path)
@@ -918,7 +931,7 @@ class TestFlacMetadata:
     def test_retag_stays_at_one_cover(self, tmp_path):
         from mutagen.flac import FLAC
 
-        from Spotify_Downloader import _write_metadata_flac
+        from sunnify_engine import _write_metadata_flac
 
         path = str(tmp_path / "twice.flac")
         self._minimal_flac(path)
@@ -938,7 +951,7 @@ class TestFlacMetadata:
     def test_no_cover_writes_tags_without_picture(self, tmp_path):
         from mutagen.flac import FLAC
 
-        from Spotify_Downloader import _write_metadata_flac
+        from sunnify_engine import _write_metadata_flac
 
         path = str(tmp_path / "nocover.flac")
         self._minimal_flac(path)
@@ -976,7 +989,7 @@ class TestWritingMetaTagsThread:
         # Mock the signal
         thread.tags_success = MagicMock()
 
-        with patch("Spotify_Downloader.EasyID3") as mock_easy:
+        with patch("sunnify_engine.EasyID3") as mock_easy:
             mock_audio = MagicMock()
             mock_easy.return_value = mock_audio
             thread.run()
@@ -1007,16 +1020,19 @@ class TestWritingMetaTagsThread:
         mock_response.content = b"\x89PNG\r\n\x1a\n"  # Fake image data
 
         with (
-            patch("Spotify_Downloader.EasyID3") as mock_easy,
-            patch("Spotify_Downloader.ID3") as mock_id3,
-            patch("Spotify_Downloader.requests.get", return_value=mock_response) as mock_get,
+            patch("sunnify_engine.EasyID3") as mock_easy,
+            patch("sunnify_engine.ID3") as mock_id3,
+            patch("sunnify_http.get", return_value=mock_response) as mock_get,
         ):
             mock_easy.return_value = MagicMock()
             mock_id3.return_value = MagicMock()
             thread.run()
 
-            # Verify synchronous requests.get was called (not DownloadCover QThread)
-            mock_get.assert_called_once_with("https://example.com/cover.jpg", timeout=15)
+            # Verify a synchronous cover fetch (not DownloadCover QThread), on the
+            # shared scheduler's cover traffic class
+            mock_get.assert_called_once_with(
+                "https://example.com/cover.jpg", traffic="cover", timeout=15
+            )
             # Verify APIC frame was added via id3.add(APIC(...)) and the tag
             # was saved as v2.3 for max player compatibility (closes #46)
             mock_id3.return_value.add.assert_called_once()
@@ -1040,9 +1056,9 @@ class TestWritingMetaTagsThread:
         thread.tags_success = MagicMock()
 
         with (
-            patch("Spotify_Downloader.EasyID3") as mock_easy,
+            patch("sunnify_engine.EasyID3") as mock_easy,
             patch(
-                "Spotify_Downloader.requests.get",
+                "sunnify_http.get",
                 side_effect=requests.RequestException("timeout"),
             ),
         ):
@@ -1095,6 +1111,19 @@ class TestScraperThread:
         thread = ScraperThread("https://open.spotify.com/playlist/abc123", folder)
         assert thread.music_folder == folder
 
+    def test_profiled_run_writes_its_profile_to_the_log_folder(self, tmp_path):
+        """The debug toggle wraps the run in the sampling profiler and drops
+        pstats + collapsed stacks next to the logs."""
+        from Spotify_Downloader import ScraperThread
+
+        thread = ScraperThread("https://open.spotify.com/track/abc", str(tmp_path), profile=True)
+        thread.scraper.download = MagicMock()
+        with patch("Spotify_Downloader._log_dir", return_value=str(tmp_path / "logs")):
+            thread.run()
+        thread.scraper.download.assert_called_once()
+        written = sorted(os.listdir(tmp_path / "logs"))
+        assert [os.path.splitext(name)[1] for name in written] == [".collapsed", ".pstats"]
+
 
 class TestParallelDownloads:
     """Tests for parallel track download behavior (issue #34)."""
@@ -1638,6 +1667,124 @@ class TestParallelDownloads:
         assert emitted_values[-1] == 100
 
 
+class TestScrapeMany:
+    """scrape_many: many links, one pool, global de-duplication."""
+
+    def _scraper(self):
+        from Spotify_Downloader import MusicScraper
+
+        scraper = MusicScraper()
+        for sig in (
+            "song_meta",
+            "add_song_meta",
+            "dlprogress_signal",
+            "Resetprogress_signal",
+            "PlaylistID",
+            "song_Album",
+            "PlaylistCompleted",
+            "error_signal",
+            "count_updated",
+            "resume_skipped",
+            "source_progress",
+        ):
+            setattr(scraper, sig, MagicMock())
+        return scraper
+
+    def _track(self, tid):
+        from spotifydown_api import TrackInfo
+
+        return TrackInfo(
+            id=tid,
+            title=f"Song {tid}",
+            artists="Artist",
+            album=None,
+            release_date=None,
+            cover_url="https://example.com/c.jpg",
+            duration_ms=None,
+            preview_url=None,
+            raw={},
+        )
+
+    def _api(self, playlists):
+        api = MagicMock()
+
+        def meta(pid, **_):
+            m = MagicMock()
+            m.name, m.owner, m.cover_url, m.track_count = pid, "O", None, None
+            return m
+
+        api.get_playlist_metadata.side_effect = meta
+        api.iter_playlist_tracks.side_effect = lambda pid, skip_ids, **_: iter(
+            [self._track(t) for t in playlists[pid] if t not in skip_ids]
+        )
+        api.get_track.side_effect = self._track
+        return api
+
+    def test_one_pool_dedups_across_links_and_reports_per_source(self, tmp_path):
+        import threading
+
+        from Spotify_Downloader import MusicScraper
+
+        scraper = self._scraper()
+        scraper.ensure_spotifydown_api = MagicMock(
+            return_value=self._api({"AAAA": ["a1", "a2"], "BBBB": ["a2", "b1", "b2"]})
+        )
+        workers: set[str] = set()
+
+        def fake_download(_q, dest, **_kw):
+            workers.add(threading.current_thread().name)
+            open(dest, "wb").close()
+            return dest
+
+        scraper.download_track_audio = fake_download
+        scraper.scrape_many(
+            [
+                "https://open.spotify.com/playlist/AAAA",
+                "https://open.spotify.com/album/BBBB",
+                "https://open.spotify.com/track/t1",
+                "not a link",
+            ],
+            str(tmp_path),
+        )
+
+        # 2 + 2 (a2 deduped) + 1 track, all on one pool of MAX_WORKERS
+        assert scraper.add_song_meta.emit.call_count == 5
+        assert len(workers) <= MusicScraper.MAX_WORKERS
+        assert threading.current_thread().name not in workers
+        sources = {m.args[0]["source"] for m in scraper.add_song_meta.emit.call_args_list}
+        assert "https://open.spotify.com/album/BBBB" in sources
+        assert (tmp_path / "Song t1 - Artist.mp3").exists()
+
+        records = [c.args[0] for c in scraper.source_progress.emit.call_args_list]
+        started = {r["url"]: r for r in records if r["phase"] == "started"}
+        done = {r["url"]: r for r in records if r["phase"] == "done"}
+        assert started["https://open.spotify.com/album/BBBB"]["duplicates"] == 1
+        assert done["https://open.spotify.com/album/BBBB"]["landed"] == 2
+        assert done["not a link"]["error"]
+        scraper.PlaylistCompleted.emit.assert_called_with("Download Complete!")
+
+    def test_each_playlist_folder_gets_its_own_manifest(self, tmp_path):
+        scraper = self._scraper()
+        scraper.ensure_spotifydown_api = MagicMock(
+            return_value=self._api({"AAAA": ["a1", "a2"], "BBBB": ["b1", "b2"]})
+        )
+        scraper.download_track_audio = lambda _q, d, **_kw: open(d, "wb").close() or d
+        links = ["https://open.spotify.com/playlist/AAAA", "https://open.spotify.com/playlist/BBBB"]
+        scraper.scrape_many(links, str(tmp_path))
+
+        fresh = self._scraper()
+        assert fresh._load_manifest(str(tmp_path / "AAAA - O")) == {"a1", "a2"}
+        assert fresh._load_manifest(str(tmp_path / "BBBB - O")) == {"b1", "b2"}
+
+        # a second run resumes both folders from their manifests
+        rerun = self._scraper()
+        rerun.ensure_spotifydown_api = scraper.ensure_spotifydown_api
+        rerun.download_track_audio = MagicMock()
+        rerun.scrape_many(links, str(tmp_path))
+        rerun.download_track_audio.assert_not_called()
+        rerun.resume_skipped.emit.assert_called_once_with(4)
+
+
 class TestMainWindow:
     """Tests for MainWindow class (limited - requires QApplication)."""
 
@@ -1952,9 +2099,9 @@ class TestTrackNumberMetadata:
 
         # Mock EasyID3/ID3 so we can inspect what was written without a real mp3
         mock_easy = mocker.MagicMock()
-        mocker.patch("Spotify_Downloader.EasyID3", return_value=mock_easy)
+        mocker.patch("sunnify_engine.EasyID3", return_value=mock_easy)
         mocker.patch(
-            "Spotify_Downloader.requests.get",
+            "sunnify_http.get",
             return_value=mocker.MagicMock(status_code=200, content=b""),
         )
 
@@ -1976,9 +2123,9 @@ class TestTrackNumberMetadata:
         from Spotify_Downloader import WritingMetaTagsThread
 
         mock_easy = mocker.MagicMock()
-        mocker.patch("Spotify_Downloader.EasyID3", return_value=mock_easy)
+        mocker.patch("sunnify_engine.EasyID3", return_value=mock_easy)
         mocker.patch(
-            "Spotify_Downloader.requests.get",
+            "sunnify_http.get",
             return_value=mocker.MagicMock(status_code=200, content=b""),
         )
 
@@ -2388,8 +2535,8 @@ class TestSampleRateOption:
 
         captured = []
         with (
-            patch("Spotify_Downloader.get_ffmpeg_path", return_value="/usr/bin/true"),
-            patch("Spotify_Downloader.YoutubeDL") as ydl,
+            patch("sunnify_engine.get_ffmpeg_path", return_value="/usr/bin/true"),
+            patch("sunnify_engine.YoutubeDL") as ydl,
         ):
             ydl.side_effect = lambda opts: (
                 captured.append(opts)
@@ -2530,6 +2677,29 @@ class TestSettingsDialog:
         dlg._format_cb.setCurrentText("flac")
         assert dlg._sample_rate_cb.isEnabled()
 
+    def test_profile_toggle_is_hidden_until_alt_or_on(self, qapp):
+        """The debug profiler toggle only appears when the dialog is opened
+        with Alt/Option held, or while it's already on; hidden, it leaves
+        the saved value alone."""
+        from PyQt6.QtCore import Qt
+
+        from Spotify_Downloader import QApplication, SettingsDialog
+
+        dlg = SettingsDialog(None, {"format": "mp3", "profile_runs": False})
+        assert dlg._profile_cb is None
+        assert dlg.result_config()["profile_runs"] is False
+
+        with patch.object(
+            QApplication, "keyboardModifiers", return_value=Qt.KeyboardModifier.AltModifier
+        ):
+            dlg = SettingsDialog(None, {"format": "mp3"})
+        dlg._profile_cb.setChecked(True)
+        assert dlg.result_config()["profile_runs"] is True
+
+        dlg = SettingsDialog(None, {"format": "mp3", "profile_runs": True})
+        dlg._profile_cb.setChecked(False)
+        assert dlg.result_config()["profile_runs"] is False
+
 
 class TestLogging:
     """Tests for the per-user logging setup."""
@@ -2565,7 +2735,7 @@ class TestLogging:
         import Spotify_Downloader as S
 
         log_path = str(tmp_path / "sunnify.log")
-        with patch.object(S, "log_file_path", return_value=log_path):
+        with patch("sunnify_core.log_file_path", return_value=log_path):
             try:
                 p1 = S.setup_logging()
                 p2 = S.setup_logging()  # second call must not double-attach
@@ -2600,7 +2770,7 @@ class TestLogging:
         import Spotify_Downloader as S
 
         prev_hook, prev_thook = sys.excepthook, threading.excepthook
-        with patch.object(S, "log_file_path", return_value=str(tmp_path / "sunnify.log")):
+        with patch("sunnify_core.log_file_path", return_value=str(tmp_path / "sunnify.log")):
             try:
                 S.setup_logging()
                 assert sys.excepthook is S._log_excepthook
@@ -2614,7 +2784,7 @@ class TestLogging:
         import Spotify_Downloader as S
 
         prev_hook, prev_thook = sys.excepthook, threading.excepthook
-        with patch.object(S, "log_file_path", return_value=str(tmp_path / "sunnify.log")):
+        with patch("sunnify_core.log_file_path", return_value=str(tmp_path / "sunnify.log")):
             try:
                 S.setup_logging()
                 try:
@@ -2637,7 +2807,7 @@ class TestLogging:
 
         import Spotify_Downloader as S
 
-        with patch.object(S, "log_file_path", return_value=str(tmp_path / "sunnify.log")):
+        with patch("sunnify_core.log_file_path", return_value=str(tmp_path / "sunnify.log")):
             try:
                 S.setup_logging()
                 scraper = S.MusicScraper()
@@ -2691,12 +2861,12 @@ class TestLogging:
 
         scraper = S.MusicScraper()
         with (
-            patch.object(S, "log_file_path", return_value=str(tmp_path / "sunnify.log")),
-            patch.object(S, "get_ffmpeg_path", return_value=str(tmp_path)),
+            patch("sunnify_core.log_file_path", return_value=str(tmp_path / "sunnify.log")),
+            patch("sunnify_engine.get_ffmpeg_path", return_value=str(tmp_path)),
         ):
             try:
                 S.setup_logging()
-                with patch.object(S, "YoutubeDL", FakeYDL), pytest.raises(RuntimeError):
+                with patch("sunnify_engine.YoutubeDL", FakeYDL), pytest.raises(RuntimeError):
                     scraper.download_track_audio(
                         "Song X Artist Y",
                         str(tmp_path / "out.mp3"),
@@ -2946,7 +3116,7 @@ class TestStarPrompt:
         from Spotify_Downloader import load_config
 
         cfg_file = tmp_path / "config.json"
-        with patch("Spotify_Downloader._config_path", return_value=str(cfg_file)):
+        with patch("sunnify_core._config_path", return_value=str(cfg_file)):
             assert load_config()["star_prompt_shown"] is False
             cfg_file.write_text(json.dumps({"star_prompt_shown": "yes"}))
             assert load_config()["star_prompt_shown"] is False
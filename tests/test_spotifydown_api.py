@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import time
+from unittest.mock import MagicMock
+
 import pytest
 
 from spotifydown_api import (
@@ -10,12 +13,15 @@ from spotifydown_api import (
     PlaylistInfo,
     SpotifyEmbedAPI,
     TrackInfo,
+    TrackTable,
     detect_spotify_url_type,
     extract_album_id,
     extract_playlist_id,
     extract_track_id,
+    resolve_many,
     sanitize_filename,
 )
+from sunnify_concurrency import AdaptiveLimit
 
 
 class TestExtractPlaylistId:
@@ -369,10 +375,13 @@ class TestSpotifyEmbedAPI:
 
         # Force the per-track metadata fetches to return in REVERSE playlist
         # order (s6 first, then s5, s4, s3) — the worst case for the prior
-        # bug. _fetch_track_metadata is what the parallel pool calls.
+        # bug. _fetch_track_metadata is what the parallel pool calls; all
+        # four run at once (the pool starts at 4), so staggered delays
+        # decide which finishes first.
         completion_order = ["s6", "s5", "s4", "s3"]
 
         def fake_fetch(tid):
+            time.sleep(0.05 * completion_order.index(tid))
             return TrackInfo(
                 id=tid,
                 title=f"Title {tid}",
@@ -387,26 +396,11 @@ class TestSpotifyEmbedAPI:
 
         api._fetch_track_metadata = fake_fetch  # type: ignore[assignment]
 
-        # Force as_completed-style ordering: monkey-patch the pool's
-        # as_completed to return futures in the reverse order we want.
-        import concurrent.futures as cf
-
-        original_as_completed = cf.as_completed
-
-        def reverse_as_completed(fs):
-            # Re-sort futures by their bound track_id so s6 yields first.
-            pairs = [(f, fs[f]) for f in fs]  # fs is future -> (tid, uri)
-            pairs.sort(key=lambda p: completion_order.index(p[1][0]))
-            return [p[0] for p in pairs]
-
-        cf.as_completed = reverse_as_completed  # type: ignore[assignment]
-        try:
-            tracks = list(api.iter_playlist_tracks("PL", content_type="playlist"))
-        finally:
-            cf.as_completed = original_as_completed  # type: ignore[assignment]
+        tracks = list(api.iter_playlist_tracks("PL", content_type="playlist"))
 
         # Yield order is: p1, p2 (phase 1), then s6, s5, s4, s3 (phase 2 in
         # reverse completion). But POSITION must still match the playlist:
+        assert [t.id for t in tracks] == ["p1", "p2", *completion_order]
         by_id = {t.id: t.position for t in tracks}
         assert by_id == {"p1": 1, "p2": 2, "s3": 3, "s4": 4, "s5": 5, "s6": 6}
 
@@ -456,6 +450,34 @@ class TestSpotifyEmbedAPI:
         assert by_id["a"].title == "Track a"
         assert by_id["a"].artists == "Unknown Artist"
 
+    def test_phase2_pool_backs_off_on_spotify_429(self):
+        """A 429 during the per-track fetches halves the metadata pool."""
+        api = SpotifyEmbedAPI()
+        api._fetch_embed_data = lambda _url: {  # type: ignore[assignment]
+            "props": {"pageProps": {"state": {"data": {"entity": {"trackList": []}}}}}
+        }
+        api._cached_token = "tok"
+        items = [{"uri": f"spotify:track:t{n}"} for n in range(8)]
+        api._session.get = lambda *_a, **_kw: type(  # type: ignore[assignment]
+            "R",
+            (),
+            {
+                "status_code": 200,
+                "json": staticmethod(lambda: {"length": 8, "contents": {"items": items}}),
+            },
+        )()
+
+        def fetch(tid):
+            if tid == "t0":
+                api._rate_limited += 1  # what _fetch_embed_data counts on a 429
+            return None
+
+        api._fetch_track_metadata = fetch  # type: ignore[assignment]
+        limit = AdaptiveLimit(4, 1, 4, window_s=60)
+        tracks = list(api.iter_playlist_tracks("PL", content_type="playlist", limit=limit))
+        assert len(tracks) == 8
+        assert (limit.current, limit.throttles) == (2, 1)
+
     def test_album_iteration_tags_album_name_and_skips_spclient(self):
         """Album iteration uses the album embed URL, tags every track with the
         album name, and never invokes the playlist-only spclient fallback."""
@@ -670,6 +692,77 @@ class TestPlaylistClient:
         assert client.get_track_youtube_id("abc123") is None
 
 
+def _track(track_id: str) -> TrackInfo:
+    return TrackInfo(
+        id=track_id,
+        title=f"Song {track_id}",
+        artists="Artist",
+        album=None,
+        release_date=None,
+        cover_url=None,
+        duration_ms=None,
+        preview_url=None,
+        raw={},
+    )
+
+
+class TestResolveMany:
+    """Tests for resolve_many batch resolution."""
+
+    def _client(self, playlists: dict[str, list[str]]):
+        client = MagicMock(spec=PlaylistClient)
+        client.get_playlist_metadata.side_effect = lambda pid, **_: PlaylistInfo(
+            name=pid, owner=None, description=None, cover_url=None
+        )
+        client.iter_playlist_tracks.side_effect = lambda pid, **_: iter(
+            [_track(t) for t in playlists[pid]]
+        )
+        client.get_track.side_effect = _track
+        return client
+
+    def test_yields_in_input_order_with_cross_batch_dedup(self):
+        client = self._client({"AAAA": ["t1", "t2"], "BBBB": ["t2", "t3"]})
+        items = list(
+            resolve_many(
+                [
+                    "https://open.spotify.com/playlist/AAAA",
+                    "https://open.spotify.com/album/BBBB",
+                    "https://open.spotify.com/track/t3",
+                ],
+                client=client,
+            )
+        )
+        assert [i.index for i in items] == [0, 1, 2]
+        assert [t.id for t in items[0].tracks] == ["t1", "t2"]
+        assert [t.id for t in items[1].tracks] == ["t3"]
+        assert items[1].duplicates == ["t2"]
+        assert items[2].tracks == [] and items[2].duplicates == ["t3"]
+
+    def test_repeated_url_is_fetched_once(self):
+        client = self._client({"AAAA": ["t1"]})
+        url = "https://open.spotify.com/playlist/AAAA"
+        items = list(resolve_many([url, url], client=client))
+        assert client.iter_playlist_tracks.call_count == 1
+        assert items[1].duplicates == ["t1"]
+
+    def test_bad_urls_and_failed_fetches_do_not_abort_batch(self):
+        client = self._client({"AAAA": ["t1"]})
+        client.get_track.side_effect = RuntimeError("upstream down")
+        items = list(
+            resolve_many(
+                [
+                    "https://example.com/nope",
+                    "https://open.spotify.com/track/t9",
+                    "https://open.spotify.com/playlist/AAAA",
+                ],
+                client=client,
+            )
+        )
+        assert items[0].type == "unknown" and items[0].error
+        assert items[1].error == "upstream down"
+        assert items[2].error is None and [t.id for t in items[2].tracks] == ["t1"]
+
+
 class TestTrackInfo:
     """Tests for TrackInfo dataclass."""
 
@@ -688,6 +781,69 @@ class TestTrackInfo:
         )
         assert track.spotify_id == "abc123"
 
+    def test_slotted(self):
+        track = _track("abc123")
+        assert not hasattr(track, "__dict__")
+        with pytest.raises(AttributeError):
+            track.youtube_id = "x"
+
+    def test_raw_is_only_kept_on_request(self):
+        entry = {"uri": "spotify:track:t1", "title": "Song", "subtitle": "Artist", "uid": "u"}
+        assert SpotifyEmbedAPI()._parse_track(entry, "t1").raw is None
+        kept = SpotifyEmbedAPI(keep_raw=True)._parse_track(entry, "t1").raw
+        assert kept == entry and kept is not entry
+        assert PlaylistClient(keep_raw=True)._embed_api._keep_raw is True
+
+
+def _full_track(n: int, **overrides) -> TrackInfo:
+    fields = {
+        "id": f"id{n}",
+        "title": f"Song {n}",
+        "artists": "Artist A, Artist B",
+        "album": "Album",
+        "release_date": "2024-01-01",
+        "cover_url": "https://i.scdn.co/image/cover",
+        "duration_ms": 180000 + n,
+        "preview_url": f"https://p.scdn.co/mp3-preview/{n}",
+        "position": n + 1,
+    }
+    return TrackInfo(**{**fields, **overrides})
+
+
+class TestTrackTable:
+    def test_tracks_come_back_as_they_went_in(self):
+        tracks = [
+            _full_track(0),
+            _full_track(1, album=None, release_date=None, cover_url=None, preview_url=None),
+            _full_track(2, duration_ms=None, position=None, artists=""),
+        ]
+        table = TrackTable(tracks)
+        assert len(table) == 3
+        assert list(table) == tracks
+        assert table[-1] == tracks[2] and table[1:] == tracks[1:]
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_raw_is_not_kept(self):
+        table = TrackTable([_full_track(0, raw={"uri": "spotify:track:id0"})])
+        assert table[0].raw is None
+
+    def test_fields_of_the_wrong_type_are_refused(self):
+        table = TrackTable()
+        with pytest.raises(TypeError, match="duration_ms as int or None, got str"):
+            table.append(_full_track(0, duration_ms="200000"))
+        with pytest.raises(TypeError, match="title as str, got MagicMock"):
+            table.append(_full_track(0, title=MagicMock()))
+        with pytest.raises(TypeError, match="album as str or None"):
+            table.append(_full_track(0, album=MagicMock()))
+        assert len(table) == 0  # nothing half-appended
+
+    def test_repeated_strings_are_stored_once(self):
+        table = TrackTable(_full_track(n) for n in range(500))
+        # None, the artists, album, release date and cover: once each
+        assert len(table._strings) == 5
+        assert table[499].album == "Album" and table[499].position == 500
+
 
 class TestPlaylistInfo:
     """Tests for PlaylistInfo dataclass."""
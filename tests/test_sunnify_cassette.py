@@ -0,0 +1,223 @@
+"""Tests for the HTTP cassette: what a recording run writes, what a replay
+serves back (requests and yt-dlp alike) without the server, misses, and the
+replayed latency."""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yt_dlp import YoutubeDL
+from yt_dlp.networking.common import Request
+from yt_dlp.networking.exceptions import HTTPError, RequestError
+
+import sunnify_cassette
+from spotifydown_api import SpotifyDownAPIError, SpotifyEmbedAPI
+from sunnify_cassette import Cassette, CassetteMiss
+
+COVER = bytes(range(256))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, content_type="text/plain"):
+        type(self).hits += 1
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/cover.jpg":
+            self._reply(200, COVER, "image/jpeg")
+        elif self.path == "/missing":
+            self._reply(404, b"not here")
+        else:
+            self._reply(200, f"page {self.path} #{type(self).hits}".encode())
+
+    def do_POST(self):
+        query = self.rfile.read(int(self.headers["Content-Length"]))
+        self._reply(200, b"results for " + query)
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _session(cassette: Cassette) -> requests.Session:
+    session = requests.Session()
+    cassette.mount(session)
+    return session
+
+
+def _write_cassette(path, *entries) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps({"method": "GET", "status": 200, "headers": [], **entry}) + "\n")
+    return str(path)
+
+
+class TestRequests:
+    def test_replay_serves_what_was_recorded_without_the_server(self, server, tmp_path):
+        httpd, base = server
+        path = str(tmp_path / "run.jsonl")
+        recorder = Cassette.record(path)
+        live = _session(recorder)
+        page = live.get(base + "/embed/playlist/abc")
+        cover = live.get(base + "/cover.jpg", stream=True)
+        missing = live.get(base + "/missing")
+        assert b"".join(cover.iter_content(64)) == COVER  # streaming still works
+        assert recorder.recorded == 3
+        httpd.shutdown()
+
+        offline = _session(Cassette.replay(path, latency=0))
+        assert offline.get(base + "/embed/playlist/abc").text == page.text
+        assert offline.get(base + "/cover.jpg", stream=True).content == COVER
+        replayed = offline.get(base + "/missing")
+        assert (replayed.status_code, replayed.text) == (missing.status_code, "not here")
+        assert replayed.headers["Content-Type"] == "text/plain"
+
+    def test_binary_bodies_are_stored_as_base64(self, server, tmp_path):
+        _, base = server
+        path = tmp_path / "run.jsonl"
+        _session(Cassette.record(str(path))).get(base + "/cover.jpg")
+        (entry,) = [json.loads(line) for line in path.read_text().splitlines()]
+        assert base64.b64decode(entry["base64"]) == COVER
+        assert entry["client"] == "requests" and entry["status"] == 200
+
+    def test_repeats_are_served_in_order_the_last_one_repeating(self, server, tmp_path):
+        _, base = server
+        path = str(tmp_path / "run.jsonl")
+        live = _session(Cassette.record(path))
+        first, second = live.get(base + "/p").text, live.get(base + "/p").text
+        assert first != second
+        offline = _session(Cassette.replay(path, latency=0))
+        assert [offline.get(base + "/p").text for _ in range(3)] == [first, second, second]
+
+    def test_request_bodies_pick_the_response(self, server, tmp_path):
+        _, base = server
+        path = str(tmp_path / "run.jsonl")
+        live = _session(Cassette.record(path))
+        live.post(base + "/search", data=b"one")
+        live.post(base + "/search", data=b"two")
+        offline = _session(Cassette.replay(path, latency=0))
+        assert offline.post(base + "/search", data=b"two").text == "results for two"
+        assert offline.post(base + "/search", data=b"one").text == "results for one"
+
+    def test_a_miss_is_not_a_retryable_network_error(self, tmp_path):
+        cassette = Cassette.replay(_write_cassette(tmp_path / "empty.jsonl"), latency=0)
+        api = SpotifyEmbedAPI(session=_session(cassette))
+        started = time.monotonic()
+        with pytest.raises(SpotifyDownAPIError) as err:
+            api.get_playlist_metadata("37i9dQZF1DXcBWIGoYBM5M")
+        assert isinstance(err.value.__cause__, CassetteMiss)
+        assert not isinstance(err.value.__cause__, requests.ConnectionError)
+        assert time.monotonic() - started < 1  # no backoff
+        assert cassette.misses == 1
+
+    def test_embed_pages_parse_offline(self, tmp_path, sample_embed_html):
+        url = "https://open.spotify.com/embed/playlist/37i9dQZF1DXcBWIGoYBM5M"
+        cassette = Cassette.replay(
+            _write_cassette(tmp_path / "run.jsonl", {"url": url, "text": sample_embed_html}),
+            latency=0,
+        )
+        api = SpotifyEmbedAPI(session=_session(cassette))
+        assert api.get_playlist_metadata("37i9dQZF1DXcBWIGoYBM5M").name == "Test Playlist"
+
+    def test_unmount_puts_the_adapters_back(self):
+        session = requests.Session()
+        adapters = dict(session.adapters)
+        cassette = Cassette.record("unused.jsonl")
+        cassette.mount(session)
+        assert isinstance(session.get_adapter("https://x"), sunnify_cassette.CassetteAdapter)
+        cassette.unmount()
+        assert dict(session.adapters) == adapters
+
+
+class TestLatency:
+    def test_recorded_latency_is_replayed(self, tmp_path):
+        path = _write_cassette(tmp_path / "run.jsonl", {"url": "http://x/a", "elapsed": 0.2})
+        session = _session(Cassette.replay(path))
+        started = time.monotonic()
+        session.get("http://x/a")
+        assert time.monotonic() - started >= 0.2
+
+    def test_fixed_latency_overrides_the_recording(self, tmp_path):
+        path = _write_cassette(tmp_path / "run.jsonl", {"url": "http://x/a", "elapsed": 5})
+        session = _session(Cassette.replay(path, latency=0.01))
+        started = time.monotonic()
+        session.get("http://x/a")
+        assert time.monotonic() - started < 1
+
+    def test_bad_cassettes_and_latencies_are_refused(self, tmp_path):
+        bad = tmp_path / "bad.jsonl"
+        bad.write_text("not json\n")
+        with pytest.raises(ValueError, match="bad.jsonl:1"):
+            Cassette.replay(str(bad))
+        with pytest.raises(ValueError):
+            Cassette.replay(_write_cassette(tmp_path / "ok.jsonl"), latency=-1)
+
+
+class TestYtdlp:
+    def test_extractor_requests_record_and_replay(self, server, tmp_path):
+        httpd, base = server
+        path = str(tmp_path / "run.jsonl")
+
+        def run():
+            with YoutubeDL({"quiet": True}) as ydl:
+                page = ydl.urlopen(base + "/watch").read()
+                search = ydl.urlopen(Request(base + "/youtubei/v1/search", data=b"q=rick")).read()
+                with pytest.raises(HTTPError) as err:
+                    ydl.urlopen(base + "/missing")
+                return page, search, err.value.status
+
+        with Cassette.record(path) as recorder:
+            live = run()
+        assert recorder.recorded == 3
+        lines = open(path).read().splitlines()  # noqa: SIM115
+        assert {json.loads(line)["client"] for line in lines} == {"yt-dlp"}
+        httpd.shutdown()
+
+        with Cassette.replay(path, latency=0) as player:
+            assert run() == live
+        assert player.replayed == 3
+
+    def test_misses_fail_the_request(self, tmp_path):
+        cassette = Cassette.replay(_write_cassette(tmp_path / "empty.jsonl"), latency=0)
+        with cassette, YoutubeDL({"quiet": True}) as ydl, pytest.raises(RequestError):
+            ydl.urlopen("http://127.0.0.1:9/never")
+
+    def test_handler_stands_aside_without_a_cassette(self, server):
+        _, base = server
+        with YoutubeDL({"quiet": True}) as ydl:
+            assert ydl.urlopen(base + "/live").read().startswith(b"page /live")
+
+    def test_one_cassette_at_a_time(self, tmp_path):
+        with (
+            Cassette.record(str(tmp_path / "a.jsonl")),
+            pytest.raises(RuntimeError),
+            Cassette.record(str(tmp_path / "b.jsonl")),
+        ):
+            pass
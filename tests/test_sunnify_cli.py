@@ -12,6 +12,7 @@ import json
 import os
 import subprocess
 import sys
+import threading
 from types import SimpleNamespace
 from unittest.mock import patch
 
@@ -21,6 +22,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import Spotify_Downloader as sd
 import sunnify_cli as cli
+from spotifydown_api import TrackInfo
+from sunnify_engine import DownloadEngine
 
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -35,13 +38,55 @@ def _args(**kw):
     return SimpleNamespace(**base)
 
 
+class TestProfile:
+    def test_profiled_command_writes_next_to_the_log(self, tmp_path, capsys):
+        args = SimpleNamespace(command="info", profile=True, func=lambda _args: cli.EXIT_PARTIAL)
+        with patch("sunnify_core.log_file_path", return_value=str(tmp_path / "sunnify.log")):
+            assert cli._run_profiled(args) == cli.EXIT_PARTIAL
+        assert sorted(p.suffix for p in tmp_path.iterdir()) == [".collapsed", ".pstats"]
+        assert capsys.readouterr().out == ""  # the paths go to stderr
+
+    def test_download_and_info_take_the_flag(self):
+        parser = cli.build_parser()
+        assert parser.parse_args(["download", "u", "--profile"]).profile is True
+        assert parser.parse_args(["info", "u", "--profile"]).profile is True
+
+
+class TestCassette:
+    def test_recording_run_reports_on_stderr(self, tmp_path, capsys):
+        path = tmp_path / "run.jsonl"
+        args = SimpleNamespace(record_http=str(path), func=lambda _args: cli.EXIT_OK)
+        assert cli._run_with_cassette(args, args.func) == cli.EXIT_OK
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert f"recorded 0 responses to {path}" in captured.err
+
+    def test_unreadable_cassette_is_a_usage_error(self, tmp_path, capsys):
+        args = SimpleNamespace(replay_http=str(tmp_path / "nope.jsonl"), replay_latency=0)
+        assert cli._run_with_cassette(args, lambda _args: cli.EXIT_OK) == cli.EXIT_USAGE
+        assert "cassette not readable" in capsys.readouterr().err
+
+    def test_flags(self):
+        parser = cli.build_parser()
+        args = parser.parse_args(["info", "u", "--replay-http", "run.jsonl"])
+        assert (args.replay_http, args.replay_latency) == ("run.jsonl", "recorded")
+        args = parser.parse_args(["download", "u", "--replay-http", "r", "--replay-latency", "0"])
+        assert args.replay_latency == 0.0
+        for argv in (
+            ["info", "u", "--record-http", "a", "--replay-http", "b"],
+            ["info", "u", "--replay-latency", "-1"],
+        ):
+            with pytest.raises(SystemExit):
+                parser.parse_args(argv)
+
+
 class TestRegistryParity:
     """The single-source-of-truth guarantees: a new setting added to
     SETTINGS reaches config io, the scraper, and the CLI with no manual
     parity work - these tests fail loudly if that contract breaks."""
 
     def test_every_scraper_kwarg_is_a_real_ctor_param(self):
-        params = inspect.signature(sd.MusicScraper.__init__).parameters
+        params = inspect.signature(DownloadEngine.__init__).parameters
         for s in sd.SETTINGS:
             if s.scraper_kwarg:
                 assert s.scraper_kwarg in params, f"{s.key} maps to unknown kwarg {s.scraper_kwarg}"
@@ -56,7 +101,7 @@ class TestRegistryParity:
 
     def test_load_config_keys_match_registry(self):
         cfg = sd.load_config()
-        expected = {s.key for s in sd.SETTINGS} | {"version", "star_prompt_shown"}
+        expected = {s.key for s in sd.SETTINGS} | {"version", *cli.core.INTERNAL_FLAGS}
         assert set(cfg) == expected
 
     def test_scraper_kwargs_from_covers_all_wired_settings(self):
@@ -118,7 +163,7 @@ class TestDownloadGuards:
         assert json.loads(capsys.readouterr().out)["code"] == "invalid_url"
 
     def test_missing_ffmpeg_is_fatal_with_code(self, tmp_path, capsys):
-        with patch.object(sd, "get_ffmpeg_path", return_value=None):
+        with patch("sunnify_core.get_ffmpeg_path", return_value=None):
             rc = cli.cmd_download(
                 _args(
                     url="https://open.spotify.com/track/0VjIjW4GlUZAMYd2vXMi3b",
@@ -134,7 +179,7 @@ class TestDownloadGuards:
         if sys.platform == "win32":
             pytest.skip("posix pid semantics")
         (tmp_path / cli._LOCK_NAME).write_text("1")
-        with patch.object(sd, "get_ffmpeg_path", return_value="/usr/bin/true"):
+        with patch("sunnify_core.get_ffmpeg_path", return_value="/usr/bin/true"):
             rc = cli.cmd_download(
                 _args(
                     url="https://open.spotify.com/track/0VjIjW4GlUZAMYd2vXMi3b",
@@ -145,6 +190,152 @@ class TestDownloadGuards:
         assert rc == cli.EXIT_FATAL
         assert json.loads(capsys.readouterr().out)["code"] == "folder_locked"
 
+    def test_busy_metrics_port_is_fatal_with_code(self, capsys):
+        import socket
+
+        with socket.socket() as taken:
+            taken.bind(("127.0.0.1", 0))
+            taken.listen()
+            rc = cli.cmd_download(
+                _args(
+                    url="https://open.spotify.com/track/0VjIjW4GlUZAMYd2vXMi3b",
+                    metrics_port=taken.getsockname()[1],
+                    json=True,
+                )
+            )
+        assert rc == cli.EXIT_FATAL
+        assert json.loads(capsys.readouterr().out)["code"] == "port_unavailable"
+
+
+class TestInfoBatch:
+    """`info --batch` resolves a url list; no network (resolve_many is patched)."""
+
+    def test_url_and_batch_together_is_usage_error(self, tmp_path):
+        rc = cli.cmd_info(SimpleNamespace(url="x", batch=str(tmp_path / "u.txt"), json=True))
+        assert rc == cli.EXIT_USAGE
+
+    def test_ndjson_per_url_and_partial_exit(self, tmp_path, capsys):
+        from spotifydown_api import BatchItem, PlaylistInfo
+
+        urls = tmp_path / "urls.txt"
+        urls.write_text("# my links\nhttps://open.spotify.com/playlist/p1\n\nnope\n")
+        items = [
+            BatchItem(
+                0,
+                "https://open.spotify.com/playlist/p1",
+                "playlist",
+                "p1",
+                playlist=PlaylistInfo(name="Mix", owner=None, description=None, cover_url=None),
+            ),
+            BatchItem(1, "nope", "unknown", None, error="Invalid Spotify URL."),
+        ]
+        with patch("spotifydown_api.resolve_many", return_value=iter(items)) as rm:
+            rc = cli.cmd_info(SimpleNamespace(url=None, batch=str(urls), json=True))
+        assert rm.call_args.args[0] == ["https://open.spotify.com/playlist/p1", "nope"]
+        assert rc == cli.EXIT_PARTIAL
+        parsed = [json.loads(line) for line in capsys.readouterr().out.strip().splitlines()]
+        assert [p["event"] for p in parsed] == ["resolved", "error", "batch_summary"]
+        assert parsed[0]["name"] == "Mix" and parsed[0]["track_count"] == 0
+        assert parsed[1]["code"] == "invalid_url" and parsed[1]["index"] == 1
+        assert parsed[2]["failed"] == 1
+
+    def test_unreadable_batch_file_is_fatal(self, tmp_path, capsys):
+        rc = cli.cmd_info(SimpleNamespace(url=None, batch=str(tmp_path / "missing"), json=True))
+        assert rc == cli.EXIT_FATAL
+        assert json.loads(capsys.readouterr().out)["code"] == "batch_file_unreadable"
+
+
+class TestDownloadFromFile:
+    def test_url_and_from_file_together_is_usage_error(self, tmp_path):
+        rc = cli.cmd_download(_args(url="x", from_file=str(tmp_path / "u.txt")))
+        assert rc == cli.EXIT_USAGE
+
+    def test_empty_url_file_is_usage_error(self, tmp_path):
+        urls = tmp_path / "urls.txt"
+        urls.write_text("# nothing yet\n\n")
+        assert cli.cmd_download(_args(from_file=str(urls))) == cli.EXIT_USAGE
+
+    def test_source_records_become_ndjson_events(self, capsys):
+        state = cli._RunState(cli._Emitter(as_json=True))
+        state.on_source_progress({"url": "u1", "phase": "started", "tracks": 3})
+        state.on_source_progress({"url": "u2", "phase": "done", "error": "Invalid Spotify URL"})
+        parsed = [json.loads(line) for line in capsys.readouterr().out.strip().splitlines()]
+        assert [p["event"] for p in parsed] == ["source_started", "source_done"]
+        assert state.failed_sources == ["u2"]
+
+
+class TestTagStage:
+    def test_tagging_runs_off_the_download_worker(self, tmp_path, capsys):
+        """The download worker returns once the audio is in; tagging, the
+        rename and the manifest record run on the tagging pool, track_done
+        waits for them, and drain() waits for every queued finalize."""
+        gate = threading.Event()
+        state = cli._RunState(cli._Emitter(as_json=True))
+        engine = DownloadEngine(embed_tags=True)
+        engine.tag_pool = state._tagger
+        engine.events.subscribe("track_ready", state.on_track_ready)
+
+        def land(_query, dest, **_kw):
+            landed = os.path.splitext(dest)[0] + ".partial.mp3"
+            with open(landed, "wb") as fh:
+                fh.write(b"x" * 10)
+            return landed
+
+        engine.download_track_audio = land
+        track = TrackInfo(
+            id="a",
+            title="A",
+            artists="B",
+            album=None,
+            release_date=None,
+            cover_url=None,
+            duration_ms=None,
+            preview_url=None,
+        )
+        with patch("sunnify_engine.write_tags", side_effect=lambda *_a, **_kw: gate.wait(5)):
+            assert engine._download_one_track(track, str(tmp_path), None, 1) is None
+            assert capsys.readouterr().out == ""  # still tagging
+            assert not os.path.exists(tmp_path / "A - B.mp3")
+            gate.set()
+            state.drain()
+        (event,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert event["event"] == "track_done"
+        assert event["bytes"] == 10
+        assert state.landed == [str(tmp_path / "A - B.mp3")]
+        assert os.path.exists(tmp_path / "A - B.mp3")
+        assert not engine._in_flight_files
+
+    def test_engine_tagged_tracks_are_done_on_arrival(self, tmp_path, capsys):
+        song = tmp_path / "a.mp3"
+        song.write_bytes(b"x")
+        state = cli._RunState(cli._Emitter(as_json=True))
+        with patch("sunnify_engine.write_tags") as write:
+            state.on_track_ready({"title": "A", "file": str(song), "tagged": True})
+            assert json.loads(capsys.readouterr().out)["event"] == "track_done"
+            state.drain()
+        write.assert_not_called()
+        assert state.landed == [str(song)]
+
+    def test_cli_engine_embeds_tags(self):
+        engine = cli._build_scraper(cli.build_parser().parse_args(["download", "u"]), {}, None)
+        assert engine.embed_tags
+
+    def test_track_done_reports_the_audio_path(self, tmp_path, capsys):
+        song = tmp_path / "a.m4a"
+        song.write_bytes(b"x")
+        state = cli._RunState(cli._Emitter(as_json=True))
+        meta = {"title": "A", "file": str(song), "audio_path": "copy", "source_codec": "mp4a"}
+        with patch("sunnify_engine.write_tags"):
+            state.on_track_ready({**meta, "postprocess_ms": 40})
+            state.drain()
+        event = json.loads(capsys.readouterr().out)
+        assert (event["audio_path"], event["source_codec"], event["postprocess_ms"]) == (
+            "copy",
+            "mp4a",
+            40,
+        )
+        assert state.audio_paths == {"copy": 1}
+
 
 class TestFolderLock:
     def test_stale_lock_is_claimed(self, tmp_path):
@@ -159,7 +350,7 @@ class TestFolderLock:
 class TestConfigCommand:
     def _run(self, tmp_path, *set_pairs, as_json=False):
         cfg_file = tmp_path / "config.json"
-        with patch.object(sd, "_config_path", return_value=str(cfg_file)):
+        with patch("sunnify_core._config_path", return_value=str(cfg_file)):
             args = SimpleNamespace(set=list(set_pairs) or None, json=as_json)
             rc = cli.cmd_config(args)
         return rc, cfg_file
@@ -175,6 +366,17 @@ class TestConfigCommand:
         rc, _ = self._run(tmp_path, "format=wma")
         assert rc == cli.EXIT_USAGE
 
+    def test_concurrency_is_stored_as_an_int(self, tmp_path, capsys):
+        rc, cfg_file = self._run(tmp_path, "concurrency=12", "concurrency_max=16")
+        assert rc == cli.EXIT_OK
+        saved = json.loads(cfg_file.read_text())
+        assert (saved["concurrency"], saved["concurrency_max"]) == (12, 16)
+
+    @pytest.mark.parametrize("value", ["0", "65", "lots"])
+    def test_out_of_range_concurrency_is_usage_error(self, tmp_path, capsys, value):
+        rc, _ = self._run(tmp_path, f"concurrency={value}")
+        assert rc == cli.EXIT_USAGE
+
     def test_unknown_key_is_usage_error(self, tmp_path, capsys):
         rc, _ = self._run(tmp_path, "volume=11")
         assert rc == cli.EXIT_USAGE
@@ -203,6 +405,252 @@ class TestStatusCommand:
         assert payload["download_in_progress"] is False
 
 
+class TestVerifyCommand:
+    def _args(self, folder, **kw):
+        return SimpleNamespace(
+            folder=str(folder), json=True, quiet=False, workers=1, no_cache=False, **kw
+        )
+
+    def test_ndjson_per_file_then_summary(self, tmp_path, capsys, silent_mp3):
+        (tmp_path / "good.mp3").write_bytes(silent_mp3(5))
+        (tmp_path / "empty.mp3").write_bytes(b"")
+        rc = cli.cmd_verify(self._args(tmp_path))
+        events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert rc == cli.EXIT_PARTIAL
+        by_file = {e["file"]: e for e in events if e["event"] == "verified"}
+        assert by_file["empty.mp3"]["problems"] == ["empty"]
+        assert by_file["good.mp3"]["duration_s"] == pytest.approx(5, abs=0.5)
+        summary = events[-1]
+        assert summary["event"] == "verify_summary"
+        assert (summary["files"], summary["problems"], summary["exit_code"]) == (2, 2, 1)
+
+    def test_clean_folder_exits_ok(self, tmp_path, capsys):
+        assert cli.cmd_verify(self._args(tmp_path)) == cli.EXIT_OK
+        assert json.loads(capsys.readouterr().out)["files"] == 0
+
+    def test_missing_folder_is_fatal(self, tmp_path, capsys):
+        assert cli.cmd_verify(self._args(tmp_path / "nope")) == cli.EXIT_FATAL
+        assert json.loads(capsys.readouterr().out)["code"] == "folder_missing"
+
+
+class TestRepairCommand:
+    def _library(self, tmp_path, silent_mp3):
+        """One good and one cut-off track recorded with metadata, plus one
+        legacy record (id and file only) whose file is gone."""
+        (tmp_path / "01. Good - A.mp3").write_bytes(silent_mp3(200))
+        (tmp_path / "02. Cut - A.mp3").write_bytes(silent_mp3(30))
+        records = [
+            {"id": "g", "file": "01. Good - A.mp3", "duration_ms": 200_000, "title": "Good"},
+            {
+                "id": "c",
+                "file": "02. Cut - A.mp3",
+                "duration_ms": 200_000,
+                "title": "Cut",
+                "artists": "A",
+                "number": 2,
+            },
+            {"id": "old", "file": "07. Gone - A.mp3"},
+        ]
+        with open(tmp_path / sd.MANIFEST_FILENAME, "w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(r) + "\n" for r in records)
+
+    def _args(self, folder, **kw):
+        return _args(folder=str(folder), json=True, quiet=False, workers=1, no_cache=True, **kw)
+
+    def _legacy(self, track_id):
+        return TrackInfo(
+            id=track_id,
+            title="Gone",
+            artists="A",
+            album=None,
+            release_date=None,
+            cover_url=None,
+            duration_ms=None,
+            preview_url=None,
+            raw={},
+        )
+
+    def test_dry_run_lists_broken_tracks_only(self, tmp_path, capsys, silent_mp3):
+        self._library(tmp_path, silent_mp3)
+        with patch("spotifydown_api.PlaylistClient.get_track", side_effect=self._legacy) as get:
+            rc = cli.cmd_repair(self._args(tmp_path, dry_run=True))
+        events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert rc == cli.EXIT_PARTIAL
+        queued = {e["file"]: e for e in events if e["event"] == "repair_queued"}
+        assert queued["02. Cut - A.mp3"]["problems"] == ["truncated"]
+        assert queued["07. Gone - A.mp3"]["problems"] == ["missing"]
+        assert "01. Good - A.mp3" not in queued
+        # only the record without stored metadata needed a lookup
+        get.assert_called_once_with("old")
+        assert events[-1]["event"] == "repair_scan"
+        assert (events[-1]["tracks"], events[-1]["broken"]) == (3, 2)
+
+    def test_repair_downloads_the_rebuilt_tracks(self, tmp_path, capsys, silent_mp3):
+        self._library(tmp_path, silent_mp3)
+        runs = []
+
+        def fake_download_tracks(engine, jobs, on_result=None, *, sweep=True):
+            runs.append((engine.verify_audio, jobs))
+
+        with (
+            patch("spotifydown_api.PlaylistClient.get_track", side_effect=self._legacy),
+            patch("sunnify_core.get_ffmpeg_path", return_value="/usr/bin/true"),
+            patch.object(DownloadEngine, "download_tracks", fake_download_tracks),
+            patch.object(DownloadEngine, "download", side_effect=AssertionError("enumerated")),
+        ):
+            rc = cli.cmd_repair(self._args(tmp_path, dry_run=False))
+        events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert rc == cli.EXIT_OK
+        verify_audio, jobs = runs[0]
+        assert verify_audio is True
+        by_id = {track.id: (track, folder, num, old) for track, folder, num, old in jobs}
+        assert sorted(by_id) == ["c", "old"]
+        track, folder, num, old = by_id["c"]
+        assert (track.title, track.duration_ms, num) == ("Cut", 200_000, 2)
+        assert (folder, old) == (str(tmp_path), str(tmp_path / "02. Cut - A.mp3"))
+        assert by_id["old"][2] == 7  # numbered from the file name
+        started = next(e for e in events if e["event"] == "run_started")
+        assert (started["type"], started["tracks"]) == ("repair", 2)
+
+    def test_unnumbered_files_stay_unnumbered(self):
+        record = {"id": "s", "file": "Single - A.mp3", "title": "Single", "artists": "A"}
+        track, number = cli._repair_track(record, client=None)
+        assert (track.title, number) == ("Single", None)
+        assert cli._repair_track({**record, "file": "03. Single - A.mp3"}, None)[1] == 3
+
+    def test_healthy_library_downloads_nothing(self, tmp_path, capsys, silent_mp3):
+        (tmp_path / "a.mp3").write_bytes(silent_mp3(200))
+        with open(tmp_path / sd.MANIFEST_FILENAME, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps({"id": "a", "file": "a.mp3", "duration_ms": 200_000}) + "\n")
+        rc = cli.cmd_repair(self._args(tmp_path, dry_run=False))
+        assert rc == cli.EXIT_OK
+        assert json.loads(capsys.readouterr().out)["broken"] == 0
+
+
+class TestQueueAndWork:
+    def _track(self, track_id, position=None):
+        return TrackInfo(
+            id=track_id,
+            title=track_id.upper(),
+            artists="A",
+            album=None,
+            release_date=None,
+            cover_url=None,
+            duration_ms=200_000,
+            preview_url=None,
+            raw={},
+            position=position,
+        )
+
+    def test_queue_publishes_each_track_once(self, tmp_path, capsys):
+        from spotifydown_api import PlaylistInfo
+
+        folder = tmp_path / "Mix - Me"
+        folder.mkdir()
+        (folder / "01. A - A.mp3").write_bytes(b"x")
+        with open(folder / sd.MANIFEST_FILENAME, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps({"id": "a", "file": "01. A - A.mp3"}) + "\n")
+        skipped = []
+
+        def tracks(_id, content_type, skip_ids):
+            skipped.append(skip_ids)
+            return iter([self._track("b", 2), self._track("c", 3)])
+
+        args = _args(
+            urls=["https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M"],
+            db=str(tmp_path / "jobs.db"),
+            from_file=None,
+            out=str(tmp_path),
+            json=True,
+        )
+        with (
+            patch(
+                "spotifydown_api.PlaylistClient.get_playlist_metadata",
+                return_value=PlaylistInfo(name="Mix", owner="Me", description=None, cover_url="c"),
+            ),
+            patch("spotifydown_api.PlaylistClient.iter_playlist_tracks", side_effect=tracks),
+        ):
+            assert cli.cmd_queue(args) == cli.EXIT_OK
+            assert cli.cmd_queue(args) == cli.EXIT_OK
+        events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        published = [e for e in events if e["event"] == "queue_published"]
+        assert [(e["tracks"], e["added"]) for e in published] == [(2, 2), (2, 0)]
+        assert published[0]["folder"] == str(folder)
+        assert skipped[0] == {"a"}
+        assert events[-1]["queued"] == 2
+
+    def test_workers_settle_their_jobs_in_the_queue(self, tmp_path, capsys):
+        import sunnify_queue
+
+        db = str(tmp_path / "jobs.db")
+        queue = sunnify_queue.JobQueue(db)
+        queue.publish(
+            "Mix", [{"id": "b", "title": "B", "number": 2}, {"id": "c", "title": "C", "number": 3}]
+        )
+        runs = []
+
+        def fake_download_tracks(engine, jobs, on_result=None, *, sweep=True):
+            runs.append((jobs, sweep))
+            for track, _folder, _num, _old in jobs:
+                on_result(track, None if track.id == "b" else track.title)
+
+        args = _args(db=db, out=str(tmp_path), batch=8, lease=60.0, worker="w1", json=True)
+        with (
+            patch("sunnify_core.get_ffmpeg_path", return_value="/usr/bin/true"),
+            patch.object(DownloadEngine, "download_tracks", fake_download_tracks),
+        ):
+            rc = cli.cmd_work(args)
+        events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert rc == cli.EXIT_PARTIAL
+        # the failing track went back to the queue until its attempts ran out
+        assert [[t.id for t, *_rest in jobs] for jobs, _sweep in runs] == [["b", "c"], ["c"], ["c"]]
+        jobs, sweep = runs[0]
+        assert sweep is False
+        assert [(t.id, folder, num) for t, folder, num, _old in jobs] == [
+            ("b", str(tmp_path / "Mix"), 2),
+            ("c", str(tmp_path / "Mix"), 3),
+        ]
+        started = next(e for e in events if e["event"] == "run_started")
+        assert (started["type"], started["worker"]) == ("work", "w1")
+        summary = events[-1]
+        assert summary["event"] == "work_summary"
+        assert (summary["done"], summary["failed"], summary["retried"]) == (1, 1, 2)
+        assert queue.counts() == {"queued": 0, "leased": 0, "done": 1, "failed": 1}
+        assert not os.path.exists(tmp_path / cli._LOCK_NAME)
+
+    def test_leases_are_renewed_for_unsettled_jobs_only(self, tmp_path, capsys):
+        import time
+
+        import sunnify_queue
+
+        db = str(tmp_path / "jobs.db")
+        queue = sunnify_queue.JobQueue(db)
+        queue.publish("Mix", [{"id": "b", "title": "B"}, {"id": "c", "title": "C"}])
+        renewed = []
+        renew = sunnify_queue.JobQueue.renew
+
+        def recording_renew(self, worker, job_ids, **kw):
+            renewed.append(list(job_ids))
+            return renew(self, worker, job_ids, **kw)
+
+        def fake_download_tracks(engine, jobs, on_result=None, *, sweep=True):
+            first, second = (track for track, *_rest in jobs)
+            on_result(first, None)
+            time.sleep(0.2)  # several renewals while the second downloads
+            on_result(second, None)
+
+        args = _args(db=db, out=str(tmp_path), batch=8, lease=0.06, worker="w1", json=True)
+        with (
+            patch("sunnify_core.get_ffmpeg_path", return_value="/usr/bin/true"),
+            patch.object(DownloadEngine, "download_tracks", fake_download_tracks),
+            patch.object(sunnify_queue.JobQueue, "renew", recording_renew),
+        ):
+            assert cli.cmd_work(args) == cli.EXIT_OK
+        # by the last renewal the settled job had dropped out
+        assert renewed and len(renewed[-1]) == 1
+        assert queue.counts()["done"] == 2
+
+
 class TestBinaryDispatch:
     """The one binary serves both personalities; these drive the real
     dispatch through a subprocess exactly as a shell would."""
@@ -246,6 +694,12 @@ class TestBinaryDispatch:
         assert result.returncode == cli.EXIT_USAGE
         assert "unknown command 'upgrade'" in result.stderr
 
+    def test_queue_and_work_reach_the_cli(self):
+        for command in ("queue", "work"):
+            result = self._run(command, "--help")
+            assert result.returncode == 0, result.stderr
+            assert f"usage: sunnify {command}" in result.stdout
+
     def test_help_command_alias(self):
         result = self._run("help")
         assert result.returncode == 0
@@ -255,3 +709,55 @@ class TestBinaryDispatch:
         result = self._run("help", "download")
         assert result.returncode == 0
         assert "usage: sunnify download" in result.stdout
+
+
+class TestColdStart:
+    """Headless commands that don't download must not import the engine.
+
+    Drives `python -X importtime` exactly as a shell would and reads which
+    modules the process actually loaded, plus the total import cost against
+    importing the full GUI module."""
+
+    HEAVY = ("PyQt6", "yt_dlp", "mutagen", "Template", "Spotify_Downloader", "sunnify_engine")
+
+    @staticmethod
+    def _imports(*argv) -> dict[str, int]:
+        """{module: self-import microseconds} for one process."""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", *argv],
+            capture_output=True,
+            text=True,
+            timeout=120,
+            cwd=REPO_ROOT,
+            env={**os.environ, "QT_QPA_PLATFORM": "offscreen"},
+        )
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            self_us, _cumulative, name = line[len("import time:") :].split("|")
+            modules[name.strip()] = int(self_us)
+        return modules
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ("sunnify_cli.py", "status", "--json"),
+            ("sunnify_cli.py", "config", "--json"),
+            ("sunnify_cli.py", "info", "https://example.com/not-spotify", "--json"),
+            ("Spotify_Downloader.py", "status", "--json"),  # the binary's dispatch path
+        ],
+    )
+    def test_headless_commands_skip_the_engine(self, argv):
+        loaded = self._imports(*argv)
+        assert "sunnify_core" in loaded
+        assert not [m for m in loaded if m.split(".")[0] in self.HEAVY]
+
+    def test_status_skips_requests_too(self):
+        loaded = self._imports("sunnify_cli.py", "status", "--json")
+        assert "requests" not in loaded
+
+    def test_status_import_cost_is_a_fraction_of_the_engine(self):
+        status = sum(self._imports("sunnify_cli.py", "status", "--json").values())
+        engine = sum(self._imports("-c", "import Spotify_Downloader").values())
+        assert status < engine * 0.5, f"status imports {status}us vs engine {engine}us"
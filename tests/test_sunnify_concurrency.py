@@ -0,0 +1,209 @@
+"""Tests for the adaptive concurrency controller and the pool that follows
+it: AIMD steps driven by a fake clock, throttle back-off, the bounds,
+run_adaptive's thread count tracking the live limit, and lane queues with
+delayed jobs."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sunnify_concurrency import AdaptiveLimit, LaneQueue, run_adaptive, run_inline
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _window(limit, clock, rate, seconds=10.0):
+    """Finish one measurement window at `rate` successful jobs per second."""
+    ok = round(rate * seconds)
+    jobs = max(limit.current, ok)
+    for n in range(jobs - 1):
+        limit.record(ok=n < ok)
+    clock.now += seconds
+    limit.record(ok=jobs <= ok)  # the completion that closes the window
+
+
+class TestAdaptiveLimit:
+    def _limit(self, initial=4, minimum=1, maximum=8):
+        clock = Clock()
+        changes = []
+        limit = AdaptiveLimit(
+            initial,
+            minimum,
+            maximum,
+            clock=clock,
+            on_change=lambda old, new, reason: changes.append((old, new, reason)),
+        )
+        return limit, clock, changes
+
+    def test_first_window_probes_up_and_gains_keep_it_climbing(self):
+        limit, clock, changes = self._limit()
+        _window(limit, clock, rate=4)
+        _window(limit, clock, rate=5)
+        _window(limit, clock, rate=6)
+        assert changes == [(4, 5, "probe"), (5, 6, "throughput up"), (6, 7, "throughput up")]
+
+    def test_a_step_up_that_costs_throughput_is_undone(self):
+        limit, clock, changes = self._limit()
+        _window(limit, clock, rate=4)
+        _window(limit, clock, rate=3)
+        assert changes[-1] == (5, 4, "throughput down")
+        # flat from here: hold, then re-probe after REPROBE windows
+        for _ in range(3):
+            _window(limit, clock, rate=3)
+        assert changes[-1] == (4, 5, "re-probe")
+
+    def test_windows_need_both_time_and_completions(self):
+        limit, clock, changes = self._limit()
+        for _ in range(50):
+            limit.record()  # fast jobs, but no time has passed
+        clock.now += 10
+        limit.record()
+        assert changes == [(4, 5, "probe")]
+
+    def test_throttle_halves_once_per_burst(self):
+        limit, clock, changes = self._limit(initial=8)
+        limit.throttled()
+        limit.throttled()
+        clock.now += 5
+        limit.throttled()
+        assert changes == [(8, 4, "throttled")]
+        assert limit.throttles == 3
+        clock.now += 10
+        limit.throttled()
+        assert limit.current == 2
+
+    def test_bounds_hold_and_snapshot_reports_the_run(self):
+        limit, clock, changes = self._limit(initial=2, minimum=2, maximum=3)
+        for rate in (2, 3, 4, 5):
+            _window(limit, clock, rate=rate)
+        limit.throttled()
+        assert limit.current == 2
+        assert limit.snapshot() == {"current": 2, "min": 2, "max": 3, "peak": 3, "throttles": 1}
+
+    def test_initial_is_clamped_and_fixed_limits_never_move(self):
+        assert AdaptiveLimit(10, 1, 4).current == 4
+        limit, clock, changes = self._limit(initial=3, minimum=3, maximum=3)
+        assert limit.fixed
+        _window(limit, clock, rate=3)
+        limit.throttled()
+        assert changes == []
+
+
+class TestRunAdaptive:
+    def test_every_job_runs_once_and_errors_come_back(self):
+        def run(n):
+            if n == 3:
+                raise ValueError("bad")
+            return n * 2
+
+        outcomes = list(run_adaptive(range(6), run, AdaptiveLimit(3, 1, 3)))
+        assert sorted(job for job, _r, _e in outcomes) == list(range(6))
+        by_job = {job: (result, error) for job, result, error in outcomes}
+        assert by_job[2] == (4, None)
+        assert isinstance(by_job[3][1], ValueError)
+
+    def test_thread_count_follows_the_limit(self):
+        limit = AdaptiveLimit(4, 1, 4, window_s=60)
+        lock = threading.Lock()
+        running = 0
+        peaks = []
+
+        def run(_job):
+            nonlocal running
+            with lock:
+                running += 1
+                peaks.append(running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        outcomes = run_adaptive(range(40), run, limit)
+        for _ in range(4):
+            next(outcomes)
+        limit.throttled()  # 4 -> 2
+        peaks.clear()
+        list(outcomes)
+        # the two surplus workers retire after the job they were running
+        assert max(peaks[4:]) <= 2
+
+    def test_stop_leaves_the_rest_of_the_queue(self):
+        ran = []
+        outcomes = run_adaptive(
+            range(20),
+            ran.append,
+            AdaptiveLimit(1),
+            stop=lambda: len(ran) >= 5,
+        )
+        assert len(list(outcomes)) == 5
+
+
+class TestLaneQueue:
+    def test_lanes_are_drained_in_priority_order(self):
+        lanes = LaneQueue(("fresh", "retry", "fallback"))
+        lanes.put("f1")
+        lanes.put("b1", "fallback")
+        lanes.put("f2", "fresh")
+        lanes.put("r1", "retry")
+        assert [lanes.take() for _ in range(5)] == ["f1", "f2", "r1", "b1", None]
+
+    def test_delayed_jobs_wait_until_due(self):
+        clock = Clock()
+        lanes = LaneQueue(("fresh", "retry"), clock=clock)
+        lanes.put("r1", "retry", delay_s=15)
+        lanes.put("f1")
+        assert lanes.take() == "f1"
+        assert lanes.take() is None
+        assert (lanes.ready(), lanes.wait_s(), len(lanes)) == (0, 15, 1)
+        assert lanes.depths() == {"fresh": 0, "retry": 1}
+        clock.now += 15
+        assert lanes.ready() == 1
+        assert lanes.take() == "r1"
+
+
+class TestLaneRuns:
+    def _retry_once(self, runner):
+        """Every job fails once and is put back with a short delay."""
+        lanes = LaneQueue(("fresh", "retry"))
+        for n in range(4):
+            lanes.put(n)
+        seen = set()
+        done = []
+        for job, _result, _error in runner(lanes):
+            if job in seen:
+                done.append(job)
+            else:
+                seen.add(job)
+                lanes.put(job, "retry", delay_s=0.05)
+        return sorted(done)
+
+    def test_pool_waits_for_delayed_jobs(self):
+        done = self._retry_once(lambda lanes: run_adaptive(lanes, lambda n: n, AdaptiveLimit(2)))
+        assert done == [0, 1, 2, 3]
+
+    def test_inline_runner_matches(self):
+        ran_on = set()
+
+        def run(n):
+            ran_on.add(threading.current_thread().name)
+            return n
+
+        assert self._retry_once(lambda lanes: run_inline(lanes, run)) == [0, 1, 2, 3]
+        assert ran_on == {threading.current_thread().name}
+
+    def test_stop_abandons_delayed_jobs(self):
+        lanes = LaneQueue(("fresh", "retry"))
+        lanes.put("later", "retry", delay_s=60)
+        started = time.monotonic()
+        assert list(run_adaptive(lanes, str, AdaptiveLimit(2), stop=lambda: True)) == []
+        assert time.monotonic() - started < 1
@@ -0,0 +1,175 @@
+"""Tests for the `sunnify serve` job daemon. No network: the warm client is a
+mock and the download/info runners are patched where a job would touch it."""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sunnify_cli as cli
+import sunnify_daemon as daemon_mod
+
+
+@pytest.fixture
+def served():
+    """A live daemon on a free localhost port; yields (daemon, port)."""
+    daemon = daemon_mod.Daemon(client=MagicMock())
+    server = daemon_mod.make_server("127.0.0.1", 0, daemon)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield daemon, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    daemon.shutdown()
+
+
+def _request(port, method, path, body=None, content_type="application/json"):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = {"Content-Type": content_type} if body is not None else {}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    resp = conn.getresponse()
+    data = resp.read().decode("utf-8")
+    conn.close()
+    return resp.status, data
+
+
+class TestValidateSpec:
+    def test_defaults_to_download_and_strips_url(self):
+        spec = daemon_mod.validate_spec({"url": "  https://open.spotify.com/track/x "})
+        assert spec["kind"] == "download"
+        assert spec["url"] == "https://open.spotify.com/track/x"
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            [],
+            {"kind": "nuke", "url": "u"},
+            {},
+            {"url": "u", "urls": ["u"]},
+            {"urls": []},
+            {"url": "u", "settings": {"format": "aiff"}},
+            {"url": "u", "settings": {"download_path": "/tmp"}},
+        ],
+    )
+    def test_rejects_malformed_jobs(self, spec):
+        with pytest.raises(ValueError):
+            daemon_mod.validate_spec(spec)
+
+    def test_settings_become_cli_flag_attributes(self):
+        args = daemon_mod._job_args({"url": "u", "settings": {"format": "flac"}})
+        assert args.format == "flac"
+        assert args.quality is None  # unset falls through to saved config
+        assert args.json is True
+
+
+class TestJobStream:
+    def test_follow_replays_then_ends_with_the_job(self):
+        job = daemon_mod.Job("j1", "info", {})
+        job.push({"event": "a"})
+        seen = []
+
+        def consume():
+            seen.extend(e["event"] for e in job.follow())
+
+        reader = threading.Thread(target=consume)
+        reader.start()
+        job.push({"event": "b"})
+        job.finish("done", 0)
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+        assert seen == ["a", "b"]
+
+
+class TestHttpApi:
+    def test_health(self, served):
+        _, port = served
+        status, body = _request(port, "GET", "/health")
+        assert status == 200
+        assert json.loads(body)["status"] == "ok"
+
+    def test_metrics(self, served):
+        _, port = served
+        status, body = _request(port, "GET", "/metrics")
+        assert status == 200
+        assert "# TYPE sunnify_spotify_requests counter" in body
+        assert body.endswith("# EOF\n")
+
+    def test_post_requires_json_content_type(self, served):
+        _, port = served
+        status, body = _request(port, "POST", "/jobs", {"url": "u"}, content_type="text/plain")
+        assert status == 415
+        assert json.loads(body)["code"] == "unsupported_media_type"
+
+    def test_invalid_job_is_typed_400(self, served):
+        _, port = served
+        status, body = _request(port, "POST", "/jobs", {"kind": "nuke"})
+        assert status == 400
+        assert json.loads(body)["code"] == "invalid_job"
+
+    def test_unknown_job_is_404(self, served):
+        _, port = served
+        status, _ = _request(port, "GET", "/jobs/j999/events")
+        assert status == 404
+
+    def test_info_job_streams_ndjson_events(self, served):
+        daemon, port = served
+
+        def fake_batch(urls, emitter, client):
+            assert client is daemon.client  # the warm client, not a fresh one
+            emitter.event("resolved", index=0, url=urls[0], type="track", id="x")
+            emitter.event("batch_summary", urls=1, resolved=1, failed=0)
+            return cli.EXIT_OK
+
+        with patch.object(cli, "_run_info_batch", side_effect=fake_batch):
+            status, body = _request(port, "POST", "/jobs", {"kind": "info", "url": "u"})
+            assert status == 202
+            job_id = json.loads(body)["id"]
+            status, body = _request(port, "GET", f"/jobs/{job_id}/events")
+        assert status == 200
+        events = [json.loads(line)["event"] for line in body.splitlines()]
+        assert events == ["resolved", "batch_summary"]
+        assert json.loads(_request(port, "GET", f"/jobs/{job_id}")[1])["status"] == "done"
+
+    def test_download_jobs_run_serially_with_warm_client(self, served):
+        daemon, port = served
+        gate = threading.Event()
+        calls = []
+
+        def fake_run(args, urls, emitter, cancel_event, *, client, foreground):
+            calls.append((args.url, client is daemon.client, foreground))
+            if len(calls) == 1:
+                gate.wait(timeout=5)
+            emitter.event("run_summary", exit_code=0)
+            return cli.EXIT_OK
+
+        with patch.object(cli, "_run_download", side_effect=fake_run):
+            first = json.loads(_request(port, "POST", "/jobs", {"url": "u1"})[1])["id"]
+            second = json.loads(_request(port, "POST", "/jobs", {"url": "u2"})[1])["id"]
+            # second is still queued behind the first
+            assert json.loads(_request(port, "GET", f"/jobs/{second}")[1])["status"] == "queued"
+            gate.set()
+            _request(port, "GET", f"/jobs/{second}/events")
+        assert calls == [("u1", True, False), ("u2", True, False)]
+        assert daemon.get(first).status == "done"
+
+    def test_cancelled_queued_job_never_starts(self, served):
+        daemon, port = served
+        gate = threading.Event()
+        run = MagicMock(side_effect=lambda *_a, **_k: gate.wait(timeout=5) and cli.EXIT_OK)
+        with patch.object(cli, "_run_download", run):
+            _request(port, "POST", "/jobs", {"url": "u1"})
+            queued = json.loads(_request(port, "POST", "/jobs", {"url": "u2"})[1])["id"]
+            status, _ = _request(port, "POST", f"/jobs/{queued}/cancel", {})
+            assert status == 200
+            gate.set()
+            _request(port, "GET", f"/jobs/{queued}/events")
+        assert daemon.get(queued).status == "cancelled"
+        assert run.call_count == 1
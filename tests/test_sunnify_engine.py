@@ -0,0 +1,944 @@
+"""Tests for the Qt-free download engine: event plumbing, the match scorer's
+golden corpus, the search prefetch stage, yt-dlp instance reuse, the
+stream-copy format path, streaming transcodes, crash-safe finalization,
+repair downloads, retry/fallback lanes, stage timings, and proof that the engine runs without PyQt6. Matcher policy cases, naming,
+manifest and scrape paths are covered through the GUI's MusicScraper adapter
+in test_spotify_downloader."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sunnify_engine as engine_mod
+from spotifydown_api import TrackInfo
+from sunnify_engine import (
+    DownloadEngine,
+    EventBus,
+    EventQueue,
+    RetryableTrackError,
+    score_candidates,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MATCH_CORPUS = os.path.join(REPO_ROOT, "tests", "data", "match_corpus.json")
+
+
+class TestEventBus:
+    def test_named_and_wildcard_subscribers(self):
+        bus = EventBus()
+        named, everything = [], []
+        bus.subscribe("count", named.append)
+        bus.subscribe("*", lambda name, payload: everything.append((name, payload)))
+        bus.emit("count", 3)
+        bus.emit("album", "A")
+        assert named == [3]
+        assert everything == [("count", 3), ("album", "A")]
+
+    def test_unknown_event_is_rejected(self):
+        with pytest.raises(ValueError):
+            EventBus().subscribe("song_meta", print)
+
+    def test_failing_subscriber_does_not_stop_the_rest(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe("message", MagicMock(side_effect=RuntimeError("boom")))
+        bus.subscribe("message", seen.append)
+        bus.emit("message", "hi")
+        assert seen == ["hi"]
+
+    def test_unsubscribe(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe("count", seen.append)
+        bus.unsubscribe("count", seen.append)
+        bus.emit("count", 1)
+        assert seen == []
+
+
+class TestEventQueue:
+    def test_drains_across_threads_then_stops_at_close(self):
+        bus = EventBus()
+        events = EventQueue(bus)
+
+        def produce():
+            for i in range(50):
+                bus.emit("count", i)
+            events.close()
+
+        threading.Thread(target=produce).start()
+        assert [payload for _name, payload in events] == list(range(50))
+        assert events.get() is None  # stays closed
+
+
+class TestDownloadEngine:
+    def test_iter_events_streams_a_run_on_the_callers_thread(self):
+        engine = DownloadEngine()
+
+        def fake_download(link, folder):
+            engine._emit("album", link)
+            engine._emit("completed", "Download Complete!")
+
+        engine.download = fake_download
+        events = list(engine.iter_events("https://open.spotify.com/playlist/x", "/tmp"))
+        assert events == [
+            ("album", "https://open.spotify.com/playlist/x"),
+            ("completed", "Download Complete!"),
+        ]
+        engine._emit("count", 1)  # the run's queue unsubscribed when it ended
+
+    def test_iter_events_reports_a_crashed_run(self):
+        engine = DownloadEngine()
+        engine.download = MagicMock(side_effect=ValueError("Expected a track URL"))
+        assert list(engine.iter_events("u", "/tmp")) == [("completed", "Expected a track URL")]
+
+    def test_download_dispatches_on_link_shape(self):
+        engine = DownloadEngine()
+        engine.scrape_track = MagicMock()
+        engine.scrape_playlist = MagicMock()
+        engine.scrape_many = MagicMock()
+        engine.download("https://open.spotify.com/track/abc", "/m")
+        engine.download("https://open.spotify.com/album/abc", "/m")
+        engine.download(("a", "b"), "/m")
+        engine.scrape_track.assert_called_once()
+        engine.scrape_playlist.assert_called_once()
+        engine.scrape_many.assert_called_once_with(["a", "b"], "/m")
+
+    def test_engine_import_does_not_load_qt(self):
+        code = "import sys, sunnify_engine; print('PyQt6' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_ROOT
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "False"
+
+
+def _load_corpus():
+    with open(MATCH_CORPUS, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class TestMatchScoring:
+    def test_golden_corpus_selection_is_unchanged(self):
+        """Outputs recorded from the pre-scorer matcher (per-candidate
+        filters) over 300 searches: the #52 accept/reject policy must not move."""
+        mismatches = []
+        for n, case in enumerate(_load_corpus()):
+            engine = DownloadEngine(loose_match=case["loose_match"])
+            ydl = MagicMock()
+            ydl.__enter__.return_value.extract_info.return_value = {"entries": case["entries"]}
+            with patch("sunnify_engine.YoutubeDL", return_value=ydl):
+                url = engine._select_youtube_match(
+                    "ytsearch5:q",
+                    case["expected_duration_s"],
+                    expected_title=case["expected_title"],
+                    expected_artists=case["expected_artists"],
+                )
+            if url != case["expected"]:
+                mismatches.append((n, case["expected_title"], case["expected"], url))
+        assert not mismatches
+
+    def test_ranks_title_then_artist_then_duration(self):
+        entries = [
+            {"id": "a", "title": "Other Song", "duration": 200},
+            {"id": "b", "title": "Mi Gente (cover)", "duration": 189},
+            {"id": "c", "title": "J Balvin - Mi Gente", "duration": 260},
+            {"id": "d", "title": "J Balvin - Mi Gente (Official)", "duration": 191},
+        ]
+        ranked = score_candidates(entries, "Mi Gente", "J Balvin, Willy William", 189)
+        assert [c.entry["id"] for c in ranked] == ["d", "c", "b", "a"]
+        assert ranked[0].duration_off == 2
+        assert not ranked[-1].title_ok
+
+    def test_normalization_is_cached(self):
+        engine_mod._normalize_title.cache_clear()
+        for _ in range(3):
+            engine_mod._normalize_title("The Weeknd - Blinding Lights (Official Video)")
+        assert engine_mod._normalize_title.cache_info().hits == 2
+
+
+def _track(n: int) -> TrackInfo:
+    return TrackInfo(
+        id=f"t{n}",
+        title=f"Song {n}",
+        artists="Artist",
+        album=None,
+        release_date=None,
+        cover_url=None,
+        duration_ms=200_000,
+        preview_url=None,
+        raw={},
+    )
+
+
+class TestSearchPrefetch:
+    def _prefetcher(self, engine, tracks, ahead=3):
+        jobs = [(t, "/nowhere", n, True) for n, t in enumerate(tracks, start=1)]
+        return engine_mod._SearchPrefetcher(engine, jobs, ahead=ahead, workers=2)
+
+    def test_look_ahead_stays_bounded(self):
+        engine = DownloadEngine()
+        searched = []
+        engine._prefetch_match = lambda track, *_: searched.append(track.id) or {"q": track.id}
+        tracks = [_track(n) for n in range(10)]
+        prefetcher = self._prefetcher(engine, tracks)
+        try:
+            prefetcher._pool.shutdown(wait=True)  # let the window settle
+            assert searched == ["t0", "t1", "t2"]
+        finally:
+            prefetcher.close()
+
+    def test_take_slides_the_window_and_returns_the_match(self):
+        engine = DownloadEngine()
+        searched = []
+        engine._prefetch_match = lambda track, *_: searched.append(track.id) or {"q": track.id}
+        tracks = [_track(n) for n in range(10)]
+        prefetcher = self._prefetcher(engine, tracks)
+        try:
+            # t0 may still be queued behind the pool; either way the window
+            # now reaches three tracks past it
+            result = prefetcher.take(tracks[0])
+            assert result in ({"q": "t0"}, None)
+            prefetcher.take(tracks[1])
+            prefetcher._pool.shutdown(wait=True)
+            assert set(searched) <= {f"t{n}" for n in range(5)}
+            assert "t4" in searched
+            assert prefetcher.take(_track(99)) is None  # not in this queue
+        finally:
+            prefetcher.close()
+
+    def test_unstarted_search_is_left_to_the_worker(self):
+        engine = DownloadEngine()
+        gate = threading.Event()
+        engine._prefetch_match = lambda track, *_: gate.wait(5) and {"q": track.id}
+        tracks = [_track(n) for n in range(6)]
+        prefetcher = self._prefetcher(engine, tracks, ahead=4)
+        try:
+            # two pool threads are parked on t0/t1, so t3 has not started
+            assert prefetcher.take(tracks[3]) is None
+            assert prefetcher.misses == 1
+        finally:
+            gate.set()
+            prefetcher.close()
+
+    def test_prefetch_skips_tracks_already_on_disk(self, tmp_path):
+        engine = DownloadEngine()
+        track = _track(1)
+        open(engine._track_path(track, str(tmp_path), 1, True), "wb").close()
+        engine._select_youtube_match = MagicMock()
+        assert engine._prefetch_match(track, str(tmp_path), 1, True) == {}
+        engine._select_youtube_match.assert_not_called()
+
+    def test_download_uses_prefetched_url_without_searching(self, tmp_path, silent_mp3):
+        engine = DownloadEngine()
+        engine._select_youtube_match = MagicMock(return_value=None)
+        dest = str(tmp_path / "Song - Artist.mp3")
+        query = "ytsearch1:Song Artist audio"
+        seen = []
+
+        class FakeYDL:
+            def __init__(self, opts):
+                self.opts = opts
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *_exc):
+                return False
+
+            def extract_info(self, url, download=False):
+                seen.append(url)
+                with open(self.opts["outtmpl"]["default"].replace("%(ext)s", "mp3"), "wb") as fh:
+                    fh.write(silent_mp3())
+
+        with (
+            patch("sunnify_engine.get_ffmpeg_path", return_value="/usr/bin/ffmpeg"),
+            patch("sunnify_engine.YoutubeDL", FakeYDL),
+        ):
+            path = engine.download_track_audio(
+                query, dest, prefetched={engine._widen_search(query): "https://yt/v"}
+            )
+        assert path == str(tmp_path / "Song - Artist.partial.mp3")
+        assert seen == ["https://yt/v"]
+        engine._select_youtube_match.assert_not_called()
+
+
+class _RecordingYDL:
+    """Stands in for YoutubeDL: keeps the params dict it was built with."""
+
+    built: list = []
+
+    def __init__(self, params):
+        self.params = params
+        self.closed = False
+        _RecordingYDL.built.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.closed = True
+        return False
+
+
+class TestYtdlpPool:
+    @pytest.fixture(autouse=True)
+    def _fake_ydl(self):
+        _RecordingYDL.built = []
+        with patch("sunnify_engine.YoutubeDL", _RecordingYDL):
+            yield
+
+    def test_one_instance_per_thread_and_option_set(self):
+        pool = engine_mod._YtdlpPool()
+        search = pool.get({"quiet": True})
+        assert pool.get({"quiet": True}) is search
+        assert pool.get({"quiet": True, "format": "bestaudio"}) is not search
+        other = []
+        worker = threading.Thread(target=lambda: other.append(pool.get({"quiet": True})))
+        worker.start()
+        worker.join()
+        assert other[0] is not search
+        assert pool.created == 3
+
+    def test_an_exited_threads_instances_go_to_the_next_thread(self):
+        pool = engine_mod._YtdlpPool()
+        got = []
+
+        def worker(outtmpl):
+            got.append(pool.get({"quiet": True}, outtmpl=outtmpl))
+
+        for n in range(3):  # one worker after another, as the pool resizes
+            thread = threading.Thread(target=worker, args=(f"/a/{n}.%(ext)s",))
+            thread.start()
+            thread.join()
+        assert got[0] is got[1] is got[2]
+        assert got[2].params["outtmpl"]["default"] == "/a/2.%(ext)s"
+        assert pool.created == 1
+
+    def test_reuse_rebinds_logger_and_output_template(self):
+        pool = engine_mod._YtdlpPool()
+        first, second = object(), object()
+        ydl = pool.get({"quiet": True}, logger=first, outtmpl="/a/one.%(ext)s")
+        assert ydl.params["outtmpl"] == {"default": "/a/one.%(ext)s"}
+        assert pool.get({"quiet": True}, logger=second, outtmpl="/a/two.%(ext)s") is ydl
+        assert ydl.params["logger"] is second
+        assert ydl.params["outtmpl"]["default"] == "/a/two.%(ext)s"
+
+    def test_close_exits_and_retires_instances(self):
+        pool = engine_mod._YtdlpPool()
+        ydl = pool.get({"quiet": True})
+        pool.close()
+        assert ydl.closed
+        assert pool.get({"quiet": True}) is not ydl
+
+    def test_download_closes_the_pool_after_a_run(self):
+        engine = DownloadEngine()
+        engine.scrape_track = MagicMock(side_effect=lambda *_: engine._ytdlp.get({"q": 1}))
+        engine.download("https://open.spotify.com/track/abc", "/m")
+        assert _RecordingYDL.built[0].closed
+
+
+class TestStreamCopyPath:
+    @pytest.fixture(autouse=True)
+    def _audio(self, silent_mp3):
+        self.audio = silent_mp3()
+
+    def _download(self, engine, tmp_path, acodec):
+        """Run download_track_audio against a fake yt-dlp that fires the
+        ExtractAudio hooks the way FFmpegExtractAudioPP does."""
+        built = []
+        audio = self.audio
+
+        class FakeYDL:
+            def __init__(self, params):
+                self.params = params
+                built.append(params)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *_exc):
+                return False
+
+            def extract_info(self, url, download=False):
+                ext = engine.audio_format
+                (hook,) = self.params["postprocessor_hooks"]
+                info = {"id": "v", "acodec": acodec}
+                hook({"status": "started", "postprocessor": "ExtractAudio", "info_dict": info})
+                with open(self.params["outtmpl"]["default"].replace("%(ext)s", ext), "wb") as fh:
+                    fh.write(audio)
+                hook({"status": "finished", "postprocessor": "ExtractAudio", "info_dict": info})
+
+        engine._select_youtube_match = MagicMock(return_value="https://www.youtube.com/watch?v=v")
+        with (
+            patch("sunnify_engine.YoutubeDL", FakeYDL),
+            patch("sunnify_engine.get_ffmpeg_path", return_value=str(tmp_path)),
+        ):
+            engine.download_track_audio("ytsearch1:Song Artist audio", str(tmp_path / "s.mp3"))
+        return built[0], engine.take_audio_report()
+
+    def test_m4a_prefers_the_aac_stream_and_reports_a_copy(self, tmp_path):
+        opts, report = self._download(DownloadEngine(audio_format="m4a"), tmp_path, "mp4a.40.2")
+        assert opts["format"] == "bestaudio[acodec^=mp4a]/bestaudio/best"
+        assert report["audio_path"] == "copy"
+        assert report["source_codec"] == "mp4a"
+        assert report["postprocess_ms"] >= 0
+
+    def test_mp3_transcodes_whatever_youtube_serves(self, tmp_path):
+        opts, report = self._download(DownloadEngine(audio_format="mp3"), tmp_path, "opus")
+        assert opts["format"] == "bestaudio/best"
+        assert report["audio_path"] == "transcode"
+
+    def test_report_is_taken_once(self, tmp_path):
+        engine = DownloadEngine(audio_format="opus")
+        _, report = self._download(engine, tmp_path, "opus")
+        assert report["audio_path"] == "copy"
+        assert engine.take_audio_report() == {}
+
+    @pytest.mark.parametrize(
+        ("fmt", "codec", "path"),
+        [
+            ("m4a", "mp4a.40.2", "copy"),
+            ("m4a", "opus", "transcode"),
+            ("opus", "opus", "copy"),
+            ("flac", "opus", "transcode"),
+        ],
+    )
+    def test_audio_path_follows_ytdlp_copy_rule(self, fmt, codec, path):
+        assert engine_mod._audio_path(fmt, codec) == path
+
+
+# Stands in for ffmpeg in streaming tests: records argv, copies stdin to the
+# output path (the last argument), and exits with $FAKE_FFMPEG_EXIT.
+_FAKE_FFMPEG = """#!{python}
+import json, os, sys
+with open(os.path.join(os.path.dirname(sys.argv[0]), "argv.json"), "w") as fh:
+    json.dump(sys.argv[1:], fh)
+data = sys.stdin.buffer.read()
+code = int(os.environ.get("FAKE_FFMPEG_EXIT", "0"))
+if code == 0:
+    with open(sys.argv[-1], "wb") as out:
+        out.write(data)
+sys.exit(code)
+"""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the ffmpeg stand-in is a shebang script")
+class TestStreamTranscode:
+    @pytest.fixture
+    def ffmpeg_dir(self, tmp_path):
+        tool = tmp_path / "bin" / "ffmpeg"
+        tool.parent.mkdir()
+        tool.write_text(_FAKE_FFMPEG.format(python=sys.executable))
+        tool.chmod(0o755)
+        return tool.parent
+
+    @pytest.fixture(autouse=True)
+    def _audio(self, silent_mp3):
+        self.body = silent_mp3()
+
+    def _run(self, tmp_path, ffmpeg_dir, info, cancel_after=None):
+        body = self.body
+        cancel = threading.Event()
+        engine = DownloadEngine(
+            audio_format="mp3", audio_quality="256", stream_transcode=True, cancel_event=cancel
+        )
+        ranges = []
+
+        def get(url, headers=None, **_kw):
+            first, last = (int(n) for n in headers["Range"][len("bytes=") :].split("-"))
+            ranges.append((first, last))
+            if len(ranges) == cancel_after:
+                cancel.set()
+            response = MagicMock(status_code=206 if first < len(body) else 416)
+            response.iter_content.return_value = [body[first : last + 1]]
+            return response
+
+        engine.session = MagicMock()
+        engine.session.get.side_effect = get
+        downloads = []
+
+        class FakeYDL:
+            def __init__(self, params):
+                self.params = params
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *_exc):
+                return False
+
+            def extract_info(self, url, download=False):
+                if download:
+                    downloads.append(("extract_info", url))
+                return info
+
+            def process_ie_result(self, resolved, download=True):
+                downloads.append(("process_ie_result", resolved["url"]))
+                with open(self.params["outtmpl"]["default"].replace("%(ext)s", "mp3"), "wb") as fh:
+                    fh.write(body)
+
+        engine._select_youtube_match = MagicMock(return_value="https://www.youtube.com/watch?v=v")
+        dest = tmp_path / "Song - Artist.mp3"
+        with (
+            patch("sunnify_engine.YoutubeDL", FakeYDL),
+            patch("sunnify_engine.get_ffmpeg_path", return_value=str(ffmpeg_dir)),
+            patch("sunnify_engine._STREAM_CHUNK", 4096),
+        ):
+            path = engine.download_track_audio("ytsearch1:Song Artist audio", str(dest))
+        return engine, path, ranges, downloads
+
+    def test_pipes_ranged_chunks_through_ffmpeg_into_place(self, tmp_path, ffmpeg_dir):
+        info = {"url": "https://rr.googlevideo/x", "protocol": "https", "acodec": "opus"}
+        engine, path, ranges, downloads = self._run(tmp_path, ffmpeg_dir, info)
+        assert path == str(tmp_path / "Song - Artist.partial.mp3")
+        with open(path, "rb") as fh:
+            assert fh.read() == self.body
+        assert not os.path.exists(path + ".part")
+        assert ranges == [(0, 4095), (4096, 8191), (8192, 12287), (12288, 16383)]
+        assert downloads == []  # yt-dlp never wrote the source
+        argv = json.loads((ffmpeg_dir / "argv.json").read_text())
+        assert argv[argv.index("-c:a") + 1] == "libmp3lame"
+        assert argv[argv.index("-b:a") + 1] == "256k"
+        assert argv[-1] == path + ".part"
+        report = engine.take_audio_report()
+        assert (report["streamed"], report["audio_path"]) == (True, "transcode")
+
+    def test_fragmented_formats_use_the_ytdlp_download(self, tmp_path, ffmpeg_dir):
+        info = {"url": "https://x/manifest", "protocol": "http_dash_segments", "acodec": "opus"}
+        _engine, path, ranges, downloads = self._run(tmp_path, ffmpeg_dir, info)
+        assert ranges == []
+        # the info already resolved is downloaded, not extracted a second time
+        assert downloads == [("process_ie_result", "https://x/manifest")]
+        assert os.path.exists(path)
+
+    def test_ffmpeg_failure_leaves_no_partial_and_falls_back(
+        self, tmp_path, ffmpeg_dir, monkeypatch
+    ):
+        monkeypatch.setenv("FAKE_FFMPEG_EXIT", "1")
+        info = {"url": "https://rr.googlevideo/x", "protocol": "https", "acodec": "opus"}
+        _engine, path, _ranges, downloads = self._run(tmp_path, ffmpeg_dir, info)
+        assert not os.path.exists(path + ".part")
+        assert downloads == [("process_ie_result", "https://rr.googlevideo/x")]
+
+    def test_cancel_mid_stream_does_not_fall_back(self, tmp_path, ffmpeg_dir):
+        info = {"url": "https://rr.googlevideo/x", "protocol": "https", "acodec": "opus"}
+        _engine, path, ranges, downloads = self._run(tmp_path, ffmpeg_dir, info, cancel_after=2)
+        assert path is None
+        assert len(ranges) == 2
+        assert downloads == []  # no yt-dlp download after the cancel
+        assert [name for name in os.listdir(tmp_path) if name.startswith("Song")] == []
+
+
+class TestFinalize:
+    """Downloads land under .partial names and only take the real name once
+    verified, tagged and renamed; the manifest records them after that."""
+
+    def _engine(self, tmp_path, audio, **opts):
+        engine = DownloadEngine(**opts)
+        engine._load_manifest(str(tmp_path))
+
+        def land(_q, d, **_kw):
+            landed = os.path.splitext(d)[0] + ".partial.mp3"
+            with open(landed, "wb") as fh:
+                fh.write(audio)
+            return landed
+
+        engine.download_track_audio = land
+        return engine
+
+    def test_track_is_tagged_then_renamed_then_recorded(self, tmp_path, silent_mp3):
+        engine = self._engine(tmp_path, silent_mp3(), embed_tags=True)
+        ready = []
+        engine.events.subscribe("track_ready", ready.append)
+        tagged = []
+        with patch(
+            "sunnify_engine.write_tags", side_effect=lambda _m, f, **_kw: tagged.append(f) or "ok"
+        ):
+            assert engine._download_one_track(_track(1), str(tmp_path), "", 1) is None
+        final = engine._track_path(_track(1), str(tmp_path), 1)
+        assert tagged == [os.path.splitext(final)[0] + ".partial.mp3"]
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            [os.path.basename(final), engine_mod.MANIFEST_FILENAME]
+        )
+        assert ready[0]["file"] == final and ready[0]["tagged"] is True
+        assert DownloadEngine()._load_manifest(str(tmp_path)) == {"t1"}
+
+    def test_failed_tag_write_fails_the_track(self, tmp_path, silent_mp3):
+        engine = self._engine(tmp_path, silent_mp3(), embed_tags=True)
+        with patch("sunnify_engine.write_tags", return_value=None):
+            assert engine._download_one_track(_track(1), str(tmp_path), "", 1) == "Song 1"
+        assert os.listdir(tmp_path) == []
+        assert DownloadEngine()._load_manifest(str(tmp_path)) == set()
+
+    def test_untagged_runs_leave_tagging_to_the_subscriber(self, tmp_path, silent_mp3):
+        engine = self._engine(tmp_path, silent_mp3())
+        ready = []
+        engine.events.subscribe("track_ready", ready.append)
+        with patch("sunnify_engine.write_tags") as write:
+            engine._download_one_track(_track(1), str(tmp_path), "", 1)
+        write.assert_not_called()
+        assert "tagged" not in ready[0]
+        assert os.path.exists(ready[0]["file"])
+
+    def test_cut_off_audio_is_rejected(self, tmp_path, silent_mp3):
+        path = tmp_path / "a.partial.mp3"
+        engine = DownloadEngine()
+        path.write_bytes(silent_mp3(100))
+        assert engine._check_landed(str(path), 110) is None
+        assert "100s of an expected 200s" in engine._check_landed(str(path), 200)
+        path.write_bytes(b"")
+        assert engine._check_landed(str(path), 200) == "empty file"
+        path.write_bytes(b"not audio")
+        assert engine._check_landed(str(path), 200).startswith("unreadable audio")
+
+    def test_sweep_removes_only_partials(self, tmp_path):
+        for name in (
+            "01. A - B.partial.mp3",
+            "01. A - B.partial.webm.part",
+            "02. C - D.partial.mp3.part",
+            "02. C - D.mp3",
+            engine_mod.MANIFEST_FILENAME,
+        ):
+            (tmp_path / name).write_bytes(b"x")
+        (tmp_path / "sub.partial.d").mkdir()
+        assert engine_mod.sweep_partials(str(tmp_path)) == 3
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            ["02. C - D.mp3", engine_mod.MANIFEST_FILENAME, "sub.partial.d"]
+        )
+
+    def test_sweep_settles_files_a_killed_repair_moved_aside(self, tmp_path):
+        (tmp_path / "01. A - B.mp3.repair").write_bytes(b"old")
+        (tmp_path / "02. C - D.mp3.repair").write_bytes(b"old")
+        (tmp_path / "02. C - D.mp3").write_bytes(b"repaired")
+        assert engine_mod.sweep_partials(str(tmp_path)) == 0
+        assert sorted(os.listdir(tmp_path)) == ["01. A - B.mp3", "02. C - D.mp3"]
+        assert (tmp_path / "01. A - B.mp3").read_bytes() == b"old"
+        assert (tmp_path / "02. C - D.mp3").read_bytes() == b"repaired"
+
+
+class TestDownloadTracks:
+    """`sunnify repair`'s engine entry: known tracks, no enumeration, the
+    broken file kept until its replacement lands."""
+
+    def _jobs(self, engine, tmp_path, n=1):
+        jobs = []
+        for i in range(1, n + 1):
+            old = engine._track_path(_track(i), str(tmp_path), i)
+            with open(old, "wb") as fh:
+                fh.write(b"broken")
+            jobs.append((_track(i), str(tmp_path), i, old))
+        return jobs
+
+    def test_replacement_lands_under_the_same_name(self, tmp_path, silent_mp3):
+        engine = DownloadEngine()
+        engine.ensure_spotifydown_api = MagicMock(side_effect=AssertionError("no enumeration"))
+
+        def land(_q, d, **_kw):
+            landed = os.path.splitext(d)[0] + ".partial.mp3"
+            with open(landed, "wb") as fh:
+                fh.write(silent_mp3())
+            return landed
+
+        engine.download_track_audio = land
+        jobs = self._jobs(engine, tmp_path, n=3)
+        engine.download_tracks(jobs)
+        for _track_info, _folder, _num, old in jobs:
+            assert os.path.getsize(old) > len(b"broken")
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            [os.path.basename(job[3]) for job in jobs] + [engine_mod.MANIFEST_FILENAME]
+        )
+        with open(tmp_path / engine_mod.MANIFEST_FILENAME, encoding="utf-8") as fh:
+            records = sorted((json.loads(line) for line in fh), key=lambda r: r["id"])
+        assert records[0] == {
+            "id": "t1",
+            "file": os.path.basename(jobs[0][3]),
+            "duration_ms": 200_000,
+            "title": "Song 1",
+            "artists": "Artist",
+            "number": 1,
+        }
+
+    def test_a_track_without_a_number_keeps_its_unnumbered_name(self, tmp_path, silent_mp3):
+        engine = DownloadEngine()
+
+        def land(_q, d, **_kw):
+            landed = os.path.splitext(d)[0] + ".partial.mp3"
+            with open(landed, "wb") as fh:
+                fh.write(silent_mp3())
+            return landed
+
+        engine.download_track_audio = land
+        old = tmp_path / "Song 1 - Artist.mp3"
+        old.write_bytes(b"broken")
+        engine.download_tracks([(_track(1), str(tmp_path), None, str(old))])
+        assert sorted(os.listdir(tmp_path)) == [engine_mod.MANIFEST_FILENAME, old.name]
+        assert os.path.getsize(old) > len(b"broken")
+
+    def test_failed_repair_puts_the_old_file_back(self, tmp_path):
+        engine = DownloadEngine()
+        engine.download_track_audio = MagicMock(side_effect=RuntimeError("no match"))
+        jobs = self._jobs(engine, tmp_path)
+        completed = []
+        engine.events.subscribe("completed", completed.append)
+        engine.download_tracks(jobs)
+        with open(jobs[0][3], "rb") as fh:
+            assert fh.read() == b"broken"
+        assert engine._failed_tracks == ["Song 1"]
+        assert completed == ["Done! 1 track(s) failed"]
+
+    def test_a_crashed_repair_puts_the_old_file_back(self, tmp_path):
+        engine = DownloadEngine()
+        engine._download_one_track = MagicMock(side_effect=RuntimeError("worker crashed"))
+        jobs = self._jobs(engine, tmp_path)
+        engine.download_tracks(jobs)
+        with open(jobs[0][3], "rb") as fh:
+            assert fh.read() == b"broken"
+        assert not os.path.exists(jobs[0][3] + engine_mod.REPAIR_MARK)
+
+    def test_throttling_backs_the_pool_off(self, tmp_path):
+        engine = DownloadEngine(concurrency=4, concurrency_max=4)
+        changes = []
+        engine.events.subscribe("concurrency", changes.append)
+
+        def throttled(_q, _d, **_kw):
+            engine._throttled()  # what a 429 / bot challenge inside yt-dlp triggers
+            return None
+
+        engine.download_track_audio = throttled
+        engine.download_tracks(self._jobs(engine, tmp_path, n=4))
+        assert changes[0] == {
+            "pool": "download",
+            "previous": 4,
+            "current": 2,
+            "reason": "throttled",
+            "min": 1,
+            "max": 4,
+        }
+        assert engine.pool_stats["throttles"] >= 1
+        assert engine._limit is None
+
+
+class TestLanes:
+    """Pooled runs: transient failures wait in the retry lane, a track whose
+    widened search found nothing falls back to the simplified query after
+    the fresh work, and shortest_first reorders the fresh lane."""
+
+    def _engine(self, tmp_path, outcomes, **opts):
+        """An engine whose downloads follow `outcomes` (track id -> list of
+        RetryableTrackError | "land"), recording (id, queries) per attempt."""
+        engine = DownloadEngine(**opts)
+        engine.RETRY_DELAYS_S = (0.01,)
+        engine.PREFETCH_AHEAD = 0
+        attempts = []
+
+        def download(_q, dest, queries="both", **_kw):
+            track_id = next(t for t in outcomes if f"Song {t[1:]} " in os.path.basename(dest))
+            attempts.append((track_id, queries))
+            outcome = outcomes[track_id].pop(0)
+            if outcome != "land":
+                raise outcome
+            landed = os.path.splitext(dest)[0] + ".partial.mp3"
+            with open(landed, "wb") as fh:
+                fh.write(b"audio")
+            return landed
+
+        engine.download_track_audio = download
+        engine._check_landed = lambda *_a: None
+        return engine, attempts
+
+    def _run(self, engine, tmp_path, n):
+        engine.download_tracks([(_track(i), str(tmp_path), i, None) for i in range(1, n + 1)])
+
+    def test_transient_failure_is_retried_after_a_delay(self, tmp_path):
+        busy = RetryableTrackError("HTTP Error 429", transient=True, fallback=False)
+        engine, attempts = self._engine(
+            tmp_path, {"t1": [busy, "land"], "t2": ["land"], "t3": ["land"]}
+        )
+        lanes = []
+        engine.events.subscribe("lanes", lanes.append)
+        self._run(engine, tmp_path, 3)
+        assert [a[0] for a in attempts].count("t1") == 2
+        assert engine._failed_tracks == []
+        assert engine.requeued == {"retry": 1}
+        requeued = next(e for e in lanes if "requeued" in e)
+        assert requeued["requeued"]["lane"] == "retry"
+        assert requeued["retry"] == 1
+        assert lanes[-1] == {"fresh": 0, "retry": 0, "fallback": 0}
+
+    def test_fallback_lane_runs_after_the_fresh_work(self, tmp_path):
+        nothing = RetryableTrackError("no match", transient=False, fallback=True)
+        engine, attempts = self._engine(
+            tmp_path,
+            {"t1": [nothing, "land"], "t2": ["land"], "t3": ["land"]},
+            concurrency=1,
+            concurrency_max=1,
+        )
+        self._run(engine, tmp_path, 3)
+        assert attempts == [
+            ("t1", "widened"),
+            ("t2", "widened"),
+            ("t3", "widened"),
+            ("t1", "simplified"),
+        ]
+        assert engine._failed_tracks == []
+
+    def test_a_track_out_of_lanes_fails(self, tmp_path):
+        busy = RetryableTrackError("timed out", transient=True, fallback=False)
+        engine, attempts = self._engine(tmp_path, {"t1": [busy, busy]})
+        self._run(engine, tmp_path, 1)
+        assert attempts == [("t1", "widened"), ("t1", "widened")]
+        assert engine._failed_tracks == ["Song 1"]
+
+    def test_shortest_first_orders_the_fresh_lane(self, tmp_path):
+        engine, attempts = self._engine(
+            tmp_path,
+            {"t1": ["land"], "t2": ["land"], "t3": ["land"]},
+            concurrency=1,
+            concurrency_max=1,
+            shortest_first=True,
+        )
+        tracks = [_track(i) for i in (1, 2, 3)]
+        tracks[0].duration_ms, tracks[1].duration_ms, tracks[2].duration_ms = None, 300_000, 90_000
+        engine.download_tracks([(t, str(tmp_path), i, None) for i, t in enumerate(tracks, 1)])
+        assert [a[0] for a in attempts] == ["t3", "t2", "t1"]
+
+    def _search(self, engine, reported_error=None):
+        class EmptySearchYDL:
+            def __init__(self, params):
+                self.params = params
+
+            def __enter__(self):
+                return self
+
+            def extract_info(self, url, download=False):
+                if reported_error:  # what ignoreerrors leaves of a failed search
+                    self.params["logger"].error(reported_error)
+                return {"entries": []}
+
+        with patch("sunnify_engine.YoutubeDL", EmptySearchYDL):
+            return engine._select_youtube_match("ytsearch5:Obscure Song audio", 200)
+
+    def test_an_empty_search_is_a_final_no_match(self):
+        engine = DownloadEngine()
+        engine._limit = engine_mod.AdaptiveLimit(4, minimum=1, maximum=4)
+        engine._attempt.transient = False
+        assert self._search(engine) is None
+        assert engine._limit.current == 4
+        assert engine._attempt.transient is False
+
+    def test_a_reported_throttle_backs_the_pool_off(self):
+        engine = DownloadEngine()
+        engine._limit = engine_mod.AdaptiveLimit(4, minimum=1, maximum=4)
+        engine._attempt.transient = False
+        assert self._search(engine, "ERROR: Sign in to confirm you're not a bot") is None
+        assert engine._limit.current < 4
+        assert engine._attempt.transient is True
+
+    def test_throttled_prefetch_search_goes_to_the_retry_lane(self, tmp_path):
+        """A look-ahead search YouTube throttled isn't cached as "no match":
+        the worker searches again, sees the throttle, and retries later."""
+        engine = DownloadEngine(concurrency=1, concurrency_max=1)
+        engine.RETRY_DELAYS_S = (0.01,)
+        engine.PREFETCH_AHEAD = 8
+        searchers = []
+
+        def throttled(*_a, **_kw):
+            searchers.append(threading.current_thread().name)
+            engine._throttled()
+            return None
+
+        engine._select_youtube_match = throttled
+        take = engine_mod._SearchPrefetcher.take
+
+        def settled_take(prefetcher, track):
+            prefetcher._pool.shutdown(wait=True)  # every look-ahead search has run
+            return take(prefetcher, track)
+
+        lanes = []
+        engine.events.subscribe("lanes", lanes.append)
+        with (
+            patch("sunnify_engine.get_ffmpeg_path", return_value="/usr/bin/ffmpeg"),
+            patch.object(engine_mod._SearchPrefetcher, "take", settled_take),
+        ):
+            self._run(engine, tmp_path, 2)
+        assert all(name.startswith("sunnify-prefetch") for name in searchers[:2])
+        first = next(e["requeued"] for e in lanes if "requeued" in e)
+        assert first["lane"] == "retry"
+        assert engine.requeued.get("retry") == 2
+
+    def test_widened_only_search_holds_the_simplified_query_back(self, tmp_path):
+        engine = DownloadEngine()
+        searched = []
+        engine._select_youtube_match = lambda query, *_a, **_kw: searched.append(query)
+        query = "ytsearch1:Song (Remastered 2011) Artist audio"
+        with patch("sunnify_engine.get_ffmpeg_path", return_value="/usr/bin/ffmpeg"):
+            with pytest.raises(RetryableTrackError) as held:
+                engine.download_track_audio(query, str(tmp_path / "a.mp3"), queries="widened")
+            assert (held.value.transient, held.value.fallback) == (False, True)
+            assert searched == [engine._widen_search(query)]
+            with pytest.raises(RuntimeError) as final:
+                engine.download_track_audio(query, str(tmp_path / "a.mp3"), queries="simplified")
+        assert not isinstance(final.value, RetryableTrackError)
+        assert searched[1] == engine._simplify_search(query)
+
+
+class TestTiming:
+    def test_each_attempt_reports_its_stages_and_the_run_sums_them(self, tmp_path):
+        engine = DownloadEngine(embed_tags=False)
+        engine.RETRY_DELAYS_S = (0.01,)
+        engine.PREFETCH_AHEAD = 0
+        engine._check_landed = lambda *_a: None
+        tries = []
+
+        def download(_q, dest, **_kw):
+            tries.append(dest)
+            with engine._span("search"):
+                pass
+            with engine._span("download"):
+                engine._count_bytes("download", 4096)
+                engine._timing.track.add("ffmpeg", 5)
+            if len(tries) == 1:
+                raise RetryableTrackError("HTTP Error 429", transient=True, fallback=False)
+            landed = os.path.splitext(dest)[0] + ".partial.mp3"
+            with open(landed, "wb") as fh:
+                fh.write(b"audio")
+            return landed
+
+        engine.download_track_audio = download
+        timings = []
+        engine.events.subscribe("track_timing", timings.append)
+        engine.download_tracks([(_track(1), str(tmp_path), 1, None)])
+        assert [t["outcome"] for t in timings] == ["requeued", "landed"]
+        stages = timings[-1]["stages"]
+        assert stages["download"]["bytes"] == 4096
+        assert stages["ffmpeg"] == {"ms": 5, "count": 1}
+        assert timings[-1]["id"] == "t1"
+        summary = engine.timing_stats
+        assert list(summary) == ["search", "download", "ffmpeg"]
+        assert summary["download"]["count"] == 2
+        assert summary["download"]["bytes"] == 8192
+        assert summary["ffmpeg"]["p95_ms"] == 5
+
+
+class TestQtAdapter:
+    def test_music_scraper_relays_engine_events_as_signals(self):
+        from Spotify_Downloader import MusicScraper
+
+        scraper = MusicScraper(audio_format="flac")
+        assert isinstance(scraper, engine_mod.DownloadEngine)
+        assert scraper.audio_format == "flac"
+        scraper.song_Album = MagicMock()
+        scraper.add_song_meta = MagicMock()
+        scraper._emit("album", "Queue")
+        scraper._emit("track_ready", {"file": "x.mp3"})
+        scraper.song_Album.emit.assert_called_once_with("Queue")
+        scraper.add_song_meta.emit.assert_called_once_with({"file": "x.mp3"})
@@ -0,0 +1,160 @@
+"""Tests for the preview-clip chroma fingerprints and the engine's
+verify_audio stage. Signals are synthesized chord progressions, so nothing
+here needs ffmpeg or the network; the fingerprint tests need numpy."""
+
+from __future__ import annotations
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sunnify_fingerprint as fingerprint
+from sunnify_engine import DownloadEngine
+
+np = pytest.importorskip("numpy")
+
+SR = fingerprint.SAMPLE_RATE
+
+
+def _song(seed: int, seconds: int = 120):
+    """A chord every half second: three random pitch classes plus octaves."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(SR // 2) / SR
+    chords = []
+    for notes in rng.integers(0, 12, size=(seconds * 2, 3)):
+        freqs = 261.63 * 2.0 ** (notes / 12)
+        chords.append(
+            sum(np.sin(2 * np.pi * f * t) + 0.5 * np.sin(4 * np.pi * f * t) for f in freqs)
+        )
+    audio = np.concatenate(chords)
+    return (audio / np.abs(audio).max() * 12000).astype(np.int16)
+
+
+@pytest.fixture(scope="module")
+def songs():
+    return _song(1), _song(2)
+
+
+class TestFingerprint:
+    def test_compact_int8_chroma(self, songs):
+        fp = fingerprint.chroma_fingerprint(songs[0][: 30 * SR])
+        assert fp.dtype == np.int8
+        assert fp.shape[1] == 12
+        assert fp.nbytes < 2500  # a 30 s preview
+
+    def test_preview_is_found_inside_its_own_track(self, songs):
+        track, other = songs
+        preview = track[40 * SR : 70 * SR]
+        noisy = preview + np.random.default_rng(0).normal(0, 1500, preview.size)
+        clip = fingerprint.chroma_fingerprint(noisy.astype(np.int16))
+        same, different = fingerprint.best_alignment(
+            clip,
+            [fingerprint.chroma_fingerprint(track), fingerprint.chroma_fingerprint(other)],
+        )
+        assert same >= fingerprint.MATCH_THRESHOLD
+        assert different < fingerprint.MATCH_THRESHOLD / 2
+
+    def test_alignment_survives_a_sub_hop_offset(self, songs):
+        track = songs[0]
+        clip = fingerprint.chroma_fingerprint(track[20 * SR + 1000 : 50 * SR + 1000])
+        assert fingerprint.similarity(clip, fingerprint.chroma_fingerprint(track)) >= 0.8
+
+    def test_silence_and_short_references_score_zero(self, songs):
+        clip = fingerprint.chroma_fingerprint(songs[0][: 30 * SR])
+        silent = fingerprint.chroma_fingerprint(np.zeros(30 * SR, dtype=np.int16))
+        assert not silent.any()
+        assert fingerprint.similarity(silent, clip) == 0.0
+        assert fingerprint.similarity(clip, clip[:10]) == 0.0
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = fingerprint.FingerprintCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c"), len(cache)) == (1, 3, 2)
+
+
+class TestVerifyStage:
+    """download_track_audio with a preview: ffmpeg decoding is replaced by a
+    lookup of synthesized PCM, everything else is the real stage."""
+
+    @pytest.fixture
+    def engine(self, songs, tmp_path, monkeypatch, silent_mp3):
+        track, other = songs
+        # the first query's video is the wrong song, the fallback's the right one
+        served = {
+            "https://www.youtube.com/watch?v=wrong": other,
+            "https://www.youtube.com/watch?v=right": track,
+        }
+        pcm_by_path = {}
+
+        class FakeYDL:
+            def __init__(self, params):
+                self.params = params
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *_exc):
+                return False
+
+            def extract_info(self, url, download=False):
+                target = self.params["outtmpl"]["default"].replace("%(ext)s", "mp3")
+                with open(target, "wb") as fh:
+                    fh.write(silent_mp3())
+                pcm_by_path[target] = served[url]
+
+        def decode(_ffmpeg, source=None, data=None):
+            return track[30 * SR : 60 * SR] if data is not None else pcm_by_path[source]
+
+        engine = DownloadEngine(verify_audio=True)
+        engine.session = MagicMock()
+        engine.session.get.return_value.content = b"preview-mp3"
+        engine._select_youtube_match = MagicMock(
+            side_effect=[
+                "https://www.youtube.com/watch?v=wrong",
+                "https://www.youtube.com/watch?v=right",
+            ]
+        )
+        monkeypatch.setattr(fingerprint, "PREVIEW_CACHE", fingerprint.FingerprintCache())
+        with (
+            patch("sunnify_engine.YoutubeDL", FakeYDL),
+            patch("sunnify_engine.get_ffmpeg_path", return_value=str(tmp_path)),
+            patch("sunnify_fingerprint.decode_pcm", side_effect=decode),
+        ):
+            yield engine
+
+    def test_mismatched_audio_is_dropped_for_the_next_query(self, engine, tmp_path):
+        dest = str(tmp_path / "Song (Live) - Artist.mp3")
+        path = engine.download_track_audio(
+            "ytsearch1:Song (Live) Artist audio", dest, preview=("t1", "https://p.scdn.co/x")
+        )
+        assert path == str(tmp_path / "Song (Live) - Artist.partial.mp3")
+        assert engine._select_youtube_match.call_count == 2
+        # the preview was fetched once and is now cached for the track
+        assert engine.session.get.call_count == 1
+        assert fingerprint.PREVIEW_CACHE.get("t1") is not None
+
+    def test_all_mismatched_reports_the_preview(self, engine, tmp_path):
+        engine._select_youtube_match.side_effect = None
+        engine._select_youtube_match.return_value = "https://www.youtube.com/watch?v=wrong"
+        dest = str(tmp_path / "Song (Live) - Artist.mp3")
+        with pytest.raises(RuntimeError, match="did not match the Spotify preview") as err:
+            engine.download_track_audio(
+                "ytsearch1:Song (Live) Artist audio", dest, preview=("t1", "https://p.scdn.co/x")
+            )
+        assert os.listdir(tmp_path) == []
+        assert "matched the Spotify preview" in engine._get_user_friendly_error(err.value, "Song")
+
+    def test_unverifiable_download_is_kept(self, engine, tmp_path):
+        engine.session.get.side_effect = OSError("offline")
+        dest = str(tmp_path / "Song - Artist.mp3")
+        assert engine.download_track_audio(
+            "ytsearch1:Song Artist audio", dest, preview=("t2", "https://p.scdn.co/y")
+        ) == str(tmp_path / "Song - Artist.partial.mp3")
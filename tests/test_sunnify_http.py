@@ -0,0 +1,133 @@
+"""Tests for the shared HTTP scheduler: per-host budgets, INTERACTIVE
+requests jumping the queue, round-robin between traffic classes, and the
+keep-alive pool sized to the budgets."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sunnify_http
+from sunnify_http import BULK, INTERACTIVE, HttpScheduler
+
+COVER = "https://i.scdn.co/image/x"
+
+
+def _wait_queued(scheduler, name, n):
+    deadline = time.monotonic() + 5
+    while scheduler.stats()[name]["queued"] < n:
+        assert time.monotonic() < deadline, "waiter never queued"
+        time.sleep(0.001)
+
+
+def _served_order(scheduler, waiters):
+    """Hold the only slot, queue `waiters` (label, url, traffic, priority)
+    one at a time, release, and return the labels in the order served."""
+    served = []
+    threads = []
+    name, _ = scheduler.budget_for(waiters[0][1])
+    with scheduler.slot(waiters[0][1]):
+        for n, (label, url, traffic, priority) in enumerate(waiters, start=1):
+
+            def _take(label=label, url=url, traffic=traffic, priority=priority):
+                with scheduler.slot(url, traffic, priority):
+                    served.append(label)
+
+            thread = threading.Thread(target=_take)
+            thread.start()
+            threads.append(thread)
+            _wait_queued(scheduler, name, n)
+    for thread in threads:
+        thread.join(5)
+    return served
+
+
+class TestBudgets:
+    def test_rules_cover_subdomains_and_unlisted_hosts_get_the_default(self):
+        scheduler = HttpScheduler(host_limits={"googlevideo.com": 3}, default_limit=2)
+        assert scheduler.budget_for("https://rr1---sn-abc.googlevideo.com/v") == (
+            "googlevideo.com",
+            3,
+        )
+        assert scheduler.budget_for("https://Example.org/a") == ("example.org", 2)
+
+    def test_in_flight_requests_never_exceed_the_host_limit(self):
+        scheduler = HttpScheduler(host_limits={"i.scdn.co": 2})
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def fetch():
+            nonlocal running, peak
+            with scheduler.slot(COVER, "cover"):
+                with lock:
+                    running += 1
+                    peak = max(peak, running)
+                time.sleep(0.01)
+                with lock:
+                    running -= 1
+
+        threads = [threading.Thread(target=fetch) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert peak == 2
+        assert scheduler.stats()["i.scdn.co"] == {"limit": 2, "active": 0, "queued": 0, "peak": 2}
+
+    def test_hosts_do_not_share_a_budget(self):
+        scheduler = HttpScheduler(host_limits={"i.scdn.co": 1, "open.spotify.com": 1})
+        with scheduler.slot(COVER), scheduler.slot("https://open.spotify.com/embed/x"):
+            assert scheduler.stats()["i.scdn.co"]["active"] == 1
+
+
+class TestQueueing:
+    def test_interactive_jumps_ahead_of_bulk(self):
+        scheduler = HttpScheduler(host_limits={"i.scdn.co": 1})
+        served = _served_order(
+            scheduler,
+            [
+                ("bulk-1", COVER, "cover", BULK),
+                ("bulk-2", COVER, "cover", BULK),
+                ("thumbnail", COVER, "thumbnail", INTERACTIVE),
+            ],
+        )
+        assert served == ["thumbnail", "bulk-1", "bulk-2"]
+
+    def test_traffic_classes_take_turns(self):
+        scheduler = HttpScheduler(host_limits={"open.spotify.com": 1})
+        url = "https://open.spotify.com/embed/track/x"
+        served = _served_order(
+            scheduler,
+            [
+                ("cover-1", url, "cover", BULK),
+                ("cover-2", url, "cover", BULK),
+                ("cover-3", url, "cover", BULK),
+                ("meta-1", url, "metadata", BULK),
+            ],
+        )
+        assert served == ["cover-1", "meta-1", "cover-2", "cover-3"]
+
+
+class TestSession:
+    def test_keep_alive_pool_fits_the_largest_budget(self):
+        scheduler = HttpScheduler(host_limits={"a.example": 12}, default_limit=6)
+        adapter = scheduler.session.get_adapter("https://a.example/")
+        assert adapter._pool_maxsize == 12
+
+    def test_get_holds_a_slot_around_the_request(self):
+        scheduler = HttpScheduler(host_limits={"i.scdn.co": 1})
+        seen = []
+        scheduler.session.get = lambda url, **kw: seen.append(
+            (url, kw, scheduler.stats()["i.scdn.co"]["active"])
+        )
+        scheduler.get(COVER, traffic="cover", timeout=15)
+        assert seen == [(COVER, {"timeout": 15}, 1)]
+        assert scheduler.stats()["i.scdn.co"]["active"] == 0
+
+    def test_shared_is_one_instance(self):
+        assert sunnify_http.shared() is sunnify_http.shared()
@@ -0,0 +1,129 @@
+"""Tests for the OpenMetrics exporter: the text each metric kind renders,
+label checking, the standalone /metrics server, and what spotifydown_api
+counts per request."""
+
+from __future__ import annotations
+
+import http.client
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sunnify_metrics
+from spotifydown_api import SpotifyEmbedAPI, _endpoint_label
+from sunnify_metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestRender:
+    def test_counters_and_gauges(self):
+        registry = Registry()
+        hits = Counter("t_lookups", "Lookups", ("cache", "result"), registry)
+        busy = Gauge("t_busy", "Busy workers", ("pool",), registry)
+        hits.inc(cache="album", result="hit")
+        hits.inc(2, cache="album", result="miss")
+        busy.inc(pool="download")
+        busy.inc(pool="download")
+        busy.dec(pool="download")
+        assert registry.render() == (
+            "# TYPE t_lookups counter\n"
+            "# HELP t_lookups Lookups\n"
+            't_lookups_total{cache="album",result="hit"} 1\n'
+            't_lookups_total{cache="album",result="miss"} 2\n'
+            "# TYPE t_busy gauge\n"
+            "# HELP t_busy Busy workers\n"
+            't_busy{pool="download"} 1\n'
+            "# EOF\n"
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = Histogram("t_seconds", "Latency", ("route",), registry, buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 3.0):
+            latency.observe(seconds, route="/api/health")
+        lines = registry.render().splitlines()
+        assert lines[2:7] == [
+            't_seconds_bucket{route="/api/health",le="0.1"} 1',
+            't_seconds_bucket{route="/api/health",le="1"} 2',
+            't_seconds_bucket{route="/api/health",le="+Inf"} 3',
+            't_seconds_count{route="/api/health"} 3',
+            't_seconds_sum{route="/api/health"} 3.55',
+        ]
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        errors = Counter("t_errors", "Errors", ("reason",), registry)
+        errors.inc(reason='bad "quote"\n')
+        assert 't_errors_total{reason="bad \\"quote\\"\\n"} 1' in registry.render()
+
+    def test_labels_must_match_the_declaration(self):
+        counter = Counter("t_x", "X", ("pool",), Registry())
+        with pytest.raises(ValueError):
+            counter.inc(lane="fresh")
+        with pytest.raises(ValueError):
+            counter.inc(-1, pool="download")
+
+    def test_names_register_once(self):
+        registry = Registry()
+        Counter("t_dup", "Dup", registry=registry)
+        with pytest.raises(ValueError):
+            Gauge("t_dup", "Dup", registry=registry)
+
+
+class TestServe:
+    def test_serves_metrics_and_nothing_else(self):
+        registry = Registry()
+        Counter("t_served", "Served", registry=registry).inc()
+        server = sunnify_metrics.serve(0, registry=registry)
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+            conn.request("GET", "/metrics")
+            resp = conn.getresponse()
+            assert resp.status == 200
+            assert resp.getheader("Content-Type") == sunnify_metrics.CONTENT_TYPE
+            assert "t_served_total 1" in resp.read().decode("utf-8")
+            conn.request("GET", "/jobs")
+            assert conn.getresponse().status == 404
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestSpotifyRequests:
+    @pytest.mark.parametrize(
+        "url, label",
+        [
+            ("https://open.spotify.com/embed/playlist/37i9dQZF1DX0XUsuxWHRQd", "embed_playlist"),
+            ("https://open.spotify.com/embed/album/4aawyAB9vmqN3uQ7FjRGTy", "embed_album"),
+            ("https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC", "track"),
+            ("https://open.spotify.com/oembed?url=x", "oembed"),
+            ("https://spclient.wg.spotify.com/playlist/v2/playlist/abc", "spclient"),
+        ],
+    )
+    def test_endpoint_labels_drop_the_id(self, url, label):
+        assert _endpoint_label(url) == label
+
+    def test_requests_are_counted_by_endpoint_and_status(self):
+        requests_total = sunnify_metrics.SPOTIFY_REQUESTS
+        before = requests_total.value(endpoint="track", status="404") or 0
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=404)
+        api = SpotifyEmbedAPI(session=session)
+        api._get("https://open.spotify.com/track/abc")
+        assert requests_total.value(endpoint="track", status="404") == before + 1
+
+    def test_album_cache_hits_are_counted(self):
+        lookups = sunnify_metrics.CACHE_LOOKUPS
+        hits = lookups.value(cache="album", result="hit") or 0
+        misses = lookups.value(cache="album", result="miss") or 0
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, text="<html></html>")
+        api = SpotifyEmbedAPI(session=session)
+        api._fetch_track_album_from_page("cached")
+        api._fetch_track_album_from_page("cached")
+        assert lookups.value(cache="album", result="hit") == hits + 1
+        assert lookups.value(cache="album", result="miss") == misses + 1
@@ -0,0 +1,75 @@
+"""Tests for the `--profile` sampling profiler: every thread is sampled, and
+the samples come out as a loadable pstats file and collapsed stacks."""
+
+from __future__ import annotations
+
+import os
+import pstats
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sunnify_profile import Profiler
+
+
+def _busy_leaf(started: threading.Event, stop: threading.Event) -> None:
+    started.set()
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+def _busy_worker(started: threading.Event, stop: threading.Event) -> None:
+    _busy_leaf(started, stop)
+
+
+def _profile_worker() -> Profiler:
+    """Sample a worker thread parked in _busy_worker -> _busy_leaf."""
+    started, stop = threading.Event(), threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(started, stop), name="sunnify-worker-7")
+    worker.start()
+    started.wait(5)
+    profiler = Profiler()
+    try:
+        for _ in range(5):
+            profiler.sample()
+    finally:
+        stop.set()
+        worker.join()
+    return profiler
+
+
+class TestSampling:
+    def test_worker_threads_are_sampled(self):
+        profiler = _profile_worker()
+        assert profiler.samples == 5
+        stacks = [line for line in profiler.collapsed().splitlines() if "_busy_leaf" in line]
+        assert stacks
+        # the pool number is dropped, so a pool's workers share one root
+        frames = stacks[0].rsplit(" ", 1)[0].split(";")
+        assert frames[0] == "sunnify-worker"
+        names = [frame.split(" (")[0] for frame in frames]
+        assert names.index("_busy_worker") == names.index("_busy_leaf") - 1
+
+    def test_background_thread_skips_itself(self):
+        with Profiler(interval_s=0.001) as profiler:
+            time.sleep(0.05)
+        assert profiler.samples > 0
+        assert "sunnify-profiler" not in profiler.collapsed()
+
+
+class TestOutput:
+    def test_pstats_file_loads(self, tmp_path):
+        profiler = _profile_worker()
+        stats_path, collapsed_path = profiler.write(str(tmp_path), "download")
+        assert os.path.basename(stats_path).startswith("profile-")
+        assert collapsed_path.endswith("-download.collapsed")
+        stats = pstats.Stats(stats_path).stats
+        (leaf,) = [func for func in stats if func[2] == "_busy_leaf"]
+        (worker,) = [func for func in stats if func[2] == "_busy_worker"]
+        cc, nc, tt, ct, callers = stats[leaf]
+        assert nc >= 1 and ct >= tt > 0
+        assert worker in callers
+        # the worker only ever waits in its callee: no time of its own
+        assert stats[worker][2] == 0
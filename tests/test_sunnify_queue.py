@@ -0,0 +1,120 @@
+"""Tests for the shared job queue behind `sunnify queue` / `sunnify work`:
+publish dedup, leases that other workers can't take until they run out,
+renewal, the attempt limit, and handing back jobs that never started."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sunnify_queue import JobQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _queue(tmp_path, n=3, **kwargs):
+    clock = Clock()
+    queue = JobQueue(str(tmp_path / "jobs.db"), clock=clock, **kwargs)
+    queue.publish("Playlist", [{"id": f"t{i}", "title": f"T{i}", "number": i} for i in range(n)])
+    return queue, clock
+
+
+class TestPublish:
+    def test_a_track_is_queued_once_per_folder(self, tmp_path):
+        queue, _clock = _queue(tmp_path)
+        assert queue.publish("Playlist", [{"id": "t0"}, {"id": "t9"}]) == 1
+        assert queue.publish("Other", [{"id": "t0"}]) == 1
+        assert queue.counts() == {"queued": 5, "leased": 0, "done": 0, "failed": 0}
+
+    def test_jobs_carry_their_record_and_folder(self, tmp_path):
+        queue, _clock = _queue(tmp_path, n=1)
+        (job,) = queue.claim("a")
+        assert (job.folder, job.record, job.attempts) == (
+            "Playlist",
+            {"id": "t0", "title": "T0", "number": 0},
+            1,
+        )
+
+
+class TestLeases:
+    def test_a_leased_job_is_not_claimed_twice(self, tmp_path):
+        queue, _clock = _queue(tmp_path)
+        first = queue.claim("a", limit=2)
+        second = queue.claim("b", limit=2)
+        assert [j.record["id"] for j in first] == ["t0", "t1"]
+        assert [j.record["id"] for j in second] == ["t2"]
+        assert queue.claim("c") == []
+
+    def test_concurrent_claims_split_the_queue(self, tmp_path):
+        queue, _clock = _queue(tmp_path, n=40)
+        claimed = []
+
+        def _claim(name):
+            while jobs := queue.claim(name, limit=3):
+                claimed.extend(job.id for job in jobs)
+
+        threads = [threading.Thread(target=_claim, args=(f"w{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        assert sorted(claimed) == sorted(set(claimed))
+        assert len(claimed) == 40
+
+    def test_an_expired_lease_goes_to_the_next_worker(self, tmp_path):
+        queue, clock = _queue(tmp_path, n=1)
+        (job,) = queue.claim("a", lease_s=60)
+        assert queue.next_expiry_s() == 60
+        clock.now += 61
+        (again,) = queue.claim("b", lease_s=60)
+        assert (again.id, again.attempts) == (job.id, 2)
+        # the first worker lost it: its late result doesn't count
+        assert queue.finish(job.id, "a") is None
+        assert queue.renew("a", [job.id]) == 0
+        assert queue.finish(job.id, "b") == "done"
+
+    def test_renewal_keeps_a_slow_job(self, tmp_path):
+        queue, clock = _queue(tmp_path, n=1)
+        (job,) = queue.claim("a", lease_s=60)
+        clock.now += 50
+        assert queue.renew("a", [job.id], lease_s=60) == 1
+        clock.now += 50
+        assert queue.claim("b") == []
+
+    def test_nothing_leased_means_no_expiry(self, tmp_path):
+        queue, _clock = _queue(tmp_path, n=1)
+        assert queue.next_expiry_s() is None
+
+
+class TestFinish:
+    def test_failures_retry_until_attempts_run_out(self, tmp_path):
+        queue, _clock = _queue(tmp_path, n=1, max_attempts=2)
+        (job,) = queue.claim("a")
+        assert queue.finish(job.id, "a", "no match") == "queued"
+        (job,) = queue.claim("b")
+        assert queue.finish(job.id, "b", "no match") == "failed"
+        assert queue.claim("c") == []
+        assert queue.counts()["failed"] == 1
+
+    def test_a_job_that_keeps_losing_its_lease_fails(self, tmp_path):
+        queue, clock = _queue(tmp_path, n=1, max_attempts=1)
+        queue.claim("a", lease_s=10)
+        clock.now += 11
+        assert queue.claim("b") == []
+        assert queue.counts()["failed"] == 1
+
+    def test_release_hands_a_job_back_without_using_an_attempt(self, tmp_path):
+        queue, _clock = _queue(tmp_path, n=1)
+        (job,) = queue.claim("a")
+        queue.release(job.id, "a")
+        (again,) = queue.claim("b")
+        assert again.attempts == 1
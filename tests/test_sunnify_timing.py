@@ -0,0 +1,68 @@
+"""Tests for per-track stage timings: nested spans counting only their own
+time, byte counts, and the run's per-stage percentiles."""
+
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sunnify_timing import StageStats, TrackTiming, percentile
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTrackTiming:
+    def test_nested_time_is_not_counted_twice(self):
+        clock = Clock()
+        timing = TrackTiming(clock)
+        with timing.span("download"):
+            clock.now += 2.0
+            with timing.span("verify"):
+                clock.now += 0.5
+            timing.add("ffmpeg", 1000)  # measured by a hook, not this clock
+            timing.add_bytes("download", 3_000_000)
+        clock.now += 0.25
+        assert timing.snapshot() == {
+            "outcome": "failed",
+            "total_ms": 2750,
+            "stages": {
+                "download": {"ms": 1000, "count": 1, "bytes": 3_000_000},
+                "verify": {"ms": 500, "count": 1},
+                "ffmpeg": {"ms": 1000, "count": 1},
+            },
+        }
+
+    def test_repeated_stages_accumulate(self):
+        clock = Clock()
+        timing = TrackTiming(clock)
+        for seconds in (1.0, 3.0):
+            with timing.span("search"):
+                clock.now += seconds
+        assert timing.snapshot()["stages"]["search"] == {"ms": 4000, "count": 2}
+
+
+class TestStageStats:
+    def test_nearest_rank_percentiles(self):
+        values = list(range(1, 101))
+        assert (percentile(values, 50), percentile(values, 95)) == (50, 95)
+        assert percentile([7], 95) == 7
+
+    def test_summary_follows_the_stage_order(self):
+        stats = StageStats()
+        for ms in (100, 200, 900):
+            stats.add_track(
+                {"stages": {"tag": {"ms": 10, "count": 1}, "search": {"ms": ms, "count": 1}}}
+            )
+        stats.add("enumerate", 1500)
+        stats.add_track({"stages": {"download": {"ms": 0, "count": 0, "bytes": 5}}})
+        summary = stats.summary()
+        assert list(summary) == ["enumerate", "search", "tag"]
+        assert summary["search"] == {"count": 3, "p50_ms": 200, "p95_ms": 900, "total_ms": 1200}
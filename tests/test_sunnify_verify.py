@@ -0,0 +1,153 @@
+"""Tests for `sunnify verify`'s scanner: per-file checks against the
+manifest's Spotify duration, tag/cover detection on files the engine
+tagged, the mtime/size result cache, the process-pool path, and the
+manifest join `sunnify repair` queues from."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from mutagen.id3 import ID3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sunnify_verify as verify
+from sunnify_core import MANIFEST_FILENAME
+from sunnify_engine import write_tags
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(64)
+
+
+def _manifest(folder, **durations_ms):
+    with open(folder / MANIFEST_FILENAME, "w", encoding="utf-8") as fh:
+        for name, ms in durations_ms.items():
+            fh.write(json.dumps({"id": name, "file": f"{name}.mp3", "duration_ms": ms}) + "\n")
+
+
+def _scan(root, **kwargs):
+    seen = {}
+    summary = verify.scan(
+        str(root),
+        lambda rel, _expected, result, cached: seen.__setitem__(rel, (result, cached)),
+        **kwargs,
+    )
+    return summary, seen
+
+
+class TestCheckFile:
+    def test_tagged_full_length_file_is_ok(self, tmp_path, silent_mp3):
+        song = tmp_path / "a.mp3"
+        song.write_bytes(silent_mp3(200))
+        ID3().save(str(song))  # ffmpeg's mp3 output starts with an ID3 header
+        write_tags({"title": "A", "artists": "B"}, str(song), cover_bytes=JPEG)
+        result = verify.check_file(str(song), 200)
+        assert result == {"duration_s": pytest.approx(200, abs=1), "problems": []}
+
+    def test_missing_tags_and_cover_are_reported(self, tmp_path, silent_mp3):
+        song = tmp_path / "a.mp3"
+        song.write_bytes(silent_mp3(30))
+        assert verify.check_file(str(song))["problems"] == ["no_tags", "no_cover"]
+
+    @pytest.mark.parametrize(
+        ("seconds", "expected", "problem"),
+        [(60, 200, "truncated"), (300, 200, "duration_mismatch")],
+    )
+    def test_length_is_checked_against_the_spotify_duration(
+        self, tmp_path, silent_mp3, seconds, expected, problem
+    ):
+        song = tmp_path / "a.mp3"
+        song.write_bytes(silent_mp3(seconds))
+        assert verify.check_file(str(song), expected)["problems"][0] == problem
+
+    @pytest.mark.parametrize(
+        ("name", "data", "problem"),
+        [
+            ("a.mp3", b"", "empty"),
+            ("a.mp3", b"not audio at all", "unreadable"),
+            ("a.partial.mp3", b"x", "partial"),
+        ],
+    )
+    def test_broken_files(self, tmp_path, name, data, problem):
+        (tmp_path / name).write_bytes(data)
+        assert verify.check_file(str(tmp_path / name))["problems"] == [problem]
+
+
+class TestScan:
+    def test_library_walk_uses_each_folders_manifest(self, tmp_path, silent_mp3):
+        playlist = tmp_path / "Playlist"
+        playlist.mkdir()
+        (playlist / "cut.mp3").write_bytes(silent_mp3(60))
+        (tmp_path / "single.mp3").write_bytes(silent_mp3(60))
+        (tmp_path / "notes.txt").write_text("x")
+        _manifest(playlist, cut=200_000)
+        summary, seen = _scan(tmp_path)
+        assert sorted(seen) == [os.path.join("Playlist", "cut.mp3"), "single.mp3"]
+        assert "truncated" in seen[os.path.join("Playlist", "cut.mp3")][0]["problems"]
+        assert "truncated" not in seen["single.mp3"][0]["problems"]
+        assert summary["by_problem"]["truncated"] == 1
+
+    def test_unchanged_files_are_not_reopened(self, tmp_path, silent_mp3):
+        (tmp_path / "a.mp3").write_bytes(silent_mp3(10))
+        (tmp_path / "b.mp3").write_bytes(silent_mp3(10))
+        first, _ = _scan(tmp_path)
+        assert first["cached"] == 0
+        (tmp_path / "b.mp3").write_bytes(b"")  # changed since the last scan
+        with patch("sunnify_verify.check_file", wraps=verify.check_file) as check:
+            second, seen = _scan(tmp_path)
+        assert [c.args[0] for c in check.call_args_list] == [str(tmp_path / "b.mp3")]
+        assert second["cached"] == 1
+        assert seen["a.mp3"][1] is True
+        assert seen["b.mp3"][0]["problems"] == ["empty"]
+
+    def test_a_new_manifest_duration_invalidates_the_cached_result(self, tmp_path, silent_mp3):
+        (tmp_path / "a.mp3").write_bytes(silent_mp3(60))
+        _scan(tmp_path)
+        _manifest(tmp_path, a=200_000)
+        summary, seen = _scan(tmp_path)
+        assert summary["cached"] == 0
+        assert "truncated" in seen["a.mp3"][0]["problems"]
+
+    def test_deleted_files_drop_out_of_the_cache(self, tmp_path, silent_mp3):
+        (tmp_path / "a.mp3").write_bytes(silent_mp3(5))
+        _scan(tmp_path)
+        os.remove(tmp_path / "a.mp3")
+        _scan(tmp_path)
+        assert verify.VerifyCache(str(tmp_path)).entries == {}
+
+    def test_process_pool_results_match_inline(self, tmp_path, silent_mp3, monkeypatch):
+        for n in range(6):
+            (tmp_path / f"{n}.mp3").write_bytes(silent_mp3(5) if n % 2 else b"")
+        inline, inline_seen = _scan(tmp_path, workers=1, use_cache=False)
+        monkeypatch.setattr(verify, "_INLINE_MAX", 0)
+        monkeypatch.setattr(verify, "_CHUNK", 2)
+        pooled, pooled_seen = _scan(tmp_path, workers=2, use_cache=False)
+        assert pooled == inline
+        assert pooled_seen == inline_seen
+
+
+class TestFindBroken:
+    def test_latest_record_per_track_decides(self, tmp_path, silent_mp3):
+        (tmp_path / "a.mp3").write_bytes(silent_mp3(200))
+        (tmp_path / "b.mp3").write_bytes(silent_mp3(200))  # untagged: not worth a download
+        (tmp_path / "a-old.mp3").write_bytes(b"")  # superseded by a later record
+        with open(tmp_path / MANIFEST_FILENAME, "w", encoding="utf-8") as fh:
+            for record in (
+                {"id": "a", "file": "a-old.mp3"},
+                {"id": "a", "file": "a.mp3", "duration_ms": 200_000},
+                {"id": "b", "file": "b.mp3", "duration_ms": 200_000},
+                {"id": "c", "file": "c.mp3"},
+                {"id": "d", "file": "d.mp3", "duration_ms": 400_000},
+            ):
+                fh.write(json.dumps(record) + "\n")
+        (tmp_path / "d.mp3").write_bytes(silent_mp3(200))
+        checked, broken = verify.find_broken(str(tmp_path), workers=1)
+        assert checked == 4
+        assert [(b["record"]["id"], b["problems"]) for b in broken] == [
+            ("c", ["missing"]),
+            ("d", ["truncated"]),
+        ]
+        assert broken[0]["folder"] == str(tmp_path)
@@ -9,11 +9,13 @@ For actual MP3 downloads, use the desktop app.
 from __future__ import annotations
 
 import gc
+import json
 import os
 import sys
+import time
 from pathlib import Path
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 
 # Add parent directory to path for spotifydown_api import
@@ -21,20 +23,47 @@ ROOT = Path(__file__).resolve().parent.parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+import sunnify_metrics  # noqa: E402
 from spotifydown_api import (  # noqa: E402
     PlaylistClient,
     SpotifyDownAPIError,
     SpotifyEmbedAPI,
+    TrackTable,
     detect_spotify_url_type,
+    resolve_many,
 )
 
 app = Flask(__name__)
 CORS(app)
 
+# Cap on urls per /api/scrape-batch request; keeps one request from pinning the
+# free-tier worker for minutes.
+MAX_BATCH_URLS = 50
+
 # Reusable client (saves memory on repeated requests)
 _playlist_client: PlaylistClient | None = None
 
 
+@app.before_request
+def _start_timer():
+    g.request_started = time.monotonic()
+
+
+@app.after_request
+def _record_latency(response):
+    """Observe the request's latency under its route pattern (not the raw
+    path). A streamed response is timed to its first byte."""
+    started = g.pop("request_started", None)
+    if started is not None:
+        sunnify_metrics.REQUEST_SECONDS.observe(
+            time.monotonic() - started,
+            route=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+
 def get_playlist_client() -> PlaylistClient:
     """Get or create a playlist client (singleton pattern for memory efficiency)."""
     global _playlist_client
@@ -43,6 +72,19 @@ def get_playlist_client() -> PlaylistClient:
     return _playlist_client
 
 
+def _track_payload(track, fallback_cover: str = "") -> dict:
+    """Frontend track dict; falls back to the playlist cover when the track has none."""
+    return {
+        "id": track.spotify_id,
+        "title": track.title,
+        "artists": track.artists,
+        "album": track.album or "",
+        "cover": track.cover_url or fallback_cover,
+        "releaseDate": track.release_date or "",
+        "downloadLink": "",  # No server-side downloads
+    }
+
+
 @app.route("/api/scrape-playlist", methods=["POST"])
 def scrape_playlist():
     """Fetch Spotify playlist/track metadata (no downloads).
@@ -75,23 +117,15 @@ def scrape_playlist():
             )
 
         client = get_playlist_client()
-        tracks: list[dict] = []
+        # columnar: a 2,000-track playlist waits here while the rest is fetched
+        tracks = TrackTable()
+        playlist_cover = ""
 
         if url_type == "track":
             # Single track
             api = SpotifyEmbedAPI()
             track = api.get_track(item_id)
-            tracks.append(
-                {
-                    "id": track.spotify_id,
-                    "title": track.title,
-                    "artists": track.artists,
-                    "album": track.album or "",
-                    "cover": track.cover_url or "",
-                    "releaseDate": track.release_date or "",
-                    "downloadLink": "",  # No server-side downloads
-                }
-            )
+            tracks.append(track)
             playlist_name = f"{track.title} - {track.artists}"
 
         else:
@@ -102,19 +136,7 @@ def scrape_playlist():
 
             # Fetch tracks with memory-efficient iteration
             for track in client.iter_playlist_tracks(item_id, content_type=url_type):
-                # Use track cover if available, otherwise fall back to playlist cover
-                cover = track.cover_url or playlist_cover
-                tracks.append(
-                    {
-                        "id": track.spotify_id,
-                        "title": track.title,
-                        "artists": track.artists,
-                        "album": track.album or "",
-                        "cover": cover,
-                        "releaseDate": track.release_date or "",
-                        "downloadLink": "",  # No server-side downloads
-                    }
-                )
+                tracks.append(track)
 
                 # Memory management for large playlists
                 if len(tracks) % 50 == 0:
@@ -123,15 +145,19 @@ def scrape_playlist():
         # Final cleanup
         gc.collect()
 
-        return jsonify(
-            {
-                "event": "complete",
-                "data": {
-                    "playlistName": playlist_name,
-                    "tracks": tracks,
-                },
-            }
-        )
+        # Everything is fetched, so nothing below can fail: stream the body
+        # from the table instead of building a dict per track and then the
+        # whole document as one string.
+        def generate():
+            name = json.dumps(playlist_name, ensure_ascii=False)
+            yield f'{{"event": "complete", "data": {{"playlistName": {name}, "tracks": ['
+            for n, track in enumerate(tracks):
+                # Use track cover if available, otherwise fall back to playlist cover
+                payload = json.dumps(_track_payload(track, playlist_cover), ensure_ascii=False)
+                yield payload if n == 0 else ", " + payload
+            yield "]}}"
+
+        return Response(generate(), mimetype="application/json")
 
     except ValueError:
         # bad/unsupported spotify url is client input error, not a server fault
@@ -145,12 +171,93 @@ def scrape_playlist():
         return jsonify({"event": "error", "data": {"message": "Internal server error"}}), 500
 
 
+@app.route("/api/scrape-batch", methods=["POST"])
+def scrape_batch():
+    """Fetch metadata for many Spotify urls in one request (no downloads).
+
+    All urls share the pooled client and are fetched concurrently; repeated
+    links are fetched once and track IDs are de-duplicated across the batch.
+    The response streams as NDJSON, one line per url in input order, so the
+    frontend can render the first playlist while later ones are still loading.
+
+    Request body:
+        {"urls": ["https://open.spotify.com/playlist/...", ...]}
+
+    Response (application/x-ndjson):
+        {"event": "result", "data": {"index": 0, "url": "...", "playlistName": "...",
+                                     "tracks": [...], "duplicates": [...]}}
+        {"event": "error", "data": {"index": 1, "url": "...", "message": "..."}}
+        {"event": "complete", "data": {"urls": 2, "resolved": 1, "failed": 1}}
+    """
+    data = request.get_json(silent=True) or {}
+    urls = data.get("urls")
+    if not isinstance(urls, list) or not urls:
+        return jsonify({"event": "error", "data": {"message": "No URLs provided"}}), 400
+    if not all(isinstance(u, str) for u in urls):
+        return jsonify({"event": "error", "data": {"message": "URLs must be strings"}}), 400
+    if len(urls) > MAX_BATCH_URLS:
+        return (
+            jsonify(
+                {
+                    "event": "error",
+                    "data": {"message": f"Too many URLs (max {MAX_BATCH_URLS})"},
+                }
+            ),
+            400,
+        )
+    urls = [u.strip() for u in urls]
+
+    def generate():
+        resolved = failed = 0
+        for item in resolve_many(urls, client=get_playlist_client()):
+            if item.error is not None:
+                failed += 1
+                # detail is logged by resolve_many; keep internals off the wire
+                message = "Invalid Spotify URL" if item.type == "unknown" else "Spotify API error"
+                line = {
+                    "event": "error",
+                    "data": {"index": item.index, "url": item.url, "message": message},
+                }
+            else:
+                resolved += 1
+                if item.playlist is not None:
+                    name = f"{item.playlist.name} - {item.playlist.owner or 'Unknown'}"
+                    cover = item.playlist.cover_url or ""
+                elif item.tracks:
+                    name = f"{item.tracks[0].title} - {item.tracks[0].artists}"
+                    cover = ""
+                else:
+                    name, cover = "", ""
+                line = {
+                    "event": "result",
+                    "data": {
+                        "index": item.index,
+                        "url": item.url,
+                        "playlistName": name,
+                        "tracks": [_track_payload(t, cover) for t in item.tracks],
+                        "duplicates": item.duplicates,
+                    },
+                }
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+            gc.collect()
+        summary = {"urls": len(urls), "resolved": resolved, "failed": failed}
+        yield json.dumps({"event": "complete", "data": summary}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.route("/api/health")
 def health_check():
     """Health check endpoint for monitoring."""
     return jsonify({"status": "ok", "mode": "metadata-only"})
 
 
+@app.route("/metrics")
+def metrics():
+    """Prometheus/OpenMetrics scrape endpoint."""
+    return Response(sunnify_metrics.REGISTRY.render(), content_type=sunnify_metrics.CONTENT_TYPE)
+
+
 @app.route("/")
 def index():
     """Root endpoint with API info."""
@@ -162,7 +269,9 @@ def index():
             "description": "Fetches Spotify metadata. For MP3 downloads, use the desktop app.",
             "endpoints": {
                 "POST /api/scrape-playlist": "Fetch playlist/track metadata",
+                "POST /api/scrape-batch": "Fetch metadata for many urls (NDJSON stream)",
                 "GET /api/health": "Health check",
+                "GET /metrics": "Prometheus/OpenMetrics metrics",
             },
         }
     )